@@ -0,0 +1,161 @@
+# -----------------------------------------------------------------------------
+# bench_arena.py
+#
+# Trees built with dicts and lists, as the rule functions of the Design Lab
+# assignment do, compared with the same trees built in a yacc.Arena, for an
+# assembly program of 100,000 instructions.  Prints the parsing time, the
+# memory held by the tree, the objects the garbage collector has to look at
+# and the time they add to a full collection, and the time and size of
+# pickling the tree for another process.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import gc
+import time
+import pickle
+import tracemalloc
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+
+import ply.lex as lex
+import ply.yacc as yacc
+from bench_dense import ListLexer
+from bench_parallel import AsmLexer, make_program
+
+class DictParser(object):
+    tokens = AsmLexer.tokens
+    start = 'program'
+
+    def p_program(self, p):
+        'program : instructions'
+        p[0] = p[1]
+
+    def p_instructions(self, p):
+        '''instructions : instructions instruction
+                        | instruction'''
+        if len(p) == 3:
+            p[1].append(p[2])
+            p[0] = p[1]
+        else:
+            p[0] = [p[1]]
+
+    def p_instruction(self, p):
+        '''instruction : LABEL DOLLAR OPCODE operands
+                       | LABEL DOLLAR GOTO LABEL
+                       | condition'''
+        if len(p) == 5:
+            p[0] = {'label': p[1], 'opcode': p[3], 'operands': p[4]}
+        else:
+            p[0] = p[1]
+
+    def p_condition(self, p):
+        '''condition : LABEL DOLLAR IF comparison GOTO LABEL
+                     | LABEL DOLLAR IF comparison OPCODE operands'''
+        p[0] = {'label': p[1], 'opcode': p[3], 'comparison': p[4],
+                'operation': {'opcode': p[5], 'operands': p[6]}}
+
+    def p_comparison(self, p):
+        'comparison : operand COMPARISON operand'
+        p[0] = (p[1], p[2], p[3])
+
+    def p_operands(self, p):
+        '''operands : operands COMMA operand
+                    | operand'''
+        if len(p) == 4:
+            p[1].append(p[3])
+            p[0] = p[1]
+        else:
+            p[0] = [p[1]]
+
+    def p_operand(self, p):
+        '''operand : REG
+                   | NUMBER
+                   | STRING'''
+        p[0] = p[1]
+
+    def p_error(self, p):
+        pass
+
+# The same tree in an arena.  Lists of instructions and operands are kept
+# as Python lists of handles until the node they belong to is made.
+class ArenaParser(DictParser):
+    def __init__(self):
+        self.arena = yacc.Arena()
+
+    def p_program(self, p):
+        'program : instructions'
+        p[0] = self.arena.node('program', p[1])
+
+    def p_instruction(self, p):
+        '''instruction : LABEL DOLLAR OPCODE operands
+                       | LABEL DOLLAR GOTO LABEL
+                       | condition'''
+        if len(p) == 5:
+            node = self.arena.node
+            operands = p[4] if isinstance(p[4], list) else [node('label', value=p[4])]
+            p[0] = node('instruction', [node('label', value=p[1])] + operands, value=p[3])
+        else:
+            p[0] = p[1]
+
+    def p_condition(self, p):
+        '''condition : LABEL DOLLAR IF comparison GOTO LABEL
+                     | LABEL DOLLAR IF comparison OPCODE operands'''
+        node = self.arena.node
+        operands = p[6] if isinstance(p[6], list) else [node('label', value=p[6])]
+        operation = node('operation', operands, value=p[5])
+        p[0] = node('condition', (node('label', value=p[1]), p[4], operation), value=p[3])
+
+    def p_comparison(self, p):
+        'comparison : operand COMPARISON operand'
+        p[0] = self.arena.node('comparison', (p[1], p[3]), value=p[2])
+
+    def p_operand(self, p):
+        '''operand : REG
+                   | NUMBER
+                   | STRING'''
+        p[0] = self.arena.node('operand', value=p[1])
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+if __name__ == '__main__':
+    lexer = lex.lex(object=AsmLexer())
+    toks = lexer.tokenize_all(make_program(100000))
+    print('%d tokens' % len(toks))
+
+    for name, module in (('dicts', DictParser()), ('arena', ArenaParser())):
+        parser = yacc.yacc(module=module, debug=False, errorlog=yacc.NullLogger())
+
+        def parse():
+            if name == 'arena':
+                module.arena = yacc.Arena()
+                parser.parse('', lexer=ListLexer(toks))
+                return module.arena
+            return parser.parse('', lexer=ListLexer(toks))
+
+        elapsed = min(timed(parse)[1] for _ in range(3))
+
+        # The memory and objects of the tree, with it kept alive
+        collect = min(timed(gc.collect)[1] for _ in range(5))
+        objects = len(gc.get_objects())
+        tracemalloc.start()
+        tree = parse()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        objects = len(gc.get_objects()) - objects
+        collect = min(timed(gc.collect)[1] for _ in range(5)) - collect
+
+        data, dumps = timed(lambda: pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))
+        _, loads = timed(lambda: pickle.loads(data))
+        print('%-6s parse %7.1f ms  tree %6.1f MB  %7d objects for gc (+%5.1f ms a collection)  '
+              'pickle %5.1f MB, dumps %6.1f ms, loads %6.1f ms' %
+              (name, elapsed * 1000, memory / 2**20, objects, collect * 1000,
+               len(data) / 2**20, dumps * 1000, loads * 1000))
+        if name == 'arena':
+            _, elapsed = timed(lambda: tree.materialize(len(tree) - 1))
+            print('%-6s materialize() as tuples %7.1f ms' % ('', elapsed * 1000))
+        del tree
@@ -0,0 +1,106 @@
+# -----------------------------------------------------------------------------
+# bench_binary.py
+#
+# Lexing a log file three ways: decoding it to a str for a normal lexer,
+# reading it as bytes for a binary lexer, and scanning an mmap of it with a
+# binary lexer.  Each run is done in a child process.  The memory column is
+# the peak anonymous resident memory (RssAnon in /proc/self/status), sampled
+# as tokens are read.  Pages of an mmap are backed by the file, so they are
+# not counted.  Token values are not read, so the binary lexer never copies
+# them out of the input.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import time
+import mmap
+import random
+import tempfile
+import subprocess
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+
+import ply.lex as lex
+
+class LogLexer(object):
+    tokens = ('DATE', 'TIME', 'LEVEL', 'NUMBER', 'WORD', 'STRING')
+    literals = '='
+
+    t_ignore = ' '
+    t_DATE = r'\d{4}-\d\d-\d\d'
+    t_TIME = r'\d\d:\d\d:\d\d'
+    t_LEVEL = r'INFO|WARN|ERROR'
+    t_NUMBER = r'\d+'
+    t_WORD = r'[A-Za-z_/.]+'
+    t_STRING = r'"[^"\n]*"'
+
+    def t_newline(self, t):
+        r'\n+'
+        t.lexer.lineno += len(t.value)
+
+    def t_error(self, t):
+        raise ValueError('Bad log line %d' % t.lexer.lineno)
+
+def make_log(filename, size):
+    rand = random.Random(42)
+    users = ['alice', 'bob', 'carol', 'dave']
+    paths = ['/index.html', '/api/items', '/login', '/static/app.js']
+    with open(filename, 'w') as f:
+        written = 0
+        n = 0
+        while written < size:
+            line = '2026-10-%02d %02d:%02d:%02d %s user=%s bytes=%d "GET %s"\n' % (
+                n % 28 + 1, n % 24, n % 60, n % 60, rand.choice(['INFO', 'WARN', 'ERROR']),
+                rand.choice(users), rand.randrange(100000), rand.choice(paths))
+            f.write(line)
+            written += len(line)
+            n += 1
+
+def rss_anon():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('RssAnon:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+def run(mode, filename):
+    lexer = lex.lex(object=LogLexer(), binary=(mode != 'str'))
+    peak = rss_anon()
+    start = time.perf_counter()
+    with open(filename, 'rb') as f:
+        if mode == 'str':
+            lexer.input(f.read().decode('utf-8'))
+        elif mode == 'bytes':
+            lexer.input(f.read())
+        else:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            lexer.input(m)
+        n = 0
+        for tok in lexer:
+            n += 1
+            if not n % 100000:
+                peak = max(peak, rss_anon())
+    elapsed = time.perf_counter() - start
+    peak = max(peak, rss_anon())
+    print(n, elapsed, peak)
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3:
+        run(sys.argv[1], sys.argv[2])
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'app.log')
+        for size in (10, 50, 100):
+            make_log(filename, size * 1000000)
+            results = []
+            for mode in ('str', 'bytes', 'mmap'):
+                out = subprocess.run([sys.executable, __file__, mode, filename],
+                                     capture_output=True, text=True, check=True).stdout
+                n, elapsed, peak = out.split()
+                results.append('%s %6.2f s %7.1f MB' % (mode, float(elapsed), int(peak) / 1e6))
+            print('%4d MB %9s tokens   %s' % (size, n, '   '.join(results)))
@@ -0,0 +1,97 @@
+# -----------------------------------------------------------------------------
+# bench_dense.py
+#
+# Size of the parsing tables of the ANSI C parser as nested dicts and as
+# the dense arrays of yacc(dense=True), and the parsing speed with each.
+# Tokens are lexed ahead of time so that only the parser is timed.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import time
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+
+import ply.yacc as yacc
+from bench_relex import csource
+
+quiet = yacc.PlyLogger(io.StringIO())
+
+def best_of(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+# Total size of an object and everything it holds.  Objects shared with
+# the rest of the program (symbol names, small ints) are counted once.
+def deep_size(obj, seen=None):
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_size(v, seen) for v in obj)
+    return size
+
+class ListLexer:
+    def __init__(self, tokens):
+        self.tokens = tokens
+    def input(self, data):
+        self.next = iter(self.tokens).__next__
+    def token(self):
+        try:
+            return self.next()
+        except StopIteration:
+            return None
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import clex
+        import cparse
+
+    parser = yacc.yacc(module=cparse, errorlog=quiet)
+    dparser = yacc.yacc(module=cparse, errorlog=quiet, dense=True)
+    tables = dparser.tables
+
+    # The dense tables must give the same actions as the dicts
+    for state, row in parser.action.items():
+        for name in tables.terminals:
+            assert tables.action(state, name) == row.get(name)
+    for state, row in parser.goto.items():
+        for name in tables.nonterminals:
+            assert tables.goto(state, name) == row.get(name)
+
+    dicts = deep_size(parser.action, set()) + deep_size(parser.goto, set())
+    arrays = sum(sys.getsizeof(a) for a in (tables.action_base, tables.action_check, tables.action_value,
+                                            tables.goto_base, tables.goto_check, tables.goto_value,
+                                            tables.prod_lhs))
+    arrays += deep_size(tables.termids) + deep_size(tables.nontermids)
+    nactions = sum(len(row) for row in parser.action.values())
+    print('ansic tables: %d states, %d actions, %d gotos' %
+          (len(parser.action), nactions, sum(len(row) for row in parser.goto.values())))
+    print('  dict tables   %8d bytes' % dicts)
+    print('  dense tables  %8d bytes (%4.1fx smaller, %d action slots)' %
+          (arrays, dicts / arrays, len(tables.action_check)))
+
+    # The ANSI C lexer doesn't know about hex constants
+    clex.lexer.lineno = 1
+    toks = clex.lexer.tokenize_all(csource.replace('0x1f', '31') * 200)
+    lexer = ListLexer(toks)
+
+    d = best_of(lambda: parser.parse('', lexer=lexer))
+    a = best_of(lambda: dparser.parse('', lexer=lexer))
+    print('parse %d tokens:  dict %7.2f ms (%5.0f ns/token)   dense %7.2f ms (%5.0f ns/token)' %
+          (len(toks), d * 1000, d / len(toks) * 1e9, a * 1000, a / len(toks) * 1e9))
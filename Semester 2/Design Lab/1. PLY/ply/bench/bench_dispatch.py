@@ -0,0 +1,85 @@
+# -----------------------------------------------------------------------------
+# bench_dispatch.py
+#
+# Lexing speed with and without the first-character dispatch table on the
+# ANSI C and cpp lexers.  Both runs must produce the same tokens.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import time
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'cpp'))
+
+import ply.lex as lex
+
+def best_of(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def bench(name, lexer, data):
+    dispatch = lexer.lexstatedispatch
+
+    def run():
+        lexer.lineno = 1
+        lexer.begin('INITIAL')
+        return [(tok.type, tok.value, tok.lineno, tok.lexpos)
+                for tok in lexer.tokenize_all(data)]
+
+    lexer.lexstatedispatch = {}
+    without = run()
+    t_without = best_of(run)
+    lexer.lexstatedispatch = dispatch
+    with_dispatch = run()
+    t_with = best_of(run)
+    assert with_dispatch == without
+
+    print('%s: %d tokens, %d dispatch regexs' %
+          (name, len(without), len({id(v) for v in lexer.lexdispatch.values()})))
+    print('    %-20s %8.1f ms  %10.0f tokens/sec' % ('full master regex', t_without * 1000, len(without) / t_without))
+    print('    %-20s %8.1f ms  %10.0f tokens/sec  %5.2fx' %
+          ('dispatch table', t_with * 1000, len(without) / t_with, t_without / t_with))
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()):
+        import clex
+
+    csource = '''
+    static int count_words(const char *s, int n)
+    {
+        int i, words = 0;
+        for (i = 0; i < n; i++) {
+            if (s[i] == ' ' && s[i+1] != ' ')
+                words += 1;   /* count it */
+        }
+        return words * 2 + 0x1f - 3.5e2;
+    }
+    '''
+    bench('ansic', clex.lexer, csource * 2000)
+
+    import cpp
+    with contextlib.redirect_stderr(io.StringIO()):
+        cpplexer = lex.lex(module=cpp)
+    cppsource = '''
+#include <stdio.h>
+#define MAX(a, b) ((a) > (b) ? (a) : (b))
+/* Copy at most n characters */
+int copy(char *dst, const char *src, int n) {
+    int i;
+    for (i = 0; i < MAX(n, 0) && src[i] != '\\0'; i++)
+        dst[i] = src[i];   // copy one
+    return i + 0x10 - 1.5e3;
+}
+'''
+    bench('cpp', cpplexer, cppsource * 2000)
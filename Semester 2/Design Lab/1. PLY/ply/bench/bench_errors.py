@@ -0,0 +1,94 @@
+# -----------------------------------------------------------------------------
+# bench_errors.py
+#
+# Finding every syntax error of an assembly program (the grammar of the
+# Design Lab assignment, which has no error rules) with 10 and 100 bad
+# tokens.  collect_errors() finds them in one pass.  The fix-and-retry loop
+# of a batch validator stops at the first error, drops the bad token and
+# parses the program again from the start.  The bad tokens are copies of
+# other tokens put in at random places, so dropping the token at each error
+# fixes it.  Also prints the cost of parser.expected() in p_error() against
+# walking parser.action[state] by hand.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import random
+import copy
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+
+import ply.lex as lex
+import ply.yacc as yacc
+from bench_dense import ListLexer, best_of
+from bench_parallel import AsmLexer, make_program
+from bench_arena import DictParser
+
+quiet = yacc.PlyLogger(io.StringIO())
+
+class StopParse(Exception):
+    pass
+
+# Put count copies of tokens of the input in at random places
+def corrupt(toks, count):
+    rand = random.Random(7)
+    toks = list(toks)
+    for _ in range(count):
+        tok = copy.copy(rand.choice(toks))
+        toks.insert(rand.randrange(len(toks)), tok)
+    return toks
+
+# Parse up to the first error, drop the token and start again
+def fix_and_retry(parser, toks):
+    toks = list(toks)
+    found = []
+    while True:
+        try:
+            parser.parse('', lexer=ListLexer(toks))
+            return found
+        except StopParse as e:
+            tok = e.args[0]
+            found.append(tok)
+            if tok is None:
+                return found
+            del toks[next(n for n, t in enumerate(toks) if t is tok)]
+
+if __name__ == '__main__':
+    lexer = lex.lex(object=AsmLexer())
+    program = lexer.tokenize_all(make_program(2000))
+    print('%d tokens' % len(program))
+
+    module = DictParser()
+    parser = yacc.yacc(module=module, errorlog=quiet, debug=False)
+
+    def stop(tok):
+        raise StopParse(tok)
+
+    retry = yacc.yacc(module=module, errorlog=quiet, debug=False)
+    retry.errorfunc = stop
+
+    for count in (10, 100):
+        toks = corrupt(program, count)
+        errors = parser.collect_errors('', lexer=ListLexer(toks))[1]
+        found = fix_and_retry(retry, toks)
+        one = best_of(lambda: parser.collect_errors('', lexer=ListLexer(toks)), repeat=5)
+        again = best_of(lambda: fix_and_retry(retry, toks), repeat=1)
+        print('%3d bad tokens  collect_errors() %8.2f ms, %3d errors   fix and retry %8.2f ms, %3d parses  %6.1fx'
+              % (count, one * 1000, len(errors), again * 1000, len(found) + 1, again / one))
+
+    # The expected tokens at an error
+    state = parser.collect_errors('', lexer=ListLexer(corrupt(program, 1)))[1][0].state
+    action = parser.action
+
+    def by_hand():
+        for _ in range(10000):
+            sorted(name for name, t in action[state].items() if t is not None and name != 'error')
+
+    def expected():
+        for _ in range(10000):
+            parser.expected(state)
+
+    print('expected() %6.0f ns, walking parser.action by hand %6.0f ns'
+          % (best_of(expected) / 10000 * 1e9, best_of(by_hand) / 10000 * 1e9))
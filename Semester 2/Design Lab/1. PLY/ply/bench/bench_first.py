@@ -0,0 +1,99 @@
+# -----------------------------------------------------------------------------
+# bench_first.py
+#
+# Time taken by Grammar.compute_first() and compute_follow(), with the
+# nullable nonterminals, for the example grammars and for random grammars
+# with 2000 and 20000 rules.  Each grammar is timed three ways: with no
+# sets kept from earlier grammars, after building the same grammar, and
+# after building a grammar that has one more rule.
+#
+# A digest of the sets is printed for each grammar.  To compare with
+# another copy of PLY, give its source directory on the command line:
+#
+#     $ python bench_first.py /path/to/other/ply/src
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import hashlib
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+src = sys.argv[1] if len(sys.argv) > 1 else os.path.join(here, '..', 'src')
+sys.path.insert(0, src)
+for name in ('ansic', 'BASIC', 'GardenSnake', 'yply'):
+    sys.path.insert(0, os.path.join(here, '..', 'example', name))
+
+import ply.yacc as yacc
+from bench_lrtable import best_of, module_grammar, random_grammar, load_gardensnake
+
+# Copy a grammar's rules into a new Grammar, leaving out the first rule of
+# any nonterminal with more than one rule after skip rules.  Literal tokens
+# are quoted again.
+def copy_grammar(grammar, skip=None):
+    new = yacc.Grammar([t for t in grammar.Terminals if t != 'error'])
+    for p in grammar.Productions[1:]:
+        if skip is not None and p.number > skip and len(grammar.Prodnames[p.name]) > 1:
+            skip = None
+            continue
+        syms = [sym if sym.isidentifier() else repr(sym) for sym in p.prod]
+        new.add_production(p.name, syms, None, p.file, p.line)
+    new.set_start(grammar.Start)
+    return new
+
+def compute(grammar):
+    grammar.compute_first()
+    grammar.compute_follow()
+    if hasattr(grammar, 'compute_nullable'):
+        grammar.compute_nullable()
+    else:
+        lr = yacc.LRTable.__new__(yacc.LRTable)
+        lr.grammar = grammar
+        lr.compute_nullable_nonterminals()
+
+def forget():
+    if hasattr(yacc, '_grammar_sets'):
+        del yacc._grammar_sets[:]
+
+def digest(grammar):
+    h = hashlib.sha256()
+    for sets in (grammar.First, grammar.Follow):
+        h.update(repr(sorted((name, sorted(names)) for name, names in sets.items())).encode())
+    return h.hexdigest()[:12]
+
+def bench(name, make, repeat=5):
+    grammar = make()
+    half = len(grammar.Productions) // 2
+
+    # The time to compute the sets of a copy of the grammar, after those of
+    # earlier, if given, have been computed
+    def timed(earlier=None):
+        forget()
+        if earlier is not None:
+            compute(earlier)
+        new = copy_grammar(grammar)
+        return best_of(lambda: compute(new), repeat=1)
+
+    times = [min(timed() for _ in range(repeat)),
+             min(timed(copy_grammar(grammar)) for _ in range(repeat)),
+             min(timed(copy_grammar(grammar, skip=half)) for _ in range(repeat))]
+    forget()
+    compute(grammar)
+    print('%-16s %5d rules   no sets %9.2f ms   same grammar %9.2f ms   one more rule %9.2f ms   digest %s' %
+          (name, len(grammar.Productions) - 1, times[0] * 1000, times[1] * 1000, times[2] * 1000,
+           digest(grammar)))
+
+if __name__ == '__main__':
+    print('PLY source:', os.path.abspath(src))
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import cparse
+        import basparse
+        import yparse
+        GardenSnake = load_gardensnake()
+    bench('ansic', module_grammar(cparse))
+    bench('BASIC', module_grammar(basparse))
+    bench('yply', module_grammar(yparse))
+    bench('GardenSnake', module_grammar(GardenSnake))
+    bench('random 2000', random_grammar(2000))
+    bench('random 20000', random_grammar(20000), repeat=1)
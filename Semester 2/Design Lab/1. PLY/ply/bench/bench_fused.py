@@ -0,0 +1,83 @@
+# -----------------------------------------------------------------------------
+# bench_fused.py
+#
+# Lexing and parsing the calc and ANSI C examples with parse(), which calls
+# the lexer's token() for each token, and with parse_fused(), which has the
+# lexer make columns of token types and values and parses token numbers.
+# The time includes the lexing, as the two are run together.  Prints the
+# time per token and the number of token objects made, for parsers with
+# dict tables and dense tables.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+
+import ply.yacc as yacc
+from bench_dense import best_of
+from bench_relex import csource
+from bench_generated import load_calc
+
+quiet = yacc.PlyLogger(io.StringIO())
+
+# The number of token objects made while parsing, counted by a subclass
+# put in place of the lexer's token class
+def count_tokens(lexer, parse):
+    made = [0]
+    class CountedToken(lexer.lextokenclass):
+        __slots__ = ()
+        def __new__(cls):
+            made[0] += 1
+            return object.__new__(cls)
+    saved = lexer.lextokenclass
+    lexer.lextokenclass = CountedToken
+    try:
+        parse()
+    finally:
+        lexer.lextokenclass = saved
+    return made[0]
+
+def bench(name, module, lexer, text):
+    lexer.input(text)
+    ntokens = len(lexer.tokenize_all())
+    print('%s: %d tokens' % (name, ntokens))
+
+    for dense in (False, True):
+        parser = yacc.yacc(module=module, errorlog=quiet, debug=False, dense=dense)
+
+        def run(parse, **kwargs):
+            lexer.lineno = 1
+            with contextlib.redirect_stdout(io.StringIO()):
+                return parse(text, lexer=lexer, **kwargs)
+
+        runs = [('parse()', parser.parse), ('parse_fused()', parser.parse_fused)]
+        assert run(parser.parse) == run(parser.parse_fused), 'results differ'
+        for tracking in (False, True):
+            # The two take turns, so that they both see the same load
+            times = [None] * len(runs)
+            for _ in range(9):
+                for n, (label, parse) in enumerate(runs):
+                    elapsed = best_of(lambda: run(parse, tracking=tracking), repeat=1)
+                    if times[n] is None or elapsed < times[n]:
+                        times[n] = elapsed
+            for (label, parse), elapsed in zip(runs, times):
+                made = count_tokens(lexer, lambda: run(parse, tracking=tracking))
+                print('  %-6s %-14s tracking=%-5s %8.2f ms %6.0f ns/token %6.2fx   %d token objects' %
+                      ('dense' if dense else 'dict', label, tracking, elapsed * 1000,
+                       elapsed / ntokens * 1e9, times[0] / elapsed, made))
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        calc = load_calc()
+        import clex
+        import cparse
+
+    line = '3 * (4 + 5) - 2 / 7 + -x * x + 12 - x * (y - 1) / (2 + x) + ((1))'
+    bench('calc', calc, calc.lexer, ' + '.join([line] * 1000))
+    # The ANSI C lexer doesn't know about hex constants
+    bench('ansic', cparse, clex.lexer, csource.replace('0x1f', '31') * 100)
@@ -0,0 +1,103 @@
+# -----------------------------------------------------------------------------
+# bench_generated.py
+#
+# Parsing speed of the parsers made by yacc() (dict tables and dense
+# tables) and of the same parsers written out with write_parser() and
+# loaded with load_parser(), for the calc, BASIC and ANSI C examples.
+# Tokens are lexed ahead of time so that only the parser is timed.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import glob
+import types
+import shutil
+import tempfile
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+for name in ('ansic', 'BASIC'):
+    sys.path.insert(0, os.path.join(here, '..', 'example', name))
+
+import ply.lex as lex
+import ply.yacc as yacc
+from bench_dense import ListLexer, best_of
+from bench_relex import csource
+
+quiet = yacc.PlyLogger(io.StringIO())
+
+# calc.py reads lines from the terminal after building the parser.  Only
+# the part before that is loaded.
+def load_calc():
+    filename = os.path.join(here, '..', 'example', 'calc', 'calc.py')
+    with open(filename) as f:
+        source = f.read()
+    source = source[:source.index('while True:')]
+    module = types.ModuleType('calc')
+    module.__file__ = filename
+    sys.modules['calc'] = module
+    exec(compile(source, filename, 'exec'), module.__dict__)
+    return module
+
+# Parse each list of tokens with every kind of parser
+def bench(name, module, inputs, tmpdir):
+    parser = yacc.yacc(module=module, errorlog=quiet, debug=False)
+    dparser = yacc.yacc(module=module, errorlog=quiet, debug=False, dense=True)
+    yacc.write_parser(parser, os.path.join(tmpdir, 'bench_%s.py' % name))
+    gparser = yacc.load_parser('bench_%s' % name, module=module)
+
+    lexers = [ListLexer(toks) for toks in inputs]
+    for lexer in lexers:
+        # Position tracking reads these for empty productions
+        lexer.lineno = lexer.lexpos = 0
+    ntokens = sum(len(toks) for toks in inputs)
+    def run(parse, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return [parse('', lexer=lexer, **kwargs) for lexer in lexers]
+
+    print('%s: %d inputs, %d tokens' % (name, len(inputs), ntokens))
+    parsers = [parser.parse, dparser.parse, gparser.parse]
+    for tracking in (False, True):
+        results = [repr(run(parse, tracking=tracking)) for parse in parsers]
+        assert results[0] == results[1] == results[2]
+
+        # The parsers take turns, so that they all see the same load
+        times = [None] * len(parsers)
+        for _ in range(15):
+            for n, parse in enumerate(parsers):
+                elapsed = best_of(lambda: run(parse, tracking=tracking), repeat=1)
+                if times[n] is None or elapsed < times[n]:
+                    times[n] = elapsed
+        d, a, g = times
+        print('  tracking=%-5s  dict %7.2f ms   dense %7.2f ms   generated %7.2f ms (%4.0f ns/token, %4.2fx)' %
+              (tracking, d * 1000, a * 1000, g * 1000, g / ntokens * 1e9, d / g))
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        calc = load_calc()
+        import basiclex
+        basiclexer = lex.lexer
+        import basparse
+        import clex
+        import cparse
+
+    tmpdir = tempfile.mkdtemp()
+    sys.path.insert(0, tmpdir)
+    try:
+        lines = ['x = 3 * (4 + 5) - 2 / 7', 'y = -x * x + 12', 'x * (y - 1) / (2 + x)', '((1))'] * 2000
+        bench('calc', calc, [calc.lexer.tokenize_all(line) for line in lines], tmpdir)
+
+        programs = []
+        for filename in sorted(glob.glob(os.path.join(here, '..', 'example', 'BASIC', '*.bas'))):
+            with open(filename) as f:
+                programs.append(f.read())
+        bench('BASIC', basparse, [basiclexer.tokenize_all(''.join(programs) * 20)], tmpdir)
+
+        # The ANSI C lexer doesn't know about hex constants
+        clex.lexer.lineno = 1
+        bench('ansic', cparse, [clex.lexer.tokenize_all(csource.replace('0x1f', '31') * 200)], tmpdir)
+    finally:
+        sys.path.remove(tmpdir)
+        shutil.rmtree(tmpdir)
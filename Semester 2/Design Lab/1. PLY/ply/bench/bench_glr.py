@@ -0,0 +1,149 @@
+# -----------------------------------------------------------------------------
+# bench_glr.py
+#
+# Parsing speed of the GLR parser made by yacc(glr=True) against the LALR
+# parser for the calc, BASIC and ANSI C examples, and how the time grows
+# with the size of the input.  These grammars have few conflicts (ANSI C
+# has the dangling else), so nearly all of the input is parsed with a
+# single stack.  The GLR parser has no error recovery, so the error rules
+# of BASIC are left out for both parsers.  Then, for the ambiguous
+# balanced parentheses grammar of the Design Lab assignment, the size of
+# the forest and the time to build it, against the number of trees in it.
+# Tokens are lexed ahead of time so that only the parser is timed.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import glob
+import types
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+for name in ('ansic', 'BASIC'):
+    sys.path.insert(0, os.path.join(here, '..', 'example', name))
+
+import ply.lex as lex
+import ply.yacc as yacc
+from bench_dense import ListLexer, best_of
+from bench_relex import csource
+from bench_generated import load_calc
+
+quiet = yacc.PlyLogger(io.StringIO())
+
+# The balanced parentheses grammar
+class Parens(object):
+    tokens = ('PARLEFT', 'PARRIGHT')
+
+    def p_expS(self, p):
+        '''expS : PARLEFT PARRIGHT
+                | PARLEFT expA
+                | expS expS'''
+
+    def p_expA(self, p):
+        'expA : expS PARRIGHT'
+
+    def p_error(self, p):
+        pass
+
+class Tok(object):
+    def __init__(self, type):
+        self.type = self.value = type
+        self.lineno = self.lexpos = 0
+
+# The number of nodes and alternatives in a forest
+def forest_size(root):
+    seen = {root}
+    stack = [root]
+    alternatives = 0
+    while stack:
+        node = stack.pop()
+        alternatives += len(node.alternatives)
+        for _, children in node.alternatives:
+            for c in children:
+                if c not in seen:
+                    seen.add(c)
+                    stack.append(c)
+    return len(seen), alternatives
+
+# The grammar of a module without its error rules, which the GLR parser
+# can't be made with.  Both parsers are made from it.
+def without_error_rules(module):
+    items = {}
+    for name in dir(module):
+        value = getattr(module, name)
+        if name.startswith('p_') and 'error' in (value.__doc__ or '').split():
+            continue
+        items[name] = value
+    return types.SimpleNamespace(**items)
+
+# make_tokens(copies) gives the tokens of an input made of that many copies
+# of the example input
+def bench(name, module, make_tokens):
+    module = without_error_rules(module)
+    parser = yacc.yacc(module=module, errorlog=quiet, debug=False)
+    gparser = yacc.yacc(module=module, errorlog=quiet, debug=False, glr=True)
+    conflicts = sum(len(row) for row in gparser.alternatives.values())
+    print('%s: %d conflicts' % (name, conflicts))
+
+    for copies in (1, 2, 4, 8):
+        toks = make_tokens(copies)
+        lexer = ListLexer(toks)
+        def run(parse):
+            with contextlib.redirect_stdout(io.StringIO()):
+                return parse('', lexer=lexer)
+        assert gparser.parse_forest('', lexer=lexer) is not None
+        assert repr(run(parser.parse)) == repr(run(gparser.parse))
+
+        # The parsers take turns, so that they both see the same load
+        times = [None, None]
+        for _ in range(5):
+            for n, parse in enumerate((parser.parse, gparser.parse)):
+                elapsed = best_of(lambda: run(parse), repeat=1)
+                if times[n] is None or elapsed < times[n]:
+                    times[n] = elapsed
+        lalr, glr = times
+        ntokens = len(toks)
+        print('  %dx %6d tokens  LALR %8.2f ms (%5.0f ns/token)   GLR %8.2f ms (%5.0f ns/token, %4.2fx)' %
+              (copies, ntokens, lalr * 1000, lalr / ntokens * 1e9, glr * 1000, glr / ntokens * 1e9, glr / lalr))
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        calc = load_calc()
+        import basiclex
+        basiclexer = lex.lexer
+        import basparse
+        import clex
+        import cparse
+
+    # calc parses one line at a time, so the lines are run together into
+    # one long expression
+    line = '3 * (4 + 5) - 2 / 7 + -x * x + 12 - x * (y - 1) / (2 + x) + ((1))'
+    bench('calc', calc, lambda copies: calc.lexer.tokenize_all(' + '.join([line] * 200 * copies)))
+
+    programs = []
+    for filename in sorted(glob.glob(os.path.join(here, '..', 'example', 'BASIC', '*.bas'))):
+        with open(filename) as f:
+            programs.append(f.read())
+    bench('BASIC', basparse, lambda copies: basiclexer.tokenize_all(''.join(programs) * 5 * copies))
+
+    # The ANSI C lexer doesn't know about hex constants
+    source = csource.replace('0x1f', '31')
+    bench('ansic', cparse, lambda copies: clex.lexer.tokenize_all(source * 50 * copies))
+
+    # Every way of splitting ()()...() into a sequence is a tree, so the
+    # number of trees grows exponentially while the forest grows as the
+    # cube of the length at most
+    print()
+    parser = yacc.yacc(module=Parens(), errorlog=quiet, debug=False, glr=True)
+    for pairs in (5, 10, 20, 40, 60):
+        toks = [Tok(t) for t in ('(', ')') * pairs]
+        for tok in toks:
+            tok.type = 'PARLEFT' if tok.value == '(' else 'PARRIGHT'
+        lexer = ListLexer(toks)
+        elapsed = best_of(lambda: parser.parse_forest('', lexer=lexer), repeat=3)
+        forest = parser.parse_forest('', lexer=lexer)
+        nodes, alternatives = forest_size(forest)
+        print('%3d pairs  %6d nodes %7d alternatives  %8.2f ms   %d trees' %
+              (pairs, nodes, alternatives, elapsed * 1000, forest.count()))
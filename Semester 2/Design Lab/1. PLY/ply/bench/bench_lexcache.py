@@ -0,0 +1,60 @@
+# -----------------------------------------------------------------------------
+# bench_lexcache.py
+#
+# Compare the time needed to build a lexer with lex() without a cache (cold)
+# and with a previously written on-disk cache (warm).
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import re
+import time
+import types
+import tempfile
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+
+import ply.lex as lex
+
+quiet = lex.PlyLogger(io.StringIO())
+
+# A lexer with enough rules to force the master regex to be split
+many = types.ModuleType('many')
+many.__file__ = __file__
+many.tokens = ['TOK%d' % i for i in range(1000)]
+for _tok in many.tokens:
+    setattr(many, 't_' + _tok, _tok + ':')
+many.t_ignore = ' \t'
+def _t_error(t):
+    t.lexer.skip(1)
+many.t_error = _t_error
+
+# The re module caches compiled patterns.  Purge it before every run so
+# that each build looks like the first one in a fresh process.
+def best_of(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        re.purge()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def bench(name, module):
+    cachefile = os.path.join(tempfile.mkdtemp(), name + '.lexcache')
+    cold = best_of(lambda: lex.lex(module=module, errorlog=quiet))
+    lex.lex(module=module, errorlog=quiet, cachefile=cachefile)
+    warm = best_of(lambda: lex.lex(module=module, errorlog=quiet, cachefile=cachefile))
+    os.remove(cachefile)
+    print('%-12s cold %8.2f ms   warm %8.2f ms   speedup %5.1fx' %
+          (name, cold * 1000, warm * 1000, cold / warm))
+
+if __name__ == '__main__':
+    import clex
+    bench('ansic', clex)
+    bench('1000 tokens', many)
@@ -0,0 +1,91 @@
+# -----------------------------------------------------------------------------
+# bench_lextab.py
+#
+# Cold start time of a lexer: building it with lex(), with lex() and an
+# on-disk cache, and loading a module written by write_lextab() with and
+# without checking it against the rules.  The lextab module is imported
+# again for every run, as it would be when a program starts.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import re
+import time
+import types
+import shutil
+import tempfile
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+
+import ply.lex as lex
+from bench_relex import csource
+
+quiet = lex.PlyLogger(io.StringIO())
+
+# A lexer with enough rules to force the master regex to be split
+many = types.ModuleType('many')
+many.__file__ = __file__
+many.tokens = ['TOK%d' % i for i in range(1000)]
+for _tok in many.tokens:
+    setattr(many, 't_' + _tok, _tok + ':')
+many.t_ignore = ' \t'
+def t_error(t):
+    t.lexer.skip(1)
+many.t_error = t_error
+
+# The re module caches compiled patterns.  Purge it before every run so
+# that each build looks like the first one in a fresh process.
+def best_of(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        re.purge()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def bench(name, module, tmpdir):
+    tabname = 'lextab_' + name.replace(' ', '_')
+    cachefile = os.path.join(tmpdir, tabname + '.lexcache')
+    lexer = lex.lex(module=module, errorlog=quiet, cachefile=cachefile)
+    lex.write_lextab(lexer, os.path.join(tmpdir, tabname + '.py'))
+
+    def load(check=False):
+        sys.modules.pop(tabname, None)
+        return lex.load_lextab(tabname, module=module, check=check, errorlog=quiet)
+
+    # The loaded lexer must give the same tokens
+    text = ' '.join(t + ':' for t in module.tokens[::20]) if module is many else csource
+    expected = [(t.type, t.value, t.lineno, t.lexpos) for t in lexer.tokenize_all(text)]
+    assert [(t.type, t.value, t.lineno, t.lexpos) for t in load().tokenize_all(text)] == expected
+
+    cold = best_of(lambda: lex.lex(module=module, errorlog=quiet))
+    cached = best_of(lambda: lex.lex(module=module, errorlog=quiet, cachefile=cachefile))
+    lextab = best_of(load)
+    checked = best_of(lambda: load(check=True))
+    print('%-12s lex() %8.2f ms   cache %7.2f ms   lextab %7.2f ms (%5.1fx)   lextab+check %7.2f ms (%5.1fx)' %
+          (name, cold * 1000, cached * 1000, lextab * 1000, cold / lextab, checked * 1000, cold / checked))
+
+    # Regexs in a lextab are compiled when first used, so also time
+    # building the lexer and lexing a first input
+    cold = best_of(lambda: lex.lex(module=module, errorlog=quiet).tokenize_all(text))
+    lextab = best_of(lambda: load().tokenize_all(text))
+    print('%-12s lex() + first input %8.2f ms   lextab + first input %7.2f ms (%5.1fx)' %
+          ('', cold * 1000, lextab * 1000, cold / lextab))
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()):
+        import clex
+    tmpdir = tempfile.mkdtemp()
+    sys.path.insert(0, tmpdir)
+    try:
+        bench('ansic', clex, tmpdir)
+        bench('1000 tokens', many, tmpdir)
+    finally:
+        shutil.rmtree(tmpdir)
@@ -0,0 +1,139 @@
+# -----------------------------------------------------------------------------
+# bench_lrtable.py
+#
+# Time taken by LRTable to build the LALR tables for the example grammars
+# and for a randomly generated grammar with 2000 rules.  Only the table
+# construction is timed, not the reflection or validation done by yacc().
+#
+# A digest of the tables is printed for each grammar.  To compare with
+# another copy of PLY, give its source directory on the command line:
+#
+#     $ python bench_lrtable.py /path/to/other/ply/src
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import time
+import types
+import random
+import hashlib
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+src = sys.argv[1] if len(sys.argv) > 1 else os.path.join(here, '..', 'src')
+sys.path.insert(0, src)
+for name in ('ansic', 'BASIC', 'GardenSnake', 'yply'):
+    sys.path.insert(0, os.path.join(here, '..', 'example', name))
+
+import ply.yacc as yacc
+
+def best_of(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+# Make a Grammar from a module with grammar rules, the same way yacc() does
+def module_grammar(module):
+    def make():
+        pinfo = yacc.ParserReflect(dict((k, getattr(module, k)) for k in dir(module)),
+                                   log=yacc.NullLogger())
+        pinfo.get_all()
+        pinfo.validate_all()
+        grammar = yacc.Grammar(pinfo.tokens)
+        for term, assoc, level in pinfo.preclist:
+            grammar.set_precedence(term, assoc, level)
+        for funcname, (file, line, prodname, syms) in pinfo.grammar:
+            grammar.add_production(prodname, syms, funcname, file, line)
+        grammar.set_start(pinfo.start)
+        return grammar
+    return make
+
+# Make a random grammar with the given number of rules.  Every nonterminal
+# is reachable from the start symbol and derives some string of terminals.
+# Like a real grammar, the rules of a nonterminal mostly refer to its
+# neighbours, so the number of states grows with the number of rules.  There
+# are still plenty of conflicts, which exercises every part of the table
+# construction.
+def random_grammar(nrules, seed=1):
+    rng = random.Random(seed)
+    nnonterms = nrules // 5
+    terms = ['T%d' % i for i in range(nrules // 30 + 2)]
+    nonterms = ['n%d' % i for i in range(nnonterms)]
+    rules = []
+    for i, name in enumerate(nonterms):
+        # One rule using terminals and later nonterminals only, so that
+        # every nonterminal derives something
+        later = nonterms[i+1:i+4]
+        rules.append((name, [rng.choice(terms)] + rng.sample(later, rng.randint(0, len(later)))))
+    while len(rules) < nrules:
+        i = rng.randrange(nnonterms)
+        length = rng.choice((0, 1, 1, 2, 2, 3, 3, 4, 5))
+        syms = []
+        for _ in range(length):
+            if rng.random() < 0.6:
+                syms.append(rng.choice(terms))
+            else:
+                k = i + rng.randint(-3, 8) if rng.random() < 0.95 else rng.randrange(nnonterms)
+                syms.append(nonterms[min(max(k, 0), nnonterms - 1)])
+        rules.append((nonterms[i], syms))
+
+    def make():
+        grammar = yacc.Grammar(terms)
+        grammar.set_precedence(terms[0], 'left', 1)
+        grammar.set_precedence(terms[1], 'right', 2)
+        seen = set()
+        for line, (name, syms) in enumerate(rules):
+            if (name, tuple(syms)) not in seen:
+                seen.add((name, tuple(syms)))
+                grammar.add_production(name, syms, None, 'random', line)
+        grammar.set_start(nonterms[0])
+        return grammar
+    return make
+
+# GardenSnake.py compiles and runs a demo program at import time (using an
+# ast layout newer Pythons reject).  Only the lexer and grammar rules are
+# loaded here.
+def load_gardensnake():
+    filename = os.path.join(here, '..', 'example', 'GardenSnake', 'GardenSnake.py')
+    with open(filename) as f:
+        source = f.read()
+    source = source[:source.index('class GardenSnakeParser')]
+    module = types.ModuleType('GardenSnake')
+    module.__file__ = filename
+    sys.modules['GardenSnake'] = module
+    exec(compile(source, filename, 'exec'), module.__dict__)
+    module.start = 'file_input_end'
+    return module
+
+def digest(lr):
+    h = hashlib.sha256()
+    for state in sorted(lr.lr_action):
+        h.update(repr((state, sorted(lr.lr_action[state].items(), key=lambda x: x[0]),
+                       sorted(lr.lr_goto[state].items()))).encode())
+    return h.hexdigest()[:12]
+
+def bench(name, make):
+    grammar = make()
+    lr = yacc.LRTable(grammar)
+    elapsed = best_of(lambda: yacc.LRTable(make()))
+    print('%-16s %5d rules %6d states   %9.2f ms   digest %s' %
+          (name, len(grammar.Productions) - 1, len(lr.lr_action), elapsed * 1000, digest(lr)))
+
+if __name__ == '__main__':
+    print('PLY source:', os.path.abspath(src))
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import cparse
+        import basparse
+        import yparse
+        GardenSnake = load_gardensnake()
+    bench('ansic', module_grammar(cparse))
+    bench('BASIC', module_grammar(basparse))
+    bench('yply', module_grammar(yparse))
+    bench('GardenSnake', module_grammar(GardenSnake))
+    bench('random 2000', random_grammar(2000))
@@ -0,0 +1,126 @@
+# -----------------------------------------------------------------------------
+# bench_parallel.py
+#
+# Scaling of tokenize_parallel() with the number of worker processes, on an
+# assembly program made of one instruction per line (the record format used
+# by the Design Lab assignment).  Times are compared with tokenize_all() in
+# a single process.  The speedup is limited by the cost of sending tokens
+# back to the parent process, which columnar output reduces.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import time
+import random
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+
+import ply.lex as lex
+
+class AsmLexer(object):
+    tokens = ('LABEL', 'DOLLAR', 'OPCODE', 'REG', 'NUMBER', 'STRING', 'COMMA',
+              'COMPARISON', 'IF', 'GOTO')
+
+    t_DOLLAR = r'\$\$\$'
+    t_COMPARISON = r'==|!=|<=|>=|<|>'
+    t_COMMA = r','
+    t_ignore = ' \t'
+
+    def t_OPCODE(self, t):
+        r'STOR|PRINT|HLT|SUM|MUL|DIV|MOD|AND|OR|XOR|NOT|SHL|SHR|CONCAT|LENGTH|SUBSTR'
+        return t
+
+    def t_GOTO(self, t):
+        r'GOTO'
+        return t
+
+    def t_IF(self, t):
+        r'IF'
+        return t
+
+    def t_LABEL(self, t):
+        r'L\d+'
+        return t
+
+    def t_REG(self, t):
+        r'@?[A-Za-z]'
+        return t
+
+    def t_STRING(self, t):
+        r'"[^"]*"'
+        t.value = t.value.strip('"')
+        return t
+
+    def t_NUMBER(self, t):
+        r'-?\d+(\.\d+)?'
+        t.value = float(t.value) if '.' in t.value else int(t.value)
+        return t
+
+    def t_newline(self, t):
+        r'\n+'
+        t.lexer.lineno += len(t.value)
+
+    def t_error(self, t):
+        t.lexer.skip(1)
+
+def make_program(lines):
+    rand = random.Random(42)
+    out = []
+    for i in range(lines):
+        kind = rand.randrange(4)
+        if kind == 0:
+            out.append('L%d $$$ STOR @%s, %d\n' % (i, rand.choice('abcd'), rand.randrange(1000)))
+        elif kind == 1:
+            out.append('L%d $$$ SUM @a, @b, @c\n' % i)
+        elif kind == 2:
+            out.append('L%d $$$ IF @a <= %d GOTO L%d\n' % (i, rand.randrange(100), rand.randrange(lines)))
+        else:
+            out.append('L%d $$$ PRINT "value of a"\n' % i)
+    return ''.join(out)
+
+def best_of(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+if __name__ == '__main__':
+    lexer = lex.lex(object=AsmLexer())
+    text = make_program(200000)
+
+    def key(toks):
+        return [(t.type, t.value, t.lineno, t.lexpos) for t in toks]
+
+    lexer.lineno = 1
+    expected = key(lexer.tokenize_all(text))
+    print('%d lines, %d tokens, %d CPUs' % (text.count('\n'), len(expected), os.cpu_count() or 1))
+
+    def serial():
+        lexer.lineno = 1
+        lexer.tokenize_all(text)
+    t_serial = best_of(serial)
+    print('tokenize_all()         %8.1f ms' % (t_serial * 1000))
+
+    processes = 1
+    while processes <= max(os.cpu_count() or 1, 2):
+        lexer.lineno = 1
+        assert key(lexer.tokenize_parallel(text, '\n', processes=processes)) == expected
+
+        def tokens():
+            lexer.lineno = 1
+            lexer.tokenize_parallel(text, '\n', processes=processes)
+
+        def columnar():
+            lexer.lineno = 1
+            lexer.tokenize_parallel(text, '\n', processes=processes, columnar=True)
+
+        t_tokens = best_of(tokens)
+        t_columnar = best_of(columnar)
+        print('%2d processes   tokens %8.1f ms (%4.2fx)   columnar %8.1f ms (%4.2fx)' %
+              (processes, t_tokens * 1000, t_serial / t_tokens, t_columnar * 1000, t_serial / t_columnar))
+        processes *= 2
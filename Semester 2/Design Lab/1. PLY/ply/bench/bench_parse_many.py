@@ -0,0 +1,117 @@
+# -----------------------------------------------------------------------------
+# bench_parse_many.py
+#
+# Latency per input when parsing many tiny assembly programs (the grammar
+# of the Design Lab assignment) with a loop over parse() and with
+# parse_many(), for 1, 10,000 and 1,000,000 inputs.  parse_many() is also
+# timed with thread and process pools for 10,000 inputs.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import time
+import itertools
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+
+import ply.lex as lex
+import ply.yacc as yacc
+from bench_parallel import AsmLexer, make_program
+
+class AsmParser(object):
+    tokens = AsmLexer.tokens
+
+    def p_instructions(self, p):
+        '''instructions : instructions instruction
+                        | instruction'''
+        p[0] = p[1] + [p[2]] if len(p) == 3 else [p[1]]
+
+    def p_instruction(self, p):
+        '''instruction : LABEL DOLLAR OPCODE operands
+                       | LABEL DOLLAR GOTO LABEL
+                       | condition'''
+        if len(p) == 5:
+            p[0] = {'label': p[1], 'opcode': p[3], 'operands': p[4]}
+        else:
+            p[0] = p[1]
+
+    def p_condition(self, p):
+        '''condition : LABEL DOLLAR IF comparison GOTO LABEL
+                     | LABEL DOLLAR IF comparison OPCODE operands'''
+        p[0] = {'label': p[1], 'opcode': p[3], 'comparison': p[4],
+                'operation': {'opcode': p[5], 'operands': p[6]}}
+
+    def p_comparison(self, p):
+        '''comparison : operand COMPARISON operand'''
+        p[0] = (p[1], p[2], p[3])
+
+    def p_operands(self, p):
+        '''operands : operand COMMA operands
+                    | operand'''
+        p[0] = [p[1]] + p[3] if len(p) == 4 else [p[1]]
+
+    def p_operand(self, p):
+        '''operand : REG
+                   | NUMBER
+                   | STRING'''
+        p[0] = p[1]
+
+    def p_error(self, p):
+        pass
+
+# Tiny programs of one to four instructions
+def make_inputs():
+    lines = make_program(4000).splitlines(True)
+    inputs = []
+    for i in range(1000):
+        n = i % 4 + 1
+        inputs.append(''.join(lines[i * 4:i * 4 + n]))
+    return inputs
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    lexer = lex.lex(object=AsmLexer())
+    parser = yacc.yacc(module=AsmParser(), debug=False)
+    programs = make_inputs()
+    print('%d CPUs' % (os.cpu_count() or 1))
+
+    def parse_loop(inputs):
+        for data in inputs:
+            lexer.lineno = 1
+            parser.parse(data, lexer=lexer)
+
+    def parse_many(inputs, **kwargs):
+        for _ in parser.parse_many(inputs, lexer=lexer, **kwargs):
+            pass
+
+    # The results must not depend on how the inputs are parsed
+    expected = []
+    for data in programs:
+        lexer.lineno = 1
+        expected.append(parser.parse(data, lexer=lexer))
+    assert list(parser.parse_many(programs, lexer=lexer)) == expected
+    assert list(parser.parse_many(programs, lexer=lexer, executor='thread', workers=2)) == expected
+    assert list(parser.parse_many(programs, lexer=lexer, executor='process', workers=2)) == expected
+
+    print('%-10s %18s %18s' % ('inputs', 'parse() loop', 'parse_many()'))
+    for n in (1, 10000, 1000000):
+        repeat = max(1000000 // n, 3) if n < 1000000 else 1
+        inputs = lambda: itertools.islice(itertools.cycle(programs), n)
+        # The two take turns, so that they both see the same load
+        loop = many = float('inf')
+        for _ in range(repeat):
+            loop = min(loop, timed(lambda: parse_loop(inputs())))
+            many = min(many, timed(lambda: parse_many(inputs())))
+        print('%-10d %12.2f us/in %12.2f us/in' % (n, loop / n * 1e6, many / n * 1e6))
+
+    n = 10000
+    inputs = lambda: itertools.islice(itertools.cycle(programs), n)
+    workers = os.cpu_count() or 1
+    for executor in ('thread', 'process'):
+        elapsed = min(timed(lambda: parse_many(inputs(), executor=executor, workers=workers)) for _ in range(3))
+        print('%-10d %-7s pool (%d workers) %8.2f us/in' % (n, executor, workers, elapsed / n * 1e6))
@@ -0,0 +1,50 @@
+# -----------------------------------------------------------------------------
+# bench_profile.py
+#
+# Parsing the ANSI C example with and without parse(profile=...), and the
+# report of the profile.  Profiling is done on a copy of the parser, so
+# with it off the parse loop is the same as before.  Tokens are lexed ahead
+# of time so that only the parser is timed.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+
+import ply.yacc as yacc
+from bench_dense import ListLexer, best_of
+from bench_relex import csource
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import clex
+        import cparse
+
+    quiet = yacc.PlyLogger(io.StringIO())
+    parser = yacc.yacc(module=cparse, errorlog=quiet, debug=False)
+    # The ANSI C lexer doesn't know about hex constants
+    toks = clex.lexer.tokenize_all(csource.replace('0x1f', '31') * 50)
+    lexer = ListLexer(toks)
+    print('%d tokens' % len(toks))
+
+    profile = yacc.ParseProfile()
+    runs = [('profile off', lambda: parser.parse('', lexer=lexer)),
+            ('profile on', lambda: parser.parse('', lexer=lexer, profile=profile))]
+
+    # The two take turns, so that they both see the same load
+    times = [None] * len(runs)
+    for _ in range(7):
+        for n, (name, func) in enumerate(runs):
+            elapsed = best_of(func, repeat=1)
+            if times[n] is None or elapsed < times[n]:
+                times[n] = elapsed
+    for (name, func), elapsed in zip(runs, times):
+        print('%-12s %7.1f ms  %5.0f ns/token  %4.2fx' % (name, elapsed * 1000, elapsed / len(toks) * 1e9,
+                                                         elapsed / times[0]))
+    print()
+    profile.report(sys.stdout, limit=10)
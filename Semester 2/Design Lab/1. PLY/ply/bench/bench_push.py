@@ -0,0 +1,97 @@
+# -----------------------------------------------------------------------------
+# bench_push.py
+#
+# Feeding the tokens of the ANSI C example to a push parser, compared with
+# parse() pulling the same tokens.  Prints the time per token, the peak
+# memory of the parser for inputs of growing size (the tokens are made as
+# they are fed, so only the parser's own memory counts) and which token is
+# being fed when the rule for each declaration runs.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import contextlib
+import tracemalloc
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+
+import ply.yacc as yacc
+from bench_dense import ListLexer, best_of
+from bench_relex import csource
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import clex
+        import cparse
+
+    quiet = yacc.PlyLogger(io.StringIO())
+    parser = yacc.yacc(module=cparse, errorlog=quiet, debug=False)
+    # The ANSI C lexer doesn't know about hex constants
+    source = csource.replace('0x1f', '31')
+    clex.lexer.lineno = 1
+    toks = clex.lexer.tokenize_all(source * 50)
+    print('%d tokens' % len(toks))
+
+    def pull():
+        parser.parse('', lexer=ListLexer(toks))
+
+    def push():
+        p = parser.push()
+        p.feed_many(toks)
+        p.end()
+
+    def push_each():
+        p = parser.push()
+        feed = p.feed
+        for tok in toks:
+            feed(tok)
+        p.end()
+
+    runs = [('parse()', pull), ('feed_many()', push), ('feed()', push_each)]
+    times = [None] * len(runs)
+    for _ in range(7):
+        for n, (name, func) in enumerate(runs):
+            elapsed = best_of(func, repeat=1)
+            if times[n] is None or elapsed < times[n]:
+                times[n] = elapsed
+    for (name, func), elapsed in zip(runs, times):
+        print('%-12s %7.1f ms  %5.0f ns/token' % (name, elapsed * 1000, elapsed / len(toks) * 1e9))
+
+    # Peak memory while feeding a stream of 1x, 10x and 100x the source.
+    # Tokens are lexed a copy of the source at a time.
+    print()
+    for copies in (1, 10, 100):
+        tracemalloc.start()
+        p = parser.push()
+        for _ in range(copies):
+            clex.lexer.input(source)
+            p.feed_many(clex.lexer)
+        p.end()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print('%4dx source  peak %7.1f kB' % (copies, peak / 1024))
+
+    # How soon rules run.  As with parse(), external_declaration is reduced
+    # when the token after a declaration or function definition is fed, or
+    # at end() for the last one.
+    print()
+    ran = []
+    fed = [0]
+    for prod in parser.productions:
+        if prod.name == 'external_declaration':
+            def p_external_declaration(t, rule=prod.callable):
+                ran.append(fed[0] + 1)
+                return rule(t)
+            prod.callable = p_external_declaration
+    toks = clex.lexer.tokenize_all(source)
+    lastbrace = max(n for n, tok in enumerate(toks) if tok.type == 'RBRACE') + 1
+    p = parser.push()
+    for tok in toks:
+        p.feed(tok)
+        fed[0] += 1
+    p.end()
+    print('external_declaration ran while feeding token %s. The last } is token %d of %d, %d is end()'
+          % (ran, lastbrace, len(toks), len(toks) + 1))
@@ -0,0 +1,103 @@
+# -----------------------------------------------------------------------------
+# bench_recovery.py
+#
+# Parsing speed on input with 0%, 1%, 10% and 50% of the tokens corrupted
+# (replaced with a token of another type from the same input), for the
+# assembly grammar of the Design Lab assignment and for the BASIC example.
+# The assembly grammar has no error rules, so recovery pops the whole stack
+# and throws tokens away until one can start an instruction.  The BASIC
+# grammar recovers with rules such as statement : INTEGER error NEWLINE.
+# To compare with another version of yacc.py, give its path:
+#
+#    $ git show <commit>:src/ply/yacc.py > /tmp/yacc_old.py
+#    $ python bench_recovery.py /tmp/yacc_old.py
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import glob
+import random
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'BASIC'))
+
+import ply.lex as lex
+import ply.yacc as yacc
+from bench_dense import ListLexer, best_of
+from bench_parallel import AsmLexer, make_program
+from bench_parse_many import AsmParser
+from bench_reduce import load_yacc
+
+quiet = yacc.PlyLogger(io.StringIO())
+
+# Replace a fraction of the tokens with other tokens of the input that have
+# a different type
+def corrupt(toks, fraction):
+    rand = random.Random(7)
+    out = []
+    for tok in toks:
+        if rand.random() < fraction:
+            other = tok
+            while other.type == tok.type:
+                other = rand.choice(toks)
+            tok = other
+        out.append(tok)
+    return out
+
+# The assembly parser, building the list of instructions in place
+class AsmListParser(AsmParser):
+    def p_instructions(self, p):
+        '''instructions : instructions instruction
+                        | instruction'''
+        if len(p) == 3:
+            p[1].append(p[2])
+            p[0] = p[1]
+        else:
+            p[0] = [p[1]]
+
+def bench(name, module, toks, versions):
+    print('%s: %d tokens' % (name, len(toks)))
+    parsers = [(label, yaccmod.yacc(module=module, errorlog=quiet, debug=False)) for label, yaccmod in versions]
+    for fraction in (0, 0.01, 0.1, 0.5):
+        lexer = ListLexer(corrupt(toks, fraction))
+
+        def run(parser):
+            with contextlib.redirect_stdout(io.StringIO()):
+                return parser.parse('', lexer=lexer)
+
+        # The same results for every version
+        results = [run(parser) for label, parser in parsers]
+        assert all(result == results[0] for result in results), 'results differ'
+
+        # The versions take turns, so that they all see the same load
+        times = [None] * len(parsers)
+        for _ in range(9):
+            for n, (label, parser) in enumerate(parsers):
+                elapsed = best_of(lambda: run(parser), repeat=1)
+                if times[n] is None or elapsed < times[n]:
+                    times[n] = elapsed
+        for (label, parser), elapsed in zip(parsers, times):
+            print('  %3d%% corrupted  %-8s %8.2f ms %6.0f ns/token %6.2fx' %
+                  (fraction * 100, label, elapsed * 1000, elapsed / len(toks) * 1e9, times[0] / elapsed))
+
+if __name__ == '__main__':
+    versions = [('current', yacc)]
+    if len(sys.argv) > 1:
+        versions.append(('other', load_yacc(sys.argv[1])))
+
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import basiclex
+        basiclexer = lex.lexer
+        import basparse
+
+    lexer = lex.lex(object=AsmLexer())
+    bench('assembly', AsmListParser(), lexer.tokenize_all(make_program(20000)), versions)
+
+    programs = []
+    for filename in sorted(glob.glob(os.path.join(here, '..', 'example', 'BASIC', '*.bas'))):
+        with open(filename) as f:
+            programs.append(f.read())
+    bench('BASIC', basparse, basiclexer.tokenize_all(''.join(programs) * 20), versions)
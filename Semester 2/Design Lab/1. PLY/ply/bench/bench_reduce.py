@@ -0,0 +1,102 @@
+# -----------------------------------------------------------------------------
+# bench_reduce.py
+#
+# Parsing speed and objects made per reduction for the calc and ANSI C
+# examples.  The rules get a view of the symbol stack instead of a copy of
+# the symbols of the rule, so each reduction only makes the YaccSymbol for
+# its result.  To compare with another version of yacc.py, such as one
+# from before that change, give its path:
+#
+#    $ git show <commit>:src/ply/yacc.py > /tmp/yacc_old.py
+#    $ python bench_reduce.py /tmp/yacc_old.py
+#
+# Tokens are lexed ahead of time so that only the parser is timed.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import contextlib
+import importlib.util
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+
+import ply.yacc as yacc
+from bench_dense import ListLexer, best_of
+from bench_relex import csource
+from bench_generated import load_calc
+
+quiet = yacc.PlyLogger(io.StringIO())
+
+# Load another yacc.py as a module of the ply package
+def load_yacc(filename):
+    spec = importlib.util.spec_from_file_location('ply.yacc_other', filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# The number of YaccSymbol objects made while parsing, counted by a
+# subclass put in place of the class in the yacc module
+def count_symbols(module, parse):
+    made = [0]
+    class CountedSymbol(module.YaccSymbol):
+        __slots__ = ()
+        def __new__(cls):
+            made[0] += 1
+            return object.__new__(cls)
+    saved = module.YaccSymbol
+    module.YaccSymbol = CountedSymbol
+    try:
+        parse()
+    finally:
+        module.YaccSymbol = saved
+    return made[0]
+
+def bench(name, module, toks, versions):
+    lexer = ListLexer(toks)
+    parsers = []
+    for label, yaccmod in versions:
+        parser = yaccmod.yacc(module=module, errorlog=quiet, debug=False)
+        # Count the reductions with a profile of the current version
+        parsers.append((label, yaccmod, parser))
+
+    profile = yacc.ParseProfile()
+    with contextlib.redirect_stdout(io.StringIO()):
+        parsers[0][2].parse('', lexer=lexer, profile=profile)
+    reductions = sum(profile.reductions.values())
+    print('%s: %d tokens, %d reductions' % (name, len(toks), reductions))
+
+    def run(parser, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return parser.parse('', lexer=lexer, **kwargs)
+
+    for tracking in (False, True):
+        # The versions take turns, so that they all see the same load
+        times = [None] * len(parsers)
+        for _ in range(25):
+            for n, (label, yaccmod, parser) in enumerate(parsers):
+                elapsed = best_of(lambda: run(parser, tracking=tracking), repeat=1)
+                if times[n] is None or elapsed < times[n]:
+                    times[n] = elapsed
+        for (label, yaccmod, parser), elapsed in zip(parsers, times):
+            symbols = count_symbols(yaccmod, lambda: run(parser, tracking=tracking))
+            print('  %-8s tracking=%-5s %8.2f ms %6.0f ns/token %6.2fx   %.2f symbols/reduction' %
+                  (label, tracking, elapsed * 1000, elapsed / len(toks) * 1e9, times[0] / elapsed,
+                   symbols / reductions))
+
+if __name__ == '__main__':
+    versions = [('current', yacc)]
+    if len(sys.argv) > 1:
+        versions.append(('other', load_yacc(sys.argv[1])))
+
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        calc = load_calc()
+        import clex
+        import cparse
+
+    line = '3 * (4 + 5) - 2 / 7 + -x * x + 12 - x * (y - 1) / (2 + x) + ((1))'
+    bench('calc', calc, calc.lexer.tokenize_all(' + '.join([line] * 200)), versions)
+    # The ANSI C lexer doesn't know about hex constants
+    bench('ansic', cparse, clex.lexer.tokenize_all(csource.replace('0x1f', '31') * 50), versions)
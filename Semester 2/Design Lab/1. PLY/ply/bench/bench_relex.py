@@ -0,0 +1,81 @@
+# -----------------------------------------------------------------------------
+# bench_relex.py
+#
+# Cost of re-lexing after a one-line edit with relex() compared to lexing
+# the whole text again, for growing inputs on the ANSI C lexer.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import time
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+
+
+def best_of(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+csource = '''
+static int count_words(const char *s, int n)
+{
+    int i, words = 0;
+    for (i = 0; i < n; i++) {
+        if (s[i] == ' ' && s[i+1] != ' ')
+            words += 1;   /* count it */
+    }
+    return words * 2 + 0x1f - 3.5e2;
+}
+'''
+
+def bench(lexer, copies):
+    text = csource * copies
+    # Edit a line in the middle: "words += 1;" becomes "words += 100 + i;".
+    # Tokens after the edit have to be shifted.  Replacing the 1 by a 7
+    # keeps the length, so nothing after the edit needs to change.
+    offset = text.index('words += 1;', len(text) // 2) + len('words += ')
+    edit = (offset, 1, '100 + i')
+    same_length_edit = (offset, 1, '7')
+
+    def full():
+        lexer.lineno = 1
+        return lexer.tokenize_marked(text)
+
+    marked = full()
+    newtext = text[:offset] + edit[2] + text[offset+1:]
+
+    def incremental(edit):
+        # relex() consumes its input, so each run needs fresh marks
+        m = lexer.tokenize_marked(text)
+        start = time.perf_counter()
+        lexer.relex(m, *edit)
+        return time.perf_counter() - start
+
+    lexer.lineno = 1
+    result = lexer.relex(lexer.tokenize_marked(text), *edit)
+    lexer.lineno = 1
+    expected = lexer.tokenize_marked(newtext)
+    assert [(t.type, t.value, t.lineno, t.lexpos) for t in result] == \
+           [(t.type, t.value, t.lineno, t.lexpos) for t in expected]
+
+    t_full = best_of(full)
+    t_inc = min(incremental(edit) for _ in range(5))
+    t_same = min(incremental(same_length_edit) for _ in range(5))
+    print('%8d tokens   full %9.2f ms   relex %7.3f ms (%6.1fx)   same length %7.3f ms (%6.1fx)' %
+          (len(marked), t_full * 1000, t_inc * 1000, t_full / t_inc, t_same * 1000, t_full / t_same))
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()):
+        import clex
+    for copies in (10, 100, 1000, 5000):
+        bench(clex.lexer, copies)
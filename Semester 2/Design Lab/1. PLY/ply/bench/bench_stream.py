@@ -0,0 +1,88 @@
+# -----------------------------------------------------------------------------
+# bench_stream.py
+#
+# Peak memory and throughput of lexing a file with input_stream() compared
+# to reading it all and using input(), on the ANSI C lexer.  Tokens are
+# counted and dropped, so the peak is the memory held by the lexer.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import time
+import tempfile
+import tracemalloc
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+
+
+csource = '''
+static int count_words(const char *s, int n)
+{
+    int i, words = 0;
+    for (i = 0; i < n; i++) {
+        if (s[i] == ' ' && s[i+1] != ' ')
+            words += 1;   /* count it */
+    }
+    return words * 2 + 0x1f - 3.5e2;
+}
+'''
+
+def count(lexer):
+    n = 0
+    for tok in lexer:
+        n += 1
+    return n
+
+def whole(lexer, filename):
+    with open(filename) as f:
+        lexer.input(f.read())
+    return count(lexer)
+
+def stream(lexer, filename, bufsize=65536):
+    with open(filename) as f:
+        lexer.input_stream(f, bufsize)
+        return count(lexer)
+
+def measure(func, *args):
+    # Memory with tracing on, then time with it off
+    tracemalloc.start()
+    n = func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    func(*args)
+    return n, time.perf_counter() - start, peak
+
+def check(lexer, filename):
+    with open(filename) as f:
+        text = f.read()
+    lexer.lineno = 1
+    expected = [(t.type, t.value, t.lineno, t.lexpos) for t in lexer.tokenize_all(text)]
+    for bufsize in (64, 1000, 65536):
+        with open(filename) as f:
+            lexer.lineno = 1
+            lexer.input_stream(f, bufsize)
+            assert [(t.type, t.value, t.lineno, t.lexpos) for t in lexer] == expected
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()):
+        import clex
+    lexer = clex.lexer
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'input.c')
+        with open(filename, 'w') as f:
+            f.write(csource * 100)
+        check(lexer, filename)
+        for copies in (1000, 10000, 30000):
+            with open(filename, 'w') as f:
+                f.write(csource * copies)
+            size = os.path.getsize(filename)
+            n, t_whole, m_whole = measure(whole, lexer, filename)
+            _, t_stream, m_stream = measure(stream, lexer, filename)
+            print('%6.1f MB %8d tokens   input() %7.0f ms %8.1f MB peak   '
+                  'input_stream() %7.0f ms %6.2f MB peak' %
+                  (size / 1e6, n, t_whole * 1000, m_whole / 1e6, t_stream * 1000, m_stream / 1e6))
@@ -0,0 +1,116 @@
+# -----------------------------------------------------------------------------
+# bench_tokenize.py
+#
+# Lexer throughput of repeated token() calls versus the bulk tokenize_all()
+# method on the ANSI C and GardenSnake lexers.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import types
+import time
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+
+
+def best_of(func, repeat=7):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def bench(name, lexer, data, reset=None):
+    def run_token():
+        if reset:
+            reset(lexer)
+        lexer.input(data)
+        return [tok for tok in iter(lexer.token, None)]
+
+    def run_all():
+        if reset:
+            reset(lexer)
+        return lexer.tokenize_all(data)
+
+    def run_columnar():
+        if reset:
+            reset(lexer)
+        return lexer.tokenize_all(data, columnar=True)
+
+    ntokens = len(run_token())
+    assert [(t.type, t.value, t.lineno, t.lexpos) for t in run_token()] == \
+           [(t.type, t.value, t.lineno, t.lexpos) for t in run_all()]
+
+    print('%s: %d tokens' % (name, ntokens))
+    base = None
+    for label, func in [('token()', run_token),
+                        ('tokenize_all()', run_all),
+                        ('tokenize_all(columnar=True)', run_columnar)]:
+        t = best_of(func)
+        if base is None:
+            base = t
+        print('    %-28s %8.1f ms  %10.0f tokens/sec  %5.2fx' %
+              (label, t * 1000, ntokens / t, base / t))
+
+# GardenSnake.py compiles and runs a demo program at import time (using an
+# ast layout newer Pythons reject).  Only the lexer half of the file is
+# loaded here.
+def load_gardensnake_lexer():
+    filename = os.path.join(here, '..', 'example', 'GardenSnake', 'GardenSnake.py')
+    with open(filename) as f:
+        source = f.read()
+    source = source[:source.index('##########   Parser')]
+    module = types.ModuleType('GardenSnake')
+    module.__file__ = filename
+    sys.modules['GardenSnake'] = module
+    exec(compile(source, filename, 'exec'), module.__dict__)
+    return module.IndentLexer().lexer
+
+def reset_lineno(lexer):
+    lexer.lineno = 1
+
+def reset_gardensnake(lexer):
+    lexer.lineno = 1
+    lexer.paren_count = 0
+    lexer.at_line_start = True
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()):
+        import clex
+
+    csource = '''
+    static int count_words(const char *s, int n)
+    {
+        int i, words = 0;
+        for (i = 0; i < n; i++) {
+            if (s[i] == ' ' && s[i+1] != ' ')
+                words += 1;   /* count it */
+        }
+        return words * 2 + 0x1f - 3.5e2;
+    }
+    '''
+    bench('ansic', clex.lexer, csource * 2000, reset_lineno)
+
+    pysource = '''
+def x(a):
+    print('called with', a)
+    if a == 1:
+        return 2
+    if a*2 > 10: return 999 / 4
+    # A comment here
+    return a+2*3
+
+ints = (1, 2,
+   3, 4,
+5)
+t = 4+1/3*2+6*(9-5+1)
+print('numbers', 1.5e12, t, x(a))
+'''
+    bench('GardenSnake', load_gardensnake_lexer(), pysource * 2000, reset_gardensnake)
@@ -0,0 +1,153 @@
+# -----------------------------------------------------------------------------
+# bench_tokens.py
+#
+# Per-token memory footprint and throughput of the slotted LexToken and
+# YaccSymbol classes.  The unslotted layout used by earlier versions of
+# PLY is emulated by a subclass that does not define __slots__ and so
+# gets an instance dictionary.
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import re
+import time
+import tracemalloc
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+
+import ply.lex as lex
+import ply.yacc as yacc
+
+class DictToken(lex.LexToken):
+    pass
+
+class DictSymbol(yacc.YaccSymbol):
+    pass
+
+def best_of(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        re.purge()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+# Bytes per instance of cls with the given attributes set.  The
+# attribute values are shared, so only the objects themselves count.
+def footprint(cls, attrs, n=100000):
+    tracemalloc.start()
+    objs = []
+    for _ in range(n):
+        obj = cls()
+        for name in attrs:
+            setattr(obj, name, name)
+        objs.append(obj)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (size - sys.getsizeof(objs)) / n
+
+def bench_lexer(lexer, data):
+    def run():
+        lexer.lineno = 1
+        return lexer.tokenize_all(data)
+
+    print('Lexing %d characters with the ansic lexer' % len(data))
+    for label, tokenclass in [('unslotted', DictToken), ('LexToken', lex.LexToken)]:
+        lexer.lextokenclass = tokenclass
+        ntokens = len(run())
+        size = footprint(tokenclass, ['type', 'value', 'lineno', 'lexpos'])
+        t = best_of(run)
+        print('    %-10s %6.1f bytes/token  %8.1f ms  %10.0f tokens/sec' %
+              (label, size, t * 1000, ntokens / t))
+    lexer.lextokenclass = lex.LexToken
+
+# A calculator that keeps the whole parse tree so that the symbol objects
+# stay alive.  p_error is not needed since the input is valid.
+class Calc:
+    tokens = ('NUMBER', 'PLUS', 'TIMES', 'LPAREN', 'RPAREN')
+    t_PLUS = r'\+'
+    t_TIMES = r'\*'
+    t_LPAREN = r'\('
+    t_RPAREN = r'\)'
+    t_ignore = ' '
+
+    def t_NUMBER(self, t):
+        r'\d+'
+        t.value = int(t.value)
+        return t
+
+    def t_newline(self, t):
+        r'\n+'
+        t.lexer.lineno += len(t.value)
+
+    def t_error(self, t):
+        raise SyntaxError(t.value[0])
+
+    precedence = (('left', 'PLUS'), ('left', 'TIMES'))
+
+    def p_expr_binop(self, p):
+        '''expr : expr PLUS expr
+                | expr TIMES expr'''
+        p[0] = (p[2], p[1], p[3], p.linespan(0), p.lexspan(0))
+        self.symbols.append(p.slice[0])
+
+    def p_expr_group(self, p):
+        'expr : LPAREN expr RPAREN'
+        p[0] = p[2]
+        self.symbols.append(p.slice[0])
+
+    def p_expr_number(self, p):
+        'expr : NUMBER'
+        p[0] = p[1]
+        self.symbols.append(p.slice[0])
+
+def bench_parser(data):
+    calc = Calc()
+    lexer = lex.lex(module=calc)
+    with contextlib.redirect_stderr(io.StringIO()):
+        parser = yacc.yacc(module=calc, debug=False)
+
+    def run():
+        calc.symbols = []
+        lexer.lineno = 1
+        parser.parse(data, lexer=lexer, tracking=True)
+        return calc.symbols
+
+    print('Parsing %d characters with tracking=True' % len(data))
+    for label, symbolclass in [('unslotted', DictSymbol), ('YaccSymbol', yacc.YaccSymbol)]:
+        yacc.YaccSymbol, saved = symbolclass, yacc.YaccSymbol
+        try:
+            symbols = run()
+            t = best_of(run)
+        finally:
+            yacc.YaccSymbol = saved
+        size = footprint(symbolclass, ['type', 'value', 'lineno', 'lexpos', 'endlineno', 'endlexpos'])
+        print('    %-10s %6.1f bytes/symbol %8.1f ms  %10.0f symbols/sec' %
+              (label, size, t * 1000, len(symbols) / t))
+    print('    span of the last symbol: lines %d-%d, positions %d-%d' %
+          (symbols[-1].lineno, symbols[-1].endlineno, symbols[-1].lexpos, symbols[-1].endlexpos))
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()):
+        import clex
+
+    csource = '''
+    static int count_words(const char *s, int n)
+    {
+        int i, words = 0;
+        for (i = 0; i < n; i++) {
+            if (s[i] == ' ' && s[i+1] != ' ')
+                words += 1;   /* count it */
+        }
+        return words * 2 + 0x1f - 3.5e2;
+    }
+    '''
+    bench_lexer(clex.lexer, csource * 2000)
+    bench_parser(' + '.join(['(12 * 3\n + 4)'] * 20000))
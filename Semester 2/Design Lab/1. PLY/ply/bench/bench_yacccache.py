@@ -0,0 +1,53 @@
+# -----------------------------------------------------------------------------
+# bench_yacccache.py
+#
+# Compare the time needed to build the ANSI C parser with yacc() without a
+# cache (cold) and with a previously written on-disk table cache (warm).
+# -----------------------------------------------------------------------------
+
+import sys
+import os
+import io
+import time
+import tempfile
+import contextlib
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(here, '..', 'src'))
+sys.path.insert(0, os.path.join(here, '..', 'example', 'ansic'))
+
+import ply.yacc as yacc
+
+quiet = yacc.PlyLogger(io.StringIO())
+
+def best_of(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def bench(name, module):
+    cachefile = os.path.join(tempfile.mkdtemp(), name + '.yacccache')
+    cold = best_of(lambda: yacc.yacc(module=module, errorlog=quiet))
+    first = best_of(lambda: yacc.yacc(module=module, errorlog=quiet, cachefile=cachefile), repeat=1)
+    warm = best_of(lambda: yacc.yacc(module=module, errorlog=quiet, cachefile=cachefile))
+
+    # The cached tables must be the same as the ones just built
+    built = yacc.yacc(module=module, errorlog=quiet)
+    cached = yacc.yacc(module=module, errorlog=quiet, cachefile=cachefile)
+    assert cached.action == built.action and cached.goto == built.goto
+    assert [(p.name, p.len, p.func) for p in cached.productions] == \
+           [(p.name, p.len, p.func) for p in built.productions]
+
+    os.remove(cachefile)
+    print('%-12s cold %8.2f ms   cold+write %8.2f ms   warm %8.2f ms   speedup %5.1fx' %
+          (name, cold * 1000, first * 1000, warm * 1000, cold / warm))
+
+if __name__ == '__main__':
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import cparse
+    bench('ansic', cparse)
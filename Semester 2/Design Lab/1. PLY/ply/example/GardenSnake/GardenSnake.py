@@ -178,6 +178,14 @@ def t_error(t):
 # and the first non-WS/non-NEWLINE on a line.  It flags the check so
 # see if the new line has changed indication level.
 
+# LexToken only has slots for the standard attributes, so the two
+# extra attributes need a token subclass.  It is passed to lex.lex()
+# as the tokenclass.
+
+
+class IndentToken(lex.LexToken):
+    __slots__ = ('at_line_start', 'must_indent')
+
 # Python's syntax has three INDENT states
 #  0) no colon hence no need to indent
 #  1) "if 1: go()" - simple statements have a COLON but no need for an indent
@@ -226,7 +234,7 @@ def track_tokens_filter(lexer, tokens):
 
 
 def _new_token(type, lineno):
-    tok = lex.LexToken()
+    tok = IndentToken()
     tok.type = type
     tok.value = None
     tok.lineno = lineno
@@ -344,7 +352,7 @@ def filter(lexer, add_endmarker=True):
 class IndentLexer(object):
 
     def __init__(self, debug=0, reflags=0):
-        self.lexer = lex.lex(debug=debug, reflags=reflags)
+        self.lexer = lex.lex(debug=debug, reflags=reflags, tokenclass=IndentToken)
         self.token_stream = None
 
     def input(self, s, add_endmarker=True):
@@ -39,6 +39,28 @@ import types
 import copy
 import os
 import inspect
+import pickle
+import hashlib
+import tempfile
+import bisect
+import time
+import importlib
+from array import array
+
+# The regex parser is used to work out which characters each master regex
+# can start with.  It was renamed in Python 3.11.
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+# Version of the on-disk lexer cache format.  Bump this whenever the
+# layout of the cached tables changes.
+_lexcache_version = 2
+
+# Version of the format of modules written by write_lextab()
+_lextab_version = 1
 
 # This tuple contains acceptable string types
 StringTypes = (str, bytes)
@@ -54,10 +76,40 @@ class LexError(Exception):
         self.text = s
 
 # Token class.  This class is used to represent the tokens produced.
+# Tokens are slotted to keep them small.  To attach other attributes to
+# tokens, subclass LexToken and pass the subclass to lex() as tokenclass.
 class LexToken(object):
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'lexer')
+
     def __repr__(self):
         return f'LexToken({self.type},{self.value!r},{self.lineno},{self.lexpos})'
 
+# Token class used by binary lexers (lex(binary=True)).  The value is not
+# copied out of the input when the token is made.  It is sliced from
+# lexdata[lexstart:lexend] the first time it is read, so tokens whose values
+# are never looked at cost no copying.  Assigning to value works as usual.
+class BinaryToken(LexToken):
+    __slots__ = ('lexdata', 'lexstart', 'lexend', '_value')
+
+    @property
+    def value(self):
+        try:
+            return self._value
+        except AttributeError:
+            value = self._value = bytes(self.lexdata[self.lexstart:self.lexend])
+            return value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    # Pickle the slots rather than the value property, so that pickling
+    # doesn't copy the value out of the input
+    def __getstate__(self):
+        names = [name for cls in type(self).__mro__ for name in getattr(cls, '__slots__', ())]
+        return None, { name: getattr(self, name) for name in names
+                       if name != 'value' and hasattr(self, name) }
+
 # This object is a stand-in for a logging object created by the
 # logging module.
 
@@ -77,6 +129,33 @@ class PlyLogger(object):
     info = critical
     debug = critical
 
+# Result of Lexer.tokenize_marked() and Lexer.relex().  Holds the input text,
+# the list of tokens and a restart mark for each token.  Mark i is the lexer
+# state just before token i was scanned.  It is kept in three parallel
+# lists: positions, linenos and states.  states holds (lexstate,
+# lexstatestack) tuples.  There is one more mark than there are
+# tokens.  The last mark is the state at the end of the input.
+class MarkedTokens(object):
+    def __init__(self, data, tokens, positions, linenos, states):
+        self.data = data
+        self.tokens = tokens
+        self.positions = positions
+        self.linenos = linenos
+        self.states = states
+
+    # Return mark n as a tuple (lexpos, lineno, lexstate, lexstatestack)
+    def mark(self, n):
+        return (self.positions[n], self.linenos[n]) + self.states[n]
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def __iter__(self):
+        return iter(self.tokens)
+
+    def __getitem__(self, n):
+        return self.tokens[n]
+
 # -----------------------------------------------------------------------------
 #                        === Lexing Engine ===
 #
@@ -84,7 +163,14 @@ class PlyLogger(object):
 # a few public methods and attributes:
 #
 #    input()          -  Store a new string in the lexer
+#    input_stream()   -  Read input from a file or an iterable of strings
 #    token()          -  Get the next token
+#    tokenize_all()   -  Get all remaining tokens in one call
+#    tokenize_marked() - Get all tokens along with restart marks
+#    relex()          -  Update marked tokens after an edit to the text
+#    tokenize_parallel() - Lex independent chunks of the input in parallel
+#    profile_report() -  Counts and times per rule (lex(profile=True))
+#    print_profile()  -  Print the profile as a table
 #    clone()          -  Clone the lexer
 #
 #    lineno           -  Current line number
@@ -101,6 +187,10 @@ class Lexer:
         self.lexstatere = {}          # Dictionary mapping lexer states to master regexs
         self.lexstateretext = {}      # Dictionary mapping lexer states to regex strings
         self.lexstaterenames = {}     # Dictionary mapping lexer states to symbol names
+        self.lexstatedispatch = {}    # Dictionary mapping lexer states to dispatch tables
+        self.lexdispatch = {}         # Current dispatch table.  Maps a character to a
+                                      # list like lexre holding only the rules that
+                                      # can match starting at that character
         self.lexstate = 'INITIAL'     # Current lexer state
         self.lexstatestack = []       # Stack of lexer states
         self.lexstateinfo = None      # State information
@@ -118,6 +208,14 @@ class Lexer:
         self.lexliterals = ''         # Literal characters that can be passed through
         self.lexmodule = None         # Module
         self.lineno = 1               # Current line number
+        self.lextokenclass = LexToken # Class used to create tokens
+        self.lexbase = 0              # Input position of lexdata[0] (streaming)
+        self.lexstream = None         # Function that reads more input (streaming)
+        self.lexbufsize = 0           # Buffer size (streaming)
+        self.lexbinary = False        # Scan bytes with bytes patterns
+        self.lexprofile = None        # Profile counters (lex(profile=True))
+        self.lexrulemodule = None     # Name of the module with the rules (write_lextab)
+        self.lexsignature = None      # Signature of the rules (write_lextab)
 
     def clone(self, object=None):
         c = copy.copy(self)
@@ -127,23 +225,23 @@ class Lexer:
         # the lexstatere and lexstateerrorf tables.
 
         if object:
-            newtab = {}
+            rebound = {}
+            c.lexstatere = {}
             for key, ritem in self.lexstatere.items():
-                newre = []
-                for cre, findex in ritem:
-                    newfindex = []
-                    for f in findex:
-                        if not f or not f[0]:
-                            newfindex.append(f)
-                            continue
-                        newfindex.append((getattr(object, f[0].__name__), f[1]))
-                newre.append((cre, newfindex))
-                newtab[key] = newre
-            c.lexstatere = newtab
+                c.lexstatere[key] = _rebind_lexre(ritem, object, rebound)
+            c.lexstatedispatch = {}
+            for key, dispatch in self.lexstatedispatch.items():
+                c.lexstatedispatch[key] = { ch: _rebind_lexre(ritem, object, rebound)
+                                            for ch, ritem in dispatch.items() }
             c.lexstateerrorf = {}
             for key, ef in self.lexstateerrorf.items():
                 c.lexstateerrorf[key] = getattr(object, ef.__name__)
             c.lexmodule = object
+            c.begin(c.lexstate)
+
+        # Rebind an alternate scanner installed by input_stream()
+        if 'token' in self.__dict__:
+            c.token = getattr(c, self.token.__name__)
         return c
 
     # ------------------------------------------------------------
@@ -153,6 +251,80 @@ class Lexer:
         self.lexdata = s
         self.lexpos = 0
         self.lexlen = len(s)
+        self.lexbase = 0
+        self.lexstream = None
+        if self.lexbinary:
+            self.token = self._token_binary
+        elif self.lexprofile is not None:
+            self.token = self._token_profile
+        else:
+            self.__dict__.pop('token', None)
+
+    # ------------------------------------------------------------
+    # input_stream() - Read input from a file or other source
+    #
+    # source is a file-like object with a read() method or an iterable
+    # of strings (or bytes).  Text is read into a buffer of about bufsize
+    # characters.  Before each match the buffer is refilled if less than
+    # bufsize characters are left, and text that has already been scanned
+    # is released.  lexpos and lineno stay relative to the start of the
+    # input, while lexdata only holds the buffer.  lexbase is the input
+    # position of lexdata[0].
+    #
+    # The tokens are the same as input() gives for the whole text as long
+    # as every token, and whatever a rule must look at to decide that it
+    # does not match, fits in bufsize characters.  A match that runs to
+    # the end of the buffer is retried with more text, so tokens such as
+    # identifiers can be any length.  A longer token, for example a
+    # comment or quoted string of more than bufsize characters, may be
+    # split into shorter tokens.
+    # ------------------------------------------------------------
+    def input_stream(self, source, bufsize=65536):
+        if self.lexbinary:
+            raise ValueError('input_stream() does not work with binary lexers. Use input() with an mmap')
+        if bufsize < 2:
+            raise ValueError('bufsize must be at least 2')
+        if hasattr(source, 'read'):
+            def read():
+                return source.read(bufsize // 2)
+        else:
+            it = iter(source)
+            def read():
+                for chunk in it:
+                    if chunk:
+                        return chunk
+                return None
+
+        first = read() or ''
+        self.lexdata = first
+        self.lexpos = 0
+        self.lexlen = len(first)
+        self.lexbase = 0
+        self.lexstream = read if first else None
+        self.lexbufsize = bufsize
+        self.token = self._token_stream
+
+    # ------------------------------------------------------------
+    # _stream_fill() - Refill the streaming buffer
+    #
+    # Text before lexpos (a buffer position) is dropped.  More input is
+    # read until there are at least need characters from lexpos on, or
+    # the input runs out.  After this, lexpos is position 0 of lexdata.
+    # ------------------------------------------------------------
+    def _stream_fill(self, lexpos, need):
+        data = self.lexdata[lexpos:]
+        self.lexbase += lexpos
+        chunks = [data]
+        size = len(data)
+        while size < need:
+            chunk = self.lexstream()
+            if not chunk:
+                self.lexstream = None
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+        self.lexdata = type(data)().join(chunks)
+        self.lexlen = size
 
     # ------------------------------------------------------------
     # begin() - Changes the lexing state
@@ -162,6 +334,7 @@ class Lexer:
             raise ValueError(f'Undefined state {state!r}')
         self.lexre = self.lexstatere[state]
         self.lexretext = self.lexstateretext[state]
+        self.lexdispatch = self.lexstatedispatch.get(state, {})
         self.lexignore = self.lexstateignore.get(state, '')
         self.lexerrorf = self.lexstateerrorf.get(state, None)
         self.lexeoff = self.lexstateeoff.get(state, None)
@@ -212,14 +385,15 @@ class Lexer:
                 lexpos += 1
                 continue
 
-            # Look for a regular expression match
-            for lexre, lexindexfunc in self.lexre:
+            # Look for a regular expression match.  Only the master regexs that
+            # can start with the current character are tried.
+            for lexre, lexindexfunc in self.lexdispatch.get(lexdata[lexpos], self.lexre):
                 m = lexre.match(lexdata, lexpos)
                 if not m:
                     continue
 
                 # Create a token for return
-                tok = LexToken()
+                tok = self.lextokenclass()
                 tok.value = m.group()
                 tok.lineno = self.lineno
                 tok.lexpos = lexpos
@@ -256,7 +430,7 @@ class Lexer:
             else:
                 # No match, see if in literals
                 if lexdata[lexpos] in self.lexliterals:
-                    tok = LexToken()
+                    tok = self.lextokenclass()
                     tok.value = lexdata[lexpos]
                     tok.lineno = self.lineno
                     tok.type = tok.value
@@ -266,7 +440,7 @@ class Lexer:
 
                 # No match. Call t_error() if defined.
                 if self.lexerrorf:
-                    tok = LexToken()
+                    tok = self.lextokenclass()
                     tok.value = self.lexdata[lexpos:]
                     tok.lineno = self.lineno
                     tok.type = 'error'
@@ -280,6 +454,7 @@ class Lexer:
                                        lexdata[lexpos:])
                     lexpos = self.lexpos
                     if not newtok:
+                        lexignore = self.lexignore      # This is here in case there was a state change
                         continue
                     return newtok
 
@@ -288,7 +463,7 @@ class Lexer:
                                lexdata[lexpos:])
 
         if self.lexeoff:
-            tok = LexToken()
+            tok = self.lextokenclass()
             tok.type = 'eof'
             tok.value = ''
             tok.lineno = self.lineno
@@ -303,6 +478,836 @@ class Lexer:
             raise RuntimeError('No input string given with input()')
         return None
 
+    # ------------------------------------------------------------
+    # _token_stream() - Return the next token when reading from a stream
+    #
+    # This is token() for input_stream().  It is duplicated for speed.
+    # lexpos here is a position in the buffer.  self.lexpos and the token
+    # positions are input positions (lexbase + lexpos).
+    # ------------------------------------------------------------
+    def _token_stream(self):
+        lexbase   = self.lexbase
+        lexpos    = self.lexpos - lexbase
+        lexlen    = self.lexlen
+        lexignore = self.lexignore
+        lexdata   = self.lexdata
+        bufsize   = self.lexbufsize
+
+        while True:
+            # Keep at least bufsize characters of text ahead of the scan, so
+            # that a longer rule is never passed over for a shorter one just
+            # because the buffer ends.  Reading up to twice that keeps the
+            # refills to about one per bufsize characters.
+            if self.lexstream and lexlen - lexpos < bufsize:
+                self._stream_fill(lexpos, 2 * bufsize)
+                lexbase = self.lexbase
+                lexdata = self.lexdata
+                lexlen  = self.lexlen
+                lexpos  = 0
+
+            if lexpos >= lexlen:
+                break
+
+            if lexdata[lexpos] in lexignore:
+                lexpos += 1
+                continue
+
+            for lexre, lexindexfunc in self.lexdispatch.get(lexdata[lexpos], self.lexre):
+                m = lexre.match(lexdata, lexpos)
+                if not m:
+                    continue
+
+                if m.end() == lexlen and self.lexstream:
+                    # The match might go on past the end of the buffer.
+                    # Read more and try again.
+                    self._stream_fill(lexpos, lexlen - lexpos + bufsize)
+                    lexbase = self.lexbase
+                    lexdata = self.lexdata
+                    lexlen  = self.lexlen
+                    lexpos  = 0
+                    break
+
+                tok = self.lextokenclass()
+                tok.value = m.group()
+                tok.lineno = self.lineno
+                tok.lexpos = lexbase + lexpos
+
+                i = m.lastindex
+                func, tok.type = lexindexfunc[i]
+
+                if not func:
+                    if tok.type:
+                        self.lexpos = lexbase + m.end()
+                        return tok
+                    else:
+                        lexpos = m.end()
+                        break
+
+                tok.lexer = self
+                self.lexmatch = m
+                self.lexpos = lexbase + m.end()
+                newtok = func(tok)
+                del tok.lexer
+                del self.lexmatch
+
+                if not newtok:
+                    lexpos    = self.lexpos - lexbase
+                    lexignore = self.lexignore
+                    break
+                return newtok
+            else:
+                # No match, see if in literals
+                if lexdata[lexpos] in self.lexliterals:
+                    tok = self.lextokenclass()
+                    tok.value = lexdata[lexpos]
+                    tok.lineno = self.lineno
+                    tok.type = tok.value
+                    tok.lexpos = lexbase + lexpos
+                    self.lexpos = lexbase + lexpos + 1
+                    return tok
+
+                if self.lexerrorf:
+                    tok = self.lextokenclass()
+                    tok.value = lexdata[lexpos:]
+                    tok.lineno = self.lineno
+                    tok.type = 'error'
+                    tok.lexer = self
+                    tok.lexpos = lexbase + lexpos
+                    self.lexpos = lexbase + lexpos
+                    newtok = self.lexerrorf(tok)
+                    if lexbase + lexpos == self.lexpos:
+                        raise LexError(f"Scanning error. Illegal character {lexdata[lexpos]!r}",
+                                       lexdata[lexpos:])
+                    lexpos = self.lexpos - lexbase
+                    if not newtok:
+                        lexignore = self.lexignore
+                        continue
+                    return newtok
+
+                self.lexpos = lexbase + lexpos
+                raise LexError(f"Illegal character {lexdata[lexpos]!r} at index {lexbase + lexpos}",
+                               lexdata[lexpos:])
+
+        if self.lexeoff:
+            tok = self.lextokenclass()
+            tok.type = 'eof'
+            tok.value = ''
+            tok.lineno = self.lineno
+            tok.lexpos = lexbase + lexpos
+            tok.lexer = self
+            self.lexpos = lexbase + lexpos
+            newtok = self.lexeoff(tok)
+            return newtok
+
+        self.lexpos = lexbase + lexpos + 1
+        return None
+
+    # ------------------------------------------------------------
+    # _token_binary() - Return the next token for a binary lexer
+    #
+    # This is token() for lexers built with lex(binary=True).  It is
+    # duplicated for speed.  lexdata is bytes or any object that supports
+    # the buffer protocol, such as an mmap or a memoryview, so
+    # lexdata[lexpos] is an int.  Token values are not copied here.
+    # BinaryToken slices them from lexdata when they are read.
+    # ------------------------------------------------------------
+    def _token_binary(self):
+        lexpos    = self.lexpos
+        lexlen    = self.lexlen
+        lexignore = self.lexignore
+        lexdata   = self.lexdata
+
+        while lexpos < lexlen:
+            if lexdata[lexpos] in lexignore:
+                lexpos += 1
+                continue
+
+            for lexre, lexindexfunc in self.lexdispatch.get(lexdata[lexpos], self.lexre):
+                m = lexre.match(lexdata, lexpos)
+                if not m:
+                    continue
+
+                tok = self.lextokenclass()
+                tok.lexdata = lexdata
+                tok.lexstart = lexpos
+                tok.lexend = m.end()
+                tok.lineno = self.lineno
+                tok.lexpos = lexpos
+
+                i = m.lastindex
+                func, tok.type = lexindexfunc[i]
+
+                if not func:
+                    if tok.type:
+                        self.lexpos = m.end()
+                        return tok
+                    else:
+                        lexpos = m.end()
+                        break
+
+                lexpos = m.end()
+
+                tok.lexer = self
+                self.lexmatch = m
+                self.lexpos = lexpos
+                newtok = func(tok)
+                del tok.lexer
+                del self.lexmatch
+
+                if not newtok:
+                    lexpos    = self.lexpos
+                    lexignore = self.lexignore
+                    break
+                return newtok
+            else:
+                c = chr(lexdata[lexpos])
+                if c in self.lexliterals:
+                    tok = self.lextokenclass()
+                    tok.lexdata = lexdata
+                    tok.lexstart = lexpos
+                    tok.lexend = lexpos + 1
+                    tok.lineno = self.lineno
+                    tok.type = c
+                    tok.lexpos = lexpos
+                    self.lexpos = lexpos + 1
+                    return tok
+
+                if self.lexerrorf:
+                    # The value is the rest of the input, as with token().  It
+                    # is only copied if the error rule reads it.
+                    tok = self.lextokenclass()
+                    tok.lexdata = lexdata
+                    tok.lexstart = lexpos
+                    tok.lexend = lexlen
+                    tok.lineno = self.lineno
+                    tok.type = 'error'
+                    tok.lexer = self
+                    tok.lexpos = lexpos
+                    self.lexpos = lexpos
+                    newtok = self.lexerrorf(tok)
+                    if lexpos == self.lexpos:
+                        raise LexError(f"Scanning error. Illegal character {lexdata[lexpos:lexpos+1]!r}",
+                                       lexdata[lexpos:])
+                    lexpos = self.lexpos
+                    if not newtok:
+                        lexignore = self.lexignore
+                        continue
+                    return newtok
+
+                self.lexpos = lexpos
+                raise LexError(f"Illegal character {lexdata[lexpos:lexpos+1]!r} at index {lexpos}",
+                               lexdata[lexpos:])
+
+        if self.lexeoff:
+            tok = self.lextokenclass()
+            tok.type = 'eof'
+            tok.value = b''
+            tok.lineno = self.lineno
+            tok.lexpos = lexpos
+            tok.lexer = self
+            self.lexpos = lexpos
+            newtok = self.lexeoff(tok)
+            return newtok
+
+        self.lexpos = lexpos + 1
+        return None
+
+    # ------------------------------------------------------------
+    # _token_profile() - Return the next token and count what was done
+    #
+    # This is token() for lexers built with lex(profile=True).  It is
+    # duplicated so that token() itself pays nothing for profiling.  The
+    # counters are kept in self.lexprofile, a dictionary mapping keys to
+    # [count, seconds] lists.  The keys are:
+    #
+    #    (state, lexre, i)      Master regex lexre matched with rule group i
+    #    (state, lexre, None)   Master regex lexre did not match
+    #    (state, 'literal')     A literal character was returned
+    #    (state, 'error')       The error rule was called
+    #
+    # seconds is the time spent in the rule function.  profile_report()
+    # turns the counters into totals per rule.
+    # ------------------------------------------------------------
+    def _token_profile(self):
+        lexpos    = self.lexpos
+        lexlen    = self.lexlen
+        lexignore = self.lexignore
+        lexdata   = self.lexdata
+        counts    = self.lexprofile
+        clock     = time.perf_counter
+
+        while lexpos < lexlen:
+            if lexdata[lexpos] in lexignore:
+                lexpos += 1
+                continue
+
+            for lexre, lexindexfunc in self.lexdispatch.get(lexdata[lexpos], self.lexre):
+                m = lexre.match(lexdata, lexpos)
+                if not m:
+                    key = (self.lexstate, lexre, None)
+                    counts.setdefault(key, [0, 0.0])[0] += 1
+                    continue
+
+                tok = self.lextokenclass()
+                tok.value = m.group()
+                tok.lineno = self.lineno
+                tok.lexpos = lexpos
+
+                i = m.lastindex
+                func, tok.type = lexindexfunc[i]
+                count = counts.setdefault((self.lexstate, lexre, i), [0, 0.0])
+                count[0] += 1
+
+                if not func:
+                    if tok.type:
+                        self.lexpos = m.end()
+                        return tok
+                    else:
+                        lexpos = m.end()
+                        break
+
+                lexpos = m.end()
+
+                tok.lexer = self
+                self.lexmatch = m
+                self.lexpos = lexpos
+                start = clock()
+                newtok = func(tok)
+                count[1] += clock() - start
+                del tok.lexer
+                del self.lexmatch
+
+                if not newtok:
+                    lexpos    = self.lexpos
+                    lexignore = self.lexignore
+                    break
+                return newtok
+            else:
+                if lexdata[lexpos] in self.lexliterals:
+                    counts.setdefault((self.lexstate, 'literal'), [0, 0.0])[0] += 1
+                    tok = self.lextokenclass()
+                    tok.value = lexdata[lexpos]
+                    tok.lineno = self.lineno
+                    tok.type = tok.value
+                    tok.lexpos = lexpos
+                    self.lexpos = lexpos + 1
+                    return tok
+
+                if self.lexerrorf:
+                    count = counts.setdefault((self.lexstate, 'error'), [0, 0.0])
+                    count[0] += 1
+                    tok = self.lextokenclass()
+                    tok.value = self.lexdata[lexpos:]
+                    tok.lineno = self.lineno
+                    tok.type = 'error'
+                    tok.lexer = self
+                    tok.lexpos = lexpos
+                    self.lexpos = lexpos
+                    start = clock()
+                    newtok = self.lexerrorf(tok)
+                    count[1] += clock() - start
+                    if lexpos == self.lexpos:
+                        raise LexError(f"Scanning error. Illegal character {lexdata[lexpos]!r}",
+                                       lexdata[lexpos:])
+                    lexpos = self.lexpos
+                    if not newtok:
+                        lexignore = self.lexignore
+                        continue
+                    return newtok
+
+                self.lexpos = lexpos
+                raise LexError(f"Illegal character {lexdata[lexpos]!r} at index {lexpos}",
+                               lexdata[lexpos:])
+
+        if self.lexeoff:
+            tok = self.lextokenclass()
+            tok.type = 'eof'
+            tok.value = ''
+            tok.lineno = self.lineno
+            tok.lexpos = lexpos
+            tok.lexer = self
+            self.lexpos = lexpos
+            newtok = self.lexeoff(tok)
+            return newtok
+
+        self.lexpos = lexpos + 1
+        return None
+
+    # ------------------------------------------------------------
+    # profile_report() - Return the profile totals
+    #
+    # Returns a dictionary mapping each state to a dictionary mapping rule
+    # names to {'matches': n, 'failed': n, 'time': seconds}.  matches is
+    # the number of tokens the rule matched and time is the time spent in
+    # its function.  failed is the number of times the rule was tried as
+    # part of a master regex and did not match.  The alternatives of a
+    # master regex are tried in order, so a rule failed whenever a rule
+    # after it matched or the whole master regex failed.  The error rule
+    # is listed under its own name, and literal characters under
+    # 'literals'.
+    # ------------------------------------------------------------
+    def profile_report(self):
+        if self.lexprofile is None:
+            raise ValueError('Lexer was not built with lex(profile=True)')
+
+        # Rule groups of each master regex, in the order they are tried
+        order = {}
+        for lexre in self.lexstatere.values():
+            for cre, findex in lexre:
+                order[cre] = [i for i, f in enumerate(findex) if f]
+        for dispatch in self.lexstatedispatch.values():
+            for lexre in dispatch.values():
+                for cre, findex in lexre:
+                    order[cre] = [i for i, f in enumerate(findex) if f]
+
+        report = {}
+        def stats(state, name):
+            return report.setdefault(state, {}).setdefault(name, {'matches': 0, 'failed': 0, 'time': 0.0})
+
+        for key, (count, elapsed) in self.lexprofile.items():
+            state = key[0]
+            if key[1] == 'literal':
+                stats(state, 'literals')['matches'] += count
+                continue
+            if key[1] == 'error':
+                entry = stats(state, self.lexstateerrorf[state].__name__)
+                entry['matches'] += count
+                entry['time'] += elapsed
+                continue
+
+            lexre, i = key[1], key[2]
+            names = { n: name for name, n in lexre.groupindex.items() }
+            groups = order.get(lexre, [])
+            if i is None:
+                failed = groups
+            else:
+                entry = stats(state, names[i])
+                entry['matches'] += count
+                entry['time'] += elapsed
+                failed = groups[:groups.index(i)] if i in groups else []
+            for n in failed:
+                stats(state, names[n])['failed'] += count
+        return report
+
+    # ------------------------------------------------------------
+    # print_profile() - Print the profile as a table
+    #
+    # Rules are sorted by time and then by number of matches.
+    # ------------------------------------------------------------
+    def print_profile(self, file=None):
+        if file is None:
+            file = sys.stdout
+        rows = []
+        for state, rules in self.profile_report().items():
+            for name, entry in rules.items():
+                rows.append((entry['time'], entry['matches'], entry['failed'], state, name))
+        rows.sort(key=lambda row: (-row[0], -row[1], row[3], row[4]))
+        width = max([len(row[4]) for row in rows] + [4])
+        file.write(f'{"state":<12} {"rule":<{width}} {"matches":>10} {"failed":>10} {"time (ms)":>10}\n')
+        for elapsed, matches, failed, state, name in rows:
+            file.write(f'{state:<12} {name:<{width}} {matches:>10} {failed:>10} {elapsed * 1000:>10.3f}\n')
+
+    # ------------------------------------------------------------
+    # tokenize_all() - Return all of the remaining tokens
+    #
+    # This produces exactly the same tokens as calling token() until
+    # it returns None, but runs the whole scan in a single loop with
+    # the scanner state held in local variables.  If data is given,
+    # it is passed to input() first.  If columnar is True, the result
+    # is a tuple of parallel sequences (types, values, linenos, lexposes)
+    # instead of a list of tokens.  In that case, no LexToken instances
+    # are created for tokens that aren't processed by a rule function.
+    # ------------------------------------------------------------
+    def tokenize_all(self, data=None, columnar=False):
+        if data is not None:
+            self.input(data)
+
+        # Alternate scanners, such as the one used by input_stream()
+        if 'token' in self.__dict__:
+            toks = list(iter(self.token, None))
+            if columnar:
+                return ([tok.type for tok in toks], [tok.value for tok in toks],
+                        array('q', [tok.lineno for tok in toks]),
+                        array('q', [tok.lexpos for tok in toks]))
+            return toks
+
+        toks = []
+        append = toks.append
+        if columnar:
+            toktypes = []
+            values = []
+            linenos = array('q')
+            lexposes = array('q')
+            append_type = toktypes.append
+            append_value = values.append
+            append_lineno = linenos.append
+            append_lexpos = lexposes.append
+
+        # Make local copies of frequently referenced attributes.  These
+        # must be reloaded after any user function is called.
+        lexpos    = self.lexpos
+        lexlen    = self.lexlen
+        lexignore = self.lexignore
+        lexdata   = self.lexdata
+        lexre     = self.lexre
+        lexdispatch = self.lexdispatch
+        lineno    = self.lineno
+        lextokenclass = self.lextokenclass
+
+        while True:
+            while lexpos < lexlen:
+                if lexdata[lexpos] in lexignore:
+                    lexpos += 1
+                    continue
+
+                for cre, lexindexfunc in lexdispatch.get(lexdata[lexpos], lexre):
+                    m = cre.match(lexdata, lexpos)
+                    if not m:
+                        continue
+
+                    func, toktype = lexindexfunc[m.lastindex]
+                    if not func:
+                        if toktype:
+                            if columnar:
+                                append_type(toktype)
+                                append_value(m.group())
+                                append_lineno(lineno)
+                                append_lexpos(lexpos)
+                            else:
+                                tok = lextokenclass()
+                                tok.type = toktype
+                                tok.value = m.group()
+                                tok.lineno = lineno
+                                tok.lexpos = lexpos
+                                append(tok)
+                        lexpos = m.end()
+                        break
+
+                    tok = lextokenclass()
+                    tok.type = toktype
+                    tok.value = m.group()
+                    tok.lineno = lineno
+                    tok.lexpos = lexpos
+
+                    tok.lexer = self
+                    self.lexmatch = m
+                    self.lexpos = m.end()
+                    newtok = func(tok)
+                    del tok.lexer
+                    del self.lexmatch
+
+                    lexpos    = self.lexpos
+                    lexlen    = self.lexlen
+                    lexignore = self.lexignore
+                    lexdata   = self.lexdata
+                    lexre     = self.lexre
+                    lexdispatch = self.lexdispatch
+                    lineno    = self.lineno
+
+                    if newtok:
+                        if columnar:
+                            append_type(newtok.type)
+                            append_value(newtok.value)
+                            append_lineno(newtok.lineno)
+                            append_lexpos(newtok.lexpos)
+                        else:
+                            append(newtok)
+                    break
+                else:
+                    # No match, see if in literals
+                    c = lexdata[lexpos]
+                    if c in self.lexliterals:
+                        if columnar:
+                            append_type(c)
+                            append_value(c)
+                            append_lineno(lineno)
+                            append_lexpos(lexpos)
+                        else:
+                            tok = lextokenclass()
+                            tok.value = c
+                            tok.lineno = lineno
+                            tok.type = c
+                            tok.lexpos = lexpos
+                            append(tok)
+                        lexpos += 1
+                        continue
+
+                    # No match. Call t_error() if defined.
+                    if self.lexerrorf:
+                        tok = lextokenclass()
+                        tok.value = lexdata[lexpos:]
+                        tok.lineno = lineno
+                        tok.type = 'error'
+                        tok.lexer = self
+                        tok.lexpos = lexpos
+                        self.lexpos = lexpos
+                        newtok = self.lexerrorf(tok)
+                        if lexpos == self.lexpos:
+                            # Error method didn't change text position at all. This is an error.
+                            raise LexError(f"Scanning error. Illegal character {lexdata[lexpos]!r}",
+                                           lexdata[lexpos:])
+
+                        lexpos    = self.lexpos
+                        lexlen    = self.lexlen
+                        lexignore = self.lexignore
+                        lexdata   = self.lexdata
+                        lexre     = self.lexre
+                        lexdispatch = self.lexdispatch
+                        lineno    = self.lineno
+
+                        if newtok:
+                            if columnar:
+                                append_type(newtok.type)
+                                append_value(newtok.value)
+                                append_lineno(newtok.lineno)
+                                append_lexpos(newtok.lexpos)
+                            else:
+                                append(newtok)
+                        continue
+
+                    self.lexpos = lexpos
+                    raise LexError(f"Illegal character {lexdata[lexpos]!r} at index {lexpos}",
+                                   lexdata[lexpos:])
+
+            if not self.lexeoff:
+                break
+
+            tok = lextokenclass()
+            tok.type = 'eof'
+            tok.value = ''
+            tok.lineno = lineno
+            tok.lexpos = lexpos
+            tok.lexer = self
+            self.lexpos = lexpos
+            newtok = self.lexeoff(tok)
+            if not newtok:
+                break
+
+            if columnar:
+                append_type(newtok.type)
+                append_value(newtok.value)
+                append_lineno(newtok.lineno)
+                append_lexpos(newtok.lexpos)
+            else:
+                append(newtok)
+
+            # The eof rule may have supplied more input
+            lexpos    = self.lexpos
+            lexlen    = self.lexlen
+            lexignore = self.lexignore
+            lexdata   = self.lexdata
+            lexre     = self.lexre
+            lexdispatch = self.lexdispatch
+            lineno    = self.lineno
+
+        if not self.lexeoff:
+            self.lexpos = lexpos + 1
+            if self.lexdata is None:
+                raise RuntimeError('No input string given with input()')
+
+        if columnar:
+            return toktypes, values, linenos, lexposes
+        return toks
+
+    # ------------------------------------------------------------
+    # tokenize_marked() - Tokenize a string for later re-lexing
+    #
+    # Returns a MarkedTokens object holding the tokens and the lexer
+    # state (position, line number, state and state stack) before each
+    # token.  The result can be passed to relex() after the text is edited.
+    # ------------------------------------------------------------
+    def tokenize_marked(self, data):
+        self.input(data)
+        tokens = []
+        positions = []
+        linenos = []
+        states = []
+        while True:
+            positions.append(self.lexpos)
+            linenos.append(self.lineno)
+            states.append((self.lexstate, tuple(self.lexstatestack)))
+            tok = self.token()
+            if not tok:
+                break
+            tokens.append(tok)
+        return MarkedTokens(data, tokens, positions, linenos, states)
+
+    # ------------------------------------------------------------
+    # relex() - Re-lex marked tokens after an edit
+    #
+    # The edit replaces deleted characters at offset with the string
+    # inserted.  Scanning restarts from the last mark before the line
+    # that holds the edit.  It stops as soon as the lexer is past the
+    # edit and reaches a position, state and state stack that match a
+    # mark in the old token stream.  The rest of the old tokens are
+    # kept, with their lexpos and lineno shifted.  The MarkedTokens
+    # object is updated in place and returned.
+    #
+    # This assumes that no rule looks ahead past the end of the line
+    # where its match starts, unless the match itself spans the lines.
+    # Only the lexer position, line number and states are restored.
+    # Token rules that keep other state of their own can't be re-lexed
+    # this way.
+    # ------------------------------------------------------------
+    def relex(self, marked, offset, deleted, inserted):
+        olddata = marked.data
+        if offset < 0 or deleted < 0 or offset + deleted > len(olddata):
+            raise ValueError(f'Edit at {offset} of length {deleted} is outside the text')
+
+        data = olddata[:offset] + inserted + olddata[offset+deleted:]
+        delta = len(inserted) - deleted
+        editend = offset + len(inserted)
+        tokens = marked.tokens
+        positions = marked.positions
+        linenos = marked.linenos
+        states = marked.states
+
+        # Restart from the token whose text (with trailing ignored
+        # characters) reaches the start of the edited line.  A rule that
+        # fails to match may have looked ahead as far as the end of the line.
+        newline = '\n' if isinstance(olddata, str) else b'\n'
+        linestart = olddata.rfind(newline, 0, offset) + 1
+        start = max(bisect.bisect_left(positions, linestart) - 1, 0)
+
+        self.input(data)
+        self.begin(states[start][0])
+        self.lexstatestack = list(states[start][1])
+        self.lexpos = positions[start]
+        self.lineno = linenos[start]
+
+        newtokens = []
+        newpositions = []
+        newlinenos = []
+        newstates = []
+        end = len(positions)
+        while True:
+            lexpos = self.lexpos
+            state = (self.lexstate, tuple(self.lexstatestack))
+            if lexpos >= editend:
+                # Past the edit.  Look for the same state in the old marks
+                m = bisect.bisect_left(positions, lexpos - delta)
+                if m < end and positions[m] == lexpos - delta and states[m] == state:
+                    # Shift the old tokens and marks that are kept
+                    dl = self.lineno - linenos[m]
+                    if dl:
+                        for tok in tokens[m:]:
+                            tok.lexpos += delta
+                            tok.lineno += dl
+                        linenos[m:] = [n + dl for n in linenos[m:]]
+                    elif delta:
+                        for tok in tokens[m:]:
+                            tok.lexpos += delta
+                    if delta:
+                        positions[m:] = [p + delta for p in positions[m:]]
+                    end = m
+                    break
+            newpositions.append(lexpos)
+            newlinenos.append(self.lineno)
+            newstates.append(state)
+            tok = self.token()
+            if not tok:
+                break
+            newtokens.append(tok)
+
+        tokens[start:end] = newtokens
+        positions[start:end] = newpositions
+        linenos[start:end] = newlinenos
+        states[start:end] = newstates
+        marked.data = data
+
+        # Leave the lexer at the end of the new text
+        self.begin(states[-1][0])
+        self.lexstatestack = list(states[-1][1])
+        self.lexpos = positions[-1]
+        self.lineno = linenos[-1]
+        return marked
+
+    # ------------------------------------------------------------
+    # tokenize_parallel() - Lex the input in chunks in a process pool
+    #
+    # The input is split into chunks of about chunksize characters.  Each
+    # chunk ends just after an occurrence of boundary, a string (or bytes)
+    # such as '\n' after which lexing can safely start over.  Clones of the
+    # lexer scan the chunks in a pool of processes worker processes.  Every
+    # chunk starts in the current lexer state with lineno 1, so no state may
+    # be carried across a boundary.  The tokens are put back in input order
+    # and their lexpos and lineno are corrected, so the result is the same
+    # as from tokenize_all() and does not depend on the number of processes.
+    #
+    # Rule functions and the lexer must be picklable.  Define them at the
+    # top level of a module, or in a class passed to lex() as object.
+    # ------------------------------------------------------------
+    def tokenize_parallel(self, data, boundary, processes=None, chunksize=None, columnar=False):
+        if not boundary:
+            raise ValueError('boundary must not be empty')
+        if processes is None:
+            processes = os.cpu_count() or 1
+        if chunksize is None:
+            chunksize = max(len(data) // (processes * 4), 65536)
+
+        # Split the input
+        starts = [0]
+        while True:
+            end = data.find(boundary, starts[-1] + chunksize)
+            if end < 0 or end + len(boundary) >= len(data):
+                break
+            starts.append(end + len(boundary))
+
+        if processes == 1 or len(starts) == 1:
+            return self.tokenize_all(data, columnar)
+
+        c = self.clone()
+        c.lexdata = None
+        c.__dict__.pop('token', None)
+        c.lexstream = None
+        chunks = [data[start:end] for start, end in zip(starts, starts[1:] + [len(data)])]
+
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(processes, initializer=_parallel_init, initargs=(c, columnar)) as executor:
+            results = list(executor.map(_tokenize_chunk, chunks))
+
+        # Merge the results, shifting positions and line numbers
+        lineno = self.lineno
+        if columnar:
+            types, values, linenos, lexposes = [], [], array('q'), array('q')
+            for start, (result, lines) in zip(starts, results):
+                ctypes, cvalues, clinenos, clexposes = result
+                types.extend(ctypes)
+                values.extend(cvalues)
+                linenos.extend([n + lineno - 1 for n in clinenos])
+                lexposes.extend([p + start for p in clexposes])
+                lineno += lines
+            result = (types, values, linenos, lexposes)
+        else:
+            result = []
+            append = result.append
+            for start, (toks, lines) in zip(starts, results):
+                if isinstance(toks, tuple):
+                    # Plain LexTokens sent as columns
+                    for ttype, value, tlineno, lexpos in zip(*toks):
+                        tok = LexToken()
+                        tok.type = ttype
+                        tok.value = value
+                        tok.lineno = tlineno + lineno - 1
+                        tok.lexpos = lexpos + start
+                        append(tok)
+                else:
+                    for tok in toks:
+                        tok.lineno += lineno - 1
+                        tok.lexpos += start
+                        if self.lexbinary and hasattr(tok, 'lexstart'):
+                            tok.lexdata = data
+                            tok.lexstart += start
+                            tok.lexend += start
+                    result.extend(toks)
+                lineno += lines
+
+        # Leave the lexer at the end of the input
+        self.input(data)
+        self.lexpos = self.lexlen
+        self.lineno = lineno
+        return result
+
     # Iterator interface
     def __iter__(self):
         return self
@@ -313,6 +1318,41 @@ class Lexer:
             raise StopIteration
         return t
 
+# -----------------------------------------------------------------------------
+# _parallel_init() / _tokenize_chunk()
+#
+# Worker process side of Lexer.tokenize_parallel().  _parallel_init() runs
+# once in each worker and saves the lexer along with the state to start each
+# chunk in.  _tokenize_chunk() lexes one chunk from position 0 and line 1.
+# It returns the tokens and the number of lines the chunk moved lineno on by.
+# -----------------------------------------------------------------------------
+
+_parallel_lexer = None
+
+def _parallel_init(lexer, columnar):
+    global _parallel_lexer
+    _parallel_lexer = (lexer, lexer.lexstate, list(lexer.lexstatestack), columnar)
+
+def _tokenize_chunk(chunk):
+    lexer, state, stack, columnar = _parallel_lexer
+    lexer.begin(state)
+    lexer.lexstatestack = list(stack)
+    lexer.lineno = 1
+    result = lexer.tokenize_all(chunk, columnar)
+    if not columnar:
+        if all(type(tok) is LexToken for tok in result):
+            # Pickling token objects is slow.  Send plain tokens as columns
+            # and let the parent process make them again.
+            result = ([tok.type for tok in result], [tok.value for tok in result],
+                      [tok.lineno for tok in result], [tok.lexpos for tok in result])
+        elif lexer.lexbinary:
+            # Token values are sliced from the whole input by the parent
+            # process.  Don't send a copy of the chunk back with the tokens.
+            for tok in result:
+                if hasattr(tok, 'lexstart'):
+                    tok.lexdata = None
+    return result, lexer.lineno - 1
+
 # -----------------------------------------------------------------------------
 #                           ==== Lex Builder ===
 #
@@ -347,36 +1387,301 @@ def get_caller_module_dict(levels):
 # form the master regular expression.  Given limitations in the Python re
 # module, it may be necessary to break the master regex into separate expressions.
 # -----------------------------------------------------------------------------
-def _form_master_re(relist, reflags, ldict, toknames):
+def _form_master_re(relist, reflags, ldict, toknames, binary=False):
     if not relist:
         return [], [], []
     regex = '|'.join(relist)
     try:
-        lexre = re.compile(regex, reflags)
-
-        # Build the index to function map for the matching engine
-        lexindexfunc = [None] * (max(lexre.groupindex.values()) + 1)
-        lexindexnames = lexindexfunc[:]
-
-        for f, i in lexre.groupindex.items():
-            handle = ldict.get(f, None)
-            if type(handle) in (types.FunctionType, types.MethodType):
-                lexindexfunc[i] = (handle, toknames[f])
-                lexindexnames[i] = f
-            elif handle is not None:
-                lexindexnames[i] = f
-                if f.find('ignore_') > 0:
-                    lexindexfunc[i] = (None, None)
-                else:
-                    lexindexfunc[i] = (None, toknames[f])
-
+        lexre = re.compile(regex.encode('utf-8') if binary else regex, reflags)
+        lexindexfunc, lexindexnames = _form_index_func(lexre, ldict, toknames)
         return [(lexre, lexindexfunc)], [regex], [lexindexnames]
     except Exception:
         m = (len(relist) // 2) + 1
-        llist, lre, lnames = _form_master_re(relist[:m], reflags, ldict, toknames)
-        rlist, rre, rnames = _form_master_re(relist[m:], reflags, ldict, toknames)
+        llist, lre, lnames = _form_master_re(relist[:m], reflags, ldict, toknames, binary)
+        rlist, rre, rnames = _form_master_re(relist[m:], reflags, ldict, toknames, binary)
         return (llist+rlist), (lre+rre), (lnames+rnames)
 
+# -----------------------------------------------------------------------------
+# _form_index_func()
+#
+# Build the index to function map for the matching engine.  Given a compiled
+# master regex, returns a pair of lists (lexindexfunc, lexindexnames) indexed by
+# regex group number.
+# -----------------------------------------------------------------------------
+def _form_index_func(lexre, ldict, toknames):
+    lexindexfunc = [None] * (max(lexre.groupindex.values()) + 1)
+    lexindexnames = lexindexfunc[:]
+
+    for f, i in lexre.groupindex.items():
+        handle = ldict.get(f, None)
+        if type(handle) in (types.FunctionType, types.MethodType):
+            lexindexfunc[i] = (handle, toknames[f])
+            lexindexnames[i] = f
+        elif handle is not None:
+            lexindexnames[i] = f
+            if f.find('ignore_') > 0:
+                lexindexfunc[i] = (None, None)
+            else:
+                lexindexfunc[i] = (None, toknames[f])
+
+    return lexindexfunc, lexindexnames
+
+# -----------------------------------------------------------------------------
+# _compile_master_re()
+#
+# Compile master regex text that was previously produced by _form_master_re().
+# Returns the list of (lexre, lexindexfunc) pairs and the list of names.
+# -----------------------------------------------------------------------------
+def _compile_master_re(re_text, reflags, ldict, toknames, binary=False):
+    lexre = []
+    re_names = []
+    for text in re_text:
+        c = re.compile(text.encode('utf-8') if binary else text, reflags)
+        lexindexfunc, lexindexnames = _form_index_func(c, ldict, toknames)
+        lexre.append((c, lexindexfunc))
+        re_names.append(lexindexnames)
+    return lexre, re_names
+
+# -----------------------------------------------------------------------------
+# _rebind_lexre()
+#
+# Given a list of (lexre, lexindexfunc) pairs, return a copy in which the rule
+# functions are replaced by the methods of the same name on object.  Lists that
+# were already rebound are looked up in the rebound dictionary so that lists
+# shared by several dispatch table entries stay shared.
+# -----------------------------------------------------------------------------
+def _rebind_lexre(ritem, object, rebound):
+    if id(ritem) in rebound:
+        return rebound[id(ritem)]
+    newre = []
+    for cre, findex in ritem:
+        newfindex = []
+        for f in findex:
+            if not f or not f[0]:
+                newfindex.append(f)
+                continue
+            newfindex.append((getattr(object, f[0].__name__), f[1]))
+        newre.append((cre, newfindex))
+    rebound[id(ritem)] = newre
+    return newre
+
+# -----------------------------------------------------------------------------
+# _form_dispatch()
+#
+# Build the first-character dispatch table for one lexer state.  relist is
+# the list of rule regexs in master regex order.  Each rule is examined to
+# find the ASCII characters that a match can start with.  For every distinct
+# set of rules that can start at some character, a smaller master regex is
+# formed from just those rules.  The rules stay in their original order, so
+# the first rule to match is the same as with the full master regex.
+#
+# Returns (dispatch, dispatchtext).  dispatch maps a character to a list of
+# (lexre, lexindexfunc) pairs like Lexer.lexre.  dispatchtext is a list of
+# (chars, re_text) pairs used by the cache.  Characters that every rule can
+# start with are left out, as are non-ASCII characters.  token() falls back
+# to the full master regex for those.  For a binary lexer, the regexs are
+# compiled as bytes and the table is keyed by byte value.
+# -----------------------------------------------------------------------------
+def _form_dispatch(relist, reflags, ldict, toknames, binary=False):
+    parsed = []
+    flags = reflags
+    for regex in relist:
+        if not isinstance(regex, str):
+            return {}, []
+        try:
+            p = sre_parse.parse(regex, reflags)
+        except Exception:
+            return {}, []
+        if _has_groupref(p):
+            # Group numbers would change in a smaller master regex
+            return {}, []
+        parsed.append(p)
+        # Inline flags such as (?i) apply to the whole master regex
+        flags |= (p.state if hasattr(p, 'state') else p.pattern).flags
+    firsts = [_first_chars(p, flags) for p in parsed]
+
+    subsets = {}
+    for c in _ascii_chars:
+        selected = tuple(i for i, first in enumerate(firsts) if first is None or c in first)
+        if len(selected) < len(relist):
+            subsets.setdefault(selected, []).append(c)
+
+    dispatch = {}
+    dispatchtext = []
+    for selected, chars in subsets.items():
+        lexre, re_text, _ = _form_master_re([relist[i] for i in selected], reflags, ldict, toknames, binary)
+        for c in chars:
+            dispatch[ord(c) if binary else c] = lexre
+        dispatchtext.append((''.join(chars), re_text))
+    return dispatch, dispatchtext
+
+# -----------------------------------------------------------------------------
+# _first_chars()
+#
+# Given a parsed rule regex, return a frozenset of the ASCII characters that
+# a match can start with.  Returns None if this can't be worked out.  For
+# example, the regex might match the empty string or start with a wildcard.
+# The answer is conservative: a character may be in the set even though no
+# match starts with it, but never the other way around.
+# -----------------------------------------------------------------------------
+
+_ascii_chars = [chr(n) for n in range(128)]
+
+_category_re = {
+    sre_constants.CATEGORY_DIGIT: r'\d',
+    sre_constants.CATEGORY_NOT_DIGIT: r'\D',
+    sre_constants.CATEGORY_SPACE: r'\s',
+    sre_constants.CATEGORY_NOT_SPACE: r'\S',
+    sre_constants.CATEGORY_WORD: r'\w',
+    sre_constants.CATEGORY_NOT_WORD: r'\W',
+}
+
+_repeat_ops = tuple(getattr(sre_constants, name) for name in
+                    ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+                    if hasattr(sre_constants, name))
+
+def _first_chars(parsed, flags):
+    chars, nullable = _first_seq(parsed, flags)
+    if chars is None or nullable:
+        return None
+    return frozenset(c for c in chars if c < '\x80')
+
+# Returns (chars, nullable) for a sequence of regex items.  chars is None
+# if the sequence can start with any character.
+def _first_seq(items, flags):
+    first = set()
+    for op, av in items:
+        chars, nullable = _first_item(op, av, flags)
+        if chars is None:
+            return None, False
+        first |= chars
+        if not nullable:
+            return first, False
+    return first, True
+
+def _first_item(op, av, flags):
+    ignorecase = flags & re.IGNORECASE
+    if op == sre_constants.LITERAL:
+        if ignorecase:
+            if av > 127:
+                return None, False
+            return {chr(av).lower(), chr(av).upper()}, False
+        return {chr(av)}, False
+    elif op == sre_constants.NOT_LITERAL:
+        if av > 127:
+            return None, False
+        excluded = {chr(av).lower(), chr(av).upper()} if ignorecase else {chr(av)}
+        return set(_ascii_chars) - excluded, False
+    elif op == sre_constants.IN:
+        return _first_in(av, flags), False
+    elif op == sre_constants.BRANCH:
+        first = set()
+        anynullable = False
+        for alt in av[1]:
+            chars, nullable = _first_seq(alt, flags)
+            if chars is None:
+                return None, False
+            first |= chars
+            anynullable = anynullable or nullable
+        return first, anynullable
+    elif op == sre_constants.SUBPATTERN:
+        group, add_flags, del_flags, p = av
+        return _first_seq(p, (flags | add_flags) & ~del_flags)
+    elif op in _repeat_ops:
+        minrep, maxrep, p = av
+        chars, nullable = _first_seq(p, flags)
+        return chars, nullable or minrep == 0
+    elif op == getattr(sre_constants, 'ATOMIC_GROUP', None):
+        return _first_seq(av, flags)
+    elif op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        # Zero-width.  Lookaheads only narrow down what can match.
+        return set(), True
+    return None, False
+
+# ASCII characters matched by a character class [...]
+def _first_in(items, flags):
+    ignorecase = flags & re.IGNORECASE
+    negate = False
+    chars = set()
+    for op, av in items:
+        if op == sre_constants.NEGATE:
+            negate = True
+        elif op == sre_constants.LITERAL:
+            if ignorecase and av > 127:
+                return None
+            chars.add(chr(av))
+        elif op == sre_constants.RANGE:
+            lo, hi = av
+            if ignorecase and hi > 127:
+                return None
+            chars.update(_ascii_chars[lo:hi+1])
+        elif op == sre_constants.CATEGORY and av in _category_re:
+            catre = re.compile(_category_re[av], flags & re.ASCII)
+            chars.update(c for c in _ascii_chars if catre.match(c))
+        else:
+            return None
+    if ignorecase:
+        chars |= {c.swapcase() for c in chars if c < '\x80'}
+    if negate:
+        return set(_ascii_chars) - chars
+    return chars
+
+# True if a parsed regex contains a group reference such as \1 or (?P=name)
+def _has_groupref(items):
+    for op, av in items:
+        if op in (sre_constants.GROUPREF, sre_constants.GROUPREF_EXISTS):
+            return True
+        subs = av if isinstance(av, (list, tuple)) else [av]
+        for sub in subs:
+            if isinstance(sub, list):
+                if any(isinstance(alt, sre_parse.SubPattern) and _has_groupref(alt) for alt in sub):
+                    return True
+            elif isinstance(sub, sre_parse.SubPattern) and _has_groupref(sub):
+                return True
+    return False
+
+# -----------------------------------------------------------------------------
+# _read_lexcache() / _write_lexcache()
+#
+# Support for the optional on-disk lexer cache.  The cache holds the master
+# regular expression text for each state (already split into pieces that the
+# re module accepts) along with the first characters of each piece, and is
+# keyed on a signature of the token rules.  Reading
+# returns None on any kind of mismatch so that the caller rebuilds the tables.
+# Writing goes through a temporary file and os.replace() so that concurrent
+# processes never see a partially written cache.
+# -----------------------------------------------------------------------------
+def _read_lexcache(filename, signature):
+    try:
+        with open(filename, 'rb') as f:
+            data = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(data, dict):
+        return None
+    if data.get('version') != _lexcache_version or data.get('signature') != signature:
+        return None
+    return data.get('states')
+
+def _write_lexcache(filename, signature, states):
+    data = {
+        'version': _lexcache_version,
+        'signature': signature,
+        'states': states,
+    }
+    dirname = os.path.dirname(os.path.abspath(filename))
+    fd, tmpname = tempfile.mkstemp(dir=dirname, prefix='.lexcache-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpname, filename)
+    except BaseException:
+        try:
+            os.remove(tmpname)
+        except OSError:
+            pass
+        raise
+
 # -----------------------------------------------------------------------------
 # def _statetoken(s,names)
 #
@@ -434,6 +1739,32 @@ class LexerReflect(object):
         self.validate_rules()
         return self.error
 
+    # Compute a signature over the token rules.  Any change to the token
+    # names, rule regexes, rule order, states, literals, ignored characters
+    # or regex flags produces a different signature.  If version is false,
+    # the cache format and Python versions are left out.  This is used for
+    # lextab modules, which don't depend on them.
+    def signature(self, version=True):
+        parts = [
+            _lexcache_version,
+            sys.version_info[:2],
+        ] if version else []
+        parts += [
+            self.reflags,
+            list(self.tokens),
+            self.literals,
+            sorted(self.stateinfo.items()),
+        ]
+        try:
+            for state in self.stateinfo:
+                parts.append(state)
+                parts.append([(fname, _get_regex(f)) for fname, f in self.funcsym[state]])
+                parts.append(list(self.strsym[state]))
+                parts.append(self.ignore.get(state))
+        except (AttributeError, KeyError):
+            pass
+        return hashlib.sha256(repr(parts).encode('utf-8', 'backslashreplace')).hexdigest()
+
     # Get the tokens map
     def get_tokens(self):
         tokens = self.ldict.get('tokens', None)
@@ -712,10 +2043,14 @@ class LexerReflect(object):
 # -----------------------------------------------------------------------------
 # lex(module)
 #
-# Build all of the regular expression rules from definitions in the supplied module
+# Build all of the regular expression rules from definitions in the supplied module.
+# Unless bindglobals is false, the new lexer also becomes the module's lexer,
+# token() and input().  Programs that build lexers in several threads should
+# turn this off and always pass the lexer they want to use.
 # -----------------------------------------------------------------------------
 def lex(*, module=None, object=None, debug=False, 
-        reflags=int(re.VERBOSE), debuglog=None, errorlog=None):
+        reflags=int(re.VERBOSE), debuglog=None, errorlog=None,
+        cachefile=None, tokenclass=None, binary=False, profile=False, bindglobals=True):
 
     global lexer
 
@@ -724,6 +2059,10 @@ def lex(*, module=None, object=None, debug=False,
     lexobj = Lexer()
     global token, input
 
+    # re.UNICODE can't be used with bytes patterns
+    if binary:
+        reflags &= ~re.UNICODE
+
     if errorlog is None:
         errorlog = PlyLogger(sys.stderr)
 
@@ -748,7 +2087,15 @@ def lex(*, module=None, object=None, debug=False,
     # Collect parser information from the dictionary
     linfo = LexerReflect(ldict, log=errorlog, reflags=reflags)
     linfo.get_all()
-    if linfo.validate_all():
+
+    # If a cache file was given, try to reuse previously built master regexes.
+    # On a hit, rule validation and the master regex construction are skipped.
+    cached = None
+    if cachefile and not linfo.error:
+        signature = linfo.signature()
+        cached = _read_lexcache(cachefile, signature)
+
+    if not cached and linfo.validate_all():
         raise SyntaxError("Can't build lexer")
 
     # Dump some basic debugging information
@@ -773,42 +2120,79 @@ def lex(*, module=None, object=None, debug=False,
     # Get the stateinfo dictionary
     stateinfo = linfo.stateinfo
 
-    regexs = {}
-    # Build the master regular expressions
-    for state in stateinfo:
-        regex_list = []
-
-        # Add rules defined by functions first
-        for fname, f in linfo.funcsym[state]:
-            regex_list.append('(?P<%s>%s)' % (fname, _get_regex(f)))
-            if debug:
-                debuglog.info("lex: Adding rule %s -> '%s' (state '%s')", fname, _get_regex(f), state)
+    if cached:
+        if debug:
+            debuglog.info('lex: using cached master regexs from %r', cachefile)
+
+        for state, tables in cached.items():
+            lexre, re_names = _compile_master_re(tables['re'], reflags, ldict, linfo.toknames, binary)
+            lexobj.lexstatere[state] = lexre
+            lexobj.lexstateretext[state] = list(tables['re'])
+            lexobj.lexstaterenames[state] = re_names
+            dispatch = {}
+            for chars, re_text in tables['dispatch']:
+                lexre, _ = _compile_master_re(re_text, reflags, ldict, linfo.toknames, binary)
+                for c in chars:
+                    dispatch[ord(c) if binary else c] = lexre
+            lexobj.lexstatedispatch[state] = dispatch
+    else:
+        regexs = {}
+        # Build the master regular expressions
+        for state in stateinfo:
+            regex_list = []
 
-        # Now add all of the simple rules
-        for name, r in linfo.strsym[state]:
-            regex_list.append('(?P<%s>%s)' % (name, r))
-            if debug:
-                debuglog.info("lex: Adding rule %s -> '%s' (state '%s')", name, r, state)
+            # Add rules defined by functions first
+            for fname, f in linfo.funcsym[state]:
+                regex_list.append('(?P<%s>%s)' % (fname, _get_regex(f)))
+                if debug:
+                    debuglog.info("lex: Adding rule %s -> '%s' (state '%s')", fname, _get_regex(f), state)
 
-        regexs[state] = regex_list
+            # Now add all of the simple rules
+            for name, r in linfo.strsym[state]:
+                regex_list.append('(?P<%s>%s)' % (name, r))
+                if debug:
+                    debuglog.info("lex: Adding rule %s -> '%s' (state '%s')", name, r, state)
 
-    # Build the master regular expressions
+            regexs[state] = regex_list
 
-    if debug:
-        debuglog.info('lex: ==== MASTER REGEXS FOLLOW ====')
+        # Build the master regular expressions
 
-    for state in regexs:
-        lexre, re_text, re_names = _form_master_re(regexs[state], reflags, ldict, linfo.toknames)
-        lexobj.lexstatere[state] = lexre
-        lexobj.lexstateretext[state] = re_text
-        lexobj.lexstaterenames[state] = re_names
         if debug:
-            for i, text in enumerate(re_text):
-                debuglog.info("lex: state '%s' : regex[%d] = '%s'", state, i, text)
+            debuglog.info('lex: ==== MASTER REGEXS FOLLOW ====')
+
+        dispatchtext = {}
+        for state in regexs:
+            lexre, re_text, re_names = _form_master_re(regexs[state], reflags, ldict, linfo.toknames, binary)
+            lexobj.lexstatere[state] = lexre
+            lexobj.lexstateretext[state] = re_text
+            lexobj.lexstaterenames[state] = re_names
+            if debug:
+                for i, text in enumerate(re_text):
+                    debuglog.info("lex: state '%s' : regex[%d] = '%s'", state, i, text)
+
+            # Build the first-character dispatch table
+            dispatch, dispatchtext[state] = _form_dispatch(regexs[state], reflags, ldict, linfo.toknames, binary)
+            lexobj.lexstatedispatch[state] = dispatch
+            if debug:
+                debuglog.info("lex: state '%s' : %d dispatch regexs", state, len(dispatchtext[state]))
+
+        if cachefile:
+            states = { state: {'re': list(lexobj.lexstateretext[state]), 'dispatch': dispatchtext[state]}
+                       for state in lexobj.lexstateretext }
+            try:
+                _write_lexcache(cachefile, signature, states)
+            except (OSError, pickle.PicklingError) as e:
+                errorlog.warning("Couldn't write lexer cache %r. %s", cachefile, e)
 
     # For inclusive states, we need to add the regular expressions from the INITIAL state
     for state, stype in stateinfo.items():
         if state != 'INITIAL' and stype == 'inclusive':
+            statere = lexobj.lexstatere[state]
+            dispatch = lexobj.lexstatedispatch[state]
+            initre = lexobj.lexstatere['INITIAL']
+            initdispatch = lexobj.lexstatedispatch['INITIAL']
+            lexobj.lexstatedispatch[state] = { c: dispatch.get(c, statere) + initdispatch.get(c, initre)
+                                               for c in set(dispatch) | set(initdispatch) }
             lexobj.lexstatere[state].extend(lexobj.lexstatere['INITIAL'])
             lexobj.lexstateretext[state].extend(lexobj.lexstateretext['INITIAL'])
             lexobj.lexstaterenames[state].extend(lexobj.lexstaterenames['INITIAL'])
@@ -816,7 +2200,22 @@ def lex(*, module=None, object=None, debug=False,
     lexobj.lexstateinfo = stateinfo
     lexobj.lexre = lexobj.lexstatere['INITIAL']
     lexobj.lexretext = lexobj.lexstateretext['INITIAL']
+    lexobj.lexdispatch = lexobj.lexstatedispatch['INITIAL']
     lexobj.lexreflags = reflags
+    if tokenclass:
+        lexobj.lextokenclass = tokenclass
+    elif binary:
+        lexobj.lextokenclass = BinaryToken
+    if profile:
+        if binary:
+            errorlog.warning('Profiling is not supported for binary lexers')
+        else:
+            lexobj.lexprofile = {}
+
+    # Remember where the rules came from for write_lextab()
+    if not object:
+        lexobj.lexrulemodule = ldict.get('__name__')
+    lexobj.lexsignature = linfo.signature(version=False)
 
     # Set up ignore variables
     lexobj.lexstateignore = linfo.ignore
@@ -845,11 +2244,242 @@ def lex(*, module=None, object=None, debug=False,
             if s not in linfo.ignore:
                 linfo.ignore[s] = linfo.ignore.get('INITIAL', '')
 
+    # A binary lexer compares ignored characters with bytes of the input
+    if binary:
+        lexobj.lexbinary = True
+        lexobj.lexstateignore = { s: linfo.ignore.get(s, '').encode('utf-8') for s in stateinfo }
+        lexobj.lexignore = lexobj.lexstateignore['INITIAL']
+
     # Create global versions of the token() and input() functions
-    token = lexobj.token
-    input = lexobj.input
-    lexer = lexobj
+    if bindglobals:
+        token = lexobj.token
+        input = lexobj.input
+        lexer = lexobj
+
+    return lexobj
+
+# -----------------------------------------------------------------------------
+# write_lextab()
+#
+# Write the tables of a lexer made by lex() to a Python module.  The module
+# holds only data: the master regex text for each state and for the
+# dispatch table, the rule names and token types of the regex groups, and
+# the ignore, literal, error and eof settings.  Regexs are listed once and the states
+# refer to them by number.  load_lextab() turns the module back into a
+# lexer without looking through the rules or building the master regexs.
+# -----------------------------------------------------------------------------
+
+def write_lextab(lexer, filename):
+    regexs = []
+    numbers = {}
+    def regex_numbers(lexre):
+        result = []
+        for cre, findex in lexre:
+            if id(cre) not in numbers:
+                numbers[id(cre)] = len(regexs)
+                text = cre.pattern.decode('utf-8') if lexer.lexbinary else cre.pattern
+                # Rule functions are saved under their group name, which is
+                # the name they were found under in the rules module
+                groups = { i: name for name, i in cre.groupindex.items() }
+                names = [groups[i] if f else None for i, f in enumerate(findex)]
+                regexs.append((text, [(names[i] if f[0] else None, f[1]) if f else None
+                                      for i, f in enumerate(findex)], names))
+            result.append(numbers[id(cre)])
+        return result
+
+    statere = { state: regex_numbers(lexre) for state, lexre in lexer.lexstatere.items() }
+    statedispatch = {}
+    for state, dispatch in lexer.lexstatedispatch.items():
+        # Group the characters that share a list of regexs
+        groups = {}
+        for c, lexre in dispatch.items():
+            groups.setdefault(id(lexre), (lexre, []))[1].append(chr(c) if lexer.lexbinary else c)
+        statedispatch[state] = [(''.join(sorted(chars)), regex_numbers(lexre))
+                                for lexre, chars in groups.values()]
+    stateignore = { state: ignore.decode('utf-8') if lexer.lexbinary else ignore
+                    for state, ignore in lexer.lexstateignore.items() }
+    stateerrorf = { state: f.__name__ for state, f in lexer.lexstateerrorf.items() if f }
+    stateeoff = { state: f.__name__ for state, f in lexer.lexstateeoff.items() if f }
+
+    modname = os.path.splitext(os.path.basename(filename))[0]
+    lines = [
+        f'# {modname}.py',
+        f'# This file was written by PLY from the token rules in {lexer.lexrulemodule!r}.',
+        "# Don't edit it.  Write it again with lex.write_lextab() when the rules change.",
+        '',
+        f'_tabversion = {_lextab_version!r}',
+        f'_signature = {lexer.lexsignature!r}',
+        f'_rulemodule = {lexer.lexrulemodule!r}',
+        f'_lexbinary = {lexer.lexbinary!r}',
+        f'_lexreflags = {int(lexer.lexreflags)!r}',
+        f'_lextokens = {sorted(lexer.lextokens)!r}',
+        f'_lexliterals = {lexer.lexliterals!r}',
+        f'_lexstateinfo = {lexer.lexstateinfo!r}',
+        f'_lexstateignore = {stateignore!r}',
+        f'_lexstateerrorf = {stateerrorf!r}',
+        f'_lexstateeoff = {stateeoff!r}',
+        f'_lexstatere = {statere!r}',
+        f'_lexstatedispatch = {statedispatch!r}',
+        '_lexregexs = [',
+    ]
+    for regex in regexs:
+        lines.append(f'    {regex!r},')
+    lines.append(']')
+
+    # Write through a temporary file so that a module that is being
+    # imported is never seen half written
+    dirname = os.path.dirname(os.path.abspath(filename))
+    fd, tmpname = tempfile.mkstemp(dir=dirname, prefix='.lextab-', suffix='.py')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmpname, filename)
+    except BaseException:
+        try:
+            os.remove(tmpname)
+        except OSError:
+            pass
+        raise
+
+# -----------------------------------------------------------------------------
+# _LazyRegex
+#
+# A master regex loaded from a lextab module.  It is compiled the first time
+# it is used, so a program only pays for the regexs it needs.  A lexer has
+# one regex for each state and often dozens for the dispatch tables.  Once
+# compiled, it replaces itself in the (lexre, lexindexfunc) lists it was
+# put in, so later matches go straight to the compiled regex.
+# -----------------------------------------------------------------------------
+
+class _LazyRegex(object):
+    def __init__(self, text, flags):
+        self.text = text
+        self.flags = flags
+        self.lists = []
+        self.cre = None
+
+    def compile(self):
+        if self.cre is None:
+            self.cre = re.compile(self.text, self.flags)
+            for lexre in self.lists:
+                for i, (cre, findex) in enumerate(lexre):
+                    if cre is self:
+                        lexre[i] = (self.cre, findex)
+            self.lists = []
+        return self.cre
+
+    def match(self, string, pos=0):
+        return self.compile().match(string, pos)
+
+    @property
+    def pattern(self):
+        return self.text
+
+    @property
+    def groupindex(self):
+        return self.compile().groupindex
+
+# -----------------------------------------------------------------------------
+# load_lextab()
+#
+# Make a lexer from a module written by write_lextab().  tabmodule is the
+# module or its name.  Rule functions are looked up by name on object or
+# module if given, or else on the module the rules came from, which is
+# imported by name.  The caller's namespace is never searched for rules.
+#
+# The master regexs are compiled the first time they are used (see
+# _LazyRegex).  If check is true, the rules are read and compared with the
+# signature saved in the module.  If they differ, or if the module was written by a
+# different version of PLY, a warning is logged and the lexer is built
+# from the rules with lex() instead.  bindglobals is the same as for lex().
+# -----------------------------------------------------------------------------
+
+def load_lextab(tabmodule, *, module=None, object=None, check=False, errorlog=None, tokenclass=None,
+                bindglobals=True):
+    global lexer, token, input
+
+    if errorlog is None:
+        errorlog = PlyLogger(sys.stderr)
+    if isinstance(tabmodule, str):
+        tabmodule = importlib.import_module(tabmodule)
+    tab = tabmodule.__dict__
+
+    source = object or module
+    if source is None:
+        source = importlib.import_module(tab['_rulemodule'])
+
+    def rebuild(reason):
+        errorlog.warning('%s: %s. Building the lexer from the rules', tabmodule.__name__, reason)
+        return lex(module=None if object else source, object=object, errorlog=errorlog,
+                   reflags=tab.get('_lexreflags', int(re.VERBOSE)), binary=tab.get('_lexbinary', False),
+                   tokenclass=tokenclass, bindglobals=bindglobals)
+
+    if tab.get('_tabversion') != _lextab_version:
+        return rebuild('lextab was written by a different version of PLY')
+
+    binary = tab['_lexbinary']
+    reflags = tab['_lexreflags']
+    if check:
+        ldict = { k: getattr(source, k) for k in dir(source) }
+        linfo = LexerReflect(ldict, log=errorlog, reflags=reflags)
+        linfo.get_all()
+        if linfo.signature(version=False) != tab['_signature']:
+            return rebuild('lextab does not match the token rules')
+
+    # Compile the regexs and bind the rule functions
+    funcs = {}
+    def bind(name):
+        if name not in funcs:
+            funcs[name] = getattr(source, name)
+        return funcs[name]
+
+    regexs = []
+    for text, findex, names in tab['_lexregexs']:
+        cre = _LazyRegex(text.encode('utf-8') if binary else text, reflags)
+        findex = [(bind(f[0]) if f[0] else None, f[1]) if f else None for f in findex]
+        regexs.append((cre, findex))
+
+    def regex_list(numbers):
+        lexre = [regexs[n] for n in numbers]
+        for n in numbers:
+            regexs[n][0].lists.append(lexre)
+        return lexre
 
+    lexobj = Lexer()
+    for state, numbers in tab['_lexstatere'].items():
+        lexobj.lexstatere[state] = regex_list(numbers)
+        lexobj.lexstateretext[state] = [tab['_lexregexs'][n][0] for n in numbers]
+        lexobj.lexstaterenames[state] = [tab['_lexregexs'][n][2] for n in numbers]
+    for state, groups in tab['_lexstatedispatch'].items():
+        dispatch = {}
+        for chars, numbers in groups:
+            lexre = regex_list(numbers)
+            for c in chars:
+                dispatch[ord(c) if binary else c] = lexre
+        lexobj.lexstatedispatch[state] = dispatch
+
+    lexobj.lextokens = set(tab['_lextokens'])
+    lexobj.lexliterals = tab['_lexliterals']
+    lexobj.lextokens_all = lexobj.lextokens | set(lexobj.lexliterals)
+    lexobj.lexstateinfo = tab['_lexstateinfo']
+    lexobj.lexreflags = reflags
+    lexobj.lexstateignore = { state: ignore.encode('utf-8') if binary else ignore
+                              for state, ignore in tab['_lexstateignore'].items() }
+    lexobj.lexstateerrorf = { state: bind(name) for state, name in tab['_lexstateerrorf'].items() }
+    lexobj.lexstateeoff = { state: bind(name) for state, name in tab['_lexstateeoff'].items() }
+    lexobj.lexbinary = binary
+    if tokenclass:
+        lexobj.lextokenclass = tokenclass
+    elif binary:
+        lexobj.lextokenclass = BinaryToken
+    lexobj.lexrulemodule = tab['_rulemodule']
+    lexobj.lexsignature = tab['_signature']
+    lexobj.begin('INITIAL')
+
+    if bindglobals:
+        token = lexobj.token
+        input = lexobj.input
+        lexer = lexobj
     return lexobj
 
 # -----------------------------------------------------------------------------
@@ -868,22 +2498,22 @@ def runmain(lexer=None, data=None):
             sys.stdout.write('Reading from standard input (type EOF to end):\n')
             data = sys.stdin.read()
 
-    if lexer:
-        _input = lexer.input
-    else:
-        _input = input
-    _input(data)
-    if lexer:
-        _token = lexer.token
-    else:
-        _token = token
+    # Use the lexer object rather than the module level token() function,
+    # which does not know about the profiling and binary scanners
+    if not lexer:
+        lexer = globals()['lexer']
+    lexer.input(data)
 
     while True:
-        tok = _token()
+        tok = lexer.token()
         if not tok:
             break
         sys.stdout.write(f'({tok.type},{tok.value!r},{tok.lineno},{tok.lexpos})\n')
 
+    if lexer.lexprofile is not None:
+        sys.stdout.write('\n')
+        lexer.print_profile()
+
 # -----------------------------------------------------------------------------
 # @TOKEN(regex)
 #
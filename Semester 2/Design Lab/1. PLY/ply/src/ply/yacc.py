@@ -64,7 +64,20 @@
 import re
 import types
 import sys
+import os
+import threading
+import contextvars
 import inspect
+import pickle
+import copy
+import time
+import collections
+import gc
+import itertools
+import importlib
+import hashlib
+import tempfile
+from array import array
 
 #-----------------------------------------------------------------------------
 #                     === User configurable parameters ===
@@ -79,6 +92,9 @@ debug_file  = 'parser.out'     # Default name of the debugging file
 error_count = 3                # Number of symbols that must be shifted to leave recovery mode
 resultlimit = 40               # Size limit of results when running in debug mode.
 
+_yacccache_version = 2         # Version of the on-disk table cache format
+_parser_version = 3            # Version of the modules written by write_parser()
+
 MAXINT = sys.maxsize
 
 # This object is a stand-in for a logging object created by the
@@ -152,8 +168,13 @@ def format_stack_entry(r):
 #        .endlineno  = Ending line number (optional, set automatically)
 #        .lexpos     = Starting lex position
 #        .endlexpos  = Ending lex position (optional, set automatically)
+#
+# Symbols are slotted.  Attributes that have not been set raise
+# AttributeError, so they are read with getattr() and a default.
 
 class YaccSymbol:
+    __slots__ = ('type', 'value', 'lineno', 'lexpos', 'endlineno', 'endlexpos', 'lexer')
+
     def __str__(self):
         return self.type
 
@@ -168,56 +189,326 @@ class YaccSymbol:
 # a tuple of (startline,endline) representing the range of lines
 # for a symbol.  The lexspan() method returns a tuple (lexpos,endlexpos)
 # representing the range of positional information for a symbol.
+#
+# It is a view of the symbol stack: p[1] to p[length-1] are the symbols
+# from stack[base] up, which are still on the stack while the rule runs,
+# and p[0] is sym.  Negative indices give the symbols below the rule.
+# slice is the list of all of them, made when it is asked for.
 
 class YaccProduction:
     def __init__(self, s, stack=None):
-        self.slice = s
         self.stack = stack
+        self.sym = None
+        self.base = 0
+        self.length = 0
         self.lexer = None
         self.parser = None
+        if s is not None:
+            self.stack = s
+            self.sym = s[0]
+            self.base = 1
+            self.length = len(s)
 
     def __getitem__(self, n):
         if isinstance(n, slice):
             return [s.value for s in self.slice[n]]
-        elif n >= 0:
-            return self.slice[n].value
-        else:
-            return self.stack[n].value
+        elif n > 0:
+            return self.stack[self.base + n - 1].value
+        elif n == 0:
+            return self.sym.value
+        elif self.base + n >= 0:
+            return self.stack[self.base + n].value
+        raise IndexError('production index out of range')
 
     def __setitem__(self, n, v):
-        self.slice[n].value = v
+        if n == 0:
+            self.sym.value = v
+        else:
+            self._symbol(n).value = v
 
     def __getslice__(self, i, j):
         return [s.value for s in self.slice[i:j]]
 
     def __len__(self):
-        return len(self.slice)
+        return self.length
+
+    @property
+    def slice(self):
+        return [self.sym] + self.stack[self.base:self.base + self.length - 1]
+
+    def _symbol(self, n):
+        if n < 0:
+            n += self.length
+        if n == 0:
+            return self.sym
+        if 0 < n < self.length:
+            return self.stack[self.base + n - 1]
+        raise IndexError('production index out of range')
 
     def lineno(self, n):
-        return getattr(self.slice[n], 'lineno', 0)
+        return getattr(self._symbol(n), 'lineno', 0)
 
     def set_lineno(self, n, lineno):
-        self.slice[n].lineno = lineno
+        self._symbol(n).lineno = lineno
 
     def linespan(self, n):
-        startline = getattr(self.slice[n], 'lineno', 0)
-        endline = getattr(self.slice[n], 'endlineno', startline)
+        startline = getattr(self._symbol(n), 'lineno', 0)
+        endline = getattr(self._symbol(n), 'endlineno', startline)
         return startline, endline
 
     def lexpos(self, n):
-        return getattr(self.slice[n], 'lexpos', 0)
+        return getattr(self._symbol(n), 'lexpos', 0)
 
     def set_lexpos(self, n, lexpos):
-        self.slice[n].lexpos = lexpos
+        self._symbol(n).lexpos = lexpos
 
     def lexspan(self, n):
-        startpos = getattr(self.slice[n], 'lexpos', 0)
-        endpos = getattr(self.slice[n], 'endlexpos', startpos)
+        startpos = getattr(self._symbol(n), 'lexpos', 0)
+        endpos = getattr(self._symbol(n), 'endlexpos', startpos)
         return startpos, endpos
 
     def error(self):
         raise SyntaxError
 
+# -----------------------------------------------------------------------------
+# ParseContext
+#
+# The state of one call to parse(): the state and symbol stacks, the current
+# state, the token function and the error recovery flag.  Each call has a
+# context of its own, so that one parser can be used by many threads at once
+# and rule functions can call parse() again.  The context of the innermost
+# parse() running in a thread (or asyncio task) is kept in _parse_context.
+# errok(), restart() and token() of the parser act on that context.
+# -----------------------------------------------------------------------------
+
+class ParseContext:
+    __slots__ = ('statestack', 'symstack', 'state', 'token', 'errorok')
+
+    def __init__(self, token):
+        self.statestack = []      # Stack of parsing states
+        self.symstack = []        # Stack of grammar symbols
+        self.state = 0
+        self.token = token
+        self.errorok = True
+
+    def errok(self):
+        self.errorok = True
+
+    def restart(self):
+        del self.statestack[:]
+        del self.symstack[:]
+        sym = YaccSymbol()
+        sym.type = '$end'
+        self.symstack.append(sym)
+        self.statestack.append(0)
+
+_parse_context = contextvars.ContextVar('ply.yacc.parse_context')
+
+# -----------------------------------------------------------------------------
+# SyntaxErrorInfo
+#
+# A syntax error found by collect_errors().  token is the token at which the
+# error was found, or None at the end of the input, state is the state of
+# the parser, and expected is the sorted list of the terminals that would
+# not have been an error there.
+# -----------------------------------------------------------------------------
+
+class SyntaxErrorInfo:
+    __slots__ = ('token', 'state', 'expected')
+
+    def __init__(self, token, state, expected):
+        self.token = token
+        self.state = state
+        self.expected = expected
+
+    @property
+    def lineno(self):
+        return getattr(self.token, 'lineno', 0)
+
+    @property
+    def lexpos(self):
+        return getattr(self.token, 'lexpos', 0)
+
+    def __str__(self):
+        if self.token is None:
+            where = 'at end of input'
+        else:
+            where = 'at %r (%s) on line %d' % (self.token.value, self.token.type, self.lineno)
+        return 'Syntax error %s, expected %s' % (where, ' '.join(self.expected) or 'nothing')
+
+    def __repr__(self):
+        return '<SyntaxErrorInfo %s>' % self
+
+# -----------------------------------------------------------------------------
+# ParseProfile
+#
+# Counters collected by parse(profile=...): the shifts made in each state,
+# the reductions and the time spent in the rule function of each
+# production, the error recovery events and the depth of the parsing stack.
+# One profile can collect the counts of many calls to parse().
+#
+# The parse loop itself has no profiling code, so that it costs nothing
+# when profiling is off.  Instead, parse() runs the loop on a copy of the
+# parser whose action table, productions and p_error() count and time
+# what they are used for (see _ProfiledRow and LRParser.profiled()).
+# -----------------------------------------------------------------------------
+
+class ParseProfile:
+    def __init__(self):
+        self.parses = 0                                 # Calls to parse()
+        self.time = 0.0                                 # Total time in parse()
+        self.shifts = collections.Counter()             # Shifts, by state
+        self.errors = collections.Counter()             # Lookups with no action, by state
+        self.reductions = collections.Counter()         # Reductions, by production
+        self.rule_time = collections.Counter()          # Time in the rule function, by production
+        self.rule_errors = collections.Counter()        # SyntaxError raised by the rule, by production
+        self.error_calls = 0                            # Calls to p_error()
+        self.recoveries = 0                             # Shifts of the error token
+        self.lookups = 0                                # Lookups in the action table
+        self.depth_total = 0                            # Sum of the stack depth at each lookup
+        self.max_depth = 0                              # Deepest parsing stack
+        self.parsers = {}                               # Profiled copies of the parsers
+
+    # The productions sorted by the time spent in their rule functions, as
+    # (production, reductions, seconds)
+    def rules(self):
+        return sorted(((p, n, self.rule_time[p]) for p, n in self.reductions.items()),
+                      key=lambda r: (-r[2], -r[1], r[0].file, r[0].line))
+
+    # The states sorted by the number of shifts made in them, as
+    # (state, shifts)
+    def states(self):
+        return sorted(self.shifts.items(), key=lambda s: (-s[1], s[0]))
+
+    # Write a report of the counts to out (sys.stderr by default), with at
+    # most limit lines in each table
+    def report(self, out=None, limit=20):
+        if out is None:
+            out = sys.stderr
+        write = out.write
+        write('Parses: %d in %.3f ms\n' % (self.parses, self.time * 1000))
+        write('\nRules by time:\n')
+        write('  %10s %12s %10s  %-24s %s\n' % ('reductions', 'total ms', 'us/call', 'location', 'rule'))
+        for p, n, seconds in self.rules()[:limit]:
+            write('  %10d %12.3f %10.2f  %-24s %s\n' % (n, seconds * 1000, seconds / n * 1e6,
+                                                      '%s:%d' % (os.path.basename(p.file or '?'), p.line),
+                                                      p.str))
+        write('\nStates by shifts:\n')
+        write('  %10s %10s %10s\n' % ('state', 'shifts', 'errors'))
+        for state, n in self.states()[:limit]:
+            write('  %10d %10d %10d\n' % (state, n, self.errors[state]))
+        write('\nError recovery: %d syntax errors reported, %d error tokens shifted, '
+              '%d rules raised SyntaxError\n' % (self.error_calls, self.recoveries,
+                                                 sum(self.rule_errors.values())))
+        for state, n in sorted(self.errors.items(), key=lambda s: (-s[1], s[0]))[:limit]:
+            write('  state %d: %d lookups with no action\n' % (state, n))
+        write('\nStack depth: %d at most, %.1f on average\n'
+              % (self.max_depth, self.depth_total / self.lookups if self.lookups else 0.0))
+
+# A row of the action table that counts the lookups made in it
+class _ProfiledRow:
+    __slots__ = ('row', 'state', 'profile')
+
+    def __init__(self, row, state, profile):
+        self.row = row
+        self.state = state
+        self.profile = profile
+
+    def get(self, name):
+        t = self.row.get(name)
+        profile = self.profile
+        depth = len(_parse_context.get().statestack)
+        profile.lookups += 1
+        profile.depth_total += depth
+        if depth > profile.max_depth:
+            profile.max_depth = depth
+        if t is None:
+            profile.errors[self.state] += 1
+        elif t > 0:
+            profile.shifts[self.state] += 1
+            if name == 'error':
+                profile.recoveries += 1
+        return t
+
+# A rule function that counts and times the calls made to it
+def _profiled_rule(func, prod, profile):
+    def rule(p):
+        start = time.perf_counter()
+        try:
+            func(p)
+        except SyntaxError:
+            profile.rule_errors[prod] += 1
+            raise
+        finally:
+            profile.rule_time[prod] += time.perf_counter() - start
+            profile.reductions[prod] += 1
+    return rule
+
+# -----------------------------------------------------------------------------
+# _recovery_tables()
+#
+# Tables for error recovery, made from (state, actions) pairs where actions
+# maps terminal names to actions.  On a syntax error, the parser pops the
+# stack until it is in a state with an action on the error token, shifts
+# error, and then throws away tokens until one has an action.  error_states
+# is the set of states with an action on error, so the stack can be popped
+# back to the nearest one in one go.  error_follow maps each state reached
+# by shifting error to the set of tokens with an action there.  The tokens
+# that aren't in it are thrown away without going around the parse loop.
+# It also has the start state, where parsing starts over when the whole
+# stack has been popped.
+# -----------------------------------------------------------------------------
+
+def _recovery_tables(rows):
+    rows = dict(rows)
+    error_states = set()
+    error_follow = {}
+    for state, actions in rows.items():
+        t = actions.get('error')
+        if t is not None:
+            error_states.add(state)
+            if t > 0:
+                error_follow[t] = frozenset(name for name, a in rows.get(t, {}).items() if a is not None)
+    error_follow[0] = frozenset(name for name, a in rows.get(0, {}).items() if a is not None)
+    return error_states, error_follow
+
+# -----------------------------------------------------------------------------
+# _expected_sets()
+#
+# The terminals that can come next in each state, made from (state, actions)
+# pairs as for _recovery_tables().  The terminals other than error are
+# numbered in sorted order, and the set of a state is an int with a bit set
+# for each terminal that has an action there.  Returns the tuple of the
+# terminals and a list of the sets, indexed by state.  _expected_names()
+# turns a set back into a sorted list of names.
+# -----------------------------------------------------------------------------
+
+def _expected_sets(rows):
+    rows = dict(rows)
+    terminals = sorted({name for actions in rows.values() for name in actions} - {'error'})
+    bit = {name: 1 << n for n, name in enumerate(terminals)}
+    bits = [0] * (max(rows, default=-1) + 1)
+    for state, actions in rows.items():
+        for name, t in actions.items():
+            if t is not None and name != 'error':
+                bits[state] |= bit[name]
+    return tuple(terminals), bits
+
+# The names of the terminals in a set, looking only at the bits that are set
+def _expected_names(bits, terminals):
+    names = []
+    while bits:
+        low = bits & -bits
+        names.append(terminals[low.bit_length() - 1])
+        bits ^= low
+    return names
+
+# Unpack the rows of an action table packed into arrays, as (state, actions)
+# pairs with actions keyed by terminal name
+def _unpack_rows(terminals, abase, acheck, avalue):
+    return [(st, {name: avalue[base + n] for n, name in enumerate(terminals) if acheck[base + n] == st})
+            for st, base in enumerate(abase)]
+
 # -----------------------------------------------------------------------------
 #                               == LRParser ==
 #
@@ -231,18 +522,67 @@ class LRParser:
         self.goto = lrtab.lr_goto
         self.errorfunc = errorf
         self.set_defaulted_states()
-        self.errorok = True
+        self.error_states, self.error_follow = _recovery_tables(self.action.items())
+        self.expected_terminals, self.expected_bits = _expected_sets(self.action.items())
+        self.rulemodule = None        # Name of the module with the rules (write_parser)
+        self.signature = None         # Signature of the grammar (write_parser)
+        self.pushtables = None        # Table lookups for push parsers (push)
+        self.fusedtables = None       # Tables for parse_fused()
+
+    # The parser keeps no state of its own while parsing.  These methods and
+    # attributes refer to the context of the parse() that is running in the
+    # calling thread, and so can only be used from rule functions and
+    # p_error().
+
+    def context(self):
+        context = _parse_context.get(None)
+        if context is None:
+            raise AttributeError('the parse state is only available while parsing')
+        return context
 
     def errok(self):
-        self.errorok = True
+        self.context().errorok = True
 
     def restart(self):
-        del self.statestack[:]
-        del self.symstack[:]
-        sym = YaccSymbol()
-        sym.type = '$end'
-        self.symstack.append(sym)
-        self.statestack.append(0)
+        self.context().restart()
+
+    @property
+    def token(self):
+        return self.context().token
+
+    @property
+    def statestack(self):
+        return self.context().statestack
+
+    @property
+    def symstack(self):
+        return self.context().symstack
+
+    @property
+    def state(self):
+        return self.context().state
+
+    # Error recovery starts over with every call to parse(), so setting
+    # errorok outside of parse() has no effect
+    @property
+    def errorok(self):
+        return self.context().errorok
+
+    @errorok.setter
+    def errorok(self, value):
+        context = _parse_context.get(None)
+        if context is not None:
+            context.errorok = value
+
+    # The terminals that can come next in a state, as a sorted list of names
+    # that has '$end' if the input can end there.  The state is by default
+    # the current state of the parse, so in p_error() this gives the tokens
+    # that would not have been an error.  The sets are made with the parser,
+    # as bits of an int for each state in expected_bits.
+    def expected(self, state=None):
+        if state is None:
+            state = self.context().state
+        return _expected_names(self.expected_bits[state], self.expected_terminals)
 
     # Defaulted state support.
     # This method identifies parser states where there is only one possible reduction action.
@@ -262,6 +602,150 @@ class LRParser:
     def disable_defaulted_states(self):
         self.defaulted_states = {}
 
+    # parse_many().
+    #
+    # Parse a sequence of independent inputs, such as many small programs, and
+    # yield the result for each one in order.  Every input starts from the same
+    # place: the error recovery state of the parser and the lexer's state and
+    # line number are set back to what they were when parse_many() was called,
+    # and are left that way at the end.
+    # If return_exceptions is true, an exception raised while parsing an input
+    # is yielded in place of its result, and the remaining inputs are still
+    # parsed.  Otherwise it is raised.
+    #
+    # With executor='thread' or executor='process', the inputs are parsed in
+    # batches of chunksize in a pool of workers.  Each worker has its own clone
+    # of the lexer.  Threads share the parser.  For a process pool, the parser,
+    # the lexer, the rule functions and the results must all be picklable, and
+    # debug can only be a flag.  Rule functions that change global data only
+    # change the copy in their own worker process.
+
+    def parse_many(self, inputs, lexer=None, debug=False, tracking=False, return_exceptions=False,
+                   executor=None, workers=None, chunksize=256):
+        if executor not in (None, 'thread', 'process'):
+            raise ValueError("executor must be None, 'thread' or 'process'")
+        if chunksize < 1:
+            raise ValueError('chunksize must be at least 1')
+
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+
+        if executor is None:
+            return _parse_inputs(self, lexer, inputs, debug, tracking, return_exceptions)
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        return _parse_pool(self, lexer, inputs, debug, tracking, return_exceptions,
+                           executor, workers, chunksize)
+
+    # collect_errors().
+    #
+    # Parse the input and return the result and a list with a SyntaxErrorInfo
+    # for every syntax error found, with the token, the state and the
+    # terminals that were expected there.  Parsing goes on after an error as
+    # it always does, with the error rules of the grammar, or else by
+    # throwing away tokens until one can start the input again, so all of
+    # the errors of an input are found in one pass.  p_error() is still
+    # called for each error, if there is one, but nothing is written to
+    # sys.stderr.
+
+    def collect_errors(self, input=None, lexer=None, tracking=False):
+        errors = []
+        errorfunc = self.errorfunc
+        parser = copy.copy(self)
+
+        def collect(tok):
+            errors.append(SyntaxErrorInfo(tok, parser.state, parser.expected()))
+            if errorfunc:
+                return errorfunc(tok)
+
+        parser.errorfunc = collect
+        result = parser.parse(input, lexer, tracking=tracking)
+        return result, errors
+
+    # push().
+    #
+    # Make a PushParser for feeding tokens to the parser one at a time.  The
+    # lexer isn't read.  It is only passed to the rules on p.lexer and used
+    # for the position of empty productions when tracking.
+
+    def push(self, lexer=None, debug=False, tracking=False):
+        return PushParser(self, self.push_tables(), lexer, debug, tracking)
+
+    # The table lookups for push parsers, made the first time they are needed
+    def push_tables(self):
+        if self.pushtables is None:
+            self.pushtables = _DictPushTables(self.action, self.goto, self.productions)
+        return self.pushtables
+
+    # parse_async().
+    #
+    # Parse the tokens of an asynchronous iterable, such as an async generator
+    # that lexes the lines read from an asyncio stream, and return the
+    # result.  Each token is parsed as soon as it arrives.
+
+    async def parse_async(self, tokens, lexer=None, debug=False, tracking=False):
+        parser = self.push(lexer, debug, tracking)
+        async for tok in tokens:
+            parser.feed(tok)
+        return parser.end()
+
+    # parse_fused().
+    #
+    # Parse with the lexer fused to the parser.  The input is lexed in one go
+    # into columns of token types, values and positions, and the parse loop
+    # works on token numbers and on positions in the columns.  No token
+    # objects are made for tokens that a rule only reads the value of.  See
+    # _parse_fused().
+
+    def parse_fused(self, input=None, lexer=None, tracking=False):
+        return _parse_fused(self, self.fused_tables(), input, lexer, tracking)
+
+    # The tables for parse_fused(), made the first time they are needed
+    def fused_tables(self):
+        if self.fusedtables is None:
+            t = _dense_tables(self)
+            self.fusedtables = _FusedTables(t.terminals, len(t.nonterminals), t.action_base, t.action_check,
+                                            t.action_value, t.goto_base, t.goto_check, t.goto_value, t.prod_lhs)
+        return self.fusedtables
+
+    # A copy of the parser whose action table, rule functions and p_error()
+    # add to the counts of profile.  Made once for each profile.
+    def profiled(self, profile):
+        parser = profile.parsers.get(self)
+        if parser is None:
+            parser = copy.copy(self)
+            parser.action = {state: _ProfiledRow(row, state, profile) for state, row in self.action.items()}
+            parser.productions = []
+            for p in self.productions:
+                q = copy.copy(p)
+                if p.callable:
+                    q.callable = _profiled_rule(p.callable, p, profile)
+                parser.productions.append(q)
+            if self.errorfunc:
+                errorfunc = self.errorfunc
+                def counted_errorfunc(tok):
+                    profile.error_calls += 1
+                    return errorfunc(tok)
+                parser.errorfunc = counted_errorfunc
+            profile.parsers[self] = parser
+        return parser
+
+    def parse_profile(self, input, lexer, debug, tracking, profile):
+        report = not isinstance(profile, ParseProfile)
+        if report:
+            profile = ParseProfile()
+        start = time.perf_counter()
+        try:
+            return LRParser.parse(self.profiled(profile), input, lexer, debug, tracking)
+        finally:
+            profile.time += time.perf_counter() - start
+            profile.parses += 1
+            if report:
+                profile.report()
+
     # parse().
     #
     # This is the core parsing engine.  To operate, it requires a lexer object.
@@ -269,8 +753,17 @@ class LRParser:
     # see the various rule reductions and parsing steps.  tracking turns on position
     # tracking.  In this mode, symbols will record the starting/ending line number and
     # character index.
+    #
+    # profile is a ParseProfile to add counts and timings to, or true to
+    # write a report of them to sys.stderr at the end.
+    #
+    # DenseLRParser and the template used by write_parser() have copies of this
+    # method.  Make sure changes get made in all of them.
+
+    def parse(self, input=None, lexer=None, debug=False, tracking=False, profile=None):
+        if profile:
+            return self.parse_profile(input, lexer, debug, tracking, profile)
 
-    def parse(self, input=None, lexer=None, debug=False, tracking=False):
         # If debugging has been specified as a flag, turn it into a logging object
         if isinstance(debug, int) and debug:
             debug = PlyLogger(sys.stderr)
@@ -281,6 +774,8 @@ class LRParser:
         goto    = self.goto                      # Local reference to goto table (to avoid lookup on self.)
         prod    = self.productions               # Local reference to production list (to avoid lookup on self.)
         defaulted_states = self.defaulted_states # Local reference to defaulted states
+        error_states = self.error_states         # States with an action on error
+        error_follow = self.error_follow         # Tokens that can follow error, by state
         pslice  = YaccProduction(None)           # Production object passed to grammar rules
         errorcount = 0                           # Used during error recovery
 
@@ -300,51 +795,1324 @@ class LRParser:
         if input is not None:
             lexer.input(input)
 
-        # Set the token function
-        get_token = self.token = lexer.token
+        # Set up the context of this call with the token function and the
+        # state and symbol stacks
+        context = ParseContext(lexer.token)
+        get_token = context.token
+        statestack = context.statestack     # Stack of parsing states
+        symstack = context.symstack         # Stack of grammar symbols
+        pslice.stack = symstack             # Put in the production
+        errtoken   = None                   # Err token
+
+        # The start state is assumed to be (0,$end)
+
+        statestack.append(0)
+        sym = YaccSymbol()
+        sym.type = '$end'
+        symstack.append(sym)
+        state = 0
+        reset = _parse_context.set(context)
+        try:
+            while True:
+                # Get the next symbol on the input.  If a lookahead symbol
+                # is already set, we just use that. Otherwise, we'll pull
+                # the next token off of the lookaheadstack or from the lexer
+
+                if debug:
+                    debug.debug('State  : %s', state)
+
+                if state not in defaulted_states:
+                    if not lookahead:
+                        if not lookaheadstack:
+                            lookahead = get_token()     # Get the next token
+                        else:
+                            lookahead = lookaheadstack.pop()
+                        if not lookahead:
+                            lookahead = YaccSymbol()
+                            lookahead.type = '$end'
+
+                    # Check the action table
+                    ltype = lookahead.type
+                    t = actions[state].get(ltype)
+                else:
+                    t = defaulted_states[state]
+                    if debug:
+                        debug.debug('Defaulted state %s: Reduce using %d', state, -t)
+
+                if debug:
+                    debug.debug('Stack  : %s',
+                                ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
+
+                if t is not None:
+                    if t > 0:
+                        # shift a symbol on the stack
+                        statestack.append(t)
+                        state = t
+
+                        if debug:
+                            debug.debug('Action : Shift and goto state %s', t)
+
+                        symstack.append(lookahead)
+                        lookahead = None
+
+                        # Decrease error count on successful shift
+                        if errorcount:
+                            errorcount -= 1
+                        continue
+
+                    if t < 0:
+                        # reduce a symbol on the stack, emit a production
+                        p = prod[-t]
+                        pname = p.name
+                        plen  = p.len
+
+                        # Get production function
+                        sym = YaccSymbol()
+                        sym.type = pname       # Production name
+                        sym.value = None
+
+                        base = len(symstack) - plen           # Where the symbols of the rule start
+
+                        if debug:
+                            debug.info('Action : Reduce rule [%s] with %s and goto state %d', p.str,
+                                       '['+','.join([format_stack_entry(_v.value) for _v in symstack[base:]])+']',
+                                       goto[statestack[-1-plen]][pname])
+
+                        if tracking:
+                            if plen:
+                                t1 = symstack[base]
+                                sym.lineno = t1.lineno
+                                sym.lexpos = t1.lexpos
+                                t1 = symstack[-1]
+                                sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
+                                sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
+                            else:
+                                sym.lineno = lexer.lineno
+                                sym.lexpos = lexer.lexpos
+
+                        # The symbols of the rule stay on the stack while the rule runs.
+                        # pslice is a view of them, so no list is made for them.
+                        pslice.sym = sym
+                        pslice.base = base
+                        pslice.length = plen + 1
+
+                        try:
+                            # Call the grammar rule with our special slice object
+                            context.state = state
+                            p.callable(pslice)
+                            del symstack[base:]
+                            del statestack[len(statestack) - plen:]
+                            if debug:
+                                debug.info('Result : %s', format_result(pslice[0]))
+                            symstack.append(sym)
+                            state = goto[statestack[-1]][pname]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            if plen:
+                                symstack.pop()                  # Leave the rest of the production slice on the stack
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            context.errorok = False
+
+                        continue
+
+                    if t == 0:
+                        n = symstack[-1]
+                        result = getattr(n, 'value', None)
+
+                        if debug:
+                            debug.info('Done   : Returning %s', format_result(result))
+                            debug.info('PLY: PARSE DEBUG END')
+
+                        return result
+
+                if t is None:
+
+                    if debug:
+                        debug.error('Error  : %s',
+                                    ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
+
+                    # We have some kind of parsing error here.  To handle
+                    # this, we are going to push the current token onto
+                    # the tokenstack and replace it with an 'error' token.
+                    # If there are any synchronization rules, they may
+                    # catch it.
+                    #
+                    # In addition to pushing the error token, we call call
+                    # the user defined p_error() function if this is the
+                    # first syntax error.  This function is only called if
+                    # errorcount == 0.
+                    if errorcount == 0 or context.errorok:
+                        errorcount = error_count
+                        context.errorok = False
+                        errtoken = lookahead
+                        if errtoken.type == '$end':
+                            errtoken = None               # End of file!
+                        if self.errorfunc:
+                            if errtoken and not hasattr(errtoken, 'lexer'):
+                                errtoken.lexer = lexer
+                            context.state = state
+                            tok = self.errorfunc(errtoken)
+                            if context.errorok:
+                                # User must have done some kind of panic
+                                # mode recovery on their own.  The
+                                # returned token is the next lookahead
+                                lookahead = tok
+                                errtoken = None
+                                continue
+                        else:
+                            if errtoken:
+                                if hasattr(errtoken, 'lineno'):
+                                    lineno = lookahead.lineno
+                                else:
+                                    lineno = 0
+                                if lineno:
+                                    sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
+                                else:
+                                    sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
+                            else:
+                                sys.stderr.write('yacc: Parse error in input. EOF\n')
+                                return
+
+                    else:
+                        errorcount = error_count
+
+                    # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+                    # entire parse has been rolled back and we're completely hosed.   The token is
+                    # discarded and we just keep going.
+
+                    if len(statestack) <= 1 and lookahead.type != '$end':
+                        lookahead = None
+                        errtoken = None
+                        state = 0
+                        # Nuke the pushback stack
+                        del lookaheadstack[:]
+                        # Tokens that can't start the input either are nuked right here.
+                        if not debug and 0 not in defaulted_states:
+                            follow = error_follow[0]
+                            while True:
+                                lookahead = get_token()
+                                if not lookahead:
+                                    lookahead = YaccSymbol()
+                                    lookahead.type = '$end'
+                                    break
+                                if lookahead.type in follow:
+                                    break
+                        continue
+
+                    # case 2: the statestack has a couple of entries on it, but we're
+                    # at the end of the file. nuke the top entry and generate an error token
+
+                    # Start nuking entries on the stack
+                    if lookahead.type == '$end':
+                        # Whoa. We're really hosed here. Bail out
+                        return
+
+                    if lookahead.type != 'error':
+                        sym = symstack[-1]
+                        if sym.type == 'error':
+                            # Hmmm. Error is on top of stack, we'll just nuke input
+                            # symbol and continue.  The tokens after it that can't follow
+                            # the error either are nuked right here, without going around
+                            # the loop for each one.
+                            if tracking:
+                                sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+                                sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                            lookahead = None
+                            follow = error_follow.get(state)
+                            if follow is not None and not debug:
+                                while True:
+                                    if lookaheadstack:
+                                        lookahead = lookaheadstack.pop()
+                                    else:
+                                        lookahead = get_token()
+                                    if not lookahead:
+                                        lookahead = YaccSymbol()
+                                        lookahead.type = '$end'
+                                        break
+                                    if lookahead.type in follow:
+                                        break
+                                    if tracking:
+                                        sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+                                        sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                            continue
+
+                        # Create the error symbol for the first time and make it the new lookahead symbol
+                        t = YaccSymbol()
+                        t.type = 'error'
+
+                        if hasattr(lookahead, 'lineno'):
+                            t.lineno = t.endlineno = lookahead.lineno
+                        if hasattr(lookahead, 'lexpos'):
+                            t.lexpos = t.endlexpos = lookahead.lexpos
+                        t.value = lookahead
+                        lookaheadstack.append(lookahead)
+                        lookahead = t
+                    else:
+                        # Pop the stack straight back to the nearest state that can
+                        # act on the error token, or to the start state.
+                        # With debugging, states are popped one at a time so that
+                        # each one is logged.
+                        npop = 1
+                        if not debug:
+                            top = len(statestack) - 2
+                            while top > 0 and statestack[top] not in error_states and statestack[top] not in defaulted_states:
+                                top -= 1
+                                npop += 1
+                        sym = symstack[-npop]
+                        if tracking:
+                            lookahead.lineno = sym.lineno
+                            lookahead.lexpos = sym.lexpos
+                        del symstack[-npop:]
+                        del statestack[-npop:]
+                        state = statestack[-1]
+
+                    continue
+
+                # If we'r here, something really bad happened
+                raise RuntimeError('yacc: internal parser error!!!\n')
+        finally:
+            _parse_context.reset(reset)
+
+# -----------------------------------------------------------------------------
+#                             == DenseLRParser ==
+#
+# The LR parsing engine running on a DenseLRTable.  This is the same as
+# LRParser, except that the table lookups use symbol numbers and the
+# integer arrays of the dense tables.  The two parse() methods are kept as
+# separate copies for speed.  Make sure changes get made in both locations.
+# -----------------------------------------------------------------------------
+
+class DenseLRParser(LRParser):
+    def __init__(self, lrtab, errorf):
+        self.productions = lrtab.lr_productions
+        self.tables = lrtab
+        self.errorfunc = errorf
+        self.set_defaulted_states()
+        self.error_states = lrtab.error_states
+        self.error_follow = lrtab.error_follow
+        self.expected_terminals = lrtab.expected_terminals
+        self.expected_bits = lrtab.expected_bits
+        self.rulemodule = None
+        self.signature = None
+        self.pushtables = None
+        self.fusedtables = None
+
+    def set_defaulted_states(self):
+        self.defaulted_states = dict(self.tables.defaulted_states)
+
+    def push_tables(self):
+        if self.pushtables is None:
+            t = self.tables
+            self.pushtables = _DensePushTables(t.terminals, t.action_base, t.action_check, t.action_value,
+                                               t.goto_base, t.goto_value, t.prod_lhs)
+        return self.pushtables
+
+    def parse(self, input=None, lexer=None, debug=False, tracking=False, profile=None):
+        if profile:
+            raise YaccError('profiling is not available for dense parsers. Use a parser made by yacc() '
+                            'without dense=True')
+
+        # If debugging has been specified as a flag, turn it into a logging object
+        if isinstance(debug, int) and debug:
+            debug = PlyLogger(sys.stderr)
+
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        tables  = self.tables
+        termids = tables.termids                 # Terminal numbers
+        unknown = len(tables.terminals)          # Column used for unknown token types
+        abase   = tables.action_base             # Local references to the action table arrays
+        acheck  = tables.action_check
+        avalue  = tables.action_value
+        gbase   = tables.goto_base               # Local references to the goto table arrays
+        gvalue  = tables.goto_value
+        prodlhs = tables.prod_lhs                # Left-hand side numbers of the productions
+        prod    = self.productions               # Local reference to production list (to avoid lookup on self.)
+        defaulted_states = self.defaulted_states # Local reference to defaulted states
+        error_states = self.error_states         # States with an action on error
+        error_follow = self.error_follow         # Tokens that can follow error, by state
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        errorcount = 0                           # Used during error recovery
+
+        if debug:
+            debug.info('PLY: PARSE DEBUG START')
+
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+
+        # Set up the lexer and parser objects on pslice
+        pslice.lexer = lexer
+        pslice.parser = self
+
+        # If input was supplied, pass to lexer
+        if input is not None:
+            lexer.input(input)
 
-        # Set up the state and symbol stacks
-        statestack = self.statestack = []   # Stack of parsing states
-        symstack = self.symstack = []       # Stack of grammar symbols
+        # Set up the context of this call with the token function and the
+        # state and symbol stacks
+        context = ParseContext(lexer.token)
+        get_token = context.token
+        statestack = context.statestack     # Stack of parsing states
+        symstack = context.symstack         # Stack of grammar symbols
         pslice.stack = symstack             # Put in the production
         errtoken   = None                   # Err token
 
-        # The start state is assumed to be (0,$end)
+        # The start state is assumed to be (0,$end)
+
+        statestack.append(0)
+        sym = YaccSymbol()
+        sym.type = '$end'
+        symstack.append(sym)
+        state = 0
+        reset = _parse_context.set(context)
+        try:
+            while True:
+                # Get the next symbol on the input.  If a lookahead symbol
+                # is already set, we just use that. Otherwise, we'll pull
+                # the next token off of the lookaheadstack or from the lexer
+
+                if debug:
+                    debug.debug('State  : %s', state)
+
+                if state not in defaulted_states:
+                    if not lookahead:
+                        if not lookaheadstack:
+                            lookahead = get_token()     # Get the next token
+                        else:
+                            lookahead = lookaheadstack.pop()
+                        if not lookahead:
+                            lookahead = YaccSymbol()
+                            lookahead.type = '$end'
+
+                    # Check the action table
+                    i = abase[state] + termids.get(lookahead.type, unknown)
+                    t = avalue[i] if acheck[i] == state else None
+                else:
+                    t = defaulted_states[state]
+                    if debug:
+                        debug.debug('Defaulted state %s: Reduce using %d', state, -t)
+
+                if debug:
+                    debug.debug('Stack  : %s',
+                                ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
+
+                if t is not None:
+                    if t > 0:
+                        # shift a symbol on the stack
+                        statestack.append(t)
+                        state = t
+
+                        if debug:
+                            debug.debug('Action : Shift and goto state %s', t)
+
+                        symstack.append(lookahead)
+                        lookahead = None
+
+                        # Decrease error count on successful shift
+                        if errorcount:
+                            errorcount -= 1
+                        continue
+
+                    if t < 0:
+                        # reduce a symbol on the stack, emit a production
+                        p = prod[-t]
+                        pname = p.name
+                        plen  = p.len
+                        plhs  = prodlhs[-t]
+
+                        # Get production function
+                        sym = YaccSymbol()
+                        sym.type = pname       # Production name
+                        sym.value = None
+
+                        base = len(symstack) - plen           # Where the symbols of the rule start
+
+                        if debug:
+                            debug.info('Action : Reduce rule [%s] with %s and goto state %d', p.str,
+                                       '['+','.join([format_stack_entry(_v.value) for _v in symstack[base:]])+']',
+                                       gvalue[gbase[statestack[-1-plen]] + plhs])
+
+                        if tracking:
+                            if plen:
+                                t1 = symstack[base]
+                                sym.lineno = t1.lineno
+                                sym.lexpos = t1.lexpos
+                                t1 = symstack[-1]
+                                sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
+                                sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
+                            else:
+                                sym.lineno = lexer.lineno
+                                sym.lexpos = lexer.lexpos
+
+                        # The symbols of the rule stay on the stack while the rule runs.
+                        # pslice is a view of them, so no list is made for them.
+                        pslice.sym = sym
+                        pslice.base = base
+                        pslice.length = plen + 1
+
+                        try:
+                            # Call the grammar rule with our special slice object
+                            context.state = state
+                            p.callable(pslice)
+                            del symstack[base:]
+                            del statestack[len(statestack) - plen:]
+                            if debug:
+                                debug.info('Result : %s', format_result(pslice[0]))
+                            symstack.append(sym)
+                            state = gvalue[gbase[statestack[-1]] + plhs]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            if plen:
+                                symstack.pop()                  # Leave the rest of the production slice on the stack
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            context.errorok = False
+
+                        continue
+
+                    if t == 0:
+                        n = symstack[-1]
+                        result = getattr(n, 'value', None)
+
+                        if debug:
+                            debug.info('Done   : Returning %s', format_result(result))
+                            debug.info('PLY: PARSE DEBUG END')
+
+                        return result
+
+                if t is None:
+
+                    if debug:
+                        debug.error('Error  : %s',
+                                    ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
+
+                    # We have some kind of parsing error here.  To handle
+                    # this, we are going to push the current token onto
+                    # the tokenstack and replace it with an 'error' token.
+                    # If there are any synchronization rules, they may
+                    # catch it.
+                    #
+                    # In addition to pushing the error token, we call call
+                    # the user defined p_error() function if this is the
+                    # first syntax error.  This function is only called if
+                    # errorcount == 0.
+                    if errorcount == 0 or context.errorok:
+                        errorcount = error_count
+                        context.errorok = False
+                        errtoken = lookahead
+                        if errtoken.type == '$end':
+                            errtoken = None               # End of file!
+                        if self.errorfunc:
+                            if errtoken and not hasattr(errtoken, 'lexer'):
+                                errtoken.lexer = lexer
+                            context.state = state
+                            tok = self.errorfunc(errtoken)
+                            if context.errorok:
+                                # User must have done some kind of panic
+                                # mode recovery on their own.  The
+                                # returned token is the next lookahead
+                                lookahead = tok
+                                errtoken = None
+                                continue
+                        else:
+                            if errtoken:
+                                if hasattr(errtoken, 'lineno'):
+                                    lineno = lookahead.lineno
+                                else:
+                                    lineno = 0
+                                if lineno:
+                                    sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
+                                else:
+                                    sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
+                            else:
+                                sys.stderr.write('yacc: Parse error in input. EOF\n')
+                                return
+
+                    else:
+                        errorcount = error_count
+
+                    # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+                    # entire parse has been rolled back and we're completely hosed.   The token is
+                    # discarded and we just keep going.
+
+                    if len(statestack) <= 1 and lookahead.type != '$end':
+                        lookahead = None
+                        errtoken = None
+                        state = 0
+                        # Nuke the pushback stack
+                        del lookaheadstack[:]
+                        # Tokens that can't start the input either are nuked right here.
+                        if not debug and 0 not in defaulted_states:
+                            follow = error_follow[0]
+                            while True:
+                                lookahead = get_token()
+                                if not lookahead:
+                                    lookahead = YaccSymbol()
+                                    lookahead.type = '$end'
+                                    break
+                                if lookahead.type in follow:
+                                    break
+                        continue
+
+                    # case 2: the statestack has a couple of entries on it, but we're
+                    # at the end of the file. nuke the top entry and generate an error token
+
+                    # Start nuking entries on the stack
+                    if lookahead.type == '$end':
+                        # Whoa. We're really hosed here. Bail out
+                        return
+
+                    if lookahead.type != 'error':
+                        sym = symstack[-1]
+                        if sym.type == 'error':
+                            # Hmmm. Error is on top of stack, we'll just nuke input
+                            # symbol and continue.  The tokens after it that can't follow
+                            # the error either are nuked right here, without going around
+                            # the loop for each one.
+                            if tracking:
+                                sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+                                sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                            lookahead = None
+                            follow = error_follow.get(state)
+                            if follow is not None and not debug:
+                                while True:
+                                    if lookaheadstack:
+                                        lookahead = lookaheadstack.pop()
+                                    else:
+                                        lookahead = get_token()
+                                    if not lookahead:
+                                        lookahead = YaccSymbol()
+                                        lookahead.type = '$end'
+                                        break
+                                    if lookahead.type in follow:
+                                        break
+                                    if tracking:
+                                        sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+                                        sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                            continue
+
+                        # Create the error symbol for the first time and make it the new lookahead symbol
+                        t = YaccSymbol()
+                        t.type = 'error'
+
+                        if hasattr(lookahead, 'lineno'):
+                            t.lineno = t.endlineno = lookahead.lineno
+                        if hasattr(lookahead, 'lexpos'):
+                            t.lexpos = t.endlexpos = lookahead.lexpos
+                        t.value = lookahead
+                        lookaheadstack.append(lookahead)
+                        lookahead = t
+                    else:
+                        # Pop the stack straight back to the nearest state that can
+                        # act on the error token, or to the start state.
+                        # With debugging, states are popped one at a time so that
+                        # each one is logged.
+                        npop = 1
+                        if not debug:
+                            top = len(statestack) - 2
+                            while top > 0 and statestack[top] not in error_states and statestack[top] not in defaulted_states:
+                                top -= 1
+                                npop += 1
+                        sym = symstack[-npop]
+                        if tracking:
+                            lookahead.lineno = sym.lineno
+                            lookahead.lexpos = sym.lexpos
+                        del symstack[-npop:]
+                        del statestack[-npop:]
+                        state = statestack[-1]
+
+                    continue
+
+                # If we'r here, something really bad happened
+                raise RuntimeError('yacc: internal parser error!!!\n')
+        finally:
+            _parse_context.reset(reset)
+
+# -----------------------------------------------------------------------------
+#                              == PushParser ==
+#
+# A parser that is given its tokens with feed() instead of pulling them from
+# a lexer, for input that arrives a piece at a time, such as from a socket.
+# It is made with the push() method of a parser.  The parse loop runs as a
+# generator that is suspended whenever it needs the next token, so nothing
+# is buffered.
+#
+# The defaulted states are those of the parser, so that rules run and
+# syntax errors are found at the same points as with parse().  A rule in
+# any other state waits for the token after it.
+#
+# The loop is a copy of LRParser.parse() that looks up the tables through
+# an object with action() and goto() methods, so that it works
+# with all kinds of tables.  Make sure changes get made here as well.
+# -----------------------------------------------------------------------------
+
+# Lookups in the dictionary tables of an LRParser
+class _DictPushTables:
+    def __init__(self, action, goto, productions):
+        self.actions = action
+        self.gotos = goto
+        self.prodnames = [p.name for p in productions]
+        self.error_states, self.error_follow = _recovery_tables(action.items())
+
+    def action(self, state, name):
+        return self.actions[state].get(name)
+
+    def goto(self, state, prodnum):
+        return self.gotos[state][self.prodnames[prodnum]]
+
+# Lookups in tables packed into arrays, as made by DenseLRTable and
+# write_parser()
+class _DensePushTables:
+    def __init__(self, terminals, abase, acheck, avalue, gbase, gvalue, prodlhs):
+        self.terminals = terminals
+        self.termids = {name: n for n, name in enumerate(terminals)}
+        self.abase = abase
+        self.acheck = acheck
+        self.avalue = avalue
+        self.gbase = gbase
+        self.gvalue = gvalue
+        self.prodlhs = prodlhs
+        rows = _unpack_rows(terminals, abase, acheck, avalue)
+        self.error_states, self.error_follow = _recovery_tables(rows)
+
+    def action(self, state, name):
+        n = self.termids.get(name)
+        if n is None:
+            return None
+        i = self.abase[state] + n
+        return self.avalue[i] if self.acheck[i] == state else None
+
+    def goto(self, state, prodnum):
+        return self.gvalue[self.gbase[state] + self.prodlhs[prodnum]]
+
+class PushParser:
+    def __init__(self, parser, tables, lexer=None, debug=False, tracking=False):
+        # If debugging has been specified as a flag, turn it into a logging object
+        if isinstance(debug, int) and debug:
+            debug = PlyLogger(sys.stderr)
+
+        self.parser = parser
+        self.tables = tables
+        self.lexer = lexer
+        self.done = False              # Set once the input has been parsed
+        self.result = None             # Result of the start rule
+
+        # There are no tokens waiting to be read, so token() called from
+        # p_error() returns None
+        self.context = ParseContext(lambda: None)
+        self.loop = self.run(debug, tracking)
+        self.send((None,))
+
+    # Run the parse loop on each token in turn, up to the point where it
+    # needs the next one.  A token of None ends the input.
+    def send(self, tokens):
+        send = self.loop.send
+        reset = _parse_context.set(self.context)
+        try:
+            for tok in tokens:
+                try:
+                    send(tok)
+                except StopIteration as e:
+                    self.done = True
+                    self.result = e.value
+                    break
+                except BaseException:
+                    self.done = True
+                    raise
+        finally:
+            _parse_context.reset(reset)
+
+    # Parse one more token.  Tokens are LexToken instances, or any objects
+    # with type and value attributes (and lineno and lexpos for tracking).
+    def feed(self, tok):
+        if self.done:
+            raise YaccError('the parser has already finished')
+        if tok is None:
+            raise ValueError('the end of the input is given with end(), not a None token')
+        self.send((tok,))
+
+    # Parse the tokens of an iterable, such as a lexer.  As for tokens read
+    # by parse(), None ends the input.
+    def feed_many(self, tokens):
+        if self.done:
+            raise YaccError('the parser has already finished')
+        self.send(tokens)
+
+    # End the input.  Returns the result of the start rule, as parse() does.
+    def end(self):
+        while not self.done:
+            self.send((None,))
+        return self.result
+
+    # The terminals that can come next, including '$end' if the input can
+    # end here
+    def expected(self):
+        return self.parser.expected(self.context.state)
+
+    # The symbols on the parsing stack.  Their values are the results of the
+    # rules reduced so far and the tokens that are waiting to be reduced.
+    @property
+    def symbols(self):
+        return self.context.symstack[1:]
+
+    @property
+    def state(self):
+        return self.context.state
+
+    # The parse loop.  A generator that waits at each yield to be sent the
+    # next token.
+    def run(self, debug, tracking):
+        parser = self.parser
+        lexer = self.lexer
+        action = self.tables.action              # Local references to the table lookups
+        goto = self.tables.goto
+        prod = parser.productions
+        defaulted_states = parser.defaulted_states
+        error_states = self.tables.error_states  # States with an action on error
+        error_follow = self.tables.error_follow  # Tokens that can follow error, by state
+        errorfunc = parser.errorfunc
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        errorcount = 0                           # Used during error recovery
+
+        if debug:
+            debug.info('PLY: PARSE DEBUG START')
+
+        # Set up the lexer and parser objects on pslice
+        pslice.lexer = lexer
+        pslice.parser = parser
+
+        context = self.context
+        statestack = context.statestack     # Stack of parsing states
+        symstack = context.symstack         # Stack of grammar symbols
+        pslice.stack = symstack             # Put in the production
+        errtoken   = None                   # Err token
+
+        # The start state is assumed to be (0,$end)
+
+        statestack.append(0)
+        sym = YaccSymbol()
+        sym.type = '$end'
+        symstack.append(sym)
+        state = 0
+        while True:
+            # Get the next symbol on the input.  If a lookahead symbol
+            # is already set, we just use that. Otherwise, we'll pull
+            # the next token off of the lookaheadstack or wait for it to be fed
+
+            if debug:
+                debug.debug('State  : %s', state)
+
+            if state not in defaulted_states:
+                if not lookahead:
+                    if not lookaheadstack:
+                        context.state = state
+                        lookahead = yield           # Wait for the next token
+                    else:
+                        lookahead = lookaheadstack.pop()
+                    if not lookahead:
+                        lookahead = YaccSymbol()
+                        lookahead.type = '$end'
+
+                # Check the action table
+                ltype = lookahead.type
+                t = action(state, ltype)
+            else:
+                t = defaulted_states[state]
+                if debug:
+                    debug.debug('Defaulted state %s: Reduce using %d', state, -t)
+
+            if debug:
+                debug.debug('Stack  : %s',
+                            ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
+
+            if t is not None:
+                if t > 0:
+                    # shift a symbol on the stack
+                    statestack.append(t)
+                    state = t
+
+                    if debug:
+                        debug.debug('Action : Shift and goto state %s', t)
+
+                    symstack.append(lookahead)
+                    lookahead = None
+
+                    # Decrease error count on successful shift
+                    if errorcount:
+                        errorcount -= 1
+                    continue
+
+                if t < 0:
+                    # reduce a symbol on the stack, emit a production
+                    pnum = -t
+                    p = prod[pnum]
+                    pname = p.name
+                    plen  = p.len
+
+                    # Get production function
+                    sym = YaccSymbol()
+                    sym.type = pname       # Production name
+                    sym.value = None
+
+                    base = len(symstack) - plen           # Where the symbols of the rule start
+
+                    if debug:
+                        debug.info('Action : Reduce rule [%s] with %s and goto state %d', p.str,
+                                   '['+','.join([format_stack_entry(_v.value) for _v in symstack[base:]])+']',
+                                   goto(statestack[-1-plen], pnum))
+
+                    if tracking:
+                        if plen:
+                            t1 = symstack[base]
+                            sym.lineno = t1.lineno
+                            sym.lexpos = t1.lexpos
+                            t1 = symstack[-1]
+                            sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
+                            sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
+                        else:
+                            sym.lineno = getattr(lexer, 'lineno', 0)
+                            sym.lexpos = getattr(lexer, 'lexpos', 0)
+
+                    # The symbols of the rule stay on the stack while the rule runs.
+                    # pslice is a view of them, so no list is made for them.
+                    pslice.sym = sym
+                    pslice.base = base
+                    pslice.length = plen + 1
+
+                    try:
+                        # Call the grammar rule with our special slice object
+                        context.state = state
+                        p.callable(pslice)
+                        del symstack[base:]
+                        del statestack[len(statestack) - plen:]
+                        if debug:
+                            debug.info('Result : %s', format_result(pslice[0]))
+                        symstack.append(sym)
+                        state = goto(statestack[-1], pnum)
+                        statestack.append(state)
+                    except SyntaxError:
+                        # If an error was set. Enter error recovery state
+                        lookaheadstack.append(lookahead)    # Save the current lookahead token
+                        if plen:
+                            symstack.pop()                  # Leave the rest of the production slice on the stack
+                        statestack.pop()                    # Pop back one state (before the reduce)
+                        state = statestack[-1]
+                        sym.type = 'error'
+                        sym.value = 'error'
+                        lookahead = sym
+                        errorcount = error_count
+                        context.errorok = False
+
+                    continue
+
+                if t == 0:
+                    n = symstack[-1]
+                    result = getattr(n, 'value', None)
+
+                    if debug:
+                        debug.info('Done   : Returning %s', format_result(result))
+                        debug.info('PLY: PARSE DEBUG END')
+
+                    return result
+
+            if t is None:
+
+                if debug:
+                    debug.error('Error  : %s',
+                                ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
+
+                # We have some kind of parsing error here.  To handle
+                # this, we are going to push the current token onto
+                # the tokenstack and replace it with an 'error' token.
+                # If there are any synchronization rules, they may
+                # catch it.
+                #
+                # In addition to pushing the error token, we call call
+                # the user defined p_error() function if this is the
+                # first syntax error.  This function is only called if
+                # errorcount == 0.
+                if errorcount == 0 or context.errorok:
+                    errorcount = error_count
+                    context.errorok = False
+                    errtoken = lookahead
+                    if errtoken.type == '$end':
+                        errtoken = None               # End of file!
+                    if errorfunc:
+                        if errtoken and lexer and not hasattr(errtoken, 'lexer'):
+                            errtoken.lexer = lexer
+                        context.state = state
+                        tok = errorfunc(errtoken)
+                        if context.errorok:
+                            # User must have done some kind of panic
+                            # mode recovery on their own.  The
+                            # returned token is the next lookahead
+                            lookahead = tok
+                            errtoken = None
+                            continue
+                    else:
+                        if errtoken:
+                            if hasattr(errtoken, 'lineno'):
+                                lineno = lookahead.lineno
+                            else:
+                                lineno = 0
+                            if lineno:
+                                sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
+                            else:
+                                sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
+                        else:
+                            sys.stderr.write('yacc: Parse error in input. EOF\n')
+                            return
+
+                else:
+                    errorcount = error_count
+
+                # case 1:  the statestack only has 1 entry on it.  If we're in this state, the
+                # entire parse has been rolled back and we're completely hosed.   The token is
+                # discarded and we just keep going.
+
+                if len(statestack) <= 1 and lookahead.type != '$end':
+                    lookahead = None
+                    errtoken = None
+                    state = 0
+                    # Nuke the pushback stack
+                    del lookaheadstack[:]
+                    # Tokens that can't start the input either are nuked right here.
+                    if not debug and 0 not in defaulted_states:
+                        follow = error_follow[0]
+                        while True:
+                            context.state = state
+                            lookahead = yield           # Wait for the next token
+                            if not lookahead:
+                                lookahead = YaccSymbol()
+                                lookahead.type = '$end'
+                                break
+                            if lookahead.type in follow:
+                                break
+                    continue
+
+                # case 2: the statestack has a couple of entries on it, but we're
+                # at the end of the file. nuke the top entry and generate an error token
+
+                # Start nuking entries on the stack
+                if lookahead.type == '$end':
+                    # Whoa. We're really hosed here. Bail out
+                    return
+
+                if lookahead.type != 'error':
+                    sym = symstack[-1]
+                    if sym.type == 'error':
+                        # Hmmm. Error is on top of stack, we'll just nuke input
+                        # symbol and continue.  The tokens after it that can't follow
+                        # the error either are nuked right here, without going around
+                        # the loop for each one.
+                        if tracking:
+                            sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+                            sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                        lookahead = None
+                        follow = error_follow.get(state)
+                        if follow is not None and not debug:
+                            while True:
+                                if lookaheadstack:
+                                    lookahead = lookaheadstack.pop()
+                                else:
+                                    context.state = state
+                                    lookahead = yield       # Wait for the next token
+                                if not lookahead:
+                                    lookahead = YaccSymbol()
+                                    lookahead.type = '$end'
+                                    break
+                                if lookahead.type in follow:
+                                    break
+                                if tracking:
+                                    sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+                                    sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                        continue
+
+                    # Create the error symbol for the first time and make it the new lookahead symbol
+                    t = YaccSymbol()
+                    t.type = 'error'
+
+                    if hasattr(lookahead, 'lineno'):
+                        t.lineno = t.endlineno = lookahead.lineno
+                    if hasattr(lookahead, 'lexpos'):
+                        t.lexpos = t.endlexpos = lookahead.lexpos
+                    t.value = lookahead
+                    lookaheadstack.append(lookahead)
+                    lookahead = t
+                else:
+                    # Pop the stack straight back to the nearest state that can
+                    # act on the error token, or to the start state.
+                    # With debugging, states are popped one at a time so that
+                    # each one is logged.
+                    npop = 1
+                    if not debug:
+                        top = len(statestack) - 2
+                        while top > 0 and statestack[top] not in error_states and statestack[top] not in defaulted_states:
+                            top -= 1
+                            npop += 1
+                    sym = symstack[-npop]
+                    if tracking:
+                        lookahead.lineno = sym.lineno
+                        lookahead.lexpos = sym.lexpos
+                    del symstack[-npop:]
+                    del statestack[-npop:]
+                    state = statestack[-1]
+
+                continue
+
+            # If we'r here, something really bad happened
+            raise RuntimeError('yacc: internal parser error!!!\n')
+
+# -----------------------------------------------------------------------------
+#                             == Fused parsing ==
+#
+# parse_fused() runs the lexer and the parser as one.  Instead of calling
+# the lexer's token() for each token and getting a LexToken back, it has the
+# lexer lex the whole input with tokenize_all(columnar=True), which makes
+# columns of token types, values, line numbers and positions and no token
+# objects.  The types are turned into terminal numbers, and the parse loop
+# looks up its actions in a list for each state, indexed by those numbers.
+#
+# A token on the symbol stack is its position in the columns.  p[n] reads
+# the value of a token straight from the values column, and p.lineno(n) and
+# p.lexpos(n) read the other columns.  A token object is only made when it
+# is needed as an object: when a rule uses p.slice or sets something on a
+# token with p[n] = value or p.set_lineno(n), and for error recovery.  The
+# tokens are made with the lexer's token class, and are put on the stack in
+# place of the position, so that a change made to a token is kept.  Before
+# p_error() is called, every token on the stack is made an object, so that
+# parser.symstack looks the same as for parse().
+#
+# As the lexer has read the whole input before parsing starts, rules can't
+# change how the rest of the input is lexed (for example by changing the
+# state of the lexer), and p.lexer.lineno and p.lexer.lexpos are at the end
+# of the input.  With tracking, empty rules get the position of the next
+# token rather than the position of the lexer.  In p_error(), parser.token()
+# reads the next token from the columns.  A lexer that isn't a PLY lexer is
+# read with token() up front, and its own tokens are used as the token
+# objects.
+#
+# The loop is a copy of LRParser.parse() without debugging, for tokens that
+# are numbers.  Make sure changes get made here as well.
+# -----------------------------------------------------------------------------
+
+# The tables for parse_fused(), made from the packed tables of DenseLRTable
+# or of a module written by write_parser().  actions[state][n] is the action
+# for terminal number n, or None for an error.  The last column is for token
+# types that aren't terminals of the grammar.  gotos[state][n] is the goto
+# for nonterminal number n.  Lookups in lists are faster than lookups in
+# dicts or arithmetic on the arrays.  The tables for error recovery are
+# made as for the other parsers.
+class _FusedTables:
+    def __init__(self, terminals, nnonterminals, abase, acheck, avalue, gbase, gcheck, gvalue, prodlhs):
+        self.terminals = terminals
+        self.termids = {name: n for n, name in enumerate(terminals)}
+        self.unknown = len(terminals)
+        self.endid = self.termids['$end']
+        self.actions = [[avalue[base + n] if acheck[base + n] == st else None for n in range(len(terminals))]
+                        + [None] for st, base in enumerate(abase)]
+        self.gotos = [[gvalue[base + n] if gcheck[base + n] == st else None for n in range(nnonterminals)]
+                      for st, base in enumerate(gbase)]
+        self.prodlhs = list(prodlhs)
+        self.error_states, self.error_follow = _recovery_tables(
+            (st, {name: t for name, t in zip(terminals, row) if t is not None}) for st, row in enumerate(self.actions))
+
+# The columns of the tokens of one input.  ids are the terminal numbers of
+# the types.  The columns end with an entry for $end at position end.  pos
+# is the position of the next token for token(), only kept up to date while
+# p_error() runs.
+class _FusedInput:
+    def __init__(self, lexer, tables):
+        if hasattr(lexer, 'tokenize_all'):
+            self.tokens = None
+            self.tokclass = lexer.lextokenclass
+            self.names, self.values, self.linenos, self.lexposes = lexer.tokenize_all(columnar=True)
+        else:
+            self.tokens = list(iter(lexer.token, None))
+            self.tokclass = YaccSymbol
+            self.names = [tok.type for tok in self.tokens]
+            self.values = [tok.value for tok in self.tokens]
+            self.linenos = array('q', [getattr(tok, 'lineno', 0) for tok in self.tokens])
+            self.lexposes = array('q', [getattr(tok, 'lexpos', 0) for tok in self.tokens])
+        termids = tables.termids
+        unknown = tables.unknown
+        self.ids = [termids.get(name, unknown) for name in self.names]
+        self.end = len(self.ids)
+        self.ids.append(tables.endid)
+        self.names.append('$end')
+        self.values.append(None)
+        self.linenos.append(getattr(lexer, 'lineno', 0))
+        self.lexposes.append(getattr(lexer, 'lexpos', 0))
+        self.pos = 0
+
+    # The token object for position n
+    def symbol(self, n):
+        if self.tokens is not None and n < self.end:
+            return self.tokens[n]
+        tok = self.tokclass()
+        tok.type = self.names[n]
+        tok.value = self.values[n]
+        tok.lineno = self.linenos[n]
+        tok.lexpos = self.lexposes[n]
+        return tok
+
+    # Replace the positions in a list of symbols with token objects
+    def materialize(self, symbols):
+        for n, s in enumerate(symbols):
+            if s.__class__ is int:
+                symbols[n] = self.symbol(s)
+
+    # The token function of the parse, for parser.token() in p_error()
+    def token(self):
+        if self.pos >= self.end:
+            return None
+        tok = self.symbol(self.pos)
+        self.pos += 1
+        return tok
+
+# The view of the symbol stack passed to the rules of parse_fused().  Tokens
+# on the stack are positions in the columns of tokens, and are made into
+# objects the first time one is asked for.
+class _FusedProduction(YaccProduction):
+    def __init__(self, tokens):
+        super().__init__(None)
+        self.tokens = tokens
+        self.values = tokens.values
+
+    def __getitem__(self, n):
+        if isinstance(n, slice):
+            return [s.value for s in self.slice[n]]
+        elif n > 0:
+            s = self.stack[self.base + n - 1]
+        elif n == 0:
+            return self.sym.value
+        elif self.base + n >= 0:
+            s = self.stack[self.base + n]
+        else:
+            raise IndexError('production index out of range')
+        if s.__class__ is int:
+            return self.values[s]
+        return s.value
+
+    @property
+    def slice(self):
+        for n in range(1, self.length):
+            self._symbol(n)
+        return YaccProduction.slice.fget(self)
+
+    def _symbol(self, n):
+        s = YaccProduction._symbol(self, n)
+        if s.__class__ is int:
+            if n < 0:
+                n += self.length
+            s = self.stack[self.base + n - 1] = self.tokens.symbol(s)
+        return s
 
-        statestack.append(0)
-        sym = YaccSymbol()
-        sym.type = '$end'
-        symstack.append(sym)
-        state = 0
+    def lineno(self, n):
+        s = YaccProduction._symbol(self, n)
+        if s.__class__ is int:
+            return self.tokens.linenos[s]
+        return getattr(s, 'lineno', 0)
+
+    def lexpos(self, n):
+        s = YaccProduction._symbol(self, n)
+        if s.__class__ is int:
+            return self.tokens.lexposes[s]
+        return getattr(s, 'lexpos', 0)
+
+def _parse_fused(parser, tables, input, lexer, tracking):
+    # If no lexer was given, we will try to use the lex module
+    if not lexer:
+        from . import lex
+        lexer = lex.lexer
+
+    # If input was supplied, pass to lexer
+    if input is not None:
+        lexer.input(input)
+
+    tokens = _FusedInput(lexer, tables)     # Columns of the tokens
+    ids = tokens.ids                        # Terminal numbers of the tokens
+    names = tokens.names                    # Types of the tokens
+    linenos = tokens.linenos
+    lexposes = tokens.lexposes
+    symbol = tokens.symbol                  # Makes the token object for a position
+    end = tokens.end                        # Position of $end
+    pos = 0                                 # Position of the next token
+    termids = tables.termids                # Terminal numbers, for tokens that are objects
+    unknown = tables.unknown                # Column used for unknown token types
+    actions = tables.actions                # Local references to the tables
+    gotos   = tables.gotos
+    prodlhs = tables.prodlhs                # Left-hand side numbers of the productions
+    prod    = parser.productions
+    defaulted_states = parser.defaulted_states
+    error_states = tables.error_states      # States with an action on error
+    error_follow = tables.error_follow      # Tokens that can follow error, by state
+    errorfunc = parser.errorfunc
+    lookahead = None                        # Current lookahead symbol, a position or an object
+    lookaheadstack = []                     # Stack of lookahead symbols
+    pslice  = _FusedProduction(tokens)      # Production object passed to grammar rules
+    errorcount = 0                          # Used during error recovery
+
+    # Set up the lexer and parser objects on pslice
+    pslice.lexer = lexer
+    pslice.parser = parser
+
+    # Set up the context of this call with the token function and the
+    # state and symbol stacks
+    context = ParseContext(tokens.token)
+    statestack = context.statestack     # Stack of parsing states
+    symstack = context.symstack         # Stack of grammar symbols
+    pslice.stack = symstack             # Put in the production
+    errtoken   = None                   # Err token
+
+    # The start state is assumed to be (0,$end)
+
+    statestack.append(0)
+    sym = YaccSymbol()
+    sym.type = '$end'
+    symstack.append(sym)
+    state = 0
+    reset = _parse_context.set(context)
+    try:
         while True:
             # Get the next symbol on the input.  If a lookahead symbol
             # is already set, we just use that. Otherwise, we'll pull
-            # the next token off of the lookaheadstack or from the lexer
-
-            if debug:
-                debug.debug('State  : %s', state)
+            # the next token off of the lookaheadstack or from the columns
 
             if state not in defaulted_states:
-                if not lookahead:
+                if lookahead is None:
                     if not lookaheadstack:
-                        lookahead = get_token()     # Get the next token
+                        lookahead = pos
+                        pos += 1
                     else:
                         lookahead = lookaheadstack.pop()
-                    if not lookahead:
-                        lookahead = YaccSymbol()
-                        lookahead.type = '$end'
+                        if lookahead is None:
+                            lookahead = end
 
                 # Check the action table
-                ltype = lookahead.type
-                t = actions[state].get(ltype)
+                if lookahead.__class__ is int:
+                    t = actions[state][ids[lookahead]]
+                else:
+                    t = actions[state][termids.get(lookahead.type, unknown)]
             else:
                 t = defaulted_states[state]
-                if debug:
-                    debug.debug('Defaulted state %s: Reduce using %d', state, -t)
-
-            if debug:
-                debug.debug('Stack  : %s',
-                            ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
 
             if t is not None:
                 if t > 0:
@@ -352,9 +2120,6 @@ class LRParser:
                     statestack.append(t)
                     state = t
 
-                    if debug:
-                        debug.debug('Action : Shift and goto state %s', t)
-
                     symstack.append(lookahead)
                     lookahead = None
 
@@ -374,111 +2139,73 @@ class LRParser:
                     sym.type = pname       # Production name
                     sym.value = None
 
-                    if debug:
+                    base = len(symstack) - plen           # Where the symbols of the rule start
+
+                    if tracking:
                         if plen:
-                            debug.info('Action : Reduce rule [%s] with %s and goto state %d', p.str,
-                                       '['+','.join([format_stack_entry(_v.value) for _v in symstack[-plen:]])+']',
-                                       goto[statestack[-1-plen]][pname])
+                            t1 = symstack[base]
+                            if t1.__class__ is int:
+                                sym.lineno = linenos[t1]
+                                sym.lexpos = lexposes[t1]
+                            else:
+                                sym.lineno = t1.lineno
+                                sym.lexpos = t1.lexpos
+                            t1 = symstack[-1]
+                            if t1.__class__ is int:
+                                sym.endlineno = linenos[t1]
+                                sym.endlexpos = lexposes[t1]
+                            else:
+                                sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
+                                sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
                         else:
-                            debug.info('Action : Reduce rule [%s] with %s and goto state %d', p.str, [],
-                                       goto[statestack[-1]][pname])
-
-                    if plen:
-                        targ = symstack[-plen-1:]
-                        targ[0] = sym
-
-                        if tracking:
-                            t1 = targ[1]
-                            sym.lineno = t1.lineno
-                            sym.lexpos = t1.lexpos
-                            t1 = targ[-1]
-                            sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
-                            sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
-
-                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
-                        # The code enclosed in this section is duplicated
-                        # below as a performance optimization.  Make sure
-                        # changes get made in both locations.
-
-                        pslice.slice = targ
-
-                        try:
-                            # Call the grammar rule with our special slice object
-                            del symstack[-plen:]
-                            self.state = state
-                            p.callable(pslice)
-                            del statestack[-plen:]
-                            if debug:
-                                debug.info('Result : %s', format_result(pslice[0]))
-                            symstack.append(sym)
-                            state = goto[statestack[-1]][pname]
-                            statestack.append(state)
-                        except SyntaxError:
-                            # If an error was set. Enter error recovery state
-                            lookaheadstack.append(lookahead)    # Save the current lookahead token
-                            symstack.extend(targ[1:-1])         # Put the production slice back on the stack
-                            statestack.pop()                    # Pop back one state (before the reduce)
-                            state = statestack[-1]
-                            sym.type = 'error'
-                            sym.value = 'error'
-                            lookahead = sym
-                            errorcount = error_count
-                            self.errorok = False
-
-                        continue
-
-                    else:
-
-                        if tracking:
-                            sym.lineno = lexer.lineno
-                            sym.lexpos = lexer.lexpos
-
-                        targ = [sym]
+                            # The position of the next token
+                            n = lookahead if lookahead.__class__ is int else min(pos, end)
+                            sym.lineno = linenos[n]
+                            sym.lexpos = lexposes[n]
 
-                        # !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
-                        # The code enclosed in this section is duplicated
-                        # above as a performance optimization.  Make sure
-                        # changes get made in both locations.
+                    # The symbols of the rule stay on the stack while the rule runs.
+                    # pslice is a view of them, so no list is made for them.
+                    pslice.sym = sym
+                    pslice.base = base
+                    pslice.length = plen + 1
 
-                        pslice.slice = targ
-
-                        try:
-                            # Call the grammar rule with our special slice object
-                            self.state = state
-                            p.callable(pslice)
-                            if debug:
-                                debug.info('Result : %s', format_result(pslice[0]))
-                            symstack.append(sym)
-                            state = goto[statestack[-1]][pname]
-                            statestack.append(state)
-                        except SyntaxError:
-                            # If an error was set. Enter error recovery state
-                            lookaheadstack.append(lookahead)    # Save the current lookahead token
-                            statestack.pop()                    # Pop back one state (before the reduce)
-                            state = statestack[-1]
-                            sym.type = 'error'
-                            sym.value = 'error'
-                            lookahead = sym
-                            errorcount = error_count
-                            self.errorok = False
+                    try:
+                        # Call the grammar rule with our special slice object
+                        context.state = state
+                        p.callable(pslice)
+                        del symstack[base:]
+                        del statestack[len(statestack) - plen:]
+                        symstack.append(sym)
+                        state = gotos[statestack[-1]][prodlhs[-t]]
+                        statestack.append(state)
+                    except SyntaxError:
+                        # If an error was set. Enter error recovery state
+                        lookaheadstack.append(lookahead)    # Save the current lookahead token
+                        if plen:
+                            symstack.pop()                  # Leave the rest of the production slice on the stack
+                        statestack.pop()                    # Pop back one state (before the reduce)
+                        state = statestack[-1]
+                        sym.type = 'error'
+                        sym.value = 'error'
+                        lookahead = sym
+                        errorcount = error_count
+                        context.errorok = False
 
-                        continue
+                    continue
 
                 if t == 0:
                     n = symstack[-1]
-                    result = getattr(n, 'value', None)
-
-                    if debug:
-                        debug.info('Done   : Returning %s', format_result(result))
-                        debug.info('PLY: PARSE DEBUG END')
-
-                    return result
+                    return getattr(n, 'value', None)
 
             if t is None:
-
-                if debug:
-                    debug.error('Error  : %s',
-                                ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
+                # Error recovery works on token objects, as for parse().
+                # The tokens still to be read stay in the columns.
+                if lookahead.__class__ is int:
+                    lookahead = symbol(lookahead)
+                tokens.materialize(symstack)
+                tokens.materialize(lookaheadstack)
+                if pos > end:
+                    pos = end
 
                 # We have some kind of parsing error here.  To handle
                 # this, we are going to push the current token onto
@@ -490,18 +2217,20 @@ class LRParser:
                 # the user defined p_error() function if this is the
                 # first syntax error.  This function is only called if
                 # errorcount == 0.
-                if errorcount == 0 or self.errorok:
+                if errorcount == 0 or context.errorok:
                     errorcount = error_count
-                    self.errorok = False
+                    context.errorok = False
                     errtoken = lookahead
                     if errtoken.type == '$end':
                         errtoken = None               # End of file!
-                    if self.errorfunc:
+                    if errorfunc:
                         if errtoken and not hasattr(errtoken, 'lexer'):
                             errtoken.lexer = lexer
-                        self.state = state
-                        tok = self.errorfunc(errtoken)
-                        if self.errorok:
+                        context.state = state
+                        tokens.pos = pos
+                        tok = errorfunc(errtoken)
+                        pos = tokens.pos
+                        if context.errorok:
                             # User must have done some kind of panic
                             # mode recovery on their own.  The
                             # returned token is the next lookahead
@@ -535,6 +2264,11 @@ class LRParser:
                     state = 0
                     # Nuke the pushback stack
                     del lookaheadstack[:]
+                    # Tokens that can't start the input either are nuked right here.
+                    if 0 not in defaulted_states:
+                        follow = error_follow[0]
+                        while pos < end and names[pos] not in follow:
+                            pos += 1
                     continue
 
                 # case 2: the statestack has a couple of entries on it, but we're
@@ -549,11 +2283,33 @@ class LRParser:
                     sym = symstack[-1]
                     if sym.type == 'error':
                         # Hmmm. Error is on top of stack, we'll just nuke input
-                        # symbol and continue
+                        # symbol and continue.  The tokens after it that can't follow
+                        # the error either are nuked right here, without going around
+                        # the loop for each one.
                         if tracking:
                             sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
                             sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
                         lookahead = None
+                        follow = error_follow.get(state)
+                        if follow is not None:
+                            while lookaheadstack:
+                                lookahead = lookaheadstack.pop()
+                                if not lookahead:
+                                    lookahead = end
+                                    break
+                                if lookahead.type in follow:
+                                    break
+                                if tracking:
+                                    sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+                                    sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                                lookahead = None
+                            else:
+                                start = pos
+                                while pos < end and names[pos] not in follow:
+                                    pos += 1
+                                if tracking and pos > start:
+                                    sym.endlineno = linenos[pos - 1]
+                                    sym.endlexpos = lexposes[pos - 1]
                         continue
 
                     # Create the error symbol for the first time and make it the new lookahead symbol
@@ -568,17 +2324,746 @@ class LRParser:
                     lookaheadstack.append(lookahead)
                     lookahead = t
                 else:
-                    sym = symstack.pop()
+                    # Pop the stack straight back to the nearest state that can
+                    # act on the error token, or to the start state.
+                    npop = 1
+                    top = len(statestack) - 2
+                    while top > 0 and statestack[top] not in error_states and statestack[top] not in defaulted_states:
+                        top -= 1
+                        npop += 1
+                    sym = symstack[-npop]
                     if tracking:
                         lookahead.lineno = sym.lineno
                         lookahead.lexpos = sym.lexpos
-                    statestack.pop()
+                    del symstack[-npop:]
+                    del statestack[-npop:]
                     state = statestack[-1]
 
                 continue
 
             # If we'r here, something really bad happened
             raise RuntimeError('yacc: internal parser error!!!\n')
+    finally:
+        _parse_context.reset(reset)
+
+# -----------------------------------------------------------------------------
+#                               == GLRParser ==
+#
+# A parser for grammars with conflicts, made with yacc(glr=True).  Where the
+# tables have a conflict that was resolved by default (a shift/reduce or
+# reduce/reduce conflict that precedence doesn't settle), the LALR parser
+# only takes the chosen action.  The GLR parser takes all of them, keeping
+# the stacks in a graph-structured stack (GSS) in which stacks share their
+# common parts.  Stacks that reach the same state at the same place in the
+# input are merged.  Conflicts settled by precedence are settled the same
+# way as for the LALR parser.
+#
+# The parse trees are kept in a shared packed parse forest (SPPF).  There is
+# a ForestNode for each symbol and part of the input it covers, with one
+# entry in alternatives for each way it can be derived.  So the forest for
+# an input with exponentially many parses still has polynomial size.  On
+# input without ambiguity there is a single stack, and parsing takes time
+# linear in the input, as for the LALR parser.
+#
+# The rule functions run after the whole input has been parsed, on a tree
+# picked from the forest.  A rule can reject the tree it is in by raising
+# SyntaxError, and the next tree is tried.  There is no error recovery: on
+# a syntax error, p_error() is called with the token, and parse() returns
+# None.
+#
+# This follows Rekers' version of Tomita's algorithm: J. Rekers, "Parser
+# Generation for Interactive Environments", PhD thesis, 1992.
+# -----------------------------------------------------------------------------
+
+# A node of the parse forest.  Terminals have the token they were made from.
+# Nonterminals have a list of (production number, children) alternatives.
+# start and end are the positions in the token stream of the part of the
+# input that the symbol covers.
+
+class ForestNode:
+    __slots__ = ('symbol', 'start', 'end', 'token', 'alternatives')
+
+    def __init__(self, symbol, start, end, token=None):
+        self.symbol = symbol
+        self.start = start
+        self.end = end
+        self.token = token
+        self.alternatives = []
+
+    def __repr__(self):
+        return '%s[%d:%d]' % (self.symbol, self.start, self.end)
+
+    # The number of trees in the forest below this node.  Trees in which a
+    # node is below itself (there are infinitely many of these for cyclic
+    # grammars) aren't counted.
+    def count(self):
+        counts = {}
+        active = set()
+        stack = [self]
+        while stack:
+            node = stack[-1]
+            if node in counts:
+                stack.pop()
+                continue
+            if node.token is not None:
+                counts[node] = 1
+                stack.pop()
+                continue
+            if node not in active:
+                active.add(node)
+                stack.extend(c for _, children in node.alternatives for c in children
+                             if c not in counts and c not in active)
+                continue
+            total = 0
+            for _, children in node.alternatives:
+                n = 1
+                for c in children:
+                    n *= counts.get(c, 0)
+                total += n
+            counts[node] = total
+            active.discard(node)
+            stack.pop()
+        return counts[self]
+
+# The order in which the trees of the forest are tried.  At each node, the
+# alternative with the longest last part comes first (as for taking the
+# shift in a shift/reduce conflict), and then the one of the earliest rule
+# (as for a reduce/reduce conflict).  This gives the tree that the LALR
+# parser builds in the usual cases, such as a dangling else.
+def _alternative_key(alternative):
+    prodnum, children = alternative
+    return tuple([c.start for c in reversed(children)]), prodnum
+
+# A node of the GSS.  links holds (node, forest node) pairs for the edges
+# to the nodes below it.
+class _GSSNode:
+    __slots__ = ('state', 'level', 'links')
+
+    def __init__(self, state, level):
+        self.state = state
+        self.level = level
+        self.links = []
+
+# The paths of length n down the GSS from node.  Returns a list of
+# (node at the end, forest nodes along the path in input order).  If link is
+# given, only the paths that go through it.
+def _gss_paths(node, n, link=None):
+    if link is None:
+        # Most of the time there is only one path
+        children = []
+        while n and len(node.links) == 1:
+            node, f = node.links[0]
+            children.append(f)
+            n -= 1
+        children.reverse()
+        paths = [(node, tuple(children))]
+        for _ in range(n):
+            paths = [(l[0], (l[1],) + children) for v, children in paths for l in v.links]
+        return paths
+    paths = [(node, (), False)]
+    for _ in range(n):
+        paths = [(l[0], (l[1],) + children, seen or l is link)
+                 for v, children, seen in paths for l in v.links]
+    return [(v, children) for v, children, seen in paths if seen]
+
+class GLRParser(LRParser):
+    def __init__(self, lrtab, errorf):
+        super().__init__(lrtab, errorf)
+        self.alternatives = lrtab.lr_alternatives
+
+        # The actions of each state and terminal as tuples, with all of the
+        # actions of a conflict
+        self.glr_actions = {}
+        for state, row in self.action.items():
+            row = {name: (t,) for name, t in row.items()}
+            for name, acts in self.alternatives.get(state, {}).items():
+                row[name] = tuple(acts)
+            self.glr_actions[state] = row
+
+    def push(self, lexer=None, debug=False, tracking=False):
+        raise YaccError('push parsers are not available in GLR mode')
+
+    def parse_fused(self, input=None, lexer=None, tracking=False):
+        raise YaccError('fused parsing is not available in GLR mode')
+
+    # In p_error(), the terminals that any of the stacks could have taken
+    def expected(self, state=None):
+        if state is not None:
+            return LRParser.expected(self, state)
+        bits = 0
+        for state in self.context().statestack:
+            bits |= self.expected_bits[state]
+        return _expected_names(bits, self.expected_terminals)
+
+    # parse().
+    #
+    # Parse the input and return the result of the start rule for the first
+    # tree of the forest.  If select is given, it picks the tree instead.  It
+    # is called as select(node, alternatives) for each node that is reached
+    # and returns the alternative to use.
+
+    def parse(self, input=None, lexer=None, debug=False, tracking=False, profile=None, select=None):
+        if profile:
+            raise YaccError('profiling is not available in GLR mode. Use a parser made by yacc() '
+                            'without glr=True')
+        forest, tokens, lexer = self._parse_forest(input, lexer, debug)
+        if forest is None:
+            return None
+        for result in self._trees(forest, tokens, lexer, tracking, select):
+            return result
+        return None
+
+    # parse_all().
+    #
+    # Parse the input and return a list with the result of the start rule for
+    # every tree of the forest (up to limit of them), in the order of parse().
+    # The rule functions run once for each tree.
+
+    def parse_all(self, input=None, lexer=None, debug=False, tracking=False, limit=None):
+        forest, tokens, lexer = self._parse_forest(input, lexer, debug)
+        if forest is None:
+            return []
+        return list(itertools.islice(self._trees(forest, tokens, lexer, tracking, None), limit))
+
+    # parse_forest().
+    #
+    # Parse the input and return the ForestNode of the start symbol, without
+    # running any rules.  Returns None on a syntax error.
+
+    def parse_forest(self, input=None, lexer=None, debug=False):
+        return self._parse_forest(input, lexer, debug)[0]
+
+    # The GLR parse loop.  Returns the root of the forest, the list of
+    # tokens and the lexer.
+    def _parse_forest(self, input, lexer, debug):
+        # If debugging has been specified as a flag, turn it into a logging object
+        if isinstance(debug, int) and debug:
+            debug = PlyLogger(sys.stderr)
+
+        actions = self.glr_actions               # Local references to the tables
+        goto = self.goto
+        prod = self.productions
+
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+
+        # If input was supplied, pass to lexer
+        if input is not None:
+            lexer.input(input)
+
+        # There is no parsing stack to look at, but p_error() may still call
+        # token() and errok().  On an error, statestack is set to the states
+        # at the top of the stacks, for expected().
+        context = ParseContext(lexer.token)
+        get_token = context.token
+
+        tokens = []                              # The tokens read so far
+        bottom = _GSSNode(0, 0)
+        frontier = {0: bottom}                   # Top nodes of the stacks, by state
+
+        # The GSS and the forest have no reference cycles, but the garbage
+        # collector would look at all of the objects in them again and
+        # again as they grow, making the parse take quadratic time.  It is
+        # turned off until the forest is built.
+        collect = gc.isenabled()
+        gc.disable()
+        reset = _parse_context.set(context)
+        try:
+            while True:
+                level = len(tokens)
+                lookahead = get_token()
+                if not lookahead:
+                    lookahead = YaccSymbol()
+                    lookahead.type = '$end'
+                ltype = lookahead.type
+
+                # Reduce.  Each entry of the work list is a node and, after a
+                # new link has been added to a node already in the
+                # frontier, that link.  Only the paths through it are new.
+                forest = {}                      # Forest nodes ending here, by (symbol, start)
+                work = collections.deque((node, None) for node in frontier.values())
+                while work:
+                    node, link = work.popleft()
+                    for t in actions[node.state].get(ltype, ()):
+                        if t >= 0:
+                            continue
+                        p = prod[-t]
+                        if link is not None and not p.len:
+                            continue
+                        pname = p.name
+                        for below, children in _gss_paths(node, p.len, link):
+                            key = (pname, below.level)
+                            f = forest.get(key)
+                            if f is None:
+                                f = forest[key] = ForestNode(pname, below.level, level)
+                            alt = (-t, children)
+                            if alt not in f.alternatives:
+                                f.alternatives.append(alt)
+                                if len(f.alternatives) > 1:
+                                    f.alternatives.sort(key=_alternative_key)
+
+                            state = goto[below.state][pname]
+                            top = frontier.get(state)
+                            if top is None:
+                                top = frontier[state] = _GSSNode(state, level)
+                                top.links.append((below, f))
+                                work.append((top, None))
+                            elif not any(l[0] is below for l in top.links):
+                                newlink = (below, f)
+                                top.links.append(newlink)
+                                work.extend((n, newlink) for n in frontier.values())
+
+                if debug:
+                    debug.debug('Token  : %s, %d stacks', lookahead, len(frontier))
+
+                # Accept, if a stack is in the accepting state
+                if ltype == '$end':
+                    for node in frontier.values():
+                        if 0 in actions[node.state].get(ltype, ()):
+                            for below, f in node.links:
+                                if below is bottom:
+                                    if debug:
+                                        debug.info('Done   : %d trees', f.count())
+                                    return f, tokens, lexer
+
+                # Shift the lookahead onto every stack that can take it
+                leaf = ForestNode(ltype, level, level + 1, lookahead)
+                shifted = {}
+                for node in frontier.values():
+                    for t in actions[node.state].get(ltype, ()):
+                        if t > 0:
+                            top = shifted.get(t)
+                            if top is None:
+                                top = shifted[t] = _GSSNode(t, level + 1)
+                            top.links.append((node, leaf))
+
+                if not shifted:
+                    if debug:
+                        debug.error('Error  : %s', lookahead)
+                    context.statestack[:] = sorted(frontier)
+                    if self.errorfunc:
+                        self.errorfunc(None if ltype == '$end' else lookahead)
+                    elif ltype == '$end':
+                        sys.stderr.write('yacc: Parse error in input. EOF\n')
+                    else:
+                        sys.stderr.write('yacc: Syntax error at line %d, token=%s\n'
+                                         % (getattr(lookahead, 'lineno', 0), ltype))
+                    return None, tokens, lexer
+
+                tokens.append(lookahead)
+                frontier = shifted
+        finally:
+            _parse_context.reset(reset)
+            if collect:
+                gc.enable()
+
+    # Run the rule functions on the trees of the forest in turn and yield the
+    # results.  The trees are walked depth first, making a choice among the
+    # alternatives at each nonterminal.  After each tree, the last choice
+    # that has another option left is moved on, as with the digits of an
+    # odometer, and the choices after it are made again.
+    def _trees(self, forest, tokens, lexer, tracking, select):
+        fixed = []
+        while True:
+            ok, result, choices, counts = self._walk(forest, fixed, tokens, lexer, tracking, select)
+            if ok:
+                yield result
+            n = len(choices) - 1
+            while n >= 0 and choices[n] + 1 >= counts[n]:
+                n -= 1
+            if n < 0:
+                return
+            fixed = choices[:n] + [choices[n] + 1]
+
+    # Walk one tree, taking the options in fixed at the first choices and
+    # the first option after that, and run its rules.  Returns whether the
+    # tree was accepted, the result, the choices made and the number of
+    # options there were for each.
+    def _walk(self, forest, fixed, tokens, lexer, tracking, select):
+        prod = self.productions
+        pslice = YaccProduction(None)            # Production object passed to grammar rules
+        pslice.lexer = lexer
+        pslice.parser = self
+        symbols = []                             # Symbols of the finished parts of the tree
+        pslice.stack = symbols
+        choices = []
+        counts = []
+        active = set()                           # Nodes on the path from the root
+        frames = []                              # [node, prodnum, children, next child, base]
+
+        node = forest
+        while True:
+            # Go down to node
+            if node is not None:
+                if node.token is not None:
+                    symbols.append(node.token)
+                else:
+                    # Alternatives with a node that is already on the path
+                    # would make the tree infinite.  Only the nodes with a
+                    # choice of options count as choices.
+                    alts = node.alternatives
+                    if len(alts) == 1:
+                        options = alts if active.isdisjoint(alts[0][1]) else ()
+                    else:
+                        options = [alt for alt in alts if active.isdisjoint(alt[1])]
+                    if options and select:
+                        options = [select(node, options)]
+                    if not options:
+                        return False, None, choices, counts
+                    if len(options) > 1:
+                        k = fixed[len(choices)] if len(choices) < len(fixed) else 0
+                        choices.append(k)
+                        counts.append(len(options))
+                    else:
+                        k = 0
+                    prodnum, children = options[k]
+                    active.add(node)
+                    frames.append([node, prodnum, children, 0, len(symbols)])
+
+            if not frames:
+                return True, symbols[0].value, choices, counts
+
+            frame = frames[-1]
+            children = frame[2]
+            if frame[3] < len(children):
+                node = children[frame[3]]
+                frame[3] += 1
+                continue
+            node = None
+
+            # All of the children are done.  Run the rule.
+            frames.pop()
+            f, prodnum, children, _, base = frame
+            active.discard(f)
+            p = prod[prodnum]
+            sym = YaccSymbol()
+            sym.type = p.name
+            sym.value = None
+
+            if tracking:
+                if children:
+                    t1 = symbols[base]
+                    sym.lineno = t1.lineno
+                    sym.lexpos = t1.lexpos
+                    t1 = symbols[-1]
+                    sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
+                    sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
+                elif f.start < len(tokens):
+                    t1 = tokens[f.start]
+                    sym.lineno = getattr(t1, 'lineno', 0)
+                    sym.lexpos = getattr(t1, 'lexpos', 0)
+                else:
+                    sym.lineno = lexer.lineno
+                    sym.lexpos = lexer.lexpos
+
+            pslice.sym = sym
+            pslice.base = base
+            pslice.length = len(children) + 1
+            try:
+                p.callable(pslice)
+            except SyntaxError:
+                return False, None, choices, counts
+            del symbols[base:]
+            symbols.append(sym)
+
+# -----------------------------------------------------------------------------
+# _parse_inputs() / _parse_pool()
+#
+# The two halves of LRParser.parse_many().  _parse_inputs() parses each input
+# in turn, starting each one from the same lexer and parser state, and
+# leaves the lexer in that state at the end.
+# _parse_pool() hands batches of inputs to a pool of threads or processes.
+# Each worker sets up its own parser and lexer once in _parse_worker_init()
+# and parses batches with _parse_batch().
+# -----------------------------------------------------------------------------
+
+def _parse_inputs(parser, lexer, inputs, debug, tracking, return_exceptions):
+    # The state to start every input in.  Lexers other than PLY's may not
+    # have any of it.
+    lineno = getattr(lexer, 'lineno', None)
+    lexstate = getattr(lexer, 'lexstate', None)
+    lexstatestack = list(getattr(lexer, 'lexstatestack', ()))
+
+    def reset():
+        if lineno is not None:
+            lexer.lineno = lineno
+        if lexstate is not None:
+            lexer.begin(lexstate)
+            lexer.lexstatestack = list(lexstatestack)
+
+    try:
+        for data in inputs:
+            reset()
+            try:
+                result = parser.parse(data, lexer, debug, tracking)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                result = e
+            yield result
+    finally:
+        reset()
+
+def _parse_pool(parser, lexer, inputs, debug, tracking, return_exceptions, executor, workers, chunksize):
+    c = lexer.clone()
+    c.lexdata = None
+    c.__dict__.pop('token', None)
+    c.lexstream = None
+
+    def batches():
+        batch = []
+        for data in inputs:
+            batch.append(data)
+            if len(batch) == chunksize:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+    pool = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+    with pool(workers, initializer=_parse_worker_init,
+              initargs=(parser, c, debug, tracking, return_exceptions)) as ex:
+        for results in ex.map(_parse_batch, batches()):
+            yield from results
+
+_parse_worker = threading.local()
+
+def _parse_worker_init(parser, lexer, debug, tracking, return_exceptions):
+    _parse_worker.args = (parser, lexer.clone(), debug, tracking, return_exceptions)
+
+def _parse_batch(batch):
+    parser, lexer, debug, tracking, return_exceptions = _parse_worker.args
+    return list(_parse_inputs(parser, lexer, batch, debug, tracking, return_exceptions))
+
+# -----------------------------------------------------------------------------
+#                                 == Arena ==
+#
+# A store for the trees built by rule functions.  Nodes are kept in columns
+# of integer arrays instead of as tuples, dicts or objects, and a node is
+# referred to by its handle, which is its number in the arena.  So a tree
+# with millions of nodes is a few arrays, which take less memory, don't
+# have to be looked at by the garbage collector and are cheap to pickle.
+#
+#     arena = yacc.Arena()
+#
+#     def p_expression_binop(p):
+#         'expression : expression PLUS expression'
+#         p[0] = arena.node('binop', (p[1], p[3]), value=p[2], span=p)
+#
+# Each node has a kind (a string), its children (the handles of nodes made
+# before it), a value (any Python object, None by default) and a span: the
+# line number, the position where it starts and the position where it ends.
+# span can be given as a (lineno, lexpos, endlexpos) tuple, or as p to take
+# the span of the symbols of the rule, as p.lineno() and p.lexspan() give
+# it.  For nonterminals these are only known when parsing with tracking.
+#
+# Nodes are only ever added, and children are always made before their
+# parent.  A node can be the child of several others.
+# -----------------------------------------------------------------------------
+
+class Arena:
+    def __init__(self):
+        self.kinds = []                      # Names of the kinds of node, by number
+        self.kindids = {}                    # Numbers of the kinds, by name
+        self.kind = array('i')               # Kind number of each node
+        self.first = array('i', [0])         # Children of node n are child[first[n]:first[n+1]]
+        self.child = array('i')              # Handles of the children of all nodes
+        self.value = []                      # Value of each node
+        self.lineno = array('q')             # Span of each node.  These stay empty
+        self.lexpos = array('q')             # until a node is given a span.  64-bit,
+        self.endlexpos = array('q')          # as for tokenize_all(columnar=True).
+
+    def __len__(self):
+        return len(self.kind)
+
+    # Add a node and return its handle
+    def node(self, kind, children=(), value=None, span=None):
+        n = len(self.kind)
+        if children:
+            children = array('i', children)
+            if min(children) < 0 or max(children) >= n:
+                raise ValueError('the children of a node must be nodes already in the arena')
+        k = self.kindids.get(kind)
+        if k is None:
+            if not isinstance(kind, str):
+                raise TypeError('the kind of a node must be a string')
+            k = self.kindids[kind] = len(self.kinds)
+            self.kinds.append(kind)
+        if children:
+            self.child.extend(children)
+        self.kind.append(k)
+        self.first.append(len(self.child))
+        self.value.append(value)
+        if span is not None or self.lineno:
+            self.setspan(n, span)
+        return n
+
+    def setspan(self, n, span):
+        if span is None:
+            lineno = lexpos = endlexpos = 0
+        elif isinstance(span, YaccProduction):
+            last = len(span) - 1
+            if last:
+                lineno = span.lineno(1)
+                lexpos = span.lexpos(1)
+                endlexpos = span.lexspan(last)[1]
+            else:
+                lineno = span.lineno(0)
+                lexpos = endlexpos = span.lexpos(0)
+        else:
+            lineno, lexpos, endlexpos = span
+        if not self.lineno:
+            # The first span.  The nodes before it have none.
+            self.lineno = array('q', [0]) * n
+            self.lexpos = array('q', [0]) * n
+            self.endlexpos = array('q', [0]) * n
+        self.lineno.append(lineno)
+        self.lexpos.append(lexpos)
+        self.endlexpos.append(endlexpos)
+
+    def kindof(self, h):
+        return self.kinds[self.kind[h]]
+
+    def valueof(self, h):
+        return self.value[h]
+
+    def spanof(self, h):
+        if not self.lineno:
+            self.kind[h]                     # Check the handle
+            return 0, 0, 0
+        return self.lineno[h], self.lexpos[h], self.endlexpos[h]
+
+    def children(self, h):
+        return self.child[self.first[h]:self.first[h + 1]].tolist()
+
+    # A view of node h, made on demand
+    def __getitem__(self, h):
+        if not 0 <= h < len(self.kind):
+            raise IndexError('arena handle out of range')
+        return ArenaNode(self, h)
+
+    # The handles of the nodes of the tree below h, in preorder
+    def walk(self, h):
+        first = self.first
+        child = self.child
+        stack = [h]
+        while stack:
+            h = stack.pop()
+            yield h
+            stack.extend(reversed(child[first[h]:first[h + 1]]))
+
+    # The handles of the nodes of the tree below h, children before parents
+    def postorder(self, h):
+        first = self.first
+        child = self.child
+        stack = [(h, False)]
+        while stack:
+            h, done = stack.pop()
+            if done:
+                yield h
+            else:
+                stack.append((h, True))
+                stack.extend([(c, False) for c in reversed(child[first[h]:first[h + 1]])])
+
+    # The handles of the nodes reachable from the roots, each one once, in
+    # the order they were made
+    def reachable(self, *roots):
+        first = self.first
+        child = self.child
+        seen = set(roots)
+        stack = list(roots)
+        while stack:
+            h = stack.pop()
+            for c in child[first[h]:first[h + 1]]:
+                if c not in seen:
+                    seen.add(c)
+                    stack.append(c)
+        return sorted(seen)
+
+    # Turn the tree below h into Python objects.  build(kind, value,
+    # children) makes the object for a node, given the objects already made
+    # for its children.  By default a node becomes the tuple (kind, value,
+    # *children).  A node that is in the tree more than once is only built
+    # once.
+    def materialize(self, h, build=None):
+        kinds = self.kinds
+        kind = self.kind
+        first = self.first
+        child = self.child
+        value = self.value
+        made = {}
+        for n in self.reachable(h):
+            children = [made[c] for c in child[first[n]:first[n + 1]]]
+            if build is None:
+                made[n] = (kinds[kind[n]], value[n], *children)
+            else:
+                made[n] = build(kinds[kind[n]], value[n], children)
+        return made[h]
+
+    # A new arena with only the nodes reachable from the roots, such as the
+    # tree of one result to send to another process.  Returns the arena and
+    # the new handles of the roots.
+    def compact(self, *roots):
+        arena = Arena()
+        handles = {}
+        for n in self.reachable(*roots):
+            handles[n] = arena.node(self.kinds[self.kind[n]],
+                                    [handles[c] for c in self.child[self.first[n]:self.first[n + 1]]],
+                                    self.value[n], self.spanof(n) if self.lineno else None)
+        return arena, [handles[r] for r in roots]
+
+    # kindids is made again from kinds when unpickling
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['kindids']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.kindids = {name: n for n, name in enumerate(self.kinds)}
+
+# A node of an arena, as returned by arena[h]
+class ArenaNode:
+    __slots__ = ('arena', 'handle')
+
+    def __init__(self, arena, handle):
+        self.arena = arena
+        self.handle = handle
+
+    def __repr__(self):
+        return '%s#%d' % (self.kind, self.handle)
+
+    def __eq__(self, other):
+        return isinstance(other, ArenaNode) and self.arena is other.arena and self.handle == other.handle
+
+    def __hash__(self):
+        return hash(self.handle)
+
+    @property
+    def kind(self):
+        return self.arena.kindof(self.handle)
+
+    @property
+    def value(self):
+        return self.arena.value[self.handle]
+
+    @property
+    def span(self):
+        return self.arena.spanof(self.handle)
+
+    @property
+    def children(self):
+        return [ArenaNode(self.arena, c) for c in self.arena.children(self.handle)]
+
+    def __len__(self):
+        arena = self.arena
+        return arena.first[self.handle + 1] - arena.first[self.handle]
+
+    def __getitem__(self, n):
+        return self.children[n]
 
 # -----------------------------------------------------------------------------
 #                          === Grammar Representation ===
@@ -682,6 +3167,35 @@ class Production(object):
         if self.func:
             self.callable = pdict[self.func]
 
+# -----------------------------------------------------------------------------
+# class MiniProduction
+#
+# A stripped-down production holding only the information the parser needs
+# at run time.  These are used by parsers whose tables come from the on-disk
+# cache, where there is no Grammar object to hold full productions.
+# -----------------------------------------------------------------------------
+
+class MiniProduction(object):
+    def __init__(self, str, name, len, func, file, line):
+        self.name     = name
+        self.len      = len
+        self.func     = func
+        self.callable = None
+        self.file     = file
+        self.line     = line
+        self.str      = str
+
+    def __str__(self):
+        return self.str
+
+    def __repr__(self):
+        return 'MiniProduction(%s)' % self.str
+
+    # Bind the production function name to a callable
+    def bind(self, pdict):
+        if self.func:
+            self.callable = pdict[self.func]
+
 # -----------------------------------------------------------------------------
 # class LRItem
 #
@@ -700,9 +3214,11 @@ class Production(object):
 #       lr_next      Next LR item. Example, if we are ' expr -> expr . PLUS term'
 #                    then lr_next refers to 'expr -> expr PLUS . term'
 #       lr_index   - LR item index (location of the ".") in the prod list.
+#       lr_id      - Item number, unique within the grammar
 #       lookaheads - LALR lookahead symbols for this item
 #       len        - Length of the production (number of symbols on right hand side)
 #       lr_after    - List of all productions that immediately follow
+#       lr_after_sym - Grammar symbol immediately after, or None
 #       lr_before   - Grammar symbol immediately before
 # -----------------------------------------------------------------------------
 
@@ -741,6 +3257,32 @@ def rightmost_terminal(symbols, terminals):
         i -= 1
     return None
 
+# -----------------------------------------------------------------------------
+# _GrammarSets
+#
+# The nullable nonterminals and the FIRST and FOLLOW sets of a grammar that
+# tables have been built for, kept so that a later grammar with many of the
+# same rules can reuse them.  rules holds the productions of each
+# nonterminal as tuples of symbol names.  The sets are bitsets numbered by
+# bitterms.  follow is None until compute_follow() has been run, and is only
+# reused for a grammar with the very same rules and start symbol.
+#
+# The sets of the last few grammars are kept in _grammar_sets, newest last.
+# -----------------------------------------------------------------------------
+
+class _GrammarSets(object):
+    def __init__(self, rules, terminals, bitterms, nullable, first):
+        self.rules     = rules
+        self.terminals = terminals
+        self.bitterms  = bitterms
+        self.nullable  = nullable
+        self.first     = first
+        self.start     = None
+        self.follow    = None
+
+_grammar_sets = []
+_grammar_sets_max = 4
+
 # -----------------------------------------------------------------------------
 #                           === GRAMMAR CLASS ===
 #
@@ -779,6 +3321,13 @@ class Grammar(object):
 
         self.Follow       = {}      # A dictionary of precomputed FOLLOW(x) symbols
 
+        self.FirstBits    = {}      # FIRST(x) and FOLLOW(x) as bitsets over Bitterms.  '<empty>'
+        self.FollowBits   = {}      # is the last bit, set in FIRST(x) if x derives the empty string
+        self.Bitterms     = []
+        self.Termbits     = {}      # The bit of each terminal
+
+        self.Nullable     = set()   # The nonterminals that derive the empty string
+
         self.Precedence   = {}      # Precedence rules for each terminal. Contains tuples of the
                                     # form ('right',level) or ('nonassoc', level) or ('left',level)
 
@@ -1075,82 +3624,198 @@ class Grammar(object):
     # -------------------------------------------------------------------------
     # _first()
     #
-    # Compute the value of FIRST1(beta) where beta is a tuple of symbols.
-    #
-    # During execution of compute_first1, the result may be incomplete.
-    # Afterward (e.g., when called from compute_follow()), it will be complete.
+    # Compute the value of FIRST1(beta) where beta is a tuple of symbols, as a
+    # list of names that ends with '<empty>' if all of beta can be empty.
+    # _first_bits() returns the same set as a bitset.  Both need the FIRST
+    # sets from compute_first().
     # -------------------------------------------------------------------------
     def _first(self, beta):
+        return _expected_names(self._first_bits(beta), self.Bitterms)
 
-        # We are computing First(x1,x2,x3,...,xn)
-        result = []
+    def _first_bits(self, beta):
+        first = self.FirstBits
+        empty = self.Termbits['<empty>']
+        result = 0
         for x in beta:
-            x_produces_empty = False
-
-            # Add all the non-<empty> symbols of First[x] to the result.
-            for f in self.First[x]:
-                if f == '<empty>':
-                    x_produces_empty = True
-                else:
-                    if f not in result:
-                        result.append(f)
-
-            if x_produces_empty:
-                # We have to consider the next x in beta,
-                # i.e. stay in the loop.
-                pass
-            else:
-                # We don't have to consider any further symbols in beta.
-                break
-        else:
-            # There was no 'break' from the loop,
-            # so x_produces_empty was true for all x in beta,
-            # so beta produces empty as well.
-            result.append('<empty>')
+            bits = first[x]
+            if not bits & empty:
+                return result | bits
+            result |= bits & ~empty
+        return result | empty
 
-        return result
+    # -------------------------------------------------------------------------
+    # _reusable_sets()
+    #
+    # Finds the kept sets of an earlier grammar that has the most nonterminals
+    # with the same rules as this one.  Returns the sets and the nonterminals
+    # whose sets must be worked out again: those with different rules, and
+    # those that use one of them, directly or not.  The sets of the others
+    # only depend on rules that haven't changed.  Returns None and all of
+    # the nonterminals if nothing can be reused.
+    # -------------------------------------------------------------------------
+    def _reusable_sets(self, rules):
+        best = None
+        same = 0
+        for sets in list(_grammar_sets):
+            n = sum(1 for name, prods in rules.items() if sets.rules.get(name) == prods)
+            if n > same:
+                best, same = sets, n
+        if best is None:
+            return None, set(rules)
+
+        # A symbol that is a terminal in one grammar and not in the other
+        # changes the sets of the rules that use it
+        flipped = best.terminals.symmetric_difference(self.Terminals)
+        users = {}
+        changed = []
+        for name, prods in rules.items():
+            if best.rules.get(name) != prods:
+                changed.append(name)
+            for prod in prods:
+                for sym in prod:
+                    if sym in rules:
+                        users.setdefault(sym, set()).add(name)
+                    elif sym in flipped:
+                        changed.append(name)
+
+        redo = set(changed)
+        while changed:
+            for name in users.get(changed.pop(), ()):
+                if name not in redo:
+                    redo.add(name)
+                    changed.append(name)
+        return best, redo
 
     # -------------------------------------------------------------------------
     # compute_first()
     #
-    # Compute the value of FIRST1(X) for all symbols
+    # Compute the value of FIRST1(X) for all symbols, and the nullable
+    # nonterminals.  Both are worked out with a worklist, so that only the
+    # nonterminals that use a symbol whose set grew are visited again.  The
+    # sets are kept as bitsets in FirstBits, and as lists of names in First.
+    # If an earlier grammar had many of the same rules, its sets are reused
+    # for the nonterminals that only depend on those rules.
     # -------------------------------------------------------------------------
     def compute_first(self):
         if self.First:
-            return self.First
-
-        # Terminals:
-        for t in self.Terminals:
-            self.First[t] = [t]
-
-        self.First['$end'] = ['$end']
+            return self.First
 
-        # Nonterminals:
+        self.Bitterms = list(self.Terminals) + ['$end', '<empty>']
+        self.Termbits = termbits = {name: 1 << n for n, name in enumerate(self.Bitterms)}
+        empty = termbits['<empty>']
 
-        # Initialize to the empty set:
+        rules = {}
         for n in self.Nonterminals:
-            self.First[n] = []
+            rules[n] = tuple(tuple(p.prod) for p in self.Prodnames.get(n, ()))
+        sets, redo = self._reusable_sets(rules)
 
-        # Then propagate symbols until no change:
-        while True:
-            some_change = False
-            for n in self.Nonterminals:
-                for p in self.Prodnames[n]:
-                    for f in self._first(p.prod):
-                        if f not in self.First[n]:
-                            self.First[n].append(f)
-                            some_change = True
-            if not some_change:
-                break
+        # Terminals:
+        first = dict(termbits)
+        del first['<empty>']
+        nullable = set()
 
+        # Nonterminals whose rules haven't changed since the earlier grammar
+        if sets is not None:
+            same_bits = sets.bitterms == self.Bitterms
+            for n in rules:
+                if n not in redo:
+                    bits = sets.first[n]
+                    if not same_bits:
+                        bits = sum(termbits[name] for name in _expected_names(bits, sets.bitterms))
+                    first[n] = bits
+                    if n in sets.nullable:
+                        nullable.add(n)
+
+        # Nullable nonterminals.  Each production counts its symbols that
+        # aren't known to be nullable.  When a nonterminal becomes nullable,
+        # the productions that use it count down.
+        remaining = {}
+        uses = {}
+        work = []
+        for n in redo:
+            for p in self.Prodnames.get(n, ()):
+                count = 0
+                for sym in p.prod:
+                    if sym not in nullable:
+                        count += 1
+                        if sym in redo:
+                            uses.setdefault(sym, []).append(p)
+                remaining[p.number] = count
+                if count == 0 and n not in nullable:
+                    nullable.add(n)
+                    work.append(n)
+        while work:
+            for p in uses.get(work.pop(), ()):
+                remaining[p.number] -= 1
+                if remaining[p.number] == 0 and p.name not in nullable:
+                    nullable.add(p.name)
+                    work.append(p.name)
+
+        # FIRST sets.  Each nonterminal starts with the terminals that lead
+        # its productions, and the sets of the nonterminals that lead them
+        # are then added along the edges in feeds until nothing changes.
+        feeds = {}
+        for n in redo:
+            bits = empty if n in nullable else 0
+            for p in self.Prodnames.get(n, ()):
+                for sym in p.prod:
+                    if sym in redo:
+                        if sym != n:
+                            feeds.setdefault(sym, []).append(n)
+                    else:
+                        bits |= first[sym] & ~empty
+                    if sym not in nullable:
+                        break
+            first[n] = bits
+
+        work = list(redo)
+        while work:
+            sym = work.pop()
+            bits = first[sym] & ~empty
+            for n in feeds.get(sym, ()):
+                if bits & ~first[n]:
+                    first[n] |= bits
+                    work.append(n)
+
+        self.FirstBits = first
+        self.Nullable = nullable
+        bitterms = self.Bitterms
+        names = {}
+        for name, bits in first.items():
+            if bits not in names:
+                names[bits] = _expected_names(bits, bitterms)
+            self.First[name] = list(names[bits])
+
+        # Keep the sets for later grammars
+        self._sets = _GrammarSets(rules, frozenset(self.Terminals), bitterms, frozenset(nullable),
+                                  {n: first[n] for n in rules})
+        if sets is not None and sets.rules == rules and sets.bitterms == bitterms:
+            self._sets.start, self._sets.follow = sets.start, sets.follow
+        _grammar_sets.append(self._sets)
+        del _grammar_sets[:-_grammar_sets_max]
         return self.First
 
+    # -------------------------------------------------------------------------
+    # compute_nullable()
+    #
+    # Returns the set of nonterminals that can derive the empty string.
+    # -------------------------------------------------------------------------
+    def compute_nullable(self):
+        self.compute_first()
+        return self.Nullable
+
     # ---------------------------------------------------------------------
     # compute_follow()
     #
     # Computes all of the follow sets for every non-terminal symbol.  The
     # follow set is the set of all symbols that might follow a given
     # non-terminal.  See the Dragon book, 2nd Ed. p. 189.
+    #
+    # Each production is walked once from the right, adding FIRST of the
+    # rest of the production to the set of each nonterminal.  Where the rest
+    # can be empty, FOLLOW of the nonterminal on the left feeds the set, and
+    # the sets are then passed along with a worklist.  The sets are kept as
+    # bitsets in FollowBits, and as lists of names in Follow.
     # ---------------------------------------------------------------------
     def compute_follow(self, start=None):
         # If already computed, return the result
@@ -1161,38 +3826,50 @@ class Grammar(object):
         if not self.First:
             self.compute_first()
 
-        # Add '$end' to the follow list of the start symbol
-        for k in self.Nonterminals:
-            self.Follow[k] = []
-
         if not start:
             start = self.Productions[1].name
 
-        self.Follow[start] = ['$end']
+        sets = self._sets
+        if sets.follow is not None and sets.start == start:
+            follow = dict(sets.follow)
+        else:
+            first = self.FirstBits
+            empty = self.Termbits['<empty>']
+            Nonterminals = self.Nonterminals
 
-        while True:
-            didadd = False
+            # Add '$end' to the follow list of the start symbol
+            follow = dict.fromkeys(Nonterminals, 0)
+            follow[start] = self.Termbits['$end']
+
+            feeds = {}
             for p in self.Productions[1:]:
-                # Here is the production set
-                for i, B in enumerate(p.prod):
-                    if B in self.Nonterminals:
-                        # Okay. We got a non-terminal in a production
-                        fst = self._first(p.prod[i+1:])
-                        hasempty = False
-                        for f in fst:
-                            if f != '<empty>' and f not in self.Follow[B]:
-                                self.Follow[B].append(f)
-                                didadd = True
-                            if f == '<empty>':
-                                hasempty = True
-                        if hasempty or i == (len(p.prod)-1):
-                            # Add elements of follow(a) to follow(b)
-                            for f in self.Follow[p.name]:
-                                if f not in self.Follow[B]:
-                                    self.Follow[B].append(f)
-                                    didadd = True
-            if not didadd:
-                break
+                rest = empty
+                for sym in reversed(p.prod):
+                    if sym in Nonterminals:
+                        follow[sym] |= rest & ~empty
+                        if rest & empty and sym != p.name:
+                            feeds.setdefault(p.name, []).append(sym)
+                    bits = first[sym]
+                    rest = (bits & ~empty) | rest if bits & empty else bits
+
+            work = [n for n in follow if follow[n]]
+            while work:
+                name = work.pop()
+                bits = follow[name]
+                for sym in feeds.get(name, ()):
+                    if bits & ~follow[sym]:
+                        follow[sym] |= bits
+                        work.append(sym)
+
+            sets.start, sets.follow = start, dict(follow)
+
+        self.FollowBits = follow
+        bitterms = self.Bitterms
+        names = {}
+        for name, bits in follow.items():
+            if bits not in names:
+                names[bits] = _expected_names(bits, bitterms)
+            self.Follow[name] = list(names[bits])
         return self.Follow
 
 
@@ -1212,6 +3889,7 @@ class Grammar(object):
     # -----------------------------------------------------------------------------
 
     def build_lritems(self):
+        lr_id = 0
         for p in self.Productions:
             lastlri = p
             i = 0
@@ -1221,10 +3899,16 @@ class Grammar(object):
                     lri = None
                 else:
                     lri = LRItem(p, i)
+                    lri.lr_id = lr_id
+                    lr_id += 1
                     # Precompute the list of productions immediately following
                     try:
-                        lri.lr_after = self.Prodnames[lri.prod[i+1]]
-                    except (IndexError, KeyError):
+                        lri.lr_after_sym = lri.prod[i+1]
+                        lri.lr_after = self.Prodnames[lri.lr_after_sym]
+                    except IndexError:
+                        lri.lr_after_sym = None
+                        lri.lr_after = []
+                    except KeyError:
                         lri.lr_after = []
                     try:
                         lri.lr_before = lri.prod[i-1]
@@ -1258,9 +3942,15 @@ class Grammar(object):
 # This is used to compute the values of Read() sets as well as FOLLOW sets
 # in LALR(1) generation.
 #
+# Sets are bitsets held in one element lists, so that F[x][0] is an int
+# with a bit set for each member.  All of the nodes in a strongly connected
+# component end up sharing the same list.  The search uses an explicit
+# stack instead of recursion so that large grammars don't hit Python's
+# recursion limit.
+#
 # Inputs:  X    - An input set
 #          R    - A relation
-#          FP   - Set-valued function
+#          FP   - Set-valued function returning a new one element list
 # ------------------------------------------------------------------------------
 
 def digraph(X, R, FP):
@@ -1276,26 +3966,36 @@ def digraph(X, R, FP):
 
 def traverse(x, N, stack, F, X, R, FP):
     stack.append(x)
-    d = len(stack)
-    N[x] = d
-    F[x] = FP(x)             # F(X) <- F'(x)
-
-    rel = R(x)               # Get y's related to x
-    for y in rel:
-        if N[y] == 0:
-            traverse(y, N, stack, F, X, R, FP)
-        N[x] = min(N[x], N[y])
-        for a in F.get(y, []):
-            if a not in F[x]:
-                F[x].append(a)
-    if N[x] == d:
-        N[stack[-1]] = MAXINT
-        F[stack[-1]] = F[x]
-        element = stack.pop()
-        while element != x:
-            N[stack[-1]] = MAXINT
-            F[stack[-1]] = F[x]
-            element = stack.pop()
+    N[x] = len(stack)
+    F[x] = FP(x)                        # F(X) <- F'(x)
+    work = [(x, len(stack), iter(R(x)))]
+    while work:
+        x, d, rel = work[-1]
+        for y in rel:                   # Get y's related to x
+            if N[y] == 0:
+                stack.append(y)
+                N[y] = len(stack)
+                F[y] = FP(y)
+                work.append((y, len(stack), iter(R(y))))
+                break
+            N[x] = min(N[x], N[y])
+            F[x][0] |= F[y][0]
+        else:
+            work.pop()
+            if N[x] == d:
+                N[stack[-1]] = MAXINT
+                F[stack[-1]] = F[x]
+                element = stack.pop()
+                while element != x:
+                    N[stack[-1]] = MAXINT
+                    F[stack[-1]] = F[x]
+                    element = stack.pop()
+            if work:
+                # Back in the caller: fold in the results for x
+                y = x
+                x = work[-1][0]
+                N[x] = min(N[x], N[y])
+                F[x][0] |= F[y][0]
 
 class LALRError(YaccError):
     pass
@@ -1321,10 +4021,9 @@ class LRTable:
         self.lr_action     = {}        # Action table
         self.lr_goto       = {}        # Goto table
         self.lr_productions  = grammar.Productions    # Copy of grammar Production array
-        self.lr_goto_cache = {}        # Cache of computed gotos
-        self.lr0_cidhash   = {}        # Cache of closures
-
-        self._add_count    = 0         # Internal counter used to detect cycles
+        self.lr0_trans     = []        # LR(0) transitions. A {symbol: state} dict for each state
+        self.lr_terminals  = []        # Terminal for each bit of a lookahead bitset
+        self.lr_termbits   = {}        # Bit for each terminal
 
         # Diagnostic information filled in by the table generator
         self.sr_conflict   = 0
@@ -1334,6 +4033,11 @@ class LRTable:
         self.sr_conflicts  = []
         self.rr_conflicts  = []
 
+        # Every action of the entries with a conflict that was resolved by
+        # default, with the chosen one first.  {state: {terminal: [actions]}}.
+        # Used by the GLR parser.
+        self.lr_alternatives = {}
+
         # Build the tables
         self.grammar.build_lritems()
         self.grammar.compute_first()
@@ -1346,74 +4050,50 @@ class LRTable:
             p.bind(pdict)
 
     # Compute the LR(0) closure operation on I, where I is a set of LR(0) items.
+    #
+    # Items are added in the same order as a breadth-first search over the
+    # items would add them.  Since all of the productions of a nonterminal
+    # are added together, the search runs over nonterminals instead, using
+    # the initial items and leading nonterminals computed by lr0_prepare().
 
     def lr0_closure(self, I):
-        self._add_count += 1
+        initial = self.lr0_initial
+        leading = self.lr0_leading
 
         # Add everything in I to J
         J = I[:]
-        didadd = True
-        while didadd:
-            didadd = False
-            for j in J:
-                for x in j.lr_after:
-                    if getattr(x, 'lr0_added', 0) == self._add_count:
-                        continue
-                    # Add B --> .G to J
-                    J.append(x.lr_next)
-                    x.lr0_added = self._add_count
-                    didadd = True
-
+        added = set()
+        pending = [p.lr_after_sym for p in I if p.lr_after_sym in initial]
+        for N in pending:
+            if N in added:
+                continue
+            added.add(N)
+            # Add N --> .G to J for all productions of N
+            J.extend(initial[N])
+            pending.extend(leading[N])
         return J
 
-    # Compute the LR(0) goto function goto(I,X) where I is a set
-    # of LR(0) items and X is a grammar symbol.   This function is written
-    # in a way that guarantees uniqueness of the generated goto sets
-    # (i.e. the same goto set will never be returned as two different Python
-    # objects).  With uniqueness, we can later do fast set comparisons using
-    # id(obj) instead of element-wise comparison.
-
-    def lr0_goto(self, I, x):
-        # First we look for a previously cached entry
-        g = self.lr_goto_cache.get((id(I), x))
-        if g:
-            return g
-
-        # Now we generate the goto set in a way that guarantees uniqueness
-        # of the result
-
-        s = self.lr_goto_cache.get(x)
-        if not s:
-            s = {}
-            self.lr_goto_cache[x] = s
-
-        gs = []
-        for p in I:
-            n = p.lr_next
-            if n and n.lr_before == x:
-                s1 = s.get(id(n))
-                if not s1:
-                    s1 = {}
-                    s[id(n)] = s1
-                gs.append(n)
-                s = s1
-        g = s.get('$end')
-        if not g:
-            if gs:
-                g = self.lr0_closure(gs)
-                s['$end'] = g
-            else:
-                s['$end'] = gs
-        self.lr_goto_cache[(id(I), x)] = g
-        return g
+    # Precompute, for each nonterminal, the items N --> .G of its productions
+    # and the nonterminals that appear first in them.
+
+    def lr0_prepare(self):
+        self.lr0_initial = initial = {}
+        self.lr0_leading = leading = {}
+        for name, prods in self.grammar.Prodnames.items():
+            initial[name] = [p.lr_next for p in prods]
+            leading[name] = [p.prod[0] for p in prods if p.prod and p.prod[0] in self.grammar.Prodnames]
+
+    # Compute the LR(0) sets of items, and the transitions between them.
+    # Each goto set is identified by the numbers of the items in its kernel,
+    # so the same set is never added twice.  States are numbered in the
+    # order in which they are first reached.
 
-    # Compute the LR(0) sets of item function
     def lr0_items(self):
-        C = [self.lr0_closure([self.grammar.Productions[0].lr_next])]
-        i = 0
-        for I in C:
-            self.lr0_cidhash[id(I)] = i
-            i += 1
+        self.lr0_prepare()
+        kernel = [self.grammar.Productions[0].lr_next]
+        C = [self.lr0_closure(kernel)]
+        kernels = {(kernel[0].lr_id,): 0}
+        trans = self.lr0_trans
 
         # Loop over the items in C and each grammar symbols
         i = 0
@@ -1421,18 +4101,34 @@ class LRTable:
             I = C[i]
             i += 1
 
+            # Find the kernel of goto(I,X) for every X following a dot
+            gotos = {}
+            for p in I:
+                x = p.lr_after_sym
+                if x is not None:
+                    if x in gotos:
+                        gotos[x].append(p.lr_next)
+                    else:
+                        gotos[x] = [p.lr_next]
+
             # Collect all of the symbols that could possibly be in the goto(I,X) sets
             asyms = {}
             for ii in I:
                 for s in ii.usyms:
                     asyms[s] = None
 
+            st_trans = {}
             for x in asyms:
-                g = self.lr0_goto(I, x)
-                if not g or id(g) in self.lr0_cidhash:
+                g = gotos.get(x)
+                if not g:
                     continue
-                self.lr0_cidhash[id(g)] = len(C)
-                C.append(g)
+                key = tuple([n.lr_id for n in g])
+                j = kernels.get(key)
+                if j is None:
+                    j = kernels[key] = len(C)
+                    C.append(self.lr0_closure(g))
+                st_trans[x] = j
+            trans.append(st_trans)
 
         return C
 
@@ -1465,22 +4161,7 @@ class LRTable:
     # -----------------------------------------------------------------------------
 
     def compute_nullable_nonterminals(self):
-        nullable = set()
-        num_nullable = 0
-        while True:
-            for p in self.grammar.Productions[1:]:
-                if p.len == 0:
-                    nullable.add(p.name)
-                    continue
-                for t in p.prod:
-                    if t not in nullable:
-                        break
-                else:
-                    nullable.add(p.name)
-            if len(nullable) == num_nullable:
-                break
-            num_nullable = len(nullable)
-        return nullable
+        return self.grammar.compute_nullable()
 
     # -----------------------------------------------------------------------------
     # find_nonterminal_trans(C)
@@ -1495,13 +4176,16 @@ class LRTable:
 
     def find_nonterminal_transitions(self, C):
         trans = []
+        seen = set()
+        Nonterminals = self.grammar.Nonterminals
         for stateno, state in enumerate(C):
             for p in state:
-                if p.lr_index < p.len - 1:
-                    t = (stateno, p.prod[p.lr_index+1])
-                    if t[1] in self.grammar.Nonterminals:
-                        if t not in trans:
-                            trans.append(t)
+                N = p.lr_after_sym
+                if N in Nonterminals:
+                    t = (stateno, N)
+                    if t not in seen:
+                        seen.add(t)
+                        trans.append(t)
         return trans
 
     # -----------------------------------------------------------------------------
@@ -1510,26 +4194,24 @@ class LRTable:
     # Computes the DR(p,A) relationships for non-terminal transitions.  The input
     # is a tuple (state,N) where state is a number and N is a nonterminal symbol.
     #
-    # Returns a list of terminals.
+    # Returns a bitset of terminals in a one element list.
     # -----------------------------------------------------------------------------
 
     def dr_relation(self, C, trans, nullable):
         state, N = trans
-        terms = []
+        termbits = self.lr_termbits
+        terms = 0
 
-        g = self.lr0_goto(C[state], N)
-        for p in g:
-            if p.lr_index < p.len - 1:
-                a = p.prod[p.lr_index+1]
-                if a in self.grammar.Terminals:
-                    if a not in terms:
-                        terms.append(a)
+        for p in C[self.lr0_trans[state][N]]:
+            a = p.lr_after_sym
+            if a in termbits:
+                terms |= termbits[a]
 
         # This extra bit is to handle the start state
         if state == 0 and N == self.grammar.Productions[0].prod[0]:
-            terms.append('$end')
+            terms |= termbits['$end']
 
-        return terms
+        return [terms]
 
     # -----------------------------------------------------------------------------
     # reads_relation()
@@ -1542,13 +4224,11 @@ class LRTable:
         rel = []
         state, N = trans
 
-        g = self.lr0_goto(C[state], N)
-        j = self.lr0_cidhash.get(id(g), -1)
-        for p in g:
-            if p.lr_index < p.len - 1:
-                a = p.prod[p.lr_index + 1]
-                if a in empty:
-                    rel.append((j, a))
+        j = self.lr0_trans[state][N]
+        for p in C[j]:
+            a = p.lr_after_sym
+            if a in empty:
+                rel.append((j, a))
 
         return rel
 
@@ -1584,62 +4264,57 @@ class LRTable:
         lookdict = {}          # Dictionary of lookback relations
         includedict = {}       # Dictionary of include relations
 
-        # Make a dictionary of non-terminal transitions
-        dtrans = {}
-        for t in trans:
-            dtrans[t] = 1
-
-        # Loop over all transitions and compute lookbacks and includes
+        # Make a set of non-terminal transitions
+        dtrans = set(trans)
+        lr0_trans = self.lr0_trans
+
+        # For every item, whether the symbols after the one following the dot
+        # can all derive the empty string
+        nullsuffix = {}
+        for prod in self.grammar.Productions:
+            syms = prod.prod
+            empty = True
+            for k in range(len(syms), -1, -1):
+                nullsuffix[prod.lr_items[k]] = empty
+                if k < len(syms):
+                    empty = empty and syms[k] in nullable
+
+        # Loop over all transitions and compute lookbacks and includes.  The
+        # transitions come grouped by state, so the items of each state are
+        # sorted by production name once.
+        bystate = None
+        byname = {}
         for state, N in trans:
+            if state != bystate:
+                bystate = state
+                byname = {}
+                for p in C[state]:
+                    byname.setdefault(p.name, []).append(p)
             lookb = []
             includes = []
-            for p in C[state]:
-                if p.name != N:
-                    continue
-
+            for p in byname.get(N, ()):
                 # Okay, we have a name match.  We now follow the production all the way
                 # through the state machine until we get the . on the right hand side
 
-                lr_index = p.lr_index
+                r = p
                 j = state
-                while lr_index < p.len - 1:
-                    lr_index = lr_index + 1
-                    t = p.prod[lr_index]
-
-                    # Check to see if this symbol and state are a non-terminal transition
-                    if (j, t) in dtrans:
-                        # Yes.  Okay, there is some chance that this is an includes relation
-                        # the only way to know for certain is whether the rest of the
-                        # production derives empty
-
-                        li = lr_index + 1
-                        while li < p.len:
-                            if p.prod[li] in self.grammar.Terminals:
-                                break      # No forget it
-                            if p.prod[li] not in nullable:
-                                break
-                            li = li + 1
-                        else:
-                            # Appears to be a relation between (j,t) and (state,N)
-                            includes.append((j, t))
-
-                    g = self.lr0_goto(C[j], t)               # Go to next set
-                    j = self.lr0_cidhash.get(id(g), -1)      # Go to next state
-
-                # When we get here, j is the final state, now we have to locate the production
-                for r in C[j]:
-                    if r.name != p.name:
-                        continue
-                    if r.len != p.len:
-                        continue
-                    i = 0
-                    # This look is comparing a production ". A B C" with "A B C ."
-                    while i < r.lr_index:
-                        if r.prod[i] != p.prod[i+1]:
-                            break
-                        i = i + 1
-                    else:
-                        lookb.append((j, r))
+                while r.lr_after_sym is not None:
+                    t = r.lr_after_sym
+
+                    # Check to see if this symbol and state are a non-terminal transition.
+                    # If so, it's an includes relation when the rest of the production
+                    # derives empty
+                    if (j, t) in dtrans and nullsuffix[r]:
+                        includes.append((j, t))
+
+                    j = lr0_trans[j][t]          # Go to next state
+                    r = r.lr_next
+
+                # When we get here, j is the final state and r is the completed
+                # item.  Only items that started at the beginning of the production
+                # have a lookback to it.
+                if p.lr_index == 0:
+                    lookb.append((j, r))
             for i in includes:
                 if i not in includedict:
                     includedict[i] = []
@@ -1701,15 +4376,28 @@ class LRTable:
     # -----------------------------------------------------------------------------
 
     def add_lookaheads(self, lookbacks, followset):
+        # Collect the lookaheads as bitsets first
+        added = []
         for trans, lb in lookbacks.items():
+            f = followset.get(trans)
+            f = f[0] if f else 0
             # Loop over productions in lookback
             for state, p in lb:
                 if state not in p.lookaheads:
-                    p.lookaheads[state] = []
-                f = followset.get(trans, [])
-                for a in f:
-                    if a not in p.lookaheads[state]:
-                        p.lookaheads[state].append(a)
+                    p.lookaheads[state] = 0
+                    added.append((state, p))
+                p.lookaheads[state] |= f
+
+        # Turn the bitsets into lists of terminals
+        terminals = self.lr_terminals
+        for state, p in added:
+            f = p.lookaheads[state]
+            laheads = []
+            while f:
+                bit = f & -f
+                laheads.append(terminals[bit.bit_length() - 1])
+                f ^= bit
+            p.lookaheads[state] = laheads
 
     # -----------------------------------------------------------------------------
     # add_lalr_lookaheads()
@@ -1719,6 +4407,10 @@ class LRTable:
     # -----------------------------------------------------------------------------
 
     def add_lalr_lookaheads(self, C):
+        # Number the terminals for the lookahead bitsets
+        self.lr_terminals = list(self.grammar.Terminals) + ['$end']
+        self.lr_termbits = {term: 1 << n for n, term in enumerate(self.lr_terminals)}
+
         # Determine all of the nullable nonterminals
         nullable = self.compute_nullable_nonterminals()
 
@@ -1748,6 +4440,11 @@ class LRTable:
         goto   = self.lr_goto         # Goto array
         action = self.lr_action       # Action array
         log    = self.log             # Logger for output
+        Terminals = self.grammar.Terminals
+
+        # The list of actions of each state is only needed for the debugging
+        # output, and is skipped when there is none
+        verbose = not isinstance(log, NullLogger)
 
         actionp = {}                  # Action production array (temporary)
 
@@ -1765,12 +4462,15 @@ class LRTable:
             st_action  = {}
             st_actionp = {}
             st_goto    = {}
-            log.info('')
-            log.info('state %d', st)
-            log.info('')
-            for p in I:
-                log.info('    (%d) %s', p.number, p)
-            log.info('')
+            st_conflicts = {}         # Actions of the conflicts resolved by default
+            st_trans   = self.lr0_trans[st]
+            if verbose:
+                log.info('')
+                log.info('state %d', st)
+                log.info('')
+                for p in I:
+                    log.info('    (%d) %s', p.number, p)
+                log.info('')
 
             for p in I:
                     if p.len == p.lr_index + 1:
@@ -1781,8 +4481,10 @@ class LRTable:
                         else:
                             # We are at the end of a production.  Reduce!
                             laheads = p.lookaheads[st]
+                            if verbose:
+                                m = 'reduce using rule %d (%s)' % (p.number, p)
+                                actlist.extend([(a, p, m) for a in laheads])
                             for a in laheads:
-                                actlist.append((a, p, 'reduce using rule %d (%s)' % (p.number, p)))
                                 r = st_action.get(a)
                                 if r is not None:
                                     # Whoa. Have a shift/reduce or reduce/reduce conflict
@@ -1804,6 +4506,7 @@ class LRTable:
                                             if not slevel and not rlevel:
                                                 log.info('  ! shift/reduce conflict for %s resolved as reduce', a)
                                                 self.sr_conflicts.append((st, a, 'reduce'))
+                                                st_conflicts.setdefault(a, set()).update((r, -p.number))
                                             Productions[p.number].reduced += 1
                                         elif (slevel == rlevel) and (rprec == 'nonassoc'):
                                             st_action[a] = None
@@ -1812,6 +4515,7 @@ class LRTable:
                                             if not rlevel:
                                                 log.info('  ! shift/reduce conflict for %s resolved as shift', a)
                                                 self.sr_conflicts.append((st, a, 'shift'))
+                                                st_conflicts.setdefault(a, set()).update((r, -p.number))
                                     elif r < 0:
                                         # Reduce/reduce conflict.   In this case, we favor the rule
                                         # that was defined first in the grammar file
@@ -1826,6 +4530,7 @@ class LRTable:
                                         else:
                                             chosenp, rejectp = oldp, pp
                                         self.rr_conflicts.append((st, chosenp, rejectp))
+                                        st_conflicts.setdefault(a, set()).update((r, -p.number))
                                         log.info('  ! reduce/reduce conflict for %s resolved using rule %d (%s)',
                                                  a, st_actionp[a].number, st_actionp[a])
                                     else:
@@ -1837,12 +4542,12 @@ class LRTable:
                     else:
                         i = p.lr_index
                         a = p.prod[i+1]       # Get symbol right after the "."
-                        if a in self.grammar.Terminals:
-                            g = self.lr0_goto(I, a)
-                            j = self.lr0_cidhash.get(id(g), -1)
+                        if a in Terminals:
+                            j = st_trans.get(a, -1)
                             if j >= 0:
                                 # We are in a shift state
-                                actlist.append((a, p, 'shift and go to state %d' % j))
+                                if verbose:
+                                    actlist.append((a, p, 'shift and go to state %d' % j))
                                 r = st_action.get(a)
                                 if r is not None:
                                     # Whoa have a shift/reduce or shift/shift conflict
@@ -1869,6 +4574,7 @@ class LRTable:
                                             if not rlevel:
                                                 log.info('  ! shift/reduce conflict for %s resolved as shift', a)
                                                 self.sr_conflicts.append((st, a, 'shift'))
+                                                st_conflicts.setdefault(a, set()).update((r, j))
                                         elif (slevel == rlevel) and (rprec == 'nonassoc'):
                                             st_action[a] = None
                                         else:
@@ -1876,6 +4582,7 @@ class LRTable:
                                             if not slevel and not rlevel:
                                                 log.info('  ! shift/reduce conflict for %s resolved as reduce', a)
                                                 self.sr_conflicts.append((st, a, 'reduce'))
+                                                st_conflicts.setdefault(a, set()).update((r, j))
 
                                     else:
                                         raise LALRError('Unknown conflict in state %d' % st)
@@ -1884,44 +4591,246 @@ class LRTable:
                                     st_actionp[a] = p
 
             # Print the actions associated with each terminal
-            _actprint = {}
-            for a, p, m in actlist:
-                if a in st_action:
-                    if p is st_actionp[a]:
-                        log.info('    %-15s %s', a, m)
-                        _actprint[(a, m)] = 1
-            log.info('')
-            # Print the actions that were not used. (debugging)
-            not_used = 0
-            for a, p, m in actlist:
-                if a in st_action:
-                    if p is not st_actionp[a]:
-                        if not (a, m) in _actprint:
-                            log.debug('  ! %-15s [ %s ]', a, m)
-                            not_used = 1
+            if verbose:
+                _actprint = {}
+                for a, p, m in actlist:
+                    if a in st_action:
+                        if p is st_actionp[a]:
+                            log.info('    %-15s %s', a, m)
                             _actprint[(a, m)] = 1
-            if not_used:
-                log.debug('')
+                log.info('')
+                # Print the actions that were not used. (debugging)
+                not_used = 0
+                for a, p, m in actlist:
+                    if a in st_action:
+                        if p is not st_actionp[a]:
+                            if not (a, m) in _actprint:
+                                log.debug('  ! %-15s [ %s ]', a, m)
+                                not_used = 1
+                                _actprint[(a, m)] = 1
+                if not_used:
+                    log.debug('')
 
             # Construct the goto table for this state
 
-            nkeys = {}
-            for ii in I:
-                for s in ii.usyms:
-                    if s in self.grammar.Nonterminals:
-                        nkeys[s] = None
-            for n in nkeys:
-                g = self.lr0_goto(I, n)
-                j = self.lr0_cidhash.get(id(g), -1)
-                if j >= 0:
+            for n, j in st_trans.items():
+                if n not in Terminals:
                     st_goto[n] = j
-                    log.info('    %-30s shift and go to state %d', n, j)
+                    if verbose:
+                        log.info('    %-30s shift and go to state %d', n, j)
 
             action[st] = st_action
             actionp[st] = st_actionp
             goto[st] = st_goto
+            if st_conflicts:
+                alternatives = {}
+                for a, acts in st_conflicts.items():
+                    chosen = st_action.get(a)
+                    if chosen is not None:
+                        alternatives[a] = [chosen] + sorted(acts - {chosen}, reverse=True)
+                self.lr_alternatives[st] = alternatives
             st += 1
 
+# -----------------------------------------------------------------------------
+#                            == CachedLRTable ==
+#
+# Parsing tables read back from the on-disk cache.  This provides the same
+# attributes as LRTable that the parser relies on (lr_action, lr_goto and
+# lr_productions), but none of the grammar analysis.
+# -----------------------------------------------------------------------------
+
+class CachedLRTable:
+    def __init__(self, data):
+        self.lr_method      = data['method']
+        self.lr_action      = data['action']
+        self.lr_goto        = data['goto']
+        self.lr_productions = [MiniProduction(*p) for p in data['productions']]
+        self.lr_alternatives = data['alternatives']
+
+    # Bind all production function names to callable objects in pdict
+    def bind_callables(self, pdict):
+        for p in self.lr_productions:
+            p.bind(pdict)
+
+# -----------------------------------------------------------------------------
+#                            == DenseLRTable ==
+#
+# A compact encoding of the parsing tables.  Terminals and nonterminals are
+# numbered and each table is stored as three integer arrays using row
+# displacement: the entry for (state, symbol) lives at index base[state] +
+# symbol, and is valid only if check[index] == state.  Rows are packed into
+# the same arrays wherever their entries don't collide, so the tables only
+# take a few bytes for every action, instead of a dict per state.
+# -----------------------------------------------------------------------------
+
+class DenseLRTable:
+    def __init__(self, lrtab):
+        action = lrtab.lr_action
+        goto = lrtab.lr_goto
+        self.lr_productions = [MiniProduction(str(p), p.name, p.len, p.func, p.file, p.line)
+                               for p in lrtab.lr_productions]
+
+        # Number the grammar symbols
+        terminals = {'$end', 'error'}
+        for row in action.values():
+            terminals.update(row)
+        self.terminals = sorted(terminals)
+        self.termids = {name: n for n, name in enumerate(self.terminals)}
+
+        nonterminals = {p.name for p in self.lr_productions}
+        for row in goto.values():
+            nonterminals.update(row)
+        self.nonterminals = sorted(nonterminals)
+        self.nontermids = {name: n for n, name in enumerate(self.nonterminals)}
+
+        # Pack the tables.  Entries with a value of None (nonassociative
+        # errors) are simply left out, which makes them errors as well.
+        nstates = max(list(action) + list(goto)) + 1 if action or goto else 0
+        termids = self.termids
+        rows = [[(termids[a], t) for a, t in action.get(st, {}).items() if t is not None]
+                for st in range(nstates)]
+        self.action_base, self.action_check, self.action_value = _pack_rows(rows, len(self.terminals))
+
+        nontermids = self.nontermids
+        rows = [[(nontermids[n], t) for n, t in goto.get(st, {}).items()] for st in range(nstates)]
+        self.goto_base, self.goto_check, self.goto_value = _pack_rows(rows, len(self.nonterminals))
+
+        # Left-hand side of each production, as a nonterminal number
+        self.prod_lhs = array('i', [nontermids[p.name] for p in self.lr_productions])
+
+        # States with a single reduction.  These are found from the original
+        # tables since nonassociative error entries are not kept above.
+        self.defaulted_states = {}
+        for state, actions in action.items():
+            rules = list(actions.values())
+            if len(rules) == 1 and rules[0] is not None and rules[0] < 0:
+                self.defaulted_states[state] = rules[0]
+
+        self.error_states, self.error_follow = _recovery_tables(action.items())
+        self.expected_terminals, self.expected_bits = _expected_sets(action.items())
+
+    # Bind all production function names to callable objects in pdict
+    def bind_callables(self, pdict):
+        for p in self.lr_productions:
+            p.bind(pdict)
+
+    # Return the action for a state and terminal name, or None if it is an error
+    def action(self, state, name):
+        n = self.termids.get(name)
+        if n is None:
+            return None
+        i = self.action_base[state] + n
+        return self.action_value[i] if self.action_check[i] == state else None
+
+    # Return the goto state for a state and nonterminal name, or None
+    def goto(self, state, name):
+        n = self.nontermids.get(name)
+        if n is None:
+            return None
+        i = self.goto_base[state] + n
+        return self.goto_value[i] if self.goto_check[i] == state else None
+
+# -----------------------------------------------------------------------------
+# _pack_rows()
+#
+# Pack sparse table rows with row displacement.  rows[state] is a list of
+# (column, value) pairs.  Returns the arrays (base, check, value).  Rows are
+# placed from the fullest to the emptiest, each at the lowest displacement
+# where none of its columns collide with an entry already placed.  The arrays
+# are padded so that base[state] + ncols is always a valid index, which
+# lets a lookup use column ncols for an unknown symbol.
+# -----------------------------------------------------------------------------
+
+def _pack_rows(rows, ncols):
+    base = array('i', [0] * len(rows))
+    check = []
+    value = []
+    lowest = 0                 # Lowest free index in check
+    order = sorted(range(len(rows)), key=lambda st: -len(rows[st]))
+    for st in order:
+        row = rows[st]
+        if not row:
+            continue
+        cols = [c for c, _ in row]
+        b = max(lowest - min(cols), 0)
+        while True:
+            for c in cols:
+                i = b + c
+                if i < len(check) and check[i] != -1:
+                    break
+            else:
+                break
+            b += 1
+        top = b + max(cols) + 1
+        if top > len(check):
+            check.extend([-1] * (top - len(check)))
+            value.extend([0] * (top - len(value)))
+        for c, v in row:
+            check[b + c] = st
+            value[b + c] = v
+        base[st] = b
+        while lowest < len(check) and check[lowest] != -1:
+            lowest += 1
+
+    size = max(base, default=0) + ncols + 1
+    if size > len(check):
+        check.extend([-1] * (size - len(check)))
+        value.extend([0] * (size - len(value)))
+    return base, array('i', check), array('i', value)
+
+# -----------------------------------------------------------------------------
+# _read_yacccache() / _write_yacccache()
+#
+# Support for the optional on-disk parser table cache.  The cache holds the
+# action and goto tables along with a summary of every production, and is
+# keyed on the signature of the grammar.  Reading returns None on any kind
+# of mismatch so that the caller rebuilds the tables.  Writing goes through
+# a temporary file and os.replace() so that concurrent processes never see
+# a partially written cache.
+# -----------------------------------------------------------------------------
+
+def _yacccache_key(signature):
+    parts = [_yacccache_version, sys.version_info[:2], signature]
+    return hashlib.sha256(repr(parts).encode('utf-8', 'backslashreplace')).hexdigest()
+
+def _read_yacccache(filename, signature):
+    try:
+        with open(filename, 'rb') as f:
+            data = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(data, dict):
+        return None
+    if data.get('version') != _yacccache_version or data.get('signature') != _yacccache_key(signature):
+        return None
+    try:
+        return CachedLRTable(data)
+    except (KeyError, TypeError):
+        return None
+
+def _write_yacccache(filename, signature, lr):
+    data = {
+        'version': _yacccache_version,
+        'signature': _yacccache_key(signature),
+        'method': 'LALR',
+        'action': lr.lr_action,
+        'goto': lr.lr_goto,
+        'productions': [(str(p), p.name, p.len, p.func, p.file, p.line) for p in lr.lr_productions],
+        'alternatives': lr.lr_alternatives,
+    }
+    dirname = os.path.dirname(os.path.abspath(filename))
+    fd, tmpname = tempfile.mkstemp(dir=dirname, prefix='.yacccache-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpname, filename)
+    except BaseException:
+        try:
+            os.remove(tmpname)
+        except OSError:
+            pass
+        raise
+
 # -----------------------------------------------------------------------------
 #                            === INTROSPECTION ===
 #
@@ -2023,7 +4932,8 @@ class ParserReflect(object):
         self.validate_modules()
         return self.error
 
-    # Compute a signature over the grammar
+    # Compute a signature over the grammar.  The names of the rule functions
+    # are included since the parsing tables refer to them.
     def signature(self):
         parts = []
         try:
@@ -2035,6 +4945,7 @@ class ParserReflect(object):
                 parts.append(' '.join(self.tokens))
             for f in self.pfuncs:
                 if f[3]:
+                    parts.append(f[2])
                     parts.append(f[3])
         except (TypeError, ValueError):
             pass
@@ -2262,19 +5173,53 @@ class ParserReflect(object):
 
         self.grammar = grammar
 
+# -----------------------------------------------------------------------------
+# _make_parser()
+#
+# Make a parser from the tables, using the dense encoding or the GLR parser
+# if asked to.  The GLR parser has no error recovery, so a grammar with
+# error rules can't be used with it.
+# -----------------------------------------------------------------------------
+
+def _make_parser(lr, pinfo, dense, glr):
+    if glr:
+        for p in lr.lr_productions[1:]:
+            if 'error' in str(p).split()[2:]:
+                raise YaccError('%s:%d: Rule %r uses the error token, but GLR parsers have no error recovery' %
+                                (p.file, p.line, str(p)))
+    if dense:
+        lr = DenseLRTable(lr)
+    lr.bind_callables(pinfo.pdict)
+    if dense:
+        parser = DenseLRParser(lr, pinfo.error_func)
+    elif glr:
+        parser = GLRParser(lr, pinfo.error_func)
+    else:
+        parser = LRParser(lr, pinfo.error_func)
+
+    # Remember where the rules came from for write_parser()
+    parser.rulemodule = pinfo.pdict.get('__name__')
+    parser.signature = pinfo.signature()
+    return parser
+
 # -----------------------------------------------------------------------------
 # yacc(module)
 #
-# Build a parser
+# Build a parser.  Unless bindglobals is false, the module's parse() is set
+# to the parse() method of the new parser.  The parser itself holds no
+# state between calls and can be shared by many threads (see ParseContext).
 # -----------------------------------------------------------------------------
 
 def yacc(*, debug=yaccdebug, module=None, start=None,
          check_recursion=True, optimize=False, debugfile=debug_file,
-         debuglog=None, errorlog=None):
+         debuglog=None, errorlog=None, cachefile=None, dense=False, glr=False, bindglobals=True):
 
     # Reference to the parsing method of the last built parser
     global parse
 
+    if dense and glr:
+        raise ValueError('a parser can not be both dense and GLR')
+
     if errorlog is None:
         errorlog = PlyLogger(sys.stderr)
 
@@ -2315,6 +5260,20 @@ def yacc(*, debug=yaccdebug, module=None, start=None,
 
     debuglog.info('Created by PLY (http://www.dabeaz.com/ply)')
 
+    # If a cache file was given, try to reuse previously built parsing tables.
+    # On a hit, validation, grammar analysis and table construction are skipped.
+    if cachefile:
+        signature = pinfo.signature()
+        lr = _read_yacccache(cachefile, signature)
+        if lr:
+            debuglog.info('Using cached parsing tables from %r', cachefile)
+            if not pinfo.error_func:
+                errorlog.warning('no p_error() function is defined')
+            parser = _make_parser(lr, pinfo, dense, glr)
+            if bindglobals:
+                parse = parser.parse
+            return parser
+
     errors = False
 
     # Validate the parser information
@@ -2474,9 +5433,532 @@ def yacc(*, debug=yaccdebug, module=None, start=None,
                 errorlog.warning('Rule (%s) is never reduced', rejected)
                 warned_never.append(rejected)
 
+    if cachefile:
+        try:
+            _write_yacccache(cachefile, signature, lr)
+        except (OSError, pickle.PicklingError) as e:
+            errorlog.warning("Couldn't write parser cache %r. %s", cachefile, e)
+
     # Build the parser
-    lr.bind_callables(pinfo.pdict)
-    parser = LRParser(lr, pinfo.error_func)
+    parser = _make_parser(lr, pinfo, dense, glr)
+
+    if bindglobals:
+        parse = parser.parse
+    return parser
+
+# -----------------------------------------------------------------------------
+#                          === Generated parsers ===
+#
+# write_parser() writes a Python module specialised to one grammar.  The
+# module holds the parsing tables, packed into integer arrays as for
+# yacc(dense=True), and the source of four copies of the parse loop: with
+# and without debugging, and with and without position tracking.  Each copy
+# has the checks for the other modes left out, and calls the rule functions
+# without going through the productions.  load_parser() turns the module
+# back into a parser with the same parse() method as the one made by yacc().
+# -----------------------------------------------------------------------------
+
+# Source of the parse loop written by write_parser().  It is a copy of
+# LRParser.parse() for the tables made by _make_parsers().  Lines starting with D are only
+# kept in the debugging versions, and lines starting with T are only kept
+# in the tracking versions.  Make sure changes get made here as well.
+
+_parser_template = r'''
+    def PARSE(parser, lexer, debug):
+        lookahead = None                         # Current lookahead symbol
+        lookaheadstack = []                      # Stack of lookahead symbols
+        defaulted = parser.defaulted_states      # Defaulted states
+        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        errorcount = 0                           # Used during error recovery
+
+D       debug.info('PLY: PARSE DEBUG START')
+
+        # Set up the lexer and parser objects on pslice
+        pslice.lexer = lexer
+        pslice.parser = parser
+
+        # Set up the context of this call with the token function and the
+        # state and symbol stacks
+        context = ParseContext(lexer.token)
+        get_token = context.token
+        statestack = context.statestack       # Stack of parsing states
+        symstack = context.symstack           # Stack of grammar symbols
+        pslice.stack = symstack               # Put in the production
+        errtoken   = None                     # Err token
+
+        # The start state is assumed to be (0,$end)
+
+        statestack.append(0)
+        sym = YaccSymbol()
+        sym.type = '$end'
+        symstack.append(sym)
+        state = 0
+        reset = parse_context.set(context)
+        try:
+            while True:
+D               debug.debug('State  : %s', state)
+
+                if state not in defaulted:
+                    if not lookahead:
+                        if not lookaheadstack:
+                            lookahead = get_token()     # Get the next token
+                        else:
+                            lookahead = lookaheadstack.pop()
+                        if not lookahead:
+                            lookahead = YaccSymbol()
+                            lookahead.type = '$end'
+
+                    # Check the action table
+                    t = actions[state].get(lookahead.type)
+                else:
+                    t = defaulted[state]
+D                   debug.debug('Defaulted state %s: Reduce using %d', state, -t)
+
+D               debug.debug('Stack  : %s',
+D                           ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
+
+                if t is not None:
+                    if t > 0:
+                        # shift a symbol on the stack
+                        statestack.append(t)
+                        state = t
+
+D                       debug.debug('Action : Shift and goto state %s', t)
+
+                        symstack.append(lookahead)
+                        lookahead = None
+
+                        # Decrease error count on successful shift
+                        if errorcount:
+                            errorcount -= 1
+                        continue
+
+                    if t < 0:
+                        # reduce a symbol on the stack, emit a production
+                        plen, pname, plhs, func = reductions[-t]
+
+                        sym = YaccSymbol()
+                        sym.type = pname       # Production name
+                        sym.value = None
+
+                        base = len(symstack) - plen
+
+D                       debug.info('Action : Reduce rule [%s] with %s and goto state %d', prodstr[-t],
+D                                  '['+','.join([format_stack_entry(_v.value) for _v in symstack[base:]])+']',
+D                                  gotos[statestack[-1-plen]][plhs])
+
+T                       if plen:
+T                           t1 = symstack[base]
+T                           sym.lineno = t1.lineno
+T                           sym.lexpos = t1.lexpos
+T                           t1 = symstack[-1]
+T                           sym.endlineno = getattr(t1, 'endlineno', t1.lineno)
+T                           sym.endlexpos = getattr(t1, 'endlexpos', t1.lexpos)
+T                       else:
+T                           sym.lineno = lexer.lineno
+T                           sym.lexpos = lexer.lexpos
+
+                        pslice.sym = sym
+                        pslice.base = base
+                        pslice.length = plen + 1
+
+                        try:
+                            # Call the grammar rule with our special slice object
+                            context.state = state
+                            func(pslice)
+                            del symstack[base:]
+                            del statestack[len(statestack) - plen:]
+D                           debug.info('Result : %s', format_result(pslice[0]))
+                            symstack.append(sym)
+                            state = gotos[statestack[-1]][plhs]
+                            statestack.append(state)
+                        except SyntaxError:
+                            # If an error was set. Enter error recovery state
+                            lookaheadstack.append(lookahead)    # Save the current lookahead token
+                            if plen:
+                                symstack.pop()                  # Leave the rest of the production slice on the stack
+                            statestack.pop()                    # Pop back one state (before the reduce)
+                            state = statestack[-1]
+                            sym.type = 'error'
+                            sym.value = 'error'
+                            lookahead = sym
+                            errorcount = error_count
+                            context.errorok = False
+
+                        continue
+
+                    if t == 0:
+                        n = symstack[-1]
+                        result = getattr(n, 'value', None)
+
+D                       debug.info('Done   : Returning %s', format_result(result))
+D                       debug.info('PLY: PARSE DEBUG END')
+
+                        return result
+
+                if t is None:
+
+D                   debug.error('Error  : %s',
+D                               ('%s . %s' % (' '.join([xx.type for xx in symstack][1:]), str(lookahead))).lstrip())
+
+                    # We have some kind of parsing error here.  See LRParser.parse()
+                    # for the details of error recovery.
+                    if errorcount == 0 or context.errorok:
+                        errorcount = error_count
+                        context.errorok = False
+                        errtoken = lookahead
+                        if errtoken.type == '$end':
+                            errtoken = None               # End of file!
+                        if parser.errorfunc:
+                            if errtoken and not hasattr(errtoken, 'lexer'):
+                                errtoken.lexer = lexer
+                            context.state = state
+                            tok = parser.errorfunc(errtoken)
+                            if context.errorok:
+                                # User must have done some kind of panic
+                                # mode recovery on their own.  The
+                                # returned token is the next lookahead
+                                lookahead = tok
+                                errtoken = None
+                                continue
+                        else:
+                            if errtoken:
+                                if hasattr(errtoken, 'lineno'):
+                                    lineno = lookahead.lineno
+                                else:
+                                    lineno = 0
+                                if lineno:
+                                    sys.stderr.write('yacc: Syntax error at line %d, token=%s\n' % (lineno, errtoken.type))
+                                else:
+                                    sys.stderr.write('yacc: Syntax error, token=%s' % errtoken.type)
+                            else:
+                                sys.stderr.write('yacc: Parse error in input. EOF\n')
+                                return
+
+                    else:
+                        errorcount = error_count
+
+                    # case 1:  the statestack only has 1 entry on it.  The entire parse
+                    # has been rolled back.  The token is discarded and we just keep going.
+
+                    if len(statestack) <= 1 and lookahead.type != '$end':
+                        lookahead = None
+                        errtoken = None
+                        state = 0
+                        # Nuke the pushback stack
+                        del lookaheadstack[:]
+                        # Tokens that can't start the input either are nuked right here.
+                        follow = error_follow[0] if 0 not in defaulted else None
+D                       follow = None                     # Log every token
+                        if follow is not None:
+                            while True:
+                                lookahead = get_token()
+                                if not lookahead:
+                                    lookahead = YaccSymbol()
+                                    lookahead.type = '$end'
+                                    break
+                                if lookahead.type in follow:
+                                    break
+                        continue
+
+                    # case 2: the statestack has a couple of entries on it, but we're
+                    # at the end of the file. nuke the top entry and generate an error token
+
+                    # Start nuking entries on the stack
+                    if lookahead.type == '$end':
+                        # Whoa. We're really hosed here. Bail out
+                        return
+
+                    if lookahead.type != 'error':
+                        sym = symstack[-1]
+                        if sym.type == 'error':
+                            # Hmmm. Error is on top of stack, we'll just nuke input
+                            # symbol and continue.  The tokens after it that can't follow
+                            # the error either are nuked right here, without going around
+                            # the loop for each one.
+T                           sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+T                           sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                            lookahead = None
+                            follow = error_follow.get(state)
+D                           follow = None                 # Log every token
+                            if follow is not None:
+                                while True:
+                                    if lookaheadstack:
+                                        lookahead = lookaheadstack.pop()
+                                    else:
+                                        lookahead = get_token()
+                                    if not lookahead:
+                                        lookahead = YaccSymbol()
+                                        lookahead.type = '$end'
+                                        break
+                                    if lookahead.type in follow:
+                                        break
+T                                   sym.endlineno = getattr(lookahead, 'lineno', sym.lineno)
+T                                   sym.endlexpos = getattr(lookahead, 'lexpos', sym.lexpos)
+                            continue
+
+                        # Create the error symbol for the first time and make it the new lookahead symbol
+                        t = YaccSymbol()
+                        t.type = 'error'
+
+                        if hasattr(lookahead, 'lineno'):
+                            t.lineno = t.endlineno = lookahead.lineno
+                        if hasattr(lookahead, 'lexpos'):
+                            t.lexpos = t.endlexpos = lookahead.lexpos
+                        t.value = lookahead
+                        lookaheadstack.append(lookahead)
+                        lookahead = t
+                    else:
+                        # Pop the stack straight back to the nearest state that can
+                        # act on the error token, or to the start state.
+                        npop = 1
+                        top = len(statestack) - 2
+D                       top = 0                       # Log every state
+                        while top > 0 and statestack[top] not in error_states and statestack[top] not in defaulted:
+                            top -= 1
+                            npop += 1
+                        sym = symstack[-npop]
+T                       lookahead.lineno = sym.lineno
+T                       lookahead.lexpos = sym.lexpos
+                        del symstack[-npop:]
+                        del statestack[-npop:]
+                        state = statestack[-1]
+
+                    continue
+
+                # If we'r here, something really bad happened
+                raise RuntimeError('yacc: internal parser error!!!\n')
+        finally:
+            parse_context.reset(reset)
+'''
+
+# The variants of the parse loop, by (debug, tracking)
+_parser_variants = [
+    ('_parse', False, False),
+    ('_parse_tracking', False, True),
+    ('_parse_debug', True, False),
+    ('_parse_debug_tracking', True, True),
+]
+
+def _parser_source(name, debug, tracking):
+    lines = []
+    for line in _parser_template.split('\n'):
+        if line[:1] == 'D':
+            if not debug:
+                continue
+            line = ' ' + line[1:]
+        elif line[:1] == 'T':
+            if not tracking:
+                continue
+            line = ' ' + line[1:]
+        line = line.rstrip()
+        if line or not lines or lines[-1]:
+            lines.append(line)
+    return '\n'.join(lines).replace('def PARSE(', 'def %s(' % name)
+
+# The tables of a parser packed into arrays, as by yacc(dense=True)
+def _dense_tables(parser):
+    if isinstance(parser, DenseLRParser):
+        return parser.tables
+    return DenseLRTable(CachedLRTable({
+        'method': 'LALR',
+        'action': parser.action,
+        'goto': parser.goto,
+        'productions': [(str(p), p.name, p.len, p.func, p.file, p.line) for p in parser.productions],
+        'alternatives': {},
+    }))
+
+# -----------------------------------------------------------------------------
+# write_parser()
+#
+# Write a parser made by yacc() to a Python module.  The tables are packed
+# the same way as for yacc(dense=True).  The rule functions are saved by
+# name and are bound again by load_parser().
+# -----------------------------------------------------------------------------
+
+def write_parser(parser, filename):
+    if isinstance(parser, GLRParser):
+        raise ValueError("write_parser() can't write GLR parsers")
+    tables = _dense_tables(parser)
+    errorfunc = parser.errorfunc.__name__ if parser.errorfunc else None
+
+    modname = os.path.splitext(os.path.basename(filename))[0]
+    lines = [
+        f'# {modname}.py',
+        f'# This file was written by PLY from the grammar rules in {parser.rulemodule!r}.',
+        "# Don't edit it.  Write it again with yacc.write_parser() when the grammar changes.",
+        '',
+        'import sys',
+        'from array import array',
+        '',
+        f'_tabversion = {_parser_version!r}',
+        f'_signature = {parser.signature!r}',
+        f'_rulemodule = {parser.rulemodule!r}',
+        f'_errorfunc = {errorfunc!r}',
+        f'_terminals = {tables.terminals!r}',
+        f'_nonterminals = {len(tables.nonterminals)!r}',
+        f'_defaulted_states = {tables.defaulted_states!r}',
+        f'_action_base = {tables.action_base!r}',
+        f'_action_check = {tables.action_check!r}',
+        f'_action_value = {tables.action_value!r}',
+        f'_goto_base = {tables.goto_base!r}',
+        f'_goto_check = {tables.goto_check!r}',
+        f'_goto_value = {tables.goto_value!r}',
+        f'_prod_lhs = {tables.prod_lhs!r}',
+        '_productions = [',
+    ]
+    for p in tables.lr_productions:
+        lines.append(f'    {(p.str, p.name, p.len, p.func, p.file, p.line)!r},')
+    lines.extend([
+        ']',
+        '',
+        '# Make the parse functions.  funcs holds the rule function of each production.',
+        '# The packed tables are expanded into a dict of actions for each state, keyed',
+        '# by terminal name, and a dict of gotos keyed by left-hand side number.  In',
+        '# Python, a lookup in these is faster than the arithmetic on the arrays.',
+        'def _make_parsers(YaccSymbol, YaccProduction, ParseContext, parse_context, format_result, format_stack_entry,',
+        '                  error_count, funcs):',
+        '    actions = []',
+        '    gotos = []',
+        '    for st, (abase, gbase) in enumerate(zip(_action_base, _goto_base)):',
+        '        actions.append({name: _action_value[abase + n] for n, name in enumerate(_terminals)',
+        '                        if _action_check[abase + n] == st})',
+        '        gotos.append({n: _goto_value[gbase + n] for n in range(_nonterminals)',
+        '                      if _goto_check[gbase + n] == st})',
+        '    # Tables for error recovery, as made by _recovery_tables() in ply/yacc.py',
+        "    error_states = {st for st, row in enumerate(actions) if 'error' in row}",
+        "    error_follow = {row['error']: frozenset(actions[row['error']]) for row in actions if row.get('error', 0) > 0}",
+        '    error_follow[0] = frozenset(actions[0])',
+        '    prodstr = [p[0] for p in _productions]',
+        '    reductions = [(p[2], p[1], _prod_lhs[n], funcs[n]) for n, p in enumerate(_productions)]',
+    ])
+    for name, debug, tracking in _parser_variants:
+        lines.append(_parser_source(name, debug, tracking))
+    lines.append('    return {')
+    for name, debug, tracking in _parser_variants:
+        lines.append(f'        ({debug!r}, {tracking!r}): {name},')
+    lines.append('    }')
+
+    # Write through a temporary file so that a module that is being
+    # imported is never seen half written
+    dirname = os.path.dirname(os.path.abspath(filename))
+    fd, tmpname = tempfile.mkstemp(dir=dirname, prefix='.parser-', suffix='.py')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmpname, filename)
+    except BaseException:
+        try:
+            os.remove(tmpname)
+        except OSError:
+            pass
+        raise
+
+# -----------------------------------------------------------------------------
+#                           == GeneratedLRParser ==
+#
+# A parser running one of the parse loops of a module written by
+# write_parser().  The parse loop is picked by the debug and tracking
+# arguments to parse().  The other methods are the same as for LRParser.
+# -----------------------------------------------------------------------------
+
+class GeneratedLRParser(LRParser):
+    def __init__(self, tab, pdict):
+        self.productions = [MiniProduction(*p) for p in tab['_productions']]
+        for p in self.productions:
+            p.bind(pdict)
+        self.errorfunc = pdict.get(tab['_errorfunc']) if tab['_errorfunc'] else None
+        self.tabdefaulted = tab['_defaulted_states']
+        self.set_defaulted_states()
+        self.rulemodule = tab['_rulemodule']
+        self.signature = tab['_signature']
+        self.parsers = tab['_make_parsers'](YaccSymbol, YaccProduction, ParseContext, _parse_context,
+                                            format_result, format_stack_entry, error_count,
+                                            [p.callable for p in self.productions])
+        self.pushtables = _DensePushTables(tab['_terminals'], tab['_action_base'], tab['_action_check'],
+                                           tab['_action_value'], tab['_goto_base'], tab['_goto_value'],
+                                           tab['_prod_lhs'])
+        self.fusedtables = None
+        self.tab = tab
+        self.expected_terminals, self.expected_bits = _expected_sets(
+            _unpack_rows(tab['_terminals'], tab['_action_base'], tab['_action_check'], tab['_action_value']))
+
+    def set_defaulted_states(self):
+        self.defaulted_states = dict(self.tabdefaulted)
+
+    def push_tables(self):
+        return self.pushtables
+
+    def fused_tables(self):
+        if self.fusedtables is None:
+            tab = self.tab
+            self.fusedtables = _FusedTables(tab['_terminals'], tab['_nonterminals'], tab['_action_base'],
+                                            tab['_action_check'], tab['_action_value'], tab['_goto_base'],
+                                            tab['_goto_check'], tab['_goto_value'], tab['_prod_lhs'])
+        return self.fusedtables
+
+    def parse(self, input=None, lexer=None, debug=False, tracking=False, profile=None):
+        if profile:
+            raise YaccError('profiling is not available for parsers loaded with load_parser(). Use a '
+                            'parser made by yacc()')
+
+        # If debugging has been specified as a flag, turn it into a logging object
+        if isinstance(debug, int) and debug:
+            debug = PlyLogger(sys.stderr)
+
+        # If no lexer was given, we will try to use the lex module
+        if not lexer:
+            from . import lex
+            lexer = lex.lexer
+
+        # If input was supplied, pass to lexer
+        if input is not None:
+            lexer.input(input)
+
+        return self.parsers[bool(debug), bool(tracking)](self, lexer, debug)
 
-    parse = parser.parse
+# -----------------------------------------------------------------------------
+# load_parser()
+#
+# Make a parser from a module written by write_parser().  tabmodule is the
+# module or its name.  Rule functions are looked up by name on module if
+# given, or else on the module the rules came from, which is imported by
+# name.  If check is true, the rules are read and compared with the
+# signature saved in the module.  If they differ, or if the module was
+# written by a different version of PLY, a warning is logged and the parser
+# is built from the rules with yacc() instead.  bindglobals is the same as
+# for yacc().
+# -----------------------------------------------------------------------------
+
+def load_parser(tabmodule, *, module=None, check=False, errorlog=None, bindglobals=True):
+    global parse
+
+    if errorlog is None:
+        errorlog = PlyLogger(sys.stderr)
+    if isinstance(tabmodule, str):
+        tabmodule = importlib.import_module(tabmodule)
+    tab = tabmodule.__dict__
+
+    if module is None:
+        if not tab.get('_rulemodule'):
+            raise ValueError('%s: the module with the grammar rules must be given' % tabmodule.__name__)
+        module = importlib.import_module(tab['_rulemodule'])
+    pdict = { k: getattr(module, k) for k in dir(module) }
+
+    def rebuild(reason):
+        errorlog.warning('%s: %s. Building the parser from the rules', tabmodule.__name__, reason)
+        return yacc(module=module, debug=False, errorlog=errorlog, bindglobals=bindglobals)
+
+    if tab.get('_tabversion') != _parser_version:
+        return rebuild('parser was written by a different version of PLY')
+
+    if check:
+        pinfo = ParserReflect(pdict, log=errorlog)
+        pinfo.get_all()
+        if pinfo.signature() != tab['_signature']:
+            return rebuild('parser does not match the grammar rules')
+
+    parser = GeneratedLRParser(tab, pdict)
+    if bindglobals:
+        parse = parser.parse
     return parser
@@ -0,0 +1,85 @@
+# lex_binary.py
+#
+# Binary lexers scan bytes, memoryviews and mmaps.  Token values are only
+# sliced from the input when they are read.
+
+import os
+import mmap
+import tempfile
+import ply.lex as lex
+
+tokens = [
+    "ID",
+    "NUMBER",
+    "STRING",
+    ]
+
+literals = "=;"
+
+states = (('str', 'exclusive'),)
+
+t_ignore = " \t"
+t_str_ignore = ""
+t_ID = r'[a-z]+'
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_quote(t):
+    r'"'
+    t.lexer.strstart = t.lexpos
+    t.lexer.begin('str')
+
+def t_str_STRING(t):
+    r'[^"]*"'
+    t.lexer.begin('INITIAL')
+    t.lexpos = t.lexer.strstart
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_ANY_error(t):
+    print("Illegal character %r at %d" % (bytes(t.lexer.lexdata[t.lexpos:t.lexpos+1]), t.lexpos))
+    t.lexer.skip(1)
+
+lexer = lex.lex(binary=True)
+
+data = b'abc = 12;\nname = "x y" ? 7;\n'
+
+lexer.input(data)
+for tok in lexer:
+    print(tok)
+
+# Values are not taken from the input until they are read
+lexer.input(data)
+tok = lexer.token()
+print(hasattr(tok, '_value'), tok.value, hasattr(tok, '_value'))
+
+# The same tokens from a memoryview and from an mmap of a file
+def key(toks):
+    return [(t.type, t.value, t.lineno, t.lexpos) for t in toks]
+
+lexer.lineno = 1
+expected = key(lexer.tokenize_all(data))
+lexer.lineno = 1
+print(key(lexer.tokenize_all(memoryview(data))) == expected)
+
+with tempfile.TemporaryDirectory() as tmpdir:
+    filename = os.path.join(tmpdir, 'input.txt')
+    with open(filename, 'wb') as f:
+        f.write(data)
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            lexer.lineno = 1
+            lexer.input(m)
+            toks = list(lexer)
+            print(key(toks) == expected)
+
+try:
+    lexer.input_stream([data])
+except ValueError as e:
+    print(e)
@@ -0,0 +1,55 @@
+# lex_dispatch.py
+#
+# First-character dispatch.  Only the rules that can start with the
+# current character are tried, and the result must match the full
+# master regex.
+
+import ply.lex as lex
+
+tokens = [
+    "ID",
+    "FLOAT",
+    "NUMBER",
+    "BEGIN",
+    "PLUS",
+    "ANY",
+    ]
+
+states = (('raw', 'inclusive'),)
+
+literals = "$"
+
+t_ignore = " "
+
+def t_FLOAT(t):
+    r'\d+\.\d*'
+    return t
+
+def t_NUMBER(t):
+    r'\d+'
+    return t
+
+def t_BEGIN(t):
+    r'(?i:begin)'
+    t.lexer.begin('raw')
+    return t
+
+t_ID = r'[a-z]+'
+t_PLUS = r'\+'
+t_raw_ANY = r'[^ +]'
+
+def t_error(t):
+    print("Illegal character %r" % t.value[0])
+    t.lexer.skip(1)
+
+lexer = lex.lex()
+
+for c in "9aB+$@":
+    if c in lexer.lexdispatch:
+        print(repr(c), [sorted(lexre.groupindex) for lexre, _ in lexer.lexdispatch[c]])
+    else:
+        print(repr(c), "all")
+
+lexer.input("12 3.5 x + $ @ Begin 4 + z")
+for tok in lexer:
+    print(tok)
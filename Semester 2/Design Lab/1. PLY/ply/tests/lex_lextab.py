@@ -0,0 +1,93 @@
+# lex_lextab.py
+#
+# Writing a lexer's tables to a module with write_lextab() and making the
+# lexer again from it with load_lextab().
+
+import os
+import sys
+import shutil
+import tempfile
+import importlib
+import ply.lex as lex
+
+tokens = [
+    "ID",
+    "NUMBER",
+    "COMMENT",
+    ]
+
+literals = "+-"
+
+states = (('comment', 'exclusive'),)
+
+t_ignore = " "
+t_comment_ignore = ""
+t_ID = r'[a-z]+'
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_open(t):
+    r'/\*'
+    t.lexer.begin('comment')
+
+def t_comment_COMMENT(t):
+    r'[^*]+'
+    return t
+
+def t_comment_close(t):
+    r'\*/'
+    t.lexer.begin('INITIAL')
+
+def t_comment_star(t):
+    r'\*'
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_ANY_error(t):
+    print("Illegal character %r" % t.value[0])
+    t.lexer.skip(1)
+
+def key(toks):
+    return [(t.type, t.value, t.lineno, t.lexpos) for t in toks]
+
+text = "a + 12 /* note * here */ - b ? c\n7"
+lexer = lex.lex()
+expected = key(lexer.tokenize_all(text))
+print(expected)
+
+tmpdir = tempfile.mkdtemp()
+sys.path.insert(0, tmpdir)
+try:
+    lex.write_lextab(lexer, os.path.join(tmpdir, 'lextab_test.py'))
+    tab = importlib.import_module('lextab_test')
+    print(tab._rulemodule == __name__, tab._lexstateinfo == {'INITIAL': 'inclusive', 'comment': 'exclusive'})
+
+    loaded = lex.load_lextab('lextab_test', module=sys.modules[__name__])
+    print(key(loaded.tokenize_all(text)) == expected)
+    print(loaded.lexstateretext == lexer.lexstateretext, lex.lexer is loaded)
+
+    # Binding the rules through the module name saved in the table
+    loaded = lex.load_lextab(tab, check=True)
+    print(key(loaded.tokenize_all(text)) == expected)
+
+    # A table that doesn't match the rules is not used
+    tab._signature = 'old'
+    rebuilt = lex.load_lextab(tab, module=sys.modules[__name__], check=True,
+                              errorlog=lex.PlyLogger(sys.stdout))
+    print(key(rebuilt.tokenize_all(text)) == expected)
+
+    # Binary lexers
+    blexer = lex.lex(binary=True)
+    lex.write_lextab(blexer, os.path.join(tmpdir, 'lextab_binary.py'))
+    loaded = lex.load_lextab('lextab_binary', module=sys.modules[__name__])
+    print(loaded.lexbinary, key(loaded.tokenize_all(b"x + 5")))
+finally:
+    sys.path.remove(tmpdir)
+    sys.modules.pop('lextab_test', None)
+    sys.modules.pop('lextab_binary', None)
+    shutil.rmtree(tmpdir)
@@ -0,0 +1,62 @@
+# lex_parallel.py
+#
+# Lexing newline-delimited records in chunks with tokenize_parallel().  The
+# results must match tokenize_all() no matter how the input is split.
+
+import multiprocessing
+import ply.lex as lex
+
+tokens = [
+    "LABEL",
+    "OPCODE",
+    "REG",
+    "NUMBER",
+    ]
+
+literals = ","
+
+t_ignore = " "
+t_LABEL = r'L\d+'
+t_OPCODE = r'STOR|SUM|PRINT'
+t_REG = r'@[A-Za-z]'
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_error(t):
+    t.lexer.skip(1)
+
+def key(toks):
+    return [(t.type, t.value, t.lineno, t.lexpos) for t in toks]
+
+# Worker processes that import this module must not run the checks below
+if multiprocessing.parent_process() is None:
+    lexer = lex.lex()
+    text = ''.join('L%d STOR @a, %d\nL%d SUM @a, @b\n\nL%d PRINT @a\n' % (i, i * 7, i + 1, i + 2)
+                   for i in range(200))
+
+    lexer.lineno = 1
+    expected = key(lexer.tokenize_all(text))
+    print(len(expected), expected[:3])
+
+    for chunksize in (10, 100, 1000):
+        lexer.lineno = 1
+        toks = lexer.tokenize_parallel(text, '\n', processes=2, chunksize=chunksize)
+        print(chunksize, key(toks) == expected, lexer.lineno)
+
+    lexer.lineno = 1
+    types, values, linenos, lexposes = lexer.tokenize_parallel(text, '\n', processes=2, chunksize=100,
+                                                               columnar=True)
+    print(list(zip(types, values, linenos, lexposes)) == expected)
+
+    # Binary lexers send tokens back without their values
+    blexer = lex.lex(binary=True)
+    btoks = blexer.tokenize_parallel(text.encode('ascii'), b'\n', processes=2, chunksize=100)
+    print([(t.type, t.value if t.type == 'NUMBER' else t.value.decode('ascii'), t.lineno, t.lexpos)
+           for t in btoks] == expected)
@@ -0,0 +1,69 @@
+# lex_profile.py
+#
+# Per-rule counts from a lexer built with profile=True.  Times vary from
+# run to run, so only the counts are printed.
+
+import io
+import contextlib
+import ply.lex as lex
+
+tokens = [
+    "ID",
+    "NUMBER",
+    "FLOAT",
+    "PLUS",
+    ]
+
+literals = "()"
+
+t_ignore = " "
+t_PLUS = r'\+'
+
+def t_ID(t):
+    r'[a-z]+'
+    return t
+
+# Tried before NUMBER at every digit
+def t_FLOAT(t):
+    r'\d+\.\d+'
+    t.value = float(t.value)
+    return t
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_error(t):
+    t.lexer.skip(1)
+
+lexer = lex.lex(profile=True)
+
+print(lexer.token.__name__)
+lexer.input("x + 12 + (y + 3.5) ? 4\nz")
+print([tok.type for tok in lexer])
+print(lexer.token.__name__)
+
+report = lexer.profile_report()
+for name, entry in sorted(report['INITIAL'].items()):
+    print(name, entry['matches'], entry['failed'], entry['time'] >= 0)
+
+out = io.StringIO()
+with contextlib.redirect_stdout(out):
+    lex.runmain(data="a 1")
+lines = out.getvalue().splitlines()
+print(lines[:3])
+print(lines[3].split())
+print(sorted(line.split()[1] for line in lines[4:]))
+
+plain = lex.lex()
+plain.input("x")
+print(plain.token.__name__)
+try:
+    plain.profile_report()
+except ValueError as e:
+    print(e)
@@ -0,0 +1,105 @@
+# lex_relex.py
+#
+# Incremental re-lexing with tokenize_marked() and relex().  Comments nest
+# through push_state()/pop_state(), so the state stack is part of each mark.
+
+import ply.lex as lex
+
+tokens = [
+    "ID",
+    "NUMBER",
+    "COMMENT",
+    ]
+
+states = (('comment', 'exclusive'),)
+
+t_ignore = " "
+t_comment_ignore = ""
+
+scanned = []
+
+def t_ID(t):
+    r'[a-z]+'
+    scanned.append(t.value)
+    return t
+
+def t_NUMBER(t):
+    r'\d+'
+    scanned.append(t.value)
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_ANY_open(t):
+    r'\(\*'
+    t.lexer.push_state('comment')
+
+def t_comment_close(t):
+    r'\*\)'
+    t.lexer.pop_state()
+
+def t_comment_COMMENT(t):
+    r'[^()*\n]+'
+    scanned.append(t.value)
+    return t
+
+def t_comment_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_comment_other(t):
+    r'[()*]'
+
+def t_ANY_error(t):
+    print("Illegal character %r" % t.value[0])
+    t.lexer.skip(1)
+
+lexer = lex.lex()
+
+def show(marked):
+    for tok in marked:
+        print(tok)
+
+def same_as_full(marked):
+    lexer.begin('INITIAL')
+    lexer.lexstatestack = []
+    lexer.lineno = 1
+    full = lexer.tokenize_marked(marked.data)
+    return ([(t.type, t.value, t.lineno, t.lexpos) for t in full] ==
+            [(t.type, t.value, t.lineno, t.lexpos) for t in marked] and
+            [full.mark(i) for i in range(len(full) + 1)] ==
+            [marked.mark(i) for i in range(len(marked) + 1)])
+
+text = "a 1\n(* x (* y *) *)\nb 2\nc 3\nd 4\n"
+marked = lexer.tokenize_marked(text)
+show(marked)
+print(marked.mark(3))
+
+# Replace 'b' with 'bee' on line 3
+del scanned[:]
+marked = lexer.relex(marked, text.index('b'), 1, 'bee')
+print("scanned", scanned)
+show(marked)
+print(same_as_full(marked))
+
+# Open a comment on line 3 that is never closed
+del scanned[:]
+marked = lexer.relex(marked, marked.data.index('2'), 0, '(* 5\n')
+print("scanned", scanned)
+show(marked)
+print(same_as_full(marked))
+
+# Close it again on line 4
+del scanned[:]
+marked = lexer.relex(marked, marked.data.index('c'), 0, '*) ')
+print("scanned", scanned)
+show(marked)
+print(same_as_full(marked))
+
+try:
+    lexer.relex(marked, len(marked.data), 1, '')
+except ValueError as e:
+    print(e)
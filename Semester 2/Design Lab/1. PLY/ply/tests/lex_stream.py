@@ -0,0 +1,70 @@
+# lex_stream.py
+#
+# Streaming input with input_stream().  A small buffer forces identifiers,
+# strings and newlines to cross buffer refills.
+
+import io
+import ply.lex as lex
+
+tokens = [
+    "ID",
+    "NUMBER",
+    "STRING",
+    ]
+
+t_ignore = " "
+t_ID = r'[a-z]+'
+t_STRING = r'"[^"\n]*"'
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_error(t):
+    print("Illegal character %r at %d" % (t.value[0], t.lexpos))
+    t.lexer.skip(1)
+
+lexer = lex.lex()
+
+def key(toks):
+    return [(t.type, t.value, t.lineno, t.lexpos) for t in toks]
+
+text = 'abc 12 "x y"\n\nlongidentifier 7 ? z\n"s" 345678\n' * 3
+
+lexer.lineno = 1
+full = key(lexer.tokenize_all(text))
+
+lexer.lineno = 1
+lexer.input_stream(io.StringIO(text), bufsize=8)
+toks = list(lexer)
+for tok in toks[:9]:
+    print(tok)
+print(key(toks) == full)
+print(lexer.lexpos, len(lexer.lexdata) <= 32)
+
+# Chunks of uneven size from a generator, including empty ones
+def chunks():
+    i = 0
+    n = 1
+    while i < len(text):
+        yield text[i:i+n]
+        yield ''
+        i += n
+        n = n % 5 + 1
+
+lexer.lineno = 1
+lexer.input_stream(chunks(), bufsize=6)
+print(key(lexer.tokenize_all()) == full)
+
+# input() goes back to the normal scanner
+lexer.input("q 9")
+print(lexer.token.__name__, key(lexer))
+
+# Empty input
+lexer.input_stream(io.StringIO(""))
+print(lexer.token())
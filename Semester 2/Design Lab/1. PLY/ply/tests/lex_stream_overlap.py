@@ -0,0 +1,59 @@
+# lex_stream_overlap.py
+#
+# input_stream() with rules that overlap: '.' and '...', '/' and a comment,
+# '=' and '=='.  Small buffers must give the same tokens as tokenize_all()
+# on the whole text when every token fits in the buffer.
+
+import io
+import random
+import ply.lex as lex
+
+tokens = [
+    "PERIOD",
+    "ELLIPSIS",
+    "DIVIDE",
+    "TIMES",
+    "COMMENT",
+    "EQUALS",
+    "EQ",
+    "NAME",
+    ]
+
+t_ignore = " \n"
+t_ELLIPSIS = r'\.\.\.'
+t_PERIOD = r'\.'
+t_EQ = r'=='
+t_EQUALS = r'='
+t_DIVIDE = r'/'
+t_TIMES = r'\*'
+t_NAME = r'[a-z]+'
+
+def t_COMMENT(t):
+    r'/\*(.|\n)*?\*/'
+    return t
+
+def t_error(t):
+    t.lexer.skip(1)
+
+lexer = lex.lex()
+
+def key(toks):
+    return [(t.type, t.value, t.lexpos) for t in toks]
+
+rand = random.Random(6)
+pieces = [".", "...", "/", "*", "=", "==", "a", "xy", " ", "\n", "/* c */", "/* ." + "*" * 20 + " */"]
+texts = ["...", "a....b", "===", "/*" + "x" * 87 + "*/", "/*" + "x" * 446 + "*/"]
+texts += ["".join(rand.choice(pieces) for _ in range(rand.randrange(1, 60))) for _ in range(500)]
+
+lexer.input_stream(io.StringIO("..."), bufsize=2)
+print(key(lexer))
+for bufsize in (2, 3, 4, 5, 8, 16, 33, 64, 100, 512):
+    fits = differ = 0
+    for text in texts:
+        full = key(lexer.tokenize_all(text))
+        if max((len(value) for _, value, _ in full), default=0) > bufsize:
+            continue
+        fits += 1
+        lexer.input_stream(io.StringIO(text), bufsize=bufsize)
+        differ += key(lexer) != full
+    print(bufsize, fits, differ)
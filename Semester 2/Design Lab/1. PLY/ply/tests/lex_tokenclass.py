@@ -0,0 +1,40 @@
+# lex_tokenclass.py
+#
+# Tokens with extra attributes through a LexToken subclass passed to lex()
+
+import ply.lex as lex
+
+tokens = [
+    "PLUS",
+    "NUMBER",
+    ]
+
+t_PLUS = r'\+'
+t_ignore = " \t"
+
+class NumberToken(lex.LexToken):
+    __slots__ = ('digits',)
+
+def t_NUMBER(t):
+    r'\d+'
+    t.digits = len(t.value)
+    t.value = int(t.value)
+    return t
+
+def t_error(t):
+    pass
+
+# Plain tokens only have the standard attributes
+tok = lex.LexToken()
+try:
+    tok.digits = 1
+except AttributeError:
+    print("LexToken has no attribute 'digits'")
+
+lexer = lex.lex(tokenclass=NumberToken)
+lexer.input("3 + 4567")
+for tok in lexer:
+    print(type(tok).__name__, tok, getattr(tok, 'digits', None))
+
+for tok in lexer.tokenize_all("12+3"):
+    print(type(tok).__name__, tok, getattr(tok, 'digits', None))
@@ -0,0 +1,63 @@
+# lex_tokenize_all.py
+#
+# Bulk tokenizing with tokenize_all() must give the same tokens as repeated
+# calls to token(), including state changes and the t_error/t_eof hooks.
+
+import ply.lex as lex
+
+tokens = [
+    "PLUS",
+    "NUMBER",
+    "COMMENT",
+    ]
+
+states = (('comment', 'exclusive'),)
+
+literals = "()"
+
+t_PLUS = r'\+'
+t_ignore = " \t"
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_comment(t):
+    r'/\*'
+    t.lexer.begin('comment')
+
+def t_comment_COMMENT(t):
+    r'(.|\n)*?\*/'
+    t.lexer.begin('INITIAL')
+    return t
+
+def t_error(t):
+    print("Illegal character %r" % t.value[0])
+    t.lexer.skip(1)
+
+t_comment_error = t_error
+t_comment_ignore = t_ignore
+
+more = ["(5)"]
+
+def t_eof(t):
+    if more:
+        t.lexer.input(more.pop())
+        return t.lexer.token()
+    return None
+
+lexer = lex.lex()
+
+data = "3 + (4) /* a comment */ $ + 10"
+
+lexer.input(data)
+for tok in iter(lexer.token, None):
+    print("token %s" % tok)
+
+more.append("(5)")
+for tok in lexer.tokenize_all(data):
+    print("bulk %s" % tok)
+
+more.append("(5)")
+print(lexer.tokenize_all(data, columnar=True))
@@ -366,6 +366,64 @@ class LexBuildOptionTests(unittest.TestCase):
                                     "(TOK999,'TOK999:',1,47)\n"
                                     ))
         
+# Tests related to the on-disk lexer cache
+class LexCacheTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+        try:
+            os.remove("lexcache.pickle")
+        except OSError:
+            pass
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+        try:
+            os.remove("lexcache.pickle")
+        except OSError:
+            pass
+
+    def test_lex_cache(self):
+        run_import("lex_cache")
+        self.assertTrue(os.path.exists("lexcache.pickle"))
+        self.assertNotIn("using cached master regexs", sys.stderr.getvalue())
+
+        sys.stderr = StringIO.StringIO()
+        run_import("lex_cache")
+        self.assertIn("using cached master regexs", sys.stderr.getvalue())
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "(NUMBER,3,1,0)\n"
+                                    "(PLUS,'+',1,1)\n"
+                                    "(NUMBER,4,1,2)\n"
+                                    "(NUMBER,3,1,0)\n"
+                                    "(PLUS,'+',1,1)\n"
+                                    "(NUMBER,4,1,2)\n"))
+
+    def test_lex_cache_invalidate(self):
+        class Rules:
+            tokens = ('NUMBER', 'PLUS')
+            t_ignore = ' '
+            t_NUMBER = r'\d+'
+            t_PLUS = r'\+'
+            def t_error(self, t):
+                t.lexer.skip(1)
+
+        rules = Rules()
+        ply.lex.lex(object=rules, cachefile="lexcache.pickle")
+        rules.t_PLUS = r'\+\+?'
+        debuglog = ply.lex.PlyLogger(StringIO.StringIO())
+        lexer = ply.lex.lex(object=rules, cachefile="lexcache.pickle", debug=True, debuglog=debuglog)
+        self.assertNotIn("using cached master regexs", debuglog.f.getvalue())
+        lexer.input("1 ++ 2")
+        self.assertEqual([(t.type, t.value) for t in lexer],
+                         [('NUMBER', '1'), ('PLUS', '++'), ('NUMBER', '2')])
+
+        debuglog = ply.lex.PlyLogger(StringIO.StringIO())
+        ply.lex.lex(object=rules, cachefile="lexcache.pickle", debug=True, debuglog=debuglog)
+        self.assertIn("using cached master regexs", debuglog.f.getvalue())
+
 # Tests related to run-time behavior of lexers
 class LexRunTests(unittest.TestCase):
     def setUp(self):
@@ -396,6 +454,254 @@ class LexRunTests(unittest.TestCase):
                                     "(NUMBER,'10',1,32)\n"
                                     ))    
 
+    def test_lex_tokenize_all(self):
+        run_import("lex_tokenize_all")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "token LexToken(NUMBER,3,1,0)\n"
+                                    "token LexToken(PLUS,'+',1,2)\n"
+                                    "token LexToken((,'(',1,4)\n"
+                                    "token LexToken(NUMBER,4,1,5)\n"
+                                    "token LexToken(),')',1,6)\n"
+                                    "token LexToken(COMMENT,'a comment */',1,11)\n"
+                                    "Illegal character '$'\n"
+                                    "token LexToken(PLUS,'+',1,26)\n"
+                                    "token LexToken(NUMBER,10,1,28)\n"
+                                    "token LexToken((,'(',1,0)\n"
+                                    "token LexToken(NUMBER,5,1,1)\n"
+                                    "token LexToken(),')',1,2)\n"
+                                    "Illegal character '$'\n"
+                                    "bulk LexToken(NUMBER,3,1,0)\n"
+                                    "bulk LexToken(PLUS,'+',1,2)\n"
+                                    "bulk LexToken((,'(',1,4)\n"
+                                    "bulk LexToken(NUMBER,4,1,5)\n"
+                                    "bulk LexToken(),')',1,6)\n"
+                                    "bulk LexToken(COMMENT,'a comment */',1,11)\n"
+                                    "bulk LexToken(PLUS,'+',1,26)\n"
+                                    "bulk LexToken(NUMBER,10,1,28)\n"
+                                    "bulk LexToken((,'(',1,0)\n"
+                                    "bulk LexToken(NUMBER,5,1,1)\n"
+                                    "bulk LexToken(),')',1,2)\n"
+                                    "Illegal character '$'\n"
+                                    "(['NUMBER', 'PLUS', '(', 'NUMBER', ')', 'COMMENT', 'PLUS', 'NUMBER', '(', 'NUMBER', ')'], "
+                                    "[3, '+', '(', 4, ')', 'a comment */', '+', 10, '(', 5, ')'], "
+                                    "array('q', [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]), "
+                                    "array('q', [0, 2, 4, 5, 6, 11, 26, 28, 0, 1, 2]))\n"
+                                    ))
+
+    def test_lex_tokenclass(self):
+        run_import("lex_tokenclass")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "LexToken has no attribute 'digits'\n"
+                                    "NumberToken LexToken(NUMBER,3,1,0) 1\n"
+                                    "NumberToken LexToken(PLUS,'+',1,2) None\n"
+                                    "NumberToken LexToken(NUMBER,4567,1,4) 4\n"
+                                    "NumberToken LexToken(NUMBER,12,1,0) 2\n"
+                                    "NumberToken LexToken(PLUS,'+',1,2) None\n"
+                                    "NumberToken LexToken(NUMBER,3,1,3) 1\n"
+                                    ))
 
+    def test_lex_dispatch(self):
+        run_import("lex_dispatch")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "'9' [['t_FLOAT', 't_NUMBER']]\n"
+                                    "'a' [['t_ID']]\n"
+                                    "'B' [['t_BEGIN']]\n"
+                                    "'+' [['t_PLUS']]\n"
+                                    "'$' []\n"
+                                    "'@' []\n"
+                                    "LexToken(NUMBER,'12',1,0)\n"
+                                    "LexToken(FLOAT,'3.5',1,3)\n"
+                                    "LexToken(ID,'x',1,7)\n"
+                                    "LexToken(PLUS,'+',1,9)\n"
+                                    "LexToken($,'$',1,11)\n"
+                                    "Illegal character '@'\n"
+                                    "LexToken(BEGIN,'Begin',1,15)\n"
+                                    "LexToken(ANY,'4',1,21)\n"
+                                    "LexToken(PLUS,'+',1,23)\n"
+                                    "LexToken(ANY,'z',1,25)\n"
+                                    ))
+
+    def test_lex_relex(self):
+        run_import("lex_relex")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "LexToken(ID,'a',1,0)\n"
+                                    "LexToken(NUMBER,1,1,2)\n"
+                                    "LexToken(COMMENT,' x ',2,6)\n"
+                                    "LexToken(COMMENT,' y ',2,11)\n"
+                                    "LexToken(COMMENT,' ',2,16)\n"
+                                    "LexToken(ID,'b',3,20)\n"
+                                    "LexToken(NUMBER,2,3,22)\n"
+                                    "LexToken(ID,'c',4,24)\n"
+                                    "LexToken(NUMBER,3,4,26)\n"
+                                    "LexToken(ID,'d',5,28)\n"
+                                    "LexToken(NUMBER,4,5,30)\n"
+                                    "(9, 2, 'comment', ('INITIAL',))\n"
+                                    "scanned ['bee']\n"
+                                    "LexToken(ID,'a',1,0)\n"
+                                    "LexToken(NUMBER,1,1,2)\n"
+                                    "LexToken(COMMENT,' x ',2,6)\n"
+                                    "LexToken(COMMENT,' y ',2,11)\n"
+                                    "LexToken(COMMENT,' ',2,16)\n"
+                                    "LexToken(ID,'bee',3,20)\n"
+                                    "LexToken(NUMBER,2,3,24)\n"
+                                    "LexToken(ID,'c',4,26)\n"
+                                    "LexToken(NUMBER,3,4,28)\n"
+                                    "LexToken(ID,'d',5,30)\n"
+                                    "LexToken(NUMBER,4,5,32)\n"
+                                    "True\n"
+                                    "scanned ['bee', ' 5', '2', 'c 3', 'd 4']\n"
+                                    "LexToken(ID,'a',1,0)\n"
+                                    "LexToken(NUMBER,1,1,2)\n"
+                                    "LexToken(COMMENT,' x ',2,6)\n"
+                                    "LexToken(COMMENT,' y ',2,11)\n"
+                                    "LexToken(COMMENT,' ',2,16)\n"
+                                    "LexToken(ID,'bee',3,20)\n"
+                                    "LexToken(COMMENT,' 5',3,26)\n"
+                                    "LexToken(COMMENT,'2',4,29)\n"
+                                    "LexToken(COMMENT,'c 3',5,31)\n"
+                                    "LexToken(COMMENT,'d 4',6,35)\n"
+                                    "True\n"
+                                    "scanned ['c', '3', 'd', '4']\n"
+                                    "LexToken(ID,'a',1,0)\n"
+                                    "LexToken(NUMBER,1,1,2)\n"
+                                    "LexToken(COMMENT,' x ',2,6)\n"
+                                    "LexToken(COMMENT,' y ',2,11)\n"
+                                    "LexToken(COMMENT,' ',2,16)\n"
+                                    "LexToken(ID,'bee',3,20)\n"
+                                    "LexToken(COMMENT,' 5',3,26)\n"
+                                    "LexToken(COMMENT,'2',4,29)\n"
+                                    "LexToken(ID,'c',5,34)\n"
+                                    "LexToken(NUMBER,3,5,36)\n"
+                                    "LexToken(ID,'d',6,38)\n"
+                                    "LexToken(NUMBER,4,6,40)\n"
+                                    "True\n"
+                                    "Edit at 42 of length 1 is outside the text\n"
+                                    ))
+
+
+
+    def test_lex_stream(self):
+        run_import("lex_stream")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "Illegal character '?' at 31\n"
+                                    "Illegal character '?' at 77\n"
+                                    "Illegal character '?' at 123\n"
+                                    "Illegal character '?' at 31\n"
+                                    "Illegal character '?' at 77\n"
+                                    "Illegal character '?' at 123\n"
+                                    "LexToken(ID,'abc',1,0)\n"
+                                    "LexToken(NUMBER,12,1,4)\n"
+                                    "LexToken(STRING,'\"x y\"',1,7)\n"
+                                    "LexToken(ID,'longidentifier',3,14)\n"
+                                    "LexToken(NUMBER,7,3,29)\n"
+                                    "LexToken(ID,'z',3,33)\n"
+                                    "LexToken(STRING,'\"s\"',4,35)\n"
+                                    "LexToken(NUMBER,345678,4,39)\n"
+                                    "LexToken(ID,'abc',5,46)\n"
+                                    "True\n"
+                                    "139 True\n"
+                                    "Illegal character '?' at 31\n"
+                                    "Illegal character '?' at 77\n"
+                                    "Illegal character '?' at 123\n"
+                                    "True\n"
+                                    "token [('ID', 'q', 13, 0), ('NUMBER', 9, 13, 2)]\n"
+                                    "None\n"
+                                    ))
+
+    def test_lex_binary(self):
+        run_import("lex_binary")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "LexToken(ID,b'abc',1,0)\n"
+                                    "LexToken(=,b'=',1,4)\n"
+                                    "LexToken(NUMBER,12,1,6)\n"
+                                    "LexToken(;,b';',1,8)\n"
+                                    "LexToken(ID,b'name',2,10)\n"
+                                    "LexToken(=,b'=',2,15)\n"
+                                    "LexToken(STRING,b'x y\"',2,17)\n"
+                                    "Illegal character b'?' at 23\n"
+                                    "LexToken(NUMBER,7,2,25)\n"
+                                    "LexToken(;,b';',2,26)\n"
+                                    "False b'abc' True\n"
+                                    "Illegal character b'?' at 23\n"
+                                    "Illegal character b'?' at 23\n"
+                                    "True\n"
+                                    "Illegal character b'?' at 23\n"
+                                    "True\n"
+                                    "input_stream() does not work with binary lexers. Use input() with an mmap\n"
+                                    ))
+
+    def test_lex_stream_overlap(self):
+        run_import("lex_stream_overlap")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "[('ELLIPSIS', '...', 0)]\n"
+                                    "2 25 0\n"
+                                    "3 44 0\n"
+                                    "4 46 0\n"
+                                    "5 46 0\n"
+                                    "8 87 0\n"
+                                    "16 92 0\n"
+                                    "33 485 0\n"
+                                    "64 503 0\n"
+                                    "100 504 0\n"
+                                    "512 505 0\n"
+                                    ))
+
+    def test_lex_parallel(self):
+        run_import("lex_parallel")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "2600 [('LABEL', 'L0', 1, 0), ('OPCODE', 'STOR', 1, 3), ('REG', '@a', 1, 8)]\n"
+                                    "10 True 801\n"
+                                    "100 True 801\n"
+                                    "1000 True 801\n"
+                                    "True\n"
+                                    "True\n"
+                                    ))
+
+    def test_lex_profile(self):
+        run_import("lex_profile")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "token\n"
+                                    "['ID', 'PLUS', 'NUMBER', 'PLUS', '(', 'ID', 'PLUS', 'FLOAT', ')', 'NUMBER', 'ID']\n"
+                                    "_token_profile\n"
+                                    "literals 2 0 True\n"
+                                    "t_FLOAT 1 2 True\n"
+                                    "t_ID 3 0 True\n"
+                                    "t_NUMBER 2 0 True\n"
+                                    "t_PLUS 3 0 True\n"
+                                    "t_error 1 0 True\n"
+                                    "t_newline 1 0 True\n"
+                                    "[\"(ID,'a',2,0)\", '(NUMBER,1,2,2)', '']\n"
+                                    "['state', 'rule', 'matches', 'failed', 'time', '(ms)']\n"
+                                    "['literals', 't_FLOAT', 't_ID', 't_NUMBER', 't_PLUS', 't_error', 't_newline']\n"
+                                    "token\n"
+                                    "Lexer was not built with lex(profile=True)\n"
+                                    ))
+
+    def test_lex_lextab(self):
+        run_import("lex_lextab")
+        result = sys.stdout.getvalue()
+        self.assertTrue(check_expected(result,
+                                    "Illegal character '?'\n"
+                                    "[('ID', 'a', 1, 0), ('+', '+', 1, 2), ('NUMBER', 12, 1, 4), ('COMMENT', ' note ', 1, 9), ('COMMENT', ' here ', 1, 16), ('-', '-', 1, 25), ('ID', 'b', 1, 27), ('ID', 'c', 1, 31), ('NUMBER', 7, 2, 33)]\n"
+                                    "True True\n"
+                                    "Illegal character '?'\n"
+                                    "True\n"
+                                    "True True\n"
+                                    "Illegal character '?'\n"
+                                    "True\n"
+                                    "WARNING: lextab_test: lextab does not match the token rules. Building the lexer from the rules\n"
+                                    "Illegal character '?'\n"
+                                    "True\n"
+                                    "True [('ID', b'x', 1, 0), ('+', b'+', 1, 2), ('NUMBER', 5, 1, 4)]\n"
+                                    ))
 
 unittest.main()
@@ -14,6 +14,7 @@ import platform
 
 sys.tracebacklimit = 0
 
+import ply.lex
 import ply.yacc
 
 def make_pymodule_path(filename):
@@ -400,4 +401,531 @@ class YaccErrorWarningTests(unittest.TestCase):
                                     "Precedence rule 'left' defined for unknown symbol '/'\n"
                                     ))
 
+# Tests related to the on-disk parser table cache
+class YaccCacheTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+        try:
+            os.remove("yacccache.pickle")
+        except OSError:
+            pass
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+        try:
+            os.remove("yacccache.pickle")
+        except OSError:
+            pass
+
+    def test_yacc_cache(self):
+        run_import("yacc_cache")
+        self.assertTrue(os.path.exists("yacccache.pickle"))
+        self.assertNotIn("Using cached parsing tables", sys.stderr.getvalue())
+
+        sys.stderr = StringIO.StringIO()
+        run_import("yacc_cache")
+        self.assertIn("Using cached parsing tables", sys.stderr.getvalue())
+        self.assertNotIn("state 0", sys.stderr.getvalue())
+        result = sys.stdout.getvalue()
+        self.assertEqual(result, "11\n-5.0\n11\n-5.0\n")
+
+    def test_yacc_cache_invalidate(self):
+        class Rules:
+            tokens = ('NUMBER', 'PLUS')
+            def p_expr_plus(self, p):
+                'expr : expr PLUS NUMBER'
+                p[0] = p[1] + p[3]
+            def p_expr_number(self, p):
+                'expr : NUMBER'
+                p[0] = p[1]
+            def p_error(self, p):
+                pass
+
+        class Lexer:
+            def __init__(self, toks):
+                self.toks = iter(toks)
+            def input(self, data):
+                pass
+            def token(self):
+                for type, value in self.toks:
+                    tok = ply.lex.LexToken()
+                    tok.type, tok.value, tok.lineno, tok.lexpos = type, value, 1, 0
+                    return tok
+
+        debuglog = ply.yacc.PlyLogger(StringIO.StringIO())
+        ply.yacc.yacc(module=Rules(), cachefile="yacccache.pickle", debuglog=debuglog)
+        self.assertNotIn("Using cached parsing tables", debuglog.f.getvalue())
+
+        # Changing a rule makes the cached tables stale
+        Rules.p_expr_plus.__doc__ = 'expr : NUMBER PLUS expr'
+        debuglog = ply.yacc.PlyLogger(StringIO.StringIO())
+        parser = ply.yacc.yacc(module=Rules(), cachefile="yacccache.pickle", debuglog=debuglog)
+        self.assertNotIn("Using cached parsing tables", debuglog.f.getvalue())
+        toks = [('NUMBER', 1), ('PLUS', '+'), ('NUMBER', 2)]
+        self.assertEqual(parser.parse(lexer=Lexer(toks)), 3)
+
+        debuglog = ply.yacc.PlyLogger(StringIO.StringIO())
+        parser = ply.yacc.yacc(module=Rules(), cachefile="yacccache.pickle", debuglog=debuglog)
+        self.assertIn("Using cached parsing tables", debuglog.f.getvalue())
+        self.assertEqual(parser.parse(lexer=Lexer(toks)), 3)
+
+        # A corrupt cache is ignored and rewritten
+        with open("yacccache.pickle", "wb") as f:
+            f.write(b"garbage")
+        debuglog = ply.yacc.PlyLogger(StringIO.StringIO())
+        parser = ply.yacc.yacc(module=Rules(), cachefile="yacccache.pickle", debuglog=debuglog)
+        self.assertNotIn("Using cached parsing tables", debuglog.f.getvalue())
+        self.assertEqual(parser.parse(lexer=Lexer(toks)), 3)
+
+
+# Tests related to parsers using the dense tables
+class YaccDenseTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_dense(self):
+        run_import("yacc_dense")
+        result = sys.stdout.getvalue()
+        dict_result, dense_result = result.split("dense\n")
+        self.assertEqual(dict_result, "dict\n" + dense_result)
+        self.assertEqual(dense_result,
+                         "7\n"
+                         "-1\n"
+                         "1\n"
+                         "Syntax error at '='\n"
+                         "1\n"
+                         "Syntax error at 2\n"
+                         "Bad group at 0\n"
+                         "4\n"
+                         "Syntax error at 4\n"
+                         "Bad group at 4\n"
+                         "1\n"
+                         "Syntax error at EOF\n")
+
+    def test_yacc_dense_tables(self):
+        import yacc_simple
+        parser = ply.yacc.yacc(module=yacc_simple)
+        dparser = ply.yacc.yacc(module=yacc_simple, dense=True)
+        del sys.modules["yacc_simple"]
+        tables = dparser.tables
+        self.assertIsInstance(dparser, ply.yacc.DenseLRParser)
+        for state, row in parser.action.items():
+            for name in tables.terminals + ['UNKNOWN']:
+                self.assertEqual(tables.action(state, name), row.get(name))
+        for state, row in parser.goto.items():
+            for name in tables.nonterminals:
+                self.assertEqual(tables.goto(state, name), row.get(name))
+        self.assertEqual(dparser.defaulted_states, parser.defaulted_states)
+        self.assertEqual([p.callable for p in dparser.productions],
+                         [p.callable for p in parser.productions])
+
+class YaccGeneratedTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_generated(self):
+        run_import("yacc_generated")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result,
+                         "True p_error\n"
+                         "GeneratedLRParser True\n"
+                         "[] True\n"
+                         "['tracking'] True\n"
+                         "['debug'] True\n"
+                         "['debug', 'tracking'] True\n"
+                         "7 (0, 0) (0, 0)\n"
+                         "-1 (0, 0) (0, 0)\n"
+                         "1 (0, 0) (0, 0)\n"
+                         "Syntax error at '='\n"
+                         "1 (0, 0) (0, 0)\n"
+                         "Syntax error at 2\n"
+                         "Bad group at 0\n"
+                         "4 (0, 0) (0, 0)\n"
+                         "Syntax error at 4\n"
+                         "Bad group at 4\n"
+                         "1 (0, 0) (0, 0)\n"
+                         "Syntax error at EOF\n"
+                         "True\n"
+                         "WARNING: parser_test: parser does not match the grammar rules. Building the parser from the rules\n"
+                         "LRParser True\n"
+                         "True\n")
+
+    def test_yacc_generated_no_rulemodule(self):
+        import yacc_simple
+        parser = ply.yacc.yacc(module=yacc_simple)
+        del sys.modules["yacc_simple"]
+        self.assertEqual(parser.rulemodule, "yacc_simple")
+        tab = type(sys)("parser_norules")
+        tab._rulemodule = None
+        self.assertRaises(ValueError, ply.yacc.load_parser, tab)
+
+class YaccParseManyTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_parse_many(self):
+        run_import("yacc_parse_many")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result,
+                         "[('L1', 'STOR', ['@a', 5], 1), ('L2', 'PRINT', ['@a'], 2)]\n"
+                         "[('L1', 'STOR', ['@a', 2], 1)]\n"
+                         "[('L3', 'SUM', ['@a', 1], 3)]\n"
+                         "Syntax error at ',' on line 1\n"
+                         "None\n"
+                         "ZeroDivisionError('L5 divides by zero')\n"
+                         "[('L6', 'PRINT', ['@b'], 1)]\n"
+                         "Syntax error at ',' on line 1\n"
+                         "raised L5 divides by zero\n"
+                         "thread 1 True\n"
+                         "thread 64 True\n"
+                         "process 1 True\n"
+                         "process 64 True\n"
+                         "executor must be None, 'thread' or 'process'\n")
+
+class YaccThreadsTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_threads(self):
+        run_import("yacc_threads")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result,
+                         "True True\n"
+                         "the parse state is only available while parsing\n"
+                         "LRParser 16 True True\n"
+                         "DenseLRParser 16 True True\n")
+
+class YaccPushTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_push(self):
+        run_import("yacc_push")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result,
+                         "feed a\n"
+                         "feed =\n"
+                         "feed 2\n"
+                         "feed *\n"
+                         "feed 3\n"
+                         "feed ;\n"
+                         "feed b\n"
+                         "assign a 6\n"
+                         "feed =\n"
+                         "feed 1\n"
+                         "feed ;\n"
+                         "assign b 1\n"
+                         "[('a', 6), ('b', 1)]\n"
+                         "c ['EQUALS'] ['c']\n"
+                         "= ['NUMBER'] ['c', '=']\n"
+                         "2 ['PLUS', 'SEMI', 'TIMES'] ['c', '=', 2]\n"
+                         "* ['NUMBER'] ['c', '=', 2, '*']\n"
+                         "['$end', 'NAME']\n"
+                         "assign c 8\n"
+                         "[('c', 8)]\n"
+                         "the parser has already finished\n"
+                         "the end of the input is given with end(), not a None token\n"
+                         "True True\n"
+                         "True True\n"
+                         "True True\n"
+                         "assign p 1\n"
+                         "Syntax error at ';'\n"
+                         "assign r 2\n"
+                         "assign s 25\n"
+                         "[('p', 1), ('error', 1), ('r', 2)] [('s', 25)]\n"
+                         "assign u 1\n"
+                         "assign v 6\n"
+                         "[('u', 1), ('v', 6)]\n"
+                         "True True True\n"
+                         "True\n")
+
+class YaccGlrTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_glr(self):
+        run_import("yacc_glr")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result,
+                         "GLRParser True\n"
+                         "[1, 1, 2, 5, 14, 42, 132, 429]\n"
+                         "['[() [(()) ()]]', '[[() (())] ()]']\n"
+                         "[() [(()) ()]] [() [(()) ()]]\n"
+                         "['[() [(()) ()]]']\n"
+                         "expS[0:8] [('expS -> expS expS', (expS[0:2], expS[2:8])), ('expS -> expS expS', (expS[0:6], expS[6:8]))]\n"
+                         "Syntax error at PARRIGHT\n"
+                         "None\n"
+                         "Syntax error at EOF\n"
+                         "[]\n"
+                         "[True, True, True, True, True]\n"
+                         "[1, 2, 5, 2, 1]\n"
+                         "[('if', 'a', ('if', 'b', 'c', 'd')), ('if', 'a', ('if', 'b', 'c'), 'd')]\n"
+                         "('-', ('-', ('-', 1, 2), 3), 4)\n"
+                         "('-', ('-', ('-', 1, 2), 3), 4) [('+', ('-', 1, 2), 3)]\n"
+                         "Syntax error at +\n"
+                         "Syntax error at EOF\n"
+                         "None None\n"
+                         "a parser can not be both dense and GLR\n"
+                         "push parsers are not available in GLR mode\n"
+                         "write_parser() can't write GLR parsers\n"
+                         "a[0:1] [(b[0:1],), (X[0:1],)] 1\n"
+                         "X [('X', 'X')]\n")
+
+class YaccProfileTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_profile(self):
+        run_import("yacc_profile")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result,
+                         "Syntax error at ';'\n"
+                         "2\n"
+                         "program -> program statement 2 yacc_profile.py 32 True\n"
+                         "program -> statement 2 yacc_profile.py 33 True\n"
+                         "statement -> NAME EQUALS expression SEMI 4 yacc_profile.py 36 True\n"
+                         "statement -> error SEMI 1 yacc_profile.py 41 True\n"
+                         "expression -> expression PLUS NUMBER 1 yacc_profile.py 44 True\n"
+                         "expression -> NUMBER 5 yacc_profile.py 48 True\n"
+                         "25 True 1 2 {'statement': 1} 6\n"
+                         "True\n"
+                         "True\n"
+                         "['Rules by time:', 'States by shifts:', 'Error recovery: 1 syntax errors reported, 2 error tokens shifted, 1 rules raised SyntaxError', 'Stack depth: 6 at most, 3.6 on average']\n"
+                         "None\n"
+                         "True\n"
+                         "True True\n"
+                         "profiling is not available for dense parsers. Use a parser made by yacc() without dense=True\n"
+                         "profiling is not available for parsers loaded with load_parser(). Use a parser made by yacc()\n"
+                         "profiling is not available in GLR mode. Use a parser made by yacc() without glr=True\n")
+
+class YaccViewTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_view(self):
+        run_import("yacc_view")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result,
+                         "Syntax error at 6\n"
+                         "('a', ('a', 1), 3, 1, (1, 1), ['statement', 'NAME', 'seen_name', 'sum', 'SEMI'])\n"
+                         "('b', ('b', 1), 12, 2, (2, 3), ['statement', 'NAME', 'seen_name', 'sum', 'SEMI'])\n"
+                         "('error', 4)\n"
+                         "('c', ('c', 1), 4, 5, (5, 5), ['statement', 'NAME', 'seen_name', 'sum', 'SEMI'])\n"
+                         "Syntax error at 6\n"
+                         "Syntax error at 6\n"
+                         "Syntax error at 6\n"
+                         "Syntax error at 6\n"
+                         "True\n"
+                         "Rule 'statement -> error SEMI' uses the error token, but GLR parsers have no error recovery\n"
+                         "Syntax error at 6\n"
+                         "None True\n"
+                         "Syntax error at 6\n"
+                         "True\n"
+                         "Syntax error at 6\n"
+                         "Syntax error at 6\n"
+                         "True\n"
+                         "3 w z ['y', 'z'] True\n")
+
+class YaccRecoveryTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_recovery(self):
+        run_import("yacc_recovery")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result,
+                         "295 texts with errors\n"
+                         "([('x', 'y', (1, 1)), ('error', (1, 1), (12, 18)), ('error', (2, 2), (22, 31))], [('EQUALS', '=', 1, 12)], 36)\n"
+                         "True True\n"
+                         "True True\n"
+                         "True True\n"
+                         "[-4, -3, -2, -1, 4, 4, 16]\n"
+                         "[['NAME', 'error'], ['SEMI'], ['RPAREN']]\n")
+
+class YaccArenaTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_arena(self):
+        run_import("yacc_arena")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result,
+                         "[5, 11] 12 ['number', 'name', 'binop', 'assign']\n"
+                         "0 number 1 [] (1, 4, 4)\n"
+                         "1 number 2 [] (1, 8, 8)\n"
+                         "2 name y [] (1, 12, 12)\n"
+                         "3 binop * [1, 2] (1, 8, 12)\n"
+                         "4 binop + [0, 3] (1, 4, 12)\n"
+                         "5 assign x [4] (1, 0, 13)\n"
+                         "6 name x [] (2, 20, 20)\n"
+                         "7 number 3 [] (2, 24, 24)\n"
+                         "8 binop + [6, 7] (2, 20, 24)\n"
+                         "9 number 4 [] (3, 30, 30)\n"
+                         "10 binop * [8, 9] (2, 19, 30)\n"
+                         "11 assign y [10] (2, 15, 31)\n"
+                         "[5, 4, 0, 3, 1, 2] [0, 1, 2, 3, 4, 5]\n"
+                         "assign#5 assign x (1, 0, 13) 1 [binop#4] [number#0, binop#3]\n"
+                         "('assign', 'x', ('binop', '+', ('number', 1), ('binop', '*', ('number', 2), ('name', 'y'))))\n"
+                         "['x = (1 + (2 * y))', 'y = ((x + 3) * 4)']\n"
+                         "('pair', None, ('name', 'z'), ('name', 'z')) True (0, 0, 0)\n"
+                         "6 [5] True\n"
+                         "True (2, 15, 31) 6 ['name', 'number', 'binop', 'assign']\n"
+                         "(0, 0, 0) 0 1 (0, 0, 0) (3, 10, 12)\n"
+                         "(70000000, 8589934592, 8589934597)\n"
+                         "ValueError the children of a node must be nodes already in the arena\n"
+                         "ValueError the children of a node must be nodes already in the arena\n"
+                         "TypeError the kind of a node must be a string\n"
+                         "arena handle out of range\n"
+                         "3 ['leaf', 'top', 'far']\n")
+
+class YaccFusedTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_fused(self):
+        run_import("yacc_fused")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result,
+                         "[('a', -1, 1, 0, (1, 1), (4, 9)), ('b', -1, 2, 12, (2, 2), (16, 21))]\n"
+                         "[('error', 1, 7), ('error', 1, 18), ('error', 1, 34)] [('=', True), (5, True), ('w', True), ('v', True), (7, True)]\n"
+                         "True True\n"
+                         "True True\n"
+                         "True True\n"
+                         "14\n"
+                         "5\n"
+                         "fused parsing is not available in GLR mode\n"
+                         "[('n', 0, 1, 0, (0, 0), (0, 0))] True\n")
+
+class YaccExpectedTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_expected(self):
+        run_import("yacc_expected")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result,
+                         "error at 2: EQUALS PLUS RPAREN SEMI\n"
+                         "error at ;: LPAREN NAME NUMBER\n"
+                         "error at =: PLUS RPAREN SEMI\n"
+                         "error at EOF: EQUALS\n"
+                         "error at EOF: NAME\n"
+                         "LRParser True True\n"
+                         "DenseLRParser True True\n"
+                         "GeneratedLRParser True True\n"
+                         "('$end', 'EQUALS', 'LPAREN', 'NAME', 'NUMBER', 'PLUS', 'RPAREN', 'SEMI')\n"
+                         "['NAME'] 0b1000\n"
+                         "the parse state is only available while parsing\n"
+                         "error at b: EQUALS PLUS RPAREN SEMI\n"
+                         "error at ;: EQUALS PLUS RPAREN\n"
+                         "error at +: LPAREN NAME NUMBER\n"
+                         "error at EOF: LPAREN NAME NUMBER\n"
+                         "1 6 Syntax error at 'b' (NAME) on line 1, expected EQUALS PLUS RPAREN SEMI\n"
+                         "2 15 Syntax error at ';' (SEMI) on line 2, expected EQUALS PLUS RPAREN\n"
+                         "3 24 Syntax error at '+' (PLUS) on line 3, expected LPAREN NAME NUMBER\n"
+                         "0 0 Syntax error at end of input, expected LPAREN NAME NUMBER\n"
+                         "[\"Syntax error at 'b' (NAME) on line 1, expected EQUALS PLUS RPAREN SEMI\", 'Syntax error at end of input, expected EQUALS'] <SyntaxErrorInfo Syntax error at end of input, expected EQUALS>\n"
+                         "[['EQUALS', 'PLUS', 'RPAREN', 'SEMI']]\n")
+        self.assertEqual(sys.stderr.getvalue(), "")
+
+class YaccFirstTests(unittest.TestCase):
+    def setUp(self):
+        sys.stderr = StringIO.StringIO()
+        sys.stdout = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = sys.__stderr__
+        sys.stdout = sys.__stdout__
+
+    def test_yacc_first(self):
+        run_import("yacc_first")
+        result = sys.stdout.getvalue()
+        self.assertEqual(result,
+                         "['decls', 'opttype']\n"
+                         "FIRST block LBRACE\n"
+                         "FIRST decl VAR\n"
+                         "FIRST decls <empty> VAR\n"
+                         "FIRST expr LPAREN NAME NUMBER\n"
+                         "FIRST opttype : <empty>\n"
+                         "FIRST program LBRACE NAME VAR\n"
+                         "FIRST stmt LBRACE NAME\n"
+                         "FIRST stmts LBRACE NAME\n"
+                         "FIRST term LPAREN NAME NUMBER\n"
+                         "FOLLOW block $end LBRACE NAME RBRACE\n"
+                         "FOLLOW decl LBRACE NAME VAR\n"
+                         "FOLLOW decls LBRACE NAME VAR\n"
+                         "FOLLOW expr PLUS RPAREN SEMI\n"
+                         "FOLLOW opttype SEMI\n"
+                         "FOLLOW program $end\n"
+                         "FOLLOW stmt $end LBRACE NAME RBRACE\n"
+                         "FOLLOW stmts $end LBRACE NAME RBRACE\n"
+                         "FOLLOW term PLUS RPAREN SEMI\n"
+                         "['VAR', ':', '<empty>'] ['NAME', 'LBRACE', ':']\n"
+                         "0b10100000000000 ['$end', '<empty>']\n"
+                         "['decls', 'opttype', 'program', 'stmt', 'stmts']\n"
+                         "True\n"
+                         "True\n"
+                         "True\n")
+
 unittest.main()
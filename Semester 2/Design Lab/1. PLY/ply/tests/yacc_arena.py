@@ -0,0 +1,127 @@
+# -----------------------------------------------------------------------------
+# yacc_arena.py
+#
+# Rule functions building a tree in a yacc.Arena.  Checks the nodes and
+# their spans, walking the tree, turning it into Python objects, and
+# compacting and pickling it.
+# -----------------------------------------------------------------------------
+import pickle
+import ply.lex as lex
+import ply.yacc as yacc
+
+tokens = ('NAME', 'NUMBER', 'PLUS', 'TIMES', 'LPAREN', 'RPAREN', 'EQUALS', 'SEMI')
+
+t_PLUS   = r'\+'
+t_TIMES  = r'\*'
+t_LPAREN = r'\('
+t_RPAREN = r'\)'
+t_EQUALS = r'='
+t_SEMI   = r';'
+t_NAME   = r'[a-z]+'
+t_ignore = ' '
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_error(t):
+    t.lexer.skip(1)
+
+precedence = (
+    ('left', 'PLUS'),
+    ('left', 'TIMES'),
+    )
+
+arena = yacc.Arena()
+
+def p_program(p):
+    '''program : program statement
+               | statement'''
+    p[0] = p[1] + [p[2]] if len(p) == 3 else [p[1]]
+
+def p_statement(p):
+    'statement : NAME EQUALS expression SEMI'
+    p[0] = arena.node('assign', (p[3],), value=p[1], span=p)
+
+def p_expression_binop(p):
+    '''expression : expression PLUS expression
+                  | expression TIMES expression'''
+    p[0] = arena.node('binop', (p[1], p[3]), value=p[2], span=p)
+
+def p_expression_group(p):
+    'expression : LPAREN expression RPAREN'
+    p[0] = p[2]
+
+def p_expression_number(p):
+    'expression : NUMBER'
+    p[0] = arena.node('number', value=p[1], span=p)
+
+def p_expression_name(p):
+    'expression : NAME'
+    p[0] = arena.node('name', value=p[1], span=p)
+
+def p_error(p):
+    print('Syntax error at %r' % (p.value if p else 'EOF'))
+
+lexer = lex.lex()
+parser = yacc.yacc(debug=False)
+
+statements = parser.parse('x = 1 + 2 * y;\ny = (x + 3)\n * 4;', lexer=lexer, tracking=True)
+print(statements, len(arena), arena.kinds)
+for h in range(len(arena)):
+    print(h, arena.kindof(h), arena.valueof(h), arena.children(h), arena.spanof(h))
+
+# Walking the tree of the first statement
+first = statements[0]
+print(list(arena.walk(first)), list(arena.postorder(first)))
+node = arena[first]
+print(node, node.kind, node.value, node.span, len(node), node.children, node[0].children)
+
+# Turning it into Python objects
+print(arena.materialize(first))
+def build(kind, value, children):
+    if kind == 'binop':
+        return '(%s %s %s)' % (children[0], value, children[1])
+    if kind == 'assign':
+        return '%s = %s' % (value, children[0])
+    return str(value)
+print([arena.materialize(h, build) for h in statements])
+
+# A node that is a child of two others is built once
+shared = arena.node('name', value='z')
+pair = arena.node('pair', (shared, shared))
+made = arena.materialize(pair)
+print(made, made[2] is made[3], arena.spanof(pair))
+
+# Compacting and pickling the tree of the second statement
+small, roots = arena.compact(statements[1])
+print(len(small), roots, small.materialize(roots[0]) == arena.materialize(statements[1]))
+copy = pickle.loads(pickle.dumps(small))
+print(copy.materialize(roots[0]) == small.materialize(roots[0]), copy.spanof(roots[0]),
+      copy.node('name', value='w'), copy.kinds)
+
+# Spans are only kept once a node has one
+plain = yacc.Arena()
+leaf = plain.node('leaf', value=1)
+print(plain.spanof(leaf), len(plain.lineno), plain.node('top', [leaf], span=(3, 10, 12)), plain.spanof(leaf),
+      plain.spanof(1))
+
+# Positions past 2**31, as in an input of several GB
+print(plain.spanof(plain.node('far', span=(70000000, 2**33, 2**33 + 5))))
+
+# Errors
+for args in (('bad', [99]), ('bad', [-1]), (3, ())):
+    try:
+        plain.node(*args)
+    except (ValueError, TypeError) as e:
+        print(type(e).__name__, e)
+try:
+    plain[5]
+except IndexError as e:
+    print(e)
+print(len(plain), plain.kinds)
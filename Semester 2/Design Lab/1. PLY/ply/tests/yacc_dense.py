@@ -0,0 +1,65 @@
+# -----------------------------------------------------------------------------
+# yacc_dense.py
+#
+# A grammar with error recovery and a nonassociative operator, parsed with
+# both the dict tables and the dense tables
+# -----------------------------------------------------------------------------
+import ply.yacc as yacc
+
+from calclex import tokens, lexer
+
+# Parsing rules
+precedence = (
+    ('nonassoc','EQUALS'),
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    ('right','UMINUS'),
+    )
+
+def p_statement_expr(t):
+    'statement : expression'
+    print(t[1])
+
+def p_expression_binop(t):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression
+                  | expression EQUALS expression'''
+    if t[2] == '+'  : t[0] = t[1] + t[3]
+    elif t[2] == '-': t[0] = t[1] - t[3]
+    elif t[2] == '*': t[0] = t[1] * t[3]
+    elif t[2] == '/': t[0] = t[1] // t[3]
+    elif t[2] == '=': t[0] = int(t[1] == t[3])
+
+def p_expression_uminus(t):
+    'expression : MINUS expression %prec UMINUS'
+    t[0] = -t[2]
+
+def p_expression_group(t):
+    'expression : LPAREN expression RPAREN'
+    t[0] = t[2]
+
+def p_expression_group_error(t):
+    'expression : LPAREN error RPAREN'
+    print("Bad group at %d" % t.lexpos(1))
+    t[0] = 0
+
+def p_expression_number(t):
+    '''expression : NUMBER
+                  | NAME'''
+    t[0] = t[1] if isinstance(t[1], int) else len(t[1])
+
+def p_error(t):
+    if t:
+        print("Syntax error at %r" % t.value)
+    else:
+        print("Syntax error at EOF")
+
+texts = ['1+2*3', '-(4-1)/3', 'abc = 3', '1 = 1 = 1', '(1 2 3) + 4', '2 * (3 4) + 1', '2 +']
+
+for dense in (False, True):
+    parser = yacc.yacc(dense=dense)
+    print('dense' if dense else 'dict')
+    for text in texts:
+        parser.parse(text, lexer=lexer)
@@ -0,0 +1,122 @@
+# -----------------------------------------------------------------------------
+# yacc_expected.py
+#
+# The terminals expected at a syntax error, from parser.expected() in
+# p_error(), and collecting all of the syntax errors of an input in one
+# pass with collect_errors().  The grammar has no error rules, so parsing
+# starts over after each error.
+# -----------------------------------------------------------------------------
+import io
+import os
+import sys
+import shutil
+import tempfile
+import ply.lex as lex
+import ply.yacc as yacc
+
+tokens = ('NAME', 'NUMBER', 'EQUALS', 'PLUS', 'LPAREN', 'RPAREN', 'SEMI')
+
+t_EQUALS = r'='
+t_PLUS   = r'\+'
+t_LPAREN = r'\('
+t_RPAREN = r'\)'
+t_SEMI   = r';'
+t_NAME   = r'[a-z]+'
+t_ignore = ' '
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_error(t):
+    t.lexer.skip(1)
+
+precedence = (
+    ('nonassoc', 'EQUALS'),
+    ('left', 'PLUS'),
+    )
+
+def p_program(p):
+    '''program : program statement
+               | statement'''
+
+def p_statement(p):
+    'statement : NAME EQUALS expression SEMI'
+
+def p_expression_binop(p):
+    '''expression : expression PLUS expression
+                  | expression EQUALS expression'''
+
+def p_expression_group(p):
+    'expression : LPAREN expression RPAREN'
+
+def p_expression_value(p):
+    '''expression : NUMBER
+                   | NAME'''
+
+def p_error(p):
+    print('error at %s: %s' % (p.value if p else 'EOF', ' '.join(parser.expected())))
+
+lexer = lex.lex()
+parser = yacc.yacc(debug=False)
+
+# The expected tokens in p_error().  A = after an = is an error because
+# EQUALS is nonassociative.
+for text in ['x = 1 2;', 'x = (1 + ;', 'x = 1 = 2 = 3;', 'x', '']:
+    parser.parse(text, lexer=lexer)
+
+# The same for every kind of parser, and in fused parsing
+text = 'x = 1 y; z = (2)) + 3; w = 4'
+def errors_of(parse):
+    saved = sys.stdout
+    sys.stdout = out = io.StringIO()
+    try:
+        parse()
+    finally:
+        sys.stdout = saved
+    return out.getvalue()
+
+expected = errors_of(lambda: parser.parse(text, lexer=lexer))
+dparser = yacc.yacc(debug=False, dense=True)
+tmpdir = tempfile.mkdtemp()
+sys.path.insert(0, tmpdir)
+try:
+    yacc.write_parser(parser, os.path.join(tmpdir, 'parser_expected.py'))
+    gparser = yacc.load_parser('parser_expected', module=sys.modules[__name__])
+finally:
+    sys.path.remove(tmpdir)
+    sys.modules.pop('parser_expected', None)
+    shutil.rmtree(tmpdir)
+for p in (parser, dparser, gparser):
+    print(type(p).__name__,
+          errors_of(lambda: p.parse(text, lexer=lexer)) == expected,
+          errors_of(lambda: p.parse_fused(text, lexer=lexer)) == expected)
+
+# The sets themselves, and a state given explicitly
+print(parser.expected_terminals)
+print(parser.expected(0), bin(parser.expected_bits[0]))
+try:
+    parser.expected()
+except AttributeError as e:
+    print(e)
+
+# All of the errors of an input in one pass.  p_error() is still called.
+result, errors = parser.collect_errors('a = 1 b;\nc = (2;\nd = 3 ++ 4;\ne = 5;\nf = ', lexer=lexer)
+for e in errors:
+    print(e.lineno, e.lexpos, e)
+
+# Without p_error(), nothing is written to stderr
+del p_error
+quiet = yacc.yacc(debug=False, errorlog=yacc.NullLogger())
+lexer.lineno = 1
+result, errors = quiet.collect_errors('a = 1 b;\nc = 2; d', lexer=lexer)
+print([str(e) for e in errors], repr(errors[1]))
+
+# A GLR parser expects what any of its stacks could take
+gl = yacc.yacc(debug=False, glr=True, errorlog=yacc.NullLogger())
+print([e.expected for e in gl.collect_errors('a = 1 b;', lexer=lexer)[1]])
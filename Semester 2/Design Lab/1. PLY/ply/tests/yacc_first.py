@@ -0,0 +1,65 @@
+# -----------------------------------------------------------------------------
+# yacc_first.py
+#
+# The nullable nonterminals and the FIRST and FOLLOW sets of a grammar with
+# empty rules, and the same sets when those of an earlier grammar with
+# many of the same rules are reused.
+# -----------------------------------------------------------------------------
+import ply.yacc as yacc
+
+rules = [
+    ('program', ['decls', 'stmts']),
+    ('decls',   ['decls', 'decl']),
+    ('decls',   []),
+    ('decl',    ['VAR', 'NAME', 'opttype', 'SEMI']),
+    ('opttype', ["':'", 'NAME']),
+    ('opttype', []),
+    ('stmts',   ['stmts', 'stmt']),
+    ('stmts',   ['stmt']),
+    ('stmt',    ['NAME', 'EQUALS', 'expr', 'SEMI']),
+    ('stmt',    ['block']),
+    ('block',   ['LBRACE', 'decls', 'stmts', 'RBRACE']),
+    ('expr',    ['expr', 'PLUS', 'term']),
+    ('expr',    ['term']),
+    ('term',    ['NAME']),
+    ('term',    ['NUMBER']),
+    ('term',    ['LPAREN', 'expr', 'RPAREN']),
+    ]
+tokens = ['VAR', 'NAME', 'SEMI', 'EQUALS', 'PLUS', 'NUMBER', 'LPAREN', 'RPAREN', 'LBRACE', 'RBRACE']
+
+def make(rules, tokens=tokens):
+    grammar = yacc.Grammar(tokens)
+    for line, (name, syms) in enumerate(rules):
+        grammar.add_production(name, list(syms), None, 'yacc_first', line)
+    grammar.set_start('program')
+    grammar.compute_first()
+    grammar.compute_follow()
+    return grammar
+
+def sets(grammar):
+    return (sorted(grammar.Nullable),
+            [(name, sorted(grammar.First[name])) for name in sorted(grammar.Nonterminals)],
+            [(name, sorted(grammar.Follow[name])) for name in sorted(grammar.Nonterminals)])
+
+del yacc._grammar_sets[:]
+grammar = make(rules)
+nullable, first, follow = sets(grammar)
+print(nullable)
+for name, names in first:
+    print('FIRST', name, ' '.join(names))
+for name, names in follow:
+    print('FOLLOW', name, ' '.join(names))
+print(grammar._first(('decls', 'opttype')), grammar._first(('opttype', 'stmt')))
+print(bin(grammar.FirstBits['opttype']), grammar.Bitterms[-2:])
+
+# A statement can be empty now.  The sets are the same as for a grammar
+# built with nothing kept, after the sets of the first grammar, of the same
+# grammar, or of one with another token were kept.
+changed = rules + [('stmt', [])]
+del yacc._grammar_sets[:]
+fresh = sets(make(changed))
+print(fresh[0])
+for earlier, terms in [(rules, tokens), (changed, tokens), (rules + [('term', ['MINUS', 'term'])], tokens + ['MINUS'])]:
+    del yacc._grammar_sets[:]
+    make(earlier, terms)
+    print(sets(make(changed)) == fresh)
@@ -0,0 +1,170 @@
+# -----------------------------------------------------------------------------
+# yacc_fused.py
+#
+# Parsing with parse_fused().  The results must be the same as for parse(),
+# with and without error recovery, token objects must only be made when a
+# rule or p_error() needs them, and changes made to a token from a rule
+# must be kept.
+# -----------------------------------------------------------------------------
+import os
+import sys
+import types
+import shutil
+import tempfile
+import ply.lex as lex
+import ply.yacc as yacc
+
+tokens = ('NAME', 'NUMBER', 'EQUALS', 'PLUS', 'MINUS', 'SEMI', 'AT')
+
+t_EQUALS = r'='
+t_PLUS   = r'\+'
+t_MINUS  = r'-'
+t_SEMI   = r';'
+t_AT     = r'@'
+t_NAME   = r'[a-z]+'
+t_ignore = ' '
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_error(t):
+    t.lexer.skip(1)
+
+precedence = (
+    ('left', 'PLUS', 'MINUS'),
+    )
+
+def p_program(p):
+    '''program : program statement
+               | statement'''
+    p[0] = p[1] + [p[2]] if len(p) == 3 else [p[1]]
+
+def p_statement(p):
+    'statement : NAME EQUALS expression marker SEMI'
+    p[0] = (p[1], p[3], p.lineno(1), p.lexpos(1), p.linespan(3), p.lexspan(3))
+
+def p_statement_error(p):
+    'statement : error SEMI'
+    p[0] = ('error', p.lineno(2), p.lexpos(2))
+
+def p_marker(p):
+    '''marker : AT
+              | '''
+    p[0] = p.lexpos(1) if len(p) == 2 else None
+
+def p_expression_binop(p):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression'''
+    p[0] = p[1] + p[3] if p[2] == '+' else p[1] - p[3]
+
+def p_expression_negative(p):
+    'expression : MINUS NUMBER'
+    # Changing the value of a token, which must be kept
+    p[2] = -p[2]
+    p.set_lineno(2, p.lineno(2) + 100)
+    p[0] = p[2] if p.lineno(2) > 100 else None
+
+def p_expression_number(p):
+    'expression : NUMBER'
+    p[0] = p[1]
+
+def p_expression_name(p):
+    'expression : NAME'
+    tok = p.slice[1]
+    p[0] = len(p[1]) if tok.type == 'NAME' else 0
+
+# On an error, the stack holds token objects.  A NAME is thrown away with
+# token() and errok(), as in panic mode recovery.
+errors = []
+def p_error(p):
+    errors.append((p.value if p else None, all(not isinstance(s, int) for s in parser.symstack)))
+    if p and p.type == 'NAME':
+        parser.token()
+        parser.errok()
+
+lexer = lex.lex()
+parser = yacc.yacc(debug=False)
+
+texts = ['x = 1 + 2; y = -3 - abc;', 'x = 1\n+\n2 @;\ny = 4;', 'x = 1 + ; y = 2;', 'x = 1 y; z = 2;',
+         'x = = 3; y = 4 @ 5; z = 6;', '= 1; = 2;', 'x = 1', 'x = 1; y', '']
+
+def parse_both(parser, **kwargs):
+    for text in texts:
+        del errors[:]
+        lexer.lineno = 1
+        r1 = (parser.parse(text, lexer=lexer, **kwargs), errors[:])
+        del errors[:]
+        lexer.lineno = 1
+        r2 = (parser.parse_fused(text, lexer=lexer, **kwargs), errors[:])
+        if r1 != r2:
+            return False
+    return True
+
+# The results with positions, and the same results as parse() for every
+# kind of parser
+lexer.lineno = 1
+print(parser.parse_fused('a = 1 + -2;\nb = cd - 3 @;', lexer=lexer, tracking=True))
+del errors[:]
+lexer.lineno = 1
+print(parser.parse_fused('x = = 3; y = 4 @ 5; z = 6 w; v = 7;', lexer=lexer), errors)
+print(parse_both(parser), parse_both(parser, tracking=True))
+dparser = yacc.yacc(debug=False, dense=True)
+print(parse_both(dparser), parse_both(dparser, tracking=True))
+tmpdir = tempfile.mkdtemp()
+sys.path.insert(0, tmpdir)
+try:
+    yacc.write_parser(parser, os.path.join(tmpdir, 'parser_fused.py'))
+    gparser = yacc.load_parser('parser_fused', module=sys.modules[__name__])
+    print(parse_both(gparser), parse_both(gparser, tracking=True))
+finally:
+    sys.path.remove(tmpdir)
+    sys.modules.pop('parser_fused', None)
+    shutil.rmtree(tmpdir)
+
+# The token objects made.  parse() makes one for every token.  Here, only
+# the NUMBER rule function and p.slice in the NAME rule make one.
+made = []
+class CountedToken(lex.LexToken):
+    __slots__ = ()
+    def __new__(cls):
+        made.append(cls)
+        return object.__new__(cls)
+lexer.lextokenclass = CountedToken
+for parse in (parser.parse, parser.parse_fused):
+    del made[:]
+    parse('x = 1 + 2; y = 3 - 4 + z;', lexer=lexer)
+    print(len(made))
+lexer.lextokenclass = lex.LexToken
+
+# GLR parsers have no fused mode
+rules = dict((k, v) for k, v in globals().items() if k != 'p_statement_error')
+try:
+    yacc.yacc(module=types.SimpleNamespace(**rules), debug=False, glr=True).parse_fused('x = 1;', lexer=lexer)
+except yacc.YaccError as e:
+    print(e)
+
+# Tokens from a lexer that isn't a PLY lexer are used as they are
+class ListLexer:
+    def __init__(self, tokens):
+        self.tokens = tokens
+    def token(self):
+        return self.tokens.pop(0) if self.tokens else None
+
+lexer.input('n = abc;')
+toks = list(lexer)
+seen = []
+def expression_name_seen(p):
+    seen.append(p.slice[1])
+    p[0] = 0
+for prod in parser.productions:
+    if prod.name == 'expression' and prod.len == 1 and 'NAME' in prod.str:
+        saved, prod.callable = prod.callable, expression_name_seen
+print(parser.parse_fused(lexer=ListLexer(list(toks))), seen[0] is toks[2])
+prod.callable = saved
+
@@ -0,0 +1,119 @@
+# -----------------------------------------------------------------------------
+# yacc_generated.py
+#
+# Writing a parser to a module with write_parser() and loading it again
+# with load_parser().  The loaded parser must give the same results as the
+# one made by yacc(), with and without debugging and position tracking.
+# -----------------------------------------------------------------------------
+import os
+import io
+import re
+import sys
+import shutil
+import tempfile
+import importlib
+import ply.yacc as yacc
+
+from calclex import tokens, lexer
+
+# Parsing rules
+precedence = (
+    ('nonassoc','EQUALS'),
+    ('left','PLUS','MINUS'),
+    ('left','TIMES','DIVIDE'),
+    ('right','UMINUS'),
+    )
+
+def p_statement_expr(t):
+    'statement : expression'
+    print(t[1], t.linespan(1), t.lexspan(1))
+
+def p_expression_binop(t):
+    '''expression : expression PLUS expression
+                  | expression MINUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression
+                  | expression EQUALS expression'''
+    if t[2] == '+'  : t[0] = t[1] + t[3]
+    elif t[2] == '-': t[0] = t[1] - t[3]
+    elif t[2] == '*': t[0] = t[1] * t[3]
+    elif t[2] == '/': t[0] = t[1] // t[3]
+    elif t[2] == '=': t[0] = int(t[1] == t[3])
+
+def p_expression_uminus(t):
+    'expression : MINUS expression %prec UMINUS'
+    t[0] = -t[2]
+
+def p_expression_group(t):
+    'expression : LPAREN expression RPAREN'
+    t[0] = t[2]
+
+def p_expression_group_error(t):
+    'expression : LPAREN error RPAREN'
+    print("Bad group at %d" % t.lexpos(1))
+    t[0] = 0
+
+def p_expression_number(t):
+    '''expression : NUMBER
+                  | NAME'''
+    t[0] = t[1] if isinstance(t[1], int) else len(t[1])
+
+def p_error(t):
+    if t:
+        print("Syntax error at %r" % t.value)
+    else:
+        print("Syntax error at EOF")
+
+texts = ['1+2*3', '-(4-1)/3', 'abc = 3', '1 = 1 = 1', '(1 2 3) + 4', '2 * (3 4) + 1', '2 +']
+
+# Run every text through a parser and return the output and the debugging
+# log, without the object addresses in it
+def run(parser, **kwargs):
+    stdout = sys.stdout
+    sys.stdout = out = io.StringIO()
+    log = io.StringIO()
+    try:
+        for text in texts:
+            lexer.lineno = 1
+            if kwargs.get('debug'):
+                kwargs['debug'] = yacc.PlyLogger(log)
+            parser.parse(text, lexer=lexer, **kwargs)
+    finally:
+        sys.stdout = stdout
+    return out.getvalue(), re.sub(r'0x[0-9a-f]+', '', log.getvalue())
+
+parser = yacc.yacc(debug=False)
+
+tmpdir = tempfile.mkdtemp()
+sys.path.insert(0, tmpdir)
+try:
+    yacc.write_parser(parser, os.path.join(tmpdir, 'parser_test.py'))
+    tab = importlib.import_module('parser_test')
+    print(tab._rulemodule == __name__, tab._errorfunc)
+
+    loaded = yacc.load_parser('parser_test', module=sys.modules[__name__])
+    print(type(loaded).__name__, yacc.parse == loaded.parse)
+    for kwargs in ({}, {'tracking': True}, {'debug': True}, {'debug': True, 'tracking': True}):
+        print(sorted(kwargs), run(loaded, **kwargs) == run(parser, **kwargs))
+    print(run(loaded)[0], end='')
+
+    # Binding the rules through the module name saved in the module
+    loaded = yacc.load_parser(tab, check=True)
+    print(run(loaded) == run(parser))
+
+    # A module that doesn't match the rules is not used
+    tab._signature = 'old'
+    rebuilt = yacc.load_parser(tab, module=sys.modules[__name__], check=True,
+                               errorlog=yacc.PlyLogger(sys.stdout))
+    print(type(rebuilt).__name__, run(rebuilt) == run(parser))
+
+    # Parsers with dense tables can be written too
+    dparser = yacc.yacc(debug=False, dense=True)
+    yacc.write_parser(dparser, os.path.join(tmpdir, 'parser_dense.py'))
+    loaded = yacc.load_parser('parser_dense', module=sys.modules[__name__])
+    print(run(loaded, tracking=True) == run(parser, tracking=True))
+finally:
+    sys.path.remove(tmpdir)
+    sys.modules.pop('parser_test', None)
+    sys.modules.pop('parser_dense', None)
+    shutil.rmtree(tmpdir)
@@ -0,0 +1,184 @@
+# -----------------------------------------------------------------------------
+# yacc_glr.py
+#
+# Grammars with conflicts parsed with yacc(glr=True): the number of parses
+# of the ambiguous balanced parentheses grammar, choosing and rejecting
+# trees, and the same results as the LALR parser where that has no choice
+# to make.
+# -----------------------------------------------------------------------------
+import io
+import ply.lex as lex
+import ply.yacc as yacc
+
+quiet = yacc.PlyLogger(io.StringIO())
+
+class Tok(object):
+    def __init__(self, type, value=None):
+        self.type = type
+        self.value = type if value is None else value
+        self.lineno = self.lexpos = 0
+
+class ListLexer(object):
+    def __init__(self, text):
+        self.text = text
+    def input(self, text):
+        self.toks = iter([Tok(t) for t in text.split()])
+    def token(self):
+        return next(self.toks, None)
+
+# expS : PARLEFT PARRIGHT | PARLEFT expA | expS expS, from the Design Lab
+# assignment
+class Parens(object):
+    tokens = ('PARLEFT', 'PARRIGHT')
+
+    def p_expS(self, p):
+        '''expS : PARLEFT PARRIGHT
+                | PARLEFT expA
+                | expS expS'''
+        if p[1] == 'PARLEFT':
+            p[0] = '()' if p[2] == 'PARRIGHT' else '(' + p[2]
+        else:
+            p[0] = '[%s %s]' % (p[1], p[2])
+
+    def p_expA(self, p):
+        'expA : expS PARRIGHT'
+        p[0] = p[1] + ')'
+
+    def p_error(self, p):
+        print('Syntax error at', p.type if p else 'EOF')
+
+lexer = ListLexer('')
+parser = yacc.yacc(module=Parens(), debug=False, errorlog=quiet, glr=True)
+lrparser = yacc.yacc(module=Parens(), debug=False, errorlog=quiet)
+print(type(parser).__name__, parser.alternatives != {})
+
+# The number of ways of splitting n pairs into a sequence are the Catalan
+# numbers
+print([parser.parse_forest('PARLEFT PARRIGHT ' * n, lexer=lexer).count() for n in range(1, 9)])
+text = 'PARLEFT PARRIGHT PARLEFT PARLEFT PARRIGHT PARRIGHT PARLEFT PARRIGHT'
+print(parser.parse_all(text, lexer=lexer))
+print(parser.parse(text, lexer=lexer), lrparser.parse(text, lexer=lexer))
+print(parser.parse_all(text, lexer=lexer, limit=1))
+forest = parser.parse_forest(text, lexer=lexer)
+print(forest, [(parser.productions[n].str, children) for n, children in forest.alternatives])
+
+# Syntax errors
+print(parser.parse('PARLEFT PARRIGHT PARRIGHT', lexer=lexer))
+print(parser.parse_all('PARLEFT', lexer=lexer))
+
+# An expression grammar without precedence, and a dangling else
+tokens = ('NUMBER', 'PLUS', 'MINUS', 'IF', 'THEN', 'ELSE', 'NAME')
+
+t_PLUS = r'\+'
+t_MINUS = r'-'
+t_ignore = ' '
+
+def t_NAME(t):
+    r'[a-z]+'
+    if t.value in ('if', 'then', 'else'):
+        t.type = t.value.upper()
+    return t
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_error(t):
+    t.lexer.skip(1)
+
+def p_top(p):
+    '''top : expr
+           | stmt'''
+    p[0] = p[1]
+
+def p_expr_binop(p):
+    '''expr : expr PLUS expr
+            | expr MINUS expr'''
+    if p[2] == '-' and isinstance(p[3], tuple) and reject:
+        raise SyntaxError
+    p[0] = (p[2], p[1], p[3])
+
+def p_expr_number(p):
+    'expr : NUMBER'
+    p[0] = p[1]
+
+def p_stmt_if(p):
+    '''stmt : IF NAME THEN stmt
+            | IF NAME THEN stmt ELSE stmt'''
+    p[0] = ('if', p[2], p[4]) if len(p) == 5 else ('if', p[2], p[4], p[6])
+
+def p_stmt_name(p):
+    'stmt : NAME'
+    p[0] = p[1]
+
+def p_error(p):
+    print('Syntax error at', p.value if p else 'EOF')
+
+reject = False
+lexer = lex.lex()
+glr = yacc.yacc(debug=False, errorlog=quiet, glr=True)
+lalr = yacc.yacc(debug=False, errorlog=quiet)
+texts = ['1', '1 - 2 - 3', '1 + 2 - 3 + 4', 'if a then if b then c else d', 'if a then b else if c then d else e']
+
+# The first tree is the one that the LALR parser finds
+print([glr.parse(text) == lalr.parse(text) for text in texts])
+print([glr.parse_forest(text).count() for text in texts])
+print(glr.parse_all('if a then if b then c else d'))
+
+# Picking the tree with select.  Here the shortest last part, making
+# operators left associative.
+def leftmost(node, alternatives):
+    return max(alternatives, key=lambda alt: alt[1][-1].start)
+print(glr.parse('1 - 2 - 3 - 4', select=leftmost))
+
+# Rules rejecting trees
+reject = True
+print(glr.parse('1 - 2 - 3 - 4'), glr.parse_all('1 - 2 + 3'))
+reject = False
+
+# A parse error without a tree
+print(glr.parse('1 + + 2'), glr.parse_forest('if a then'))
+
+# GLR parsers can't be dense, pushed or written out
+try:
+    yacc.yacc(debug=False, errorlog=quiet, glr=True, dense=True)
+except ValueError as e:
+    print(e)
+try:
+    glr.push()
+except yacc.YaccError as e:
+    print(e)
+try:
+    yacc.write_parser(glr, 'parser_glr.py')
+except ValueError as e:
+    print(e)
+
+# A grammar with a cycle a -> b -> a, so that there are infinitely many
+# trees.  Trees with a node below itself are left out.
+class Cyclic(object):
+    tokens = ('X', 'PLUS')
+
+    def p_top(self, p):
+        'top : a'
+        p[0] = p[1]
+
+    def p_a(self, p):
+        '''a : b
+             | X
+             | a PLUS a'''
+        p[0] = p[1] if len(p) == 2 else (p[1], p[3])
+
+    def p_b(self, p):
+        'b : a'
+        p[0] = ['b', p[1]]
+
+    def p_error(self, p):
+        print('Syntax error')
+
+cyclic = yacc.yacc(module=Cyclic(), debug=False, errorlog=quiet, glr=True)
+lexer = ListLexer('')
+forest = cyclic.parse_forest('X', lexer=lexer)
+a = forest.alternatives[0][1][0]
+print(a, [children for _, children in a.alternatives], forest.count())
+print(cyclic.parse('X', lexer=lexer), cyclic.parse_all('X PLUS X', lexer=lexer))
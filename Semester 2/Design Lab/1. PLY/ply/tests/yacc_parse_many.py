@@ -0,0 +1,112 @@
+# -----------------------------------------------------------------------------
+# yacc_parse_many.py
+#
+# Parsing many small programs with parse_many().  Every program must be
+# parsed the same way as on its own, whatever state the one before it left
+# the lexer and parser in, and with or without a pool of workers.
+# -----------------------------------------------------------------------------
+import multiprocessing
+import ply.lex as lex
+import ply.yacc as yacc
+
+tokens = [
+    "LABEL",
+    "OPCODE",
+    "REG",
+    "NUMBER",
+    ]
+
+literals = ","
+
+states = (('comment', 'exclusive'),)
+
+t_ignore = " "
+t_comment_ignore = ""
+t_LABEL = r'L\d+'
+t_OPCODE = r'STOR|SUM|DIV|PRINT'
+t_REG = r'@[A-Za-z]'
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_hash(t):
+    r'\#'
+    t.lexer.begin('comment')
+
+def t_comment_text(t):
+    r'[^\n]+'
+
+def t_comment_newline(t):
+    r'\n'
+    t.lexer.lineno += 1
+    t.lexer.begin('INITIAL')
+
+def t_ANY_error(t):
+    t.lexer.skip(1)
+
+def p_program(p):
+    '''program : program instruction
+               | instruction'''
+    p[0] = p[1] + [p[2]] if len(p) == 3 else [p[1]]
+
+def p_instruction(p):
+    'instruction : LABEL OPCODE operands'
+    if p[2] == 'DIV' and p[3][-1] == 0:
+        raise ZeroDivisionError('%s divides by zero' % p[1])
+    p[0] = (p[1], p[2], p[3], p.lineno(1))
+
+def p_operands(p):
+    '''operands : operands ',' operand
+                | operand'''
+    p[0] = p[1] + [p[3]] if len(p) == 4 else [p[1]]
+
+def p_operand(p):
+    '''operand : REG
+               | NUMBER'''
+    p[0] = p[1]
+
+def p_error(p):
+    if p:
+        print("Syntax error at %r on line %d" % (p.value, p.lineno))
+    else:
+        print("Syntax error at EOF")
+
+# Worker processes that import this module must not run the checks below
+if multiprocessing.parent_process() is None:
+    lexer = lex.lex()
+    parser = yacc.yacc(debug=False)
+
+    programs = ['L1 STOR @a, 5\nL2 PRINT @a',
+                'L1 STOR @a, 2 # comment left open at the end',
+                '\n\nL3 SUM @a, 1',
+                'L4 STOR @a, , 3',
+                'L5 DIV @a, 0',
+                'L6 PRINT @b']
+    for result in parser.parse_many(programs, lexer=lexer, return_exceptions=True):
+        print(repr(result))
+
+    # Exceptions are raised unless asked for
+    try:
+        list(parser.parse_many(programs, lexer=lexer))
+    except ZeroDivisionError as e:
+        print('raised', e)
+
+    # The same results from pools of workers
+    programs = ['L%d STOR @a, %d\n\nL%d DIV @a, %d' % (i, i, i + 1, i % 7) for i in range(300)]
+    expected = [repr(r) for r in parser.parse_many(programs, lexer=lexer, return_exceptions=True)]
+    for executor in ('thread', 'process'):
+        for chunksize in (1, 64):
+            results = parser.parse_many(programs, lexer=lexer, return_exceptions=True,
+                                        executor=executor, workers=2, chunksize=chunksize)
+            print(executor, chunksize, [repr(r) for r in results] == expected)
+
+    try:
+        parser.parse_many(programs, executor='fork')
+    except ValueError as e:
+        print(e)
@@ -0,0 +1,103 @@
+# -----------------------------------------------------------------------------
+# yacc_profile.py
+#
+# Counting shifts, reductions and error recovery with parse(profile=...).
+# -----------------------------------------------------------------------------
+import io
+import os
+import sys
+import types
+import shutil
+import tempfile
+import ply.lex as lex
+import ply.yacc as yacc
+
+tokens = ('NAME', 'NUMBER', 'EQUALS', 'PLUS', 'SEMI')
+
+t_EQUALS = r'='
+t_PLUS   = r'\+'
+t_SEMI   = r';'
+t_NAME   = r'[a-z]+'
+t_ignore = ' '
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_error(t):
+    t.lexer.skip(1)
+
+def p_program(p):
+    '''program : program statement
+               | statement'''
+
+def p_statement(p):
+    'statement : NAME EQUALS expression SEMI'
+    if p[3] > 100:
+        raise SyntaxError
+
+def p_statement_error(p):
+    'statement : error SEMI'
+
+def p_expression_plus(p):
+    'expression : expression PLUS NUMBER'
+    p[0] = p[1] + p[3]
+
+def p_expression_number(p):
+    'expression : NUMBER'
+    p[0] = p[1]
+
+def p_error(p):
+    print('Syntax error at %r' % (p.value if p else 'EOF'))
+
+lexer = lex.lex()
+parser = yacc.yacc(debug=False)
+rules = [p.callable for p in parser.productions]
+
+profile = yacc.ParseProfile()
+parser.parse('a = 1 + 2; b = 3;', profile=profile)
+parser.parse('c = 4 + ; d = 5; e = 200;', profile=profile)
+print(profile.parses)
+for p, n, seconds in sorted(profile.rules(), key=lambda r: r[0].line):
+    print(p.str, n, os.path.basename(p.file), p.line, seconds > 0)
+print(sum(profile.shifts.values()), sum(profile.errors.values()) > 0, profile.error_calls,
+      profile.recoveries, dict((p.name, n) for p, n in profile.rule_errors.items()), profile.max_depth)
+print([n for _, n in profile.states()] == sorted(profile.shifts.values(), reverse=True))
+
+out = io.StringIO()
+profile.report(out)
+report = out.getvalue()
+print(report.startswith('Parses: 2 in '))
+print([line for line in report.splitlines() if line and not line.startswith(' ')][1:])
+
+# profile=True writes the report to stderr
+stderr = sys.stderr
+sys.stderr = io.StringIO()
+try:
+    print(parser.parse('f = 1;', profile=True))
+    print('Rules by time' in sys.stderr.getvalue())
+finally:
+    sys.stderr = stderr
+
+# The parser itself isn't changed
+print([p.callable for p in parser.productions] == rules, parser.parse('g = 1;') is None)
+
+# Other kinds of parser can't be profiled
+dparser = yacc.yacc(debug=False, dense=True)
+tmpdir = tempfile.mkdtemp()
+sys.path.insert(0, tmpdir)
+try:
+    yacc.write_parser(parser, os.path.join(tmpdir, 'parser_profile.py'))
+    gparser = yacc.load_parser('parser_profile', module=sys.modules[__name__])
+finally:
+    sys.path.remove(tmpdir)
+    sys.modules.pop('parser_profile', None)
+    shutil.rmtree(tmpdir)
+rules = dict((k, v) for k, v in globals().items() if k != 'p_statement_error')
+glr = yacc.yacc(module=types.SimpleNamespace(**rules), debug=False, glr=True)
+for p in (dparser, gparser, glr):
+    try:
+        p.parse('h = 1;', profile=True)
+    except yacc.YaccError as e:
+        print(e)
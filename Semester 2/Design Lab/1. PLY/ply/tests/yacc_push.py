@@ -0,0 +1,187 @@
+# -----------------------------------------------------------------------------
+# yacc_push.py
+#
+# Feeding tokens to a parser with push().  The results must be the same as
+# for parse(), rules must run and syntax errors be found at the same points,
+# and two push parsers fed in turn must not see each other's state.
+# -----------------------------------------------------------------------------
+import os
+import io
+import sys
+import shutil
+import random
+import asyncio
+import tempfile
+import ply.lex as lex
+import ply.yacc as yacc
+
+tokens = ('NAME', 'NUMBER', 'EQUALS', 'PLUS', 'TIMES', 'SEMI')
+
+t_EQUALS = r'='
+t_PLUS   = r'\+'
+t_TIMES  = r'\*'
+t_SEMI   = r';'
+t_NAME   = r'[a-z]+'
+t_ignore = ' \n'
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_error(t):
+    t.lexer.skip(1)
+
+precedence = (
+    ('left', 'PLUS'),
+    ('left', 'TIMES'),
+    )
+
+def p_program(p):
+    '''program : program statement
+               | statement'''
+    p[0] = p[1] + [p[2]] if len(p) == 3 else [p[1]]
+
+def p_statement(p):
+    'statement : NAME EQUALS expression SEMI'
+    print('assign', p[1], p[3])
+    p[0] = (p[1], p[3])
+
+def p_statement_error(p):
+    'statement : error SEMI'
+    p[0] = ('error', p.lineno(2))
+
+def p_expression_binop(p):
+    '''expression : expression PLUS expression
+                  | expression TIMES expression'''
+    p[0] = p[1] + p[3] if p[2] == '+' else p[1] * p[3]
+
+def p_expression_number(p):
+    'expression : NUMBER'
+    p[0] = p[1]
+
+def p_error(p):
+    print('Syntax error at %r' % (p.value if p else 'EOF'))
+
+lexer = lex.lex()
+parser = yacc.yacc(debug=False)
+
+texts = ['x = 3 + 4 * 2;', 'x = 1; y = 2 * 3 + 1;', 'x = 1 +; y = 2;', 'x = 1; y = = 3; z = 4;', 'x = 1']
+
+# Feed the tokens of a text one at a time
+def push_parse(parser, text, **kwargs):
+    push = parser.push(lexer=lexer, **kwargs)
+    lexer.input(text)
+    for tok in lexer:
+        push.feed(tok)
+    return push.end()
+
+# Parse every text with parse() and by feeding tokens, and compare the
+# results and what the rules print
+def parse_both(parser, **kwargs):
+    stdout = sys.stdout
+    try:
+        for text in texts:
+            sys.stdout = out1 = io.StringIO()
+            lexer.lineno = 1
+            r1 = parser.parse(text, lexer=lexer, **kwargs)
+            sys.stdout = out2 = io.StringIO()
+            lexer.lineno = 1
+            r2 = push_parse(parser, text, **kwargs)
+            if (r1, out1.getvalue()) != (r2, out2.getvalue()):
+                return False
+    finally:
+        sys.stdout = stdout
+    return True
+
+# As with parse(), a rule runs when the token after it is fed, unless the
+# parser has a default reduction in that state
+push = parser.push()
+lexer.input('a = 2 * 3; b = 1;')
+for tok in lexer:
+    print('feed', tok.value)
+    push.feed(tok)
+print(push.end())
+
+# The expected tokens and the partial results along the way
+push = parser.push()
+lexer.input('c = 2 *')
+for tok in lexer:
+    push.feed(tok)
+    print(tok.value, push.expected(), [s.value for s in push.symbols])
+lexer.input('4;')
+push.feed_many(lexer)
+print(push.expected())
+print(push.end())
+
+try:
+    push.feed(tok)
+except yacc.YaccError as e:
+    print(e)
+try:
+    parser.push().feed(None)
+except ValueError as e:
+    print(e)
+
+# The same results as parse() for every kind of parser
+print(parse_both(parser), parse_both(parser, tracking=True))
+dparser = yacc.yacc(debug=False, dense=True)
+print(parse_both(dparser), parse_both(dparser, tracking=True))
+tmpdir = tempfile.mkdtemp()
+sys.path.insert(0, tmpdir)
+try:
+    yacc.write_parser(parser, os.path.join(tmpdir, 'parser_push.py'))
+    gparser = yacc.load_parser('parser_push', module=sys.modules[__name__])
+    print(parse_both(gparser), parse_both(gparser, tracking=True))
+finally:
+    sys.path.remove(tmpdir)
+    sys.modules.pop('parser_push', None)
+    shutil.rmtree(tmpdir)
+
+# Two push parsers fed in turn
+lexer.input('p = 1; q = 1 +; r = 2;')
+first = list(lexer)
+lexer.input('s = 5 * 5;')
+second = list(lexer)
+push1 = parser.push()
+push2 = parser.push()
+for n in range(max(len(first), len(second))):
+    if n < len(first):
+        push1.feed(first[n])
+    if n < len(second):
+        push2.feed(second[n])
+print(push1.end(), push2.end())
+
+# Parsing lines as they arrive on an asyncio stream
+async def stream_tokens(reader):
+    lexer = lex.lex()
+    async for line in reader:
+        lexer.input(line.decode())
+        for tok in lexer:
+            yield tok
+
+async def main():
+    reader = asyncio.StreamReader()
+    async def write():
+        for line in (b'u = 1;\n', b'v = 2\n', b' * 3;\n'):
+            await asyncio.sleep(0)
+            reader.feed_data(line)
+        reader.feed_eof()
+    writer = asyncio.ensure_future(write())
+    result = await parser.parse_async(stream_tokens(reader))
+    await writer
+    return result
+
+print(asyncio.run(main()))
+
+# Syntax errors are found at the same points as with parse(), so p_error()
+# sees the same tokens and the error rules give the same results.  Also
+# with the defaulted states turned off.
+rand = random.Random(1)
+words = ['x', 'y', '=', '1', '2', '+', '*', ';', ';']
+texts = [' '.join(rand.choice(words) for _ in range(rand.randint(0, 10))) for _ in range(300)]
+texts += ['; x', '1 1 2 ;', 'x = 1 2', '= ;', 'x = ; ;', 'x']
+print(parse_both(parser), parse_both(dparser), parse_both(gparser))
+parser.disable_defaulted_states()
+print(parse_both(parser))
+parser.set_defaulted_states()
@@ -0,0 +1,141 @@
+# -----------------------------------------------------------------------------
+# yacc_recovery.py
+#
+# Error recovery on input with many errors.  Without debugging, the parser
+# pops the stack back to a state that can act on error, and throws away
+# tokens that can't follow error, in one go.  With debugging it takes one
+# step at a time, so that each one is logged.  Both must give the same
+# results, syntax errors and positions, for every kind of parser.
+# -----------------------------------------------------------------------------
+import os
+import sys
+import random
+import shutil
+import tempfile
+import ply.lex as lex
+import ply.yacc as yacc
+
+tokens = ('NAME', 'NUMBER', 'PLUS', 'TIMES', 'LPAREN', 'RPAREN', 'EQUALS', 'SEMI')
+
+t_PLUS   = r'\+'
+t_TIMES  = r'\*'
+t_LPAREN = r'\('
+t_RPAREN = r'\)'
+t_EQUALS = r'='
+t_SEMI   = r';'
+t_NAME   = r'[a-z]+'
+t_ignore = ' '
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_error(t):
+    t.lexer.skip(1)
+
+precedence = (
+    ('left', 'PLUS'),
+    ('left', 'TIMES'),
+    )
+
+def p_program(p):
+    '''program : program statement
+               | statement'''
+    p[0] = p[1] + [p[2]] if len(p) == 3 else [p[1]]
+
+def p_statement(p):
+    'statement : NAME EQUALS expression SEMI'
+    p[0] = (p[1], p[3], p.linespan(3))
+
+def p_statement_error(p):
+    'statement : error SEMI'
+    p[0] = ('error', p.linespan(1), p.lexspan(1))
+
+def p_expression_binop(p):
+    '''expression : expression PLUS expression
+                  | expression TIMES expression'''
+    p[0] = (p[2], p[1], p[3])
+
+def p_expression_group(p):
+    'expression : LPAREN expression RPAREN'
+    p[0] = p[2]
+
+def p_expression_group_error(p):
+    'expression : LPAREN error RPAREN'
+    p[0] = 'error'
+
+def p_expression_value(p):
+    '''expression : NUMBER
+                  | NAME'''
+    # A rule can start error recovery as well
+    if p[1] == 13:
+        raise SyntaxError
+    p[0] = p[1]
+
+errors = []
+def p_error(p):
+    errors.append((p.type, p.value, p.lineno, p.lexpos) if p else None)
+
+lexer = lex.lex()
+parser = yacc.yacc(debug=False)
+
+# Statements with 10% of their tokens replaced or dropped
+rand = random.Random(21)
+words = ['x', '=', '1', '13', '+', '*', '(', ')', ';', 'y']
+def statement():
+    toks = ['x', '='] + [rand.choice(words) for _ in range(rand.randrange(6))] + [';']
+    toks = [rand.choice(words) if rand.random() < 0.1 else tok for tok in toks if rand.random() > 0.1]
+    return ' '.join(toks) + rand.choice([' ', '\n'])
+texts = [''.join(statement() for _ in range(rand.randrange(1, 10))) for _ in range(300)]
+
+def parse_all(parser, **kwargs):
+    results = []
+    for text in texts:
+        del errors[:]
+        lexer.lineno = 1
+        result = parser.parse(text, lexer=lexer, **kwargs)
+        results.append((result, list(errors), lexer.lexpos))
+    return results
+
+def push_all(parser, **kwargs):
+    results = []
+    for text in texts:
+        del errors[:]
+        lexer.lineno = 1
+        push = parser.push(lexer=lexer, **kwargs)
+        lexer.input(text)
+        push.feed_many(lexer)
+        results.append((push.end(), list(errors)))
+    return results
+
+def same(run, parser):
+    return all(run(parser, tracking=t) == run(parser, tracking=t, debug=yacc.NullLogger())
+               for t in (False, True))
+
+expected = parse_all(parser, tracking=True)
+print(sum(1 for result in expected if result[1]), 'texts with errors')
+print(expected[0])
+print(same(parse_all, parser), same(push_all, parser))
+
+dparser = yacc.yacc(debug=False, dense=True)
+print(same(parse_all, dparser), parse_all(dparser, tracking=True) == expected)
+
+tmpdir = tempfile.mkdtemp()
+sys.path.insert(0, tmpdir)
+try:
+    yacc.write_parser(parser, os.path.join(tmpdir, 'parser_recovery.py'))
+    gparser = yacc.load_parser('parser_recovery', module=sys.modules[__name__])
+    print(same(parse_all, gparser), parse_all(gparser, tracking=True) == expected)
+finally:
+    sys.path.remove(tmpdir)
+    sys.modules.pop('parser_recovery', None)
+    shutil.rmtree(tmpdir)
+
+# The tables used for recovery
+print(sorted(parser.action[st]['error'] for st in parser.error_states))
+print([sorted(parser.error_follow[st]) for st in sorted(parser.error_follow)])
@@ -0,0 +1,158 @@
+# -----------------------------------------------------------------------------
+# yacc_threads.py
+#
+# Many threads parsing with one parser at the same time.  Each thread has
+# its own lexer, and p_error() uses the parser's token(), errok() and state,
+# which must refer to the parse running in the calling thread.  Quoted
+# expressions are parsed by calling parse() again from inside a rule.
+# -----------------------------------------------------------------------------
+import sys
+import random
+import threading
+import ply.lex as lex
+import ply.yacc as yacc
+
+tokens = ('NAME', 'NUMBER', 'QUOTED', 'PLUS', 'TIMES', 'DIVIDE', 'LPAREN', 'RPAREN', 'SEMI')
+
+t_PLUS   = r'\+'
+t_TIMES  = r'\*'
+t_DIVIDE = r'/'
+t_LPAREN = r'\('
+t_RPAREN = r'\)'
+t_SEMI   = r';'
+t_NAME   = r'[a-z]+'
+t_ignore = ' '
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_QUOTED(t):
+    r'"[^"]*"'
+    t.value = t.value[1:-1]
+    return t
+
+def t_error(t):
+    t.lexer.skip(1)
+
+precedence = (
+    ('left', 'PLUS'),
+    ('left', 'TIMES', 'DIVIDE'),
+    )
+
+def p_statements(p):
+    '''statements : statements statement
+                  | statement'''
+    p[0] = p[1] + [p[2]] if len(p) == 3 else [p[1]]
+
+def p_statement(p):
+    'statement : expression SEMI'
+    p[0] = p[1]
+
+def p_statement_error(p):
+    'statement : error SEMI'
+    p[0] = -1
+
+def p_expression_binop(p):
+    '''expression : expression PLUS expression
+                  | expression TIMES expression
+                  | expression DIVIDE expression'''
+    if p[2] == '+':
+        p[0] = p[1] + p[3]
+    elif p[2] == '*':
+        p[0] = p[1] * p[3]
+    elif p[3] == 0:
+        raise SyntaxError
+    else:
+        p[0] = p[1] // p[3]
+
+def p_expression_group(p):
+    'expression : LPAREN expression RPAREN'
+    p[0] = p[2]
+
+def p_expression_value(p):
+    '''expression : NUMBER
+                  | NAME'''
+    p[0] = p[1] if isinstance(p[1], int) else len(p[1])
+
+def p_expression_quoted(p):
+    'expression : QUOTED'
+    inner = p.parser.parse(p[1] + ';', lexer=p.lexer.clone())
+    p[0] = inner[0] if inner else 0
+
+# Errors are recorded per thread.  A NAME right after an error is thrown
+# away with token() and errok(), as in panic mode recovery.
+current = threading.local()
+
+def p_error(p):
+    current.errors.append((p.value if p else None, parser.state, len(parser.statestack)))
+    if p and p.type == 'NAME':
+        parser.token()
+        parser.errok()
+
+before = (getattr(yacc, 'parse', None), getattr(lex, 'lexer', None))
+lexer = lex.lex(bindglobals=False)
+parser = yacc.yacc(debug=False, bindglobals=False)
+dparser = yacc.yacc(debug=False, dense=True, bindglobals=False)
+print(getattr(yacc, 'parse', None) is before[0], getattr(lex, 'lexer', None) is before[1])
+
+rand = random.Random(16)
+def expression(depth):
+    choice = rand.randrange(9 if depth < 3 else 3)
+    if choice == 0:
+        return str(rand.randrange(10))
+    if choice == 1:
+        return rand.choice(['a', 'bb', 'ccc'])
+    if choice == 2:
+        return rand.choice(['+', '*', ')', 'x 3'])      # Syntax errors
+    if choice == 3:
+        return '(%s)' % expression(depth + 1)
+    if choice == 4:
+        return '"%s"' % expression(depth + 1).replace('"', '')
+    return '%s %s %s' % (expression(depth + 1), rand.choice('+*/'), expression(depth + 1))
+
+texts = [' '.join(expression(0) + ';' for _ in range(rand.randrange(1, 6))) for _ in range(200)]
+
+def parse_all(parser, lexer, texts):
+    current.errors = []
+    results = []
+    for text in texts:
+        result = parser.parse(text, lexer=lexer)
+        results.append((result, current.errors))
+        current.errors = []
+    return results
+
+# The state is only there while parsing
+try:
+    parser.statestack
+except AttributeError as e:
+    print(e)
+
+for p in (parser, dparser):
+    expected = parse_all(p, lexer, texts)
+    results = {}
+
+    # Every thread parses all of the texts, starting at a different one
+    def work(n):
+        mylexer = lexer.clone()
+        barrier.wait()
+        for _ in range(3):
+            order = texts[n:] + texts[:n]
+            got = parse_all(p, mylexer, order)
+            results.setdefault(n, []).append(got == expected[n:] + expected[:n])
+
+    barrier = threading.Barrier(16)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    print(type(p).__name__, len(results), all(all(r) for r in results.values()),
+          sum(len(errors) for _, errors in expected) > 0)
@@ -0,0 +1,115 @@
+# -----------------------------------------------------------------------------
+# yacc_view.py
+#
+# Rule functions see the symbols of the rule through a view of the symbol
+# stack.  p[n], p[-n], len(p), p.slice, positions and error recovery must
+# give the same results for every kind of parser.
+# -----------------------------------------------------------------------------
+import os
+import sys
+import types
+import shutil
+import tempfile
+import ply.lex as lex
+import ply.yacc as yacc
+
+tokens = ('NAME', 'NUMBER', 'PLUS', 'SEMI')
+
+t_PLUS   = r'\+'
+t_SEMI   = r';'
+t_NAME   = r'[a-z]+'
+t_ignore = ' '
+
+def t_NUMBER(t):
+    r'\d+'
+    t.value = int(t.value)
+    return t
+
+def t_newline(t):
+    r'\n+'
+    t.lexer.lineno += len(t.value)
+
+def t_error(t):
+    t.lexer.skip(1)
+
+def p_program(p):
+    '''program : program statement
+               | statement'''
+    p[0] = p[1] + [p[2]] if len(p) == 3 else [p[1]]
+
+def p_statement(p):
+    'statement : NAME seen_name sum SEMI'
+    p[0] = (p[1], p[2], p[3], p.lineno(1), p.linespan(3), [s.type for s in p.slice])
+
+def p_statement_error(p):
+    'statement : error SEMI'
+    p[0] = ('error', p.lineno(2))
+
+def p_seen_name(p):
+    'seen_name :'
+    # The symbol to the left of the empty rule
+    p[0] = (p[-1], len(p))
+
+def p_sum(p):
+    '''sum : sum PLUS NUMBER
+           | NUMBER'''
+    if len(p) == 4:
+        # The symbols of the rule are on top of the stack while it runs
+        assert [s.value for s in p.stack[-3:]] == [p[1], '+', p[3]]
+        p[0] = p[1] + p[3]
+    else:
+        p[0] = p[1]
+
+def p_error(p):
+    print('Syntax error at %r' % (p.value if p else 'EOF'))
+
+lexer = lex.lex()
+text = 'a 1 + 2;\nb 3 +\n4 + 5;\n6 +;\nc 4;'
+
+def run(parser, text=text, **kwargs):
+    lexer.lineno = 1
+    return parser.parse(text, lexer=lexer, **kwargs)
+
+parser = yacc.yacc(debug=False)
+for result in run(parser, tracking=True):
+    print(result)
+
+results = [run(parser), run(parser, tracking=True)]
+dparser = yacc.yacc(debug=False, dense=True)
+print([run(dparser), run(dparser, tracking=True)] == results)
+
+# The GLR parser has no error recovery, so it can't be made for a grammar
+# with error rules.  Without the error rule, it stops at the error.
+try:
+    yacc.yacc(debug=False, glr=True)
+except yacc.YaccError as e:
+    print(str(e).split(': ', 1)[1])
+rules = dict((k, v) for k, v in globals().items() if k != 'p_statement_error')
+gparser = yacc.yacc(module=types.SimpleNamespace(**rules), debug=False, glr=True)
+good = text.replace('6 +;', '')
+print(run(gparser, tracking=True), run(gparser, good, tracking=True) == run(parser, good, tracking=True))
+
+push = parser.push(lexer=lexer)
+lexer.lineno = 1
+lexer.input(text)
+push.feed_many(lexer)
+print(push.end() == results[0])
+
+tmpdir = tempfile.mkdtemp()
+sys.path.insert(0, tmpdir)
+try:
+    yacc.write_parser(parser, os.path.join(tmpdir, 'parser_view.py'))
+    wparser = yacc.load_parser('parser_view', module=sys.modules[__name__])
+    print([run(wparser), run(wparser, tracking=True)] == results)
+finally:
+    sys.path.remove(tmpdir)
+    sys.modules.pop('parser_view', None)
+    shutil.rmtree(tmpdir)
+
+# A production can still be made from a list
+syms = [yacc.YaccSymbol() for _ in range(3)]
+for sym, value in zip(syms, 'xyz'):
+    sym.value = value
+p = yacc.YaccProduction(syms)
+p[0] = 'w'
+print(len(p), p[0], p[2], p[1:], p.slice == syms)